@@ -23,6 +23,7 @@ import app_settings_cache
 from config import *
 from semantic_kernel import Kernel
 from semantic_kernel_loader import initialize_semantic_kernel
+from semantic_kernel_pool import KERNEL_POOL_LEASE_ATTRIBUTE, release_pooled_kernel
 
 #from azure.monitor.opentelemetry import configure_azure_monitor
 
@@ -137,7 +138,7 @@ register_route_backend_tts(app)
 from swagger_wrapper import register_swagger_routes
 register_swagger_routes(app)
 
-from flask import g
+from flask import g, abort, make_response
 from flask_session import Session
 from redis import Redis
 from functions_settings import get_settings
@@ -700,6 +701,20 @@ def enforce_idle_session_timeout():
     session.modified = True
     return None
 
+@app.teardown_request
+def release_request_kernel(exception=None):
+    """Return a per-user kernel leased by the SK loader to this worker's kernel pool."""
+    lease = g.pop(KERNEL_POOL_LEASE_ATTRIBUTE, None)
+    if not lease:
+        return
+    if exception is not None:
+        # Chat routes mark their own failures; this covers errors that escape a route
+        lease['poisoned'] = True
+    try:
+        release_pooled_kernel(lease, get_settings())
+    except Exception as e:
+        log_event(f"[SK Pool] Failed to return kernel to pool: {e}", level=logging.WARNING)
+
 @app.after_request
 def add_security_headers(response):
     """
@@ -774,6 +789,28 @@ def robots():
 def favicon():
     return send_from_directory('static', 'favicon.ico')
 
+@app.route('/settings-assets/<asset_name>')
+@swagger_route(security=get_auth_security())
+def serve_settings_asset(asset_name):
+    """Serve a custom logo or favicon stored outside the app settings document."""
+    from functions_settings_assets import SETTINGS_ASSETS, resolve_settings_asset
+    if asset_name not in SETTINGS_ASSETS:
+        abort(404)
+
+    asset = resolve_settings_asset(get_settings(), asset_name)
+    if asset is None:
+        abort(404)
+
+    response = make_response(asset['content'])
+    response.headers['Content-Type'] = asset['content_type']
+    response.set_etag(asset['sha256'])
+    if request.args.get('v') == asset['sha256']:
+        # Content-addressed URL: a new upload changes the hash and therefore the URL
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'public, max-age=300'
+    return response.make_conditional(request)
+
 @app.route('/static/js/<path:filename>')
 @swagger_route(security=get_auth_security())
 def serve_js_modules(filename):
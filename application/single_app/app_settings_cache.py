@@ -6,6 +6,8 @@ This supports the dynamic selection of redis or in-memory caching of settings.
 """
 import json
 import logging
+import os
+import tempfile
 import threading
 import time
 from redis import Redis
@@ -17,10 +19,16 @@ from azure.identity import DefaultAzureCredential
 
 _settings = None
 APP_SETTINGS_CACHE = {}
+APP_SETTINGS_CACHE_VERSION = 0
+APP_SETTINGS_VERSION_KEY = 'APP_SETTINGS_CACHE_VERSION'
+SHARED_SETTINGS_CACHE_FILENAME = 'app_settings_cache.json'
+SHARED_CACHE_VERSION_KEY_PREFIX = 'SHARED_CACHE_VERSION:'
+SHARED_CACHE_VERSION_DIRNAME = 'cache_versions'
 APP_STREAM_SESSION_METADATA = {}
 APP_STREAM_SESSION_EVENTS = {}
 update_settings_cache = None
 get_settings_cache = None
+get_settings_cache_version = None
 initialize_stream_session_cache = None
 set_stream_session_meta = None
 get_stream_session_meta = None
@@ -28,7 +36,9 @@ append_stream_session_event = None
 get_stream_session_events = None
 delete_stream_session_cache = None
 app_cache_is_using_redis = False
+_app_redis_client = None
 _app_cache_lock = threading.Lock()
+_local_cache_versions = {}
 
 
 def _get_expiration_timestamp(ttl_seconds=None):
@@ -43,17 +53,125 @@ def _is_expired(entry):
     expires_at = entry.get('expires_at')
     return expires_at is not None and expires_at <= time.time()
 
+def get_shared_settings_cache_path(settings):
+    """
+    Return the settings file shared by the worker processes in this container, or None when disabled.
+
+    The directory defaults to the system temp directory and can be moved with
+    SIMPLECHAT_SETTINGS_CACHE_DIR (for example to a tmpfs mount).
+    """
+    if not (settings or {}).get('enable_shared_settings_cache_file', True):
+        return None
+    cache_dir = os.environ.get('SIMPLECHAT_SETTINGS_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'simplechat_settings_cache')
+    return os.path.join(cache_dir, SHARED_SETTINGS_CACHE_FILENAME)
+
+
+def _read_shared_settings_version(shared_path):
+    """Return a version stamp for the shared settings file from a single stat call."""
+    try:
+        stat_result = os.stat(shared_path)
+    except OSError:
+        return None
+    # Every write replaces the file, so the inode and mtime change together
+    return f"{stat_result.st_ino}:{stat_result.st_mtime_ns}:{stat_result.st_size}"
+
+
+def _write_shared_settings(shared_path, new_settings):
+    """Atomically replace the shared settings file. The file holds secrets, so it is owner-only."""
+    cache_dir = os.path.dirname(shared_path)
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=cache_dir, prefix='.app_settings_', suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as temp_file:
+            json.dump(new_settings, temp_file)
+        os.replace(temp_path, shared_path)
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return _read_shared_settings_version(shared_path)
+
+
+def get_app_redis_client():
+    """Return the shared Redis client when the app cache is Redis-backed, otherwise None."""
+    return _app_redis_client if app_cache_is_using_redis else None
+
+
+def _get_shared_cache_version_path(name):
+    shared_settings_path = get_shared_settings_cache_path(_settings)
+    if not shared_settings_path:
+        return None
+    return os.path.join(os.path.dirname(shared_settings_path), SHARED_CACHE_VERSION_DIRNAME, name)
+
+
+def bump_shared_cache_version(name):
+    """
+    Advance a named cache version shared by every worker, so caches derived from
+    data outside the settings document (for example global agents) can be
+    invalidated everywhere.
+
+    Uses Redis INCR when the app cache is Redis-backed. Otherwise a marker file is
+    replaced in the shared settings cache directory, which reaches the other
+    workers in the container.
+    """
+    from functions_appinsights import log_event
+    with _app_cache_lock:
+        _local_cache_versions[name] = _local_cache_versions.get(name, 0) + 1
+
+    redis_client = get_app_redis_client()
+    if redis_client is not None:
+        try:
+            redis_client.incr(f"{SHARED_CACHE_VERSION_KEY_PREFIX}{name}")
+        except Exception as redis_error:
+            log_event(f"[ASC] Failed to bump shared cache version {name}: {redis_error}", level=logging.WARNING)
+        return
+
+    version_path = _get_shared_cache_version_path(name)
+    if not version_path:
+        return
+    try:
+        version_dir = os.path.dirname(version_path)
+        os.makedirs(version_dir, mode=0o700, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=version_dir, prefix=f'.{name}_', suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as temp_file:
+            temp_file.write(f"{os.getpid()}:{time.time_ns()}")
+        os.replace(temp_path, version_path)
+    except OSError as shared_error:
+        log_event(f"[ASC] Failed to write shared cache version {name}: {shared_error}", level=logging.WARNING)
+
+
+def get_shared_cache_version(name):
+    """Return the current value of a named cache version; it changes after every bump_shared_cache_version(name)."""
+    local_version = _local_cache_versions.get(name, 0)
+    redis_client = get_app_redis_client()
+    if redis_client is not None:
+        try:
+            shared_version = redis_client.get(f"{SHARED_CACHE_VERSION_KEY_PREFIX}{name}")
+        except Exception:
+            # An unreadable version must not look unchanged
+            return f"{local_version}:unavailable:{time.time_ns()}"
+        if isinstance(shared_version, bytes):
+            shared_version = shared_version.decode('utf-8')
+        return f"{local_version}:{shared_version or 0}"
+
+    version_path = _get_shared_cache_version_path(name)
+    shared_version = _read_shared_settings_version(version_path) if version_path else None
+    return f"{local_version}:{shared_version}"
+
 def configure_app_cache(settings, redis_cache_endpoint=None):
-    global _settings, update_settings_cache, get_settings_cache, APP_SETTINGS_CACHE
+    global _settings, update_settings_cache, get_settings_cache, get_settings_cache_version, APP_SETTINGS_CACHE
     global APP_STREAM_SESSION_METADATA, APP_STREAM_SESSION_EVENTS
     global initialize_stream_session_cache, set_stream_session_meta, get_stream_session_meta
     global append_stream_session_event, get_stream_session_events, delete_stream_session_cache
-    global app_cache_is_using_redis
+    global app_cache_is_using_redis, _app_redis_client
     # Local import to avoid circular dependency: functions_keyvault imports app_settings_cache.
     from functions_appinsights import log_event
     _settings = settings
     use_redis = _settings.get('enable_redis_cache', False)
     app_cache_is_using_redis = False
+    _app_redis_client = None
 
     if use_redis:
         app_cache_is_using_redis = True
@@ -105,13 +223,23 @@ def configure_app_cache(settings, redis_cache_endpoint=None):
                 ssl=True
             )
 
+        _app_redis_client = redis_client
+
         def update_settings_cache_redis(new_settings):
-            redis_client.set('APP_SETTINGS_CACHE', json.dumps(new_settings))
+            # Bump the version in the same round trip so workers can detect the change with a small GET
+            pipeline = redis_client.pipeline()
+            pipeline.set('APP_SETTINGS_CACHE', json.dumps(new_settings))
+            pipeline.incr(APP_SETTINGS_VERSION_KEY)
+            pipeline.execute()
 
         def get_settings_cache_redis():
             cached = redis_client.get('APP_SETTINGS_CACHE')
             return json.loads(cached) if cached else {}
 
+        def get_settings_cache_version_redis():
+            cached_version = redis_client.get(APP_SETTINGS_VERSION_KEY)
+            return int(cached_version) if cached_version else 0
+
         def get_stream_session_metadata_key(cache_key):
             return f'STREAM_SESSION_META:{cache_key}'
 
@@ -176,6 +304,7 @@ def configure_app_cache(settings, redis_cache_endpoint=None):
 
         update_settings_cache = update_settings_cache_redis
         get_settings_cache = get_settings_cache_redis
+        get_settings_cache_version = get_settings_cache_version_redis
         initialize_stream_session_cache = initialize_stream_session_cache_redis
         set_stream_session_meta = set_stream_session_meta_redis
         get_stream_session_meta = get_stream_session_meta_redis
@@ -184,13 +313,50 @@ def configure_app_cache(settings, redis_cache_endpoint=None):
         delete_stream_session_cache = delete_stream_session_cache_redis
 
     else:
+        # Gunicorn workers do not share memory, so settings are also published to a file in the
+        # container. Workers compare a stat-based version stamp and reload only when it changed.
+        shared_settings_path = get_shared_settings_cache_path(settings)
+        shared_settings_state = {'version': None}
+
+        def _reload_shared_settings():
+            global APP_SETTINGS_CACHE, APP_SETTINGS_CACHE_VERSION
+            shared_version = _read_shared_settings_version(shared_settings_path)
+            if shared_version is None or shared_version == shared_settings_state['version']:
+                return
+            try:
+                with open(shared_settings_path, 'r', encoding='utf-8') as shared_file:
+                    shared_settings = json.load(shared_file)
+            except (OSError, ValueError) as shared_error:
+                log_event(f"[ASC] Failed to read shared settings cache file: {shared_error}", level=logging.WARNING)
+                return
+            with _app_cache_lock:
+                APP_SETTINGS_CACHE = shared_settings
+                APP_SETTINGS_CACHE_VERSION += 1
+                shared_settings_state['version'] = shared_version
+
         def update_settings_cache_mem(new_settings):
-            global APP_SETTINGS_CACHE
-            APP_SETTINGS_CACHE = new_settings
+            global APP_SETTINGS_CACHE, APP_SETTINGS_CACHE_VERSION
+            with _app_cache_lock:
+                APP_SETTINGS_CACHE = new_settings
+                APP_SETTINGS_CACHE_VERSION += 1
+                if shared_settings_path:
+                    try:
+                        shared_settings_state['version'] = _write_shared_settings(shared_settings_path, new_settings)
+                    except Exception as shared_error:
+                        log_event(f"[ASC] Failed to write shared settings cache file: {shared_error}", level=logging.WARNING)
 
         def get_settings_cache_mem():
+            if shared_settings_path:
+                _reload_shared_settings()
             return APP_SETTINGS_CACHE
 
+        def get_settings_cache_version_mem():
+            if shared_settings_path:
+                shared_version = _read_shared_settings_version(shared_settings_path)
+                if shared_version is not None:
+                    return shared_version
+            return APP_SETTINGS_CACHE_VERSION
+
         def initialize_stream_session_cache_mem(cache_key, metadata, ttl_seconds=None):
             expiration_timestamp = _get_expiration_timestamp(ttl_seconds)
             with _app_cache_lock:
@@ -260,6 +426,7 @@ def configure_app_cache(settings, redis_cache_endpoint=None):
 
         update_settings_cache = update_settings_cache_mem
         get_settings_cache = get_settings_cache_mem
+        get_settings_cache_version = get_settings_cache_version_mem
         initialize_stream_session_cache = initialize_stream_session_cache_mem
         set_stream_session_meta = set_stream_session_meta_mem
         get_stream_session_meta = get_stream_session_meta_mem
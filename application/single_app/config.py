@@ -94,7 +94,7 @@ load_dotenv()
 EXECUTOR_TYPE = 'thread'
 EXECUTOR_MAX_WORKERS = 30
 SESSION_TYPE = 'filesystem'
-VERSION = "0.241.006"
+VERSION = "0.241.031"
 
 SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 
@@ -197,6 +197,7 @@ IDLE_TIMEOUT_EXEMPT_PATHS = {
 
 IDLE_TIMEOUT_EXEMPT_PREFIXES = (
     '/static/',
+    '/settings-assets/',
     '/health',
     '/api/health'
 )
@@ -464,6 +465,9 @@ cosmos_search_cache_container = cosmos_database.create_container_if_not_exists(
     partition_key=PartitionKey(path="/user_id")
 )
 
+# Created on first use by utils_embedding_cache when the Cosmos DB persistent tier is selected
+cosmos_embedding_cache_container_name = "embedding_cache"
+
 cosmos_activity_logs_container_name = "activity_logs"
 cosmos_activity_logs_container = cosmos_database.create_container_if_not_exists(
     id=cosmos_activity_logs_container_name,
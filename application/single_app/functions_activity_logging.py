@@ -11,6 +11,7 @@ from typing import Optional, Dict, Any
 from functions_appinsights import log_event
 from functions_debug import debug_print
 from config import cosmos_activity_logs_container
+from utils_log_writer import enqueue_log_item
 
 
 def _get_email_domain(email: str) -> str:
@@ -171,7 +172,7 @@ def log_admin_feedback_email_submission(
             'feedback_submission': feedback_metadata,
         }
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
 
         log_event(
             message='[Admin Feedback] Mailto draft prepared',
@@ -236,7 +237,7 @@ def log_user_support_feedback_email_submission(
             'feedback_submission': feedback_metadata,
         }
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
 
         log_event(
             message='[Support Feedback] Mailto draft prepared',
@@ -308,7 +309,7 @@ def log_admin_release_notifications_registration(
             'release_notifications_registration': registration_metadata,
         }
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
 
         log_event(
             message='[Admin Release Notifications] Mailto registration prepared',
@@ -370,7 +371,7 @@ def log_web_search_consent_acceptance(
             'description': consent_text
         }
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
 
         log_event(
             message=consent_text,
@@ -424,7 +425,7 @@ def log_index_auto_fix(
         if admin_email:
             activity_record['admin_email'] = admin_email
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
 
         log_event(
             message=f"Auto-fixed {index_type} index: added {len(missing_fields)} field(s)",
@@ -587,7 +588,7 @@ def log_document_creation_transaction(
             activity_record['additional_metadata'] = additional_metadata
             
         # Save to activity_logs container for permanent record
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         
         # Also log to Application Insights for monitoring
         log_event(
@@ -674,7 +675,7 @@ def log_document_deletion_transaction(
             activity_record['deleted_document_metadata'] = document_metadata
             
         # Save to activity_logs container for permanent record
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         
         # Also log to Application Insights for monitoring
         log_event(
@@ -758,7 +759,7 @@ def log_document_metadata_update_transaction(
             activity_record['additional_metadata'] = additional_metadata
             
         # Save to activity_logs container for permanent record
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         
         # Also log to Application Insights for monitoring
         log_event(
@@ -865,7 +866,7 @@ def log_token_usage(
             activity_record['additional_context'] = additional_context
             
         # Save to activity_logs container
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         
         # Also log to Application Insights for monitoring
         log_event(
@@ -943,7 +944,7 @@ def log_conversation_creation(
             activity_log['additional_context'] = additional_context
         
         # Save to activity logs container
-        cosmos_activity_logs_container.upsert_item(activity_log)
+        enqueue_log_item(cosmos_activity_logs_container, activity_log, partition_key_path="user_id", operation="upsert")
         
         debug_print(f"✅ Logged conversation creation: {conversation_id}")
         
@@ -1022,7 +1023,7 @@ def log_conversation_deletion(
             activity_log['additional_context'] = additional_context
         
         # Save to activity logs container
-        cosmos_activity_logs_container.upsert_item(activity_log)
+        enqueue_log_item(cosmos_activity_logs_container, activity_log, partition_key_path="user_id", operation="upsert")
         
         debug_print(f"✅ Logged conversation deletion: {conversation_id} (archived: {is_archived}, bulk: {is_bulk_operation})")
         
@@ -1093,7 +1094,7 @@ def log_conversation_archival(
             activity_log['additional_context'] = additional_context
         
         # Save to activity logs container
-        cosmos_activity_logs_container.upsert_item(activity_log)
+        enqueue_log_item(cosmos_activity_logs_container, activity_log, partition_key_path="user_id", operation="upsert")
         
         debug_print(f"✅ Logged conversation archival: {conversation_id}")
         
@@ -1140,7 +1141,7 @@ def log_user_login(
         }
         
         # Save to activity_logs container
-        cosmos_activity_logs_container.create_item(body=login_activity)
+        enqueue_log_item(cosmos_activity_logs_container, login_activity, partition_key_path="user_id")
         
         # Also log to Application Insights for monitoring
         log_event(
@@ -1219,7 +1220,7 @@ def log_group_status_change(
             status_change_activity['status_change']['reason'] = reason
         
         # Save to activity_logs container for permanent audit trail
-        cosmos_activity_logs_container.create_item(body=status_change_activity)
+        enqueue_log_item(cosmos_activity_logs_container, status_change_activity, partition_key_path="user_id")
         
         # Also log to Application Insights for monitoring
         log_event(
@@ -1302,7 +1303,7 @@ def log_group_member_deleted(
         }
         
         # Save to activity_logs container for permanent record
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         
         # Also log to Application Insights for monitoring
         log_event(
@@ -1383,7 +1384,7 @@ def log_public_workspace_status_change(
             status_change_activity['status_change']['reason'] = reason
         
         # Save to activity_logs container for permanent audit trail
-        cosmos_activity_logs_container.create_item(body=status_change_activity)
+        enqueue_log_item(cosmos_activity_logs_container, status_change_activity, partition_key_path="user_id")
         
         # Also log to Application Insights for monitoring
         log_event(
@@ -1449,7 +1450,7 @@ def log_user_agreement_accepted(
             'action_context': action_context
         }
         
-        # Save to activity_logs container
+        # Written synchronously: has_user_accepted_agreement_today reads it back on the next request
         cosmos_activity_logs_container.create_item(body=acceptance_record)
         
         # Also log to Application Insights for monitoring
@@ -1591,7 +1592,7 @@ def log_retention_policy_force_push(
         }
         
         # Save to activity_logs container for permanent audit trail
-        cosmos_activity_logs_container.create_item(body=force_push_activity)
+        enqueue_log_item(cosmos_activity_logs_container, force_push_activity, partition_key_path="user_id")
         
         # Also log to Application Insights for monitoring
         log_event(
@@ -1657,7 +1658,7 @@ def log_general_admin_action(
         if additional_context:
             activity_record['additional_context'] = additional_context
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
 
         log_event(
             message=f"Admin action logged: {action} by {admin_email}",
@@ -1720,7 +1721,7 @@ def log_agent_creation(
         if scope == 'group' and group_id:
             activity_record['workspace_context']['group_id'] = group_id
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         log_event(
             message=f"Agent created: {agent_name} ({scope}) by user {user_id}",
             extra=activity_record,
@@ -1775,7 +1776,7 @@ def log_agent_update(
         if scope == 'group' and group_id:
             activity_record['workspace_context']['group_id'] = group_id
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         log_event(
             message=f"Agent updated: {agent_name} ({scope}) by user {user_id}",
             extra=activity_record,
@@ -1827,7 +1828,7 @@ def log_agent_deletion(
         if scope == 'group' and group_id:
             activity_record['workspace_context']['group_id'] = group_id
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         log_event(
             message=f"Agent deleted: {agent_name} ({scope}) by user {user_id}",
             extra=activity_record,
@@ -1882,7 +1883,7 @@ def log_action_creation(
         if scope == 'group' and group_id:
             activity_record['workspace_context']['group_id'] = group_id
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         log_event(
             message=f"Action created: {action_name} ({scope}) by user {user_id}",
             extra=activity_record,
@@ -1937,7 +1938,7 @@ def log_action_update(
         if scope == 'group' and group_id:
             activity_record['workspace_context']['group_id'] = group_id
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         log_event(
             message=f"Action updated: {action_name} ({scope}) by user {user_id}",
             extra=activity_record,
@@ -1992,7 +1993,7 @@ def log_action_deletion(
         if scope == 'group' and group_id:
             activity_record['workspace_context']['group_id'] = group_id
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         log_event(
             message=f"Action deleted: {action_name} ({scope}) by user {user_id}",
             extra=activity_record,
@@ -2069,7 +2070,7 @@ def _log_agent_template_activity(
         if review_notes:
             activity_record['review_notes'] = review_notes
 
-        cosmos_activity_logs_container.create_item(body=activity_record)
+        enqueue_log_item(cosmos_activity_logs_container, activity_record, partition_key_path="user_id")
         log_event(
             message=f"Agent template {operation}: {template_name} ({scope}) by user {user_id}",
             extra=activity_record,
@@ -3,6 +3,9 @@
 from config import *
 from functions_settings import *
 from functions_debug import debug_print
+import copy
+import hashlib
+from collections import OrderedDict
 
 # Default redirect path for OAuth consent flow (must match your Azure AD app registration)
 REDIRECT_PATH = getattr(globals(), 'REDIRECT_PATH', '/getAToken')
@@ -457,46 +460,165 @@ def get_video_indexer_managed_identity_token(settings, video_id=None):
 
 
 JWKS_CACHE = {}
+JWKS_REFRESH_SECONDS = 24 * 60 * 60
+JWKS_MIN_REFRESH_SECONDS = 5 * 60
+
+# Pre-parsed public keys by kid, built once per JWKS fetch instead of per request
+_signing_key_cache = {
+    "keys": {},
+    "next_refresh_at": 0.0,
+    "last_attempt_at": 0.0,
+}
+_signing_key_lock = threading.Lock()
+
+# sha256(token) -> (exp, kid, claims) for bearer tokens that already passed validation
+_validated_token_cache = OrderedDict()
+_validated_token_cache_lock = threading.Lock()
+_bearer_token_cache_stats = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "key_refreshes": 0,
+}
+
+
+def _get_bearer_token_cache_config():
+    """Return (enabled, max_entries) for the validated bearer token cache."""
+    try:
+        settings = get_settings() or {}
+    except Exception:
+        settings = {}
+    max_entries = max(int(settings.get('bearer_token_cache_max_entries', 1024) or 0), 0)
+    return bool(settings.get('enable_bearer_token_cache', True)) and max_entries > 0, max_entries
+
+
+def _fetch_microsoft_entra_jwks():
+    """Fetch the JWKS from Microsoft Entra's OIDC metadata endpoint, keyed by kid."""
+    oidc_config = requests.get(OIDC_METADATA_URL, timeout=10).json()
+    jwks_response = requests.get(oidc_config["jwks_uri"], timeout=10).json()
+    return {key['kid']: key for key in jwks_response['keys'] if key.get('kid')}
+
 
-def get_microsoft_entra_jwks():
-    """Fetches the JWKS from Microsoft Entra's OIDC metadata endpoint."""
-    # Microsoft Entra OpenID Connect discovery endpoint
+def get_microsoft_entra_jwks(force_refresh=False):
+    """
+    Return the Microsoft Entra signing keys (JWKS by kid).
+
+    Keys are refetched once they are older than JWKS_REFRESH_SECONDS, or on
+    force_refresh when a token names an unknown kid after key rotation. Fetches
+    are throttled to one per JWKS_MIN_REFRESH_SECONDS, so tokens with made-up
+    kids cannot hammer the metadata endpoint. When a fetch fails, the previous
+    keys stay in use.
+    """
     global JWKS_CACHE
-    global OIDC_METADATA_URL
 
-    if not JWKS_CACHE:
+    with _signing_key_lock:
+        now = time.time()
+        if JWKS_CACHE and now < _signing_key_cache["next_refresh_at"] and not force_refresh:
+            return JWKS_CACHE
+        if JWKS_CACHE and now - _signing_key_cache["last_attempt_at"] < JWKS_MIN_REFRESH_SECONDS:
+            return JWKS_CACHE
+
+        _signing_key_cache["last_attempt_at"] = now
         try:
-            # Fetch OIDC configuration
-            oidc_config = requests.get(OIDC_METADATA_URL).json()
-            jwks_uri = oidc_config["jwks_uri"]
-
-            # Fetch JWKS
-            jwks_response = requests.get(jwks_uri).json()
-            JWKS_CACHE = {key['kid']: key for key in jwks_response['keys']}
-        except requests.exceptions.RequestException as e:
+            jwks = _fetch_microsoft_entra_jwks()
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
             debug_print(f"Error fetching JWKS: {e}")
-            return None
+            _signing_key_cache["next_refresh_at"] = now + JWKS_MIN_REFRESH_SECONDS
+            return JWKS_CACHE or None
+
+        public_keys = {}
+        for kid, key_data in jwks.items():
+            try:
+                public_keys[kid] = jwt.algorithms.RSAAlgorithm.from_jwk(key_data)
+            except Exception as e:
+                debug_print(f"Skipping JWKS key {kid}: {e}")
+
+        JWKS_CACHE = jwks
+        _signing_key_cache["keys"] = public_keys
+        _signing_key_cache["next_refresh_at"] = now + JWKS_REFRESH_SECONDS
+
+    with _validated_token_cache_lock:
+        _bearer_token_cache_stats["key_refreshes"] += 1
+        # Tokens signed with a key that is no longer published must be verified again
+        for token_hash in [token_hash for token_hash, entry in _validated_token_cache.items() if entry[1] not in public_keys]:
+            del _validated_token_cache[token_hash]
     return JWKS_CACHE
 
+
+def _get_signing_key(kid):
+    """Return the parsed public key for kid, refreshing the JWKS once if the kid is unknown."""
+    public_key = _signing_key_cache["keys"].get(kid)
+    if public_key is None:
+        get_microsoft_entra_jwks(force_refresh=True)
+        public_key = _signing_key_cache["keys"].get(kid)
+    return public_key
+
+
+def _read_validated_token(token_hash):
+    """Return a copy of the claims of a previously validated, unexpired token, or None."""
+    enabled, _ = _get_bearer_token_cache_config()
+    if not enabled:
+        return None
+
+    with _validated_token_cache_lock:
+        entry = _validated_token_cache.get(token_hash)
+        if entry is None or time.time() >= entry[0]:
+            _validated_token_cache.pop(token_hash, None)
+            _bearer_token_cache_stats["misses"] += 1
+            return None
+        _validated_token_cache.move_to_end(token_hash)
+        _bearer_token_cache_stats["hits"] += 1
+        claims = entry[2]
+    return copy.deepcopy(claims)
+
+
+def _store_validated_token(token_hash, kid, claims):
+    """Remember a validated token until its exp claim."""
+    enabled, max_entries = _get_bearer_token_cache_config()
+    expires_at = claims.get("exp") if isinstance(claims, dict) else None
+    if not enabled or not isinstance(expires_at, (int, float)):
+        return
+
+    with _validated_token_cache_lock:
+        _validated_token_cache[token_hash] = (float(expires_at), kid, copy.deepcopy(claims))
+        _validated_token_cache.move_to_end(token_hash)
+        while len(_validated_token_cache) > max_entries:
+            _validated_token_cache.popitem(last=False)
+            _bearer_token_cache_stats["evictions"] += 1
+
+
+def get_bearer_token_cache_stats():
+    """Return this worker's bearer token cache counters."""
+    with _validated_token_cache_lock:
+        stats = dict(_bearer_token_cache_stats)
+        stats["entries"] = len(_validated_token_cache)
+    stats["signing_keys"] = len(_signing_key_cache["keys"])
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
 def validate_bearer_token(token):
     """Validates a Microsoft Entra bearer token."""
     global CLIENT_ID, TENANT_ID, AUTHORITY
-    try:
-        jwks = get_microsoft_entra_jwks()
-        if not jwks:
-            return False, "Failed to retrieve signing keys."
+    token_hash = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    cached_claims = _read_validated_token(token_hash)
+    if cached_claims is not None:
+        return True, cached_claims
 
+    try:
         # Decode header to get 'kid' (key ID)
         header = jwt.get_unverified_header(token)
         kid = header.get("kid")
-
-        if not kid or kid not in jwks:
+        if not kid:
             return False, "Invalid or missing key ID."
 
-        key_data = jwks[kid]
+        if not get_microsoft_entra_jwks():
+            return False, "Failed to retrieve signing keys."
 
-        # Construct public key from JWK
-        public_key = jwt.algorithms.RSAAlgorithm.from_jwk(key_data)
+        public_key = _get_signing_key(kid)
+        if public_key is None:
+            return False, "Invalid or missing key ID."
 
         # Validate the token
         decoded_token = jwt.decode(
@@ -513,6 +635,7 @@ def validate_bearer_token(token):
                 "verify_aud": True, # TODO: THIS NEEDS TO BE FIXED TO VERIFY AUDIENCE.
             }
         )
+        _store_validated_token(token_hash, kid, decoded_token)
         return True, decoded_token
     except jwt.exceptions.ExpiredSignatureError:
         return False, "Token has expired."
@@ -1022,12 +1145,14 @@ def get_graph_endpoint(path=""):
 
     return f"{base_url}{path}"
 
-def get_user_profile_image():
+def get_user_profile_image(access_token=None):
     """
     Fetches the user's profile image from Microsoft Graph and returns it as base64.
     Returns None if no image is found or if there's an error.
+
+    Pass access_token when running outside the user's request (e.g. the login sync job).
     """
-    token = get_valid_access_token()
+    token = access_token or get_valid_access_token()
     if not token:
         debug_print("get_user_profile_image: Could not acquire access token")
         return None
@@ -1,7 +1,11 @@
 # functions_content.py
 
 import email.utils
+import hashlib
+import math
 import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import zipfile
 from xml.etree import ElementTree
 
@@ -11,6 +15,7 @@ from functions_debug import debug_print
 from config import *
 from functions_settings import *
 from functions_logging import *
+from utils_embedding_cache import get_cached_embeddings, cache_embeddings
 
 def extract_text_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -786,6 +791,183 @@ def _get_rate_limit_wait_time(rate_limit_error, fallback_delay):
 
     return fallback_delay * random.uniform(1.0, 1.5)
 
+class EmbeddingRateLimiter:
+    """Token bucket shared by every caller of one pooled embedding client.
+
+    Tokens refill at ``requests_per_second`` up to ``burst``. A caller that
+    finds the bucket empty reserves the next token and sleeps once for it, so
+    concurrent callers are spaced out instead of all retrying together. A 429
+    pauses the whole bucket for the wait time from ``_get_rate_limit_wait_time``.
+    """
+
+    def __init__(self, requests_per_second, burst):
+        self._lock = threading.Lock()
+        self.requests_per_second = 0
+        self.burst = 1
+        self.configure(requests_per_second, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.time()
+        self._paused_until = 0.0
+
+    def configure(self, requests_per_second, burst):
+        with self._lock:
+            self.requests_per_second = max(float(requests_per_second or 0), 0.0)
+            self.burst = max(int(burst or 1), 1)
+
+    def _refill(self, now):
+        elapsed = max(now - self._updated_at, 0.0)
+        self._updated_at = now
+        if self.requests_per_second > 0:
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self.requests_per_second)
+
+    def acquire(self):
+        """Take one token, sleeping when the bucket is empty or paused. Returns the wait in seconds."""
+        with self._lock:
+            now = time.time()
+            wait_time = max(self._paused_until - now, 0.0)
+            if self.requests_per_second > 0:
+                self._refill(now)
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait_time = max(wait_time, -self._tokens / self.requests_per_second)
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    def pause(self, wait_time):
+        """Hold back every caller of this bucket after a rate limit response."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.time() + max(float(wait_time or 0), 0.0))
+
+
+_embedding_client_registry = {}
+_embedding_client_registry_lock = threading.Lock()
+_embedding_credential = None
+_embedding_token_provider = None
+
+
+def _get_embedding_token_provider():
+    """Return the process-wide managed identity token provider for embeddings."""
+    global _embedding_credential, _embedding_token_provider
+
+    if _embedding_token_provider is None:
+        with _embedding_client_registry_lock:
+            if _embedding_token_provider is None:
+                _embedding_credential = DefaultAzureCredential()
+                _embedding_token_provider = get_bearer_token_provider(_embedding_credential, cognitive_services_scope)
+    return _embedding_token_provider
+
+
+def _get_embedding_client_config(settings):
+    """Resolve endpoint, auth type, deployment and credentials from settings."""
+    if settings.get('enable_embedding_apim', False):
+        return {
+            'endpoint': settings.get('azure_apim_embedding_endpoint'),
+            'auth_type': 'apim',
+            'deployment': settings.get('azure_apim_embedding_deployment'),
+            'api_version': settings.get('azure_apim_embedding_api_version'),
+            'api_key': settings.get('azure_apim_embedding_subscription_key'),
+        }
+
+    embedding_model = None
+    embedding_model_obj = settings.get('embedding_model', {})
+    if embedding_model_obj and embedding_model_obj.get('selected'):
+        selected_embedding_model = embedding_model_obj['selected'][0]
+        embedding_model = selected_embedding_model['deploymentName']
+
+    if settings.get('azure_openai_embedding_authentication_type') == 'managed_identity':
+        auth_type = 'managed_identity'
+        api_key = None
+    else:
+        auth_type = 'key'
+        api_key = settings.get('azure_openai_embedding_key')
+
+    return {
+        'endpoint': settings.get('azure_openai_embedding_endpoint'),
+        'auth_type': auth_type,
+        'deployment': embedding_model,
+        'api_version': settings.get('azure_openai_embedding_api_version'),
+        'api_key': api_key,
+    }
+
+
+def get_embedding_client(settings=None):
+    """Return a pooled ``(client, deployment, limiter)`` for the configured embedding model.
+
+    Clients are reused per (endpoint, auth type, deployment) so their HTTP
+    connection pool and, for managed identity, the cached credential survive
+    across calls. A client is rebuilt when its API version or key changes.
+    """
+    if settings is None:
+        settings = get_settings()
+
+    client_config = _get_embedding_client_config(settings)
+    registry_key = (client_config['endpoint'], client_config['auth_type'], client_config['deployment'])
+    signature = (
+        client_config['api_version'],
+        hashlib.sha256(str(client_config['api_key'] or '').encode('utf-8')).hexdigest(),
+    )
+    requests_per_second = settings.get('embedding_rate_limit_requests_per_second', 10)
+    burst = settings.get('embedding_rate_limit_burst', 10)
+
+    with _embedding_client_registry_lock:
+        entry = _embedding_client_registry.get(registry_key)
+    if entry is not None and entry['signature'] == signature:
+        entry['limiter'].configure(requests_per_second, burst)
+        return entry['client'], client_config['deployment'], entry['limiter']
+
+    if client_config['auth_type'] == 'managed_identity':
+        embedding_client = AzureOpenAI(
+            api_version=client_config['api_version'],
+            azure_endpoint=client_config['endpoint'],
+            azure_ad_token_provider=_get_embedding_token_provider()
+        )
+    else:
+        embedding_client = AzureOpenAI(
+            api_version=client_config['api_version'],
+            azure_endpoint=client_config['endpoint'],
+            api_key=client_config['api_key']
+        )
+
+    with _embedding_client_registry_lock:
+        entry = _embedding_client_registry.get(registry_key)
+        if entry is None or entry['signature'] != signature:
+            limiter = entry['limiter'] if entry else EmbeddingRateLimiter(requests_per_second, burst)
+            entry = {
+                'client': embedding_client,
+                'signature': signature,
+                'limiter': limiter,
+            }
+            _embedding_client_registry[registry_key] = entry
+            debug_print(
+                f"[EMBEDDING_POOL] Created embedding client for {client_config['auth_type']} "
+                f"deployment {client_config['deployment']}"
+            )
+
+    return entry['client'], client_config['deployment'], entry['limiter']
+
+
+def clear_embedding_client_registry():
+    """Drop every pooled embedding client and the cached managed identity credential."""
+    global _embedding_credential, _embedding_token_provider
+
+    with _embedding_client_registry_lock:
+        _embedding_client_registry.clear()
+        _embedding_credential = None
+        _embedding_token_provider = None
+
+
+def _get_cached_embedding_token_usage(embedding_model):
+    """Token usage reported for an embedding served from the embedding cache."""
+    return {
+        'prompt_tokens': 0,
+        'total_tokens': 0,
+        'model_deployment_name': embedding_model,
+        'cached': True
+    }
+
+
 def generate_embedding(
     text,
     max_retries=5,
@@ -797,43 +979,14 @@ def generate_embedding(
     retries = 0
     current_delay = initial_delay
 
-    enable_embedding_apim = settings.get('enable_embedding_apim', False)
+    embedding_client, embedding_model, rate_limiter = get_embedding_client(settings)
 
-    if enable_embedding_apim:
-        embedding_model = settings.get('azure_apim_embedding_deployment')
-        embedding_client = AzureOpenAI(
-            api_version = settings.get('azure_apim_embedding_api_version'),
-            azure_endpoint = settings.get('azure_apim_embedding_endpoint'),
-            api_key=settings.get('azure_apim_embedding_subscription_key'))
-    else:
-        if (settings.get('azure_openai_embedding_authentication_type') == 'managed_identity'):
-            token_provider = get_bearer_token_provider(DefaultAzureCredential(), cognitive_services_scope)
-            
-            embedding_client = AzureOpenAI(
-                api_version=settings.get('azure_openai_embedding_api_version'),
-                azure_endpoint=settings.get('azure_openai_embedding_endpoint'),
-                azure_ad_token_provider=token_provider
-            )
-        
-            embedding_model_obj = settings.get('embedding_model', {})
-            if embedding_model_obj and embedding_model_obj.get('selected'):
-                selected_embedding_model = embedding_model_obj['selected'][0]
-                embedding_model = selected_embedding_model['deploymentName']
-        else:
-            embedding_client = AzureOpenAI(
-                api_version=settings.get('azure_openai_embedding_api_version'),
-                azure_endpoint=settings.get('azure_openai_embedding_endpoint'),
-                api_key=settings.get('azure_openai_embedding_key')
-            )
-            
-            embedding_model_obj = settings.get('embedding_model', {})
-            if embedding_model_obj and embedding_model_obj.get('selected'):
-                selected_embedding_model = embedding_model_obj['selected'][0]
-                embedding_model = selected_embedding_model['deploymentName']
+    cached_embedding = get_cached_embeddings(embedding_model, [text])[0]
+    if cached_embedding is not None:
+        return cached_embedding, _get_cached_embedding_token_usage(embedding_model)
 
     while True:
-        random_delay = random.uniform(0.05, 0.2)
-        time.sleep(random_delay)
+        rate_limiter.acquire()
 
         try:
             response = embedding_client.embeddings.create(
@@ -842,6 +995,7 @@ def generate_embedding(
             )
 
             embedding = response.data[0].embedding
+            cache_embeddings(embedding_model, [(text, embedding)])
             
             # Capture token usage for embedding tracking
             token_usage = None
@@ -864,15 +1018,161 @@ def generate_embedding(
                 f"[EMBEDDING] Rate limited, retrying in {wait_time:.2f}s "
                 f"(attempt {retries}/{max_retries})"
             )
+            rate_limiter.pause(wait_time)
             time.sleep(wait_time)
             current_delay *= delay_multiplier
 
         except Exception as e:
             raise
 
+_embedding_token_encoder = None
+_embedding_token_encoder_loaded = False
+
+
+def _get_embedding_token_encoder():
+    """Return a tiktoken encoder when the optional tiktoken package is installed."""
+    global _embedding_token_encoder, _embedding_token_encoder_loaded
+
+    if not _embedding_token_encoder_loaded:
+        _embedding_token_encoder_loaded = True
+        try:
+            import tiktoken
+            _embedding_token_encoder = tiktoken.get_encoding('cl100k_base')
+        except Exception as e:
+            debug_print(f"[EMBEDDING_BATCH] tiktoken unavailable, estimating token counts: {e}")
+            _embedding_token_encoder = None
+    return _embedding_token_encoder
+
+
+def _estimate_embedding_tokens(text):
+    """Token count of one embedding input; exact with tiktoken, ~4 characters per token otherwise."""
+    text = str(text or '')
+    encoder = _get_embedding_token_encoder()
+    if encoder is not None:
+        return max(len(encoder.encode(text)), 1)
+    return max(math.ceil(len(text) / 4), 1)
+
+
+def _pack_embedding_batches(indexes, token_counts, token_budget, max_items):
+    """Group input indexes into request batches bounded by a token budget and an item cap."""
+    batches = []
+    current_batch = []
+    current_tokens = 0
+    for index in indexes:
+        item_tokens = token_counts[index]
+        if current_batch and (len(current_batch) >= max_items or current_tokens + item_tokens > token_budget):
+            batches.append(current_batch)
+            current_batch = []
+            current_tokens = 0
+        current_batch.append(index)
+        current_tokens += item_tokens
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+
+def _apportion_token_usage(total_tokens, weights):
+    """Split a batch token total across items in proportion to their token counts.
+
+    Uses largest remainders so the per-item values always add up to the total
+    the service billed for the batch.
+    """
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        weights = [1] * len(weights)
+        weight_sum = len(weights)
+
+    shares = [total_tokens * weight / weight_sum for weight in weights]
+    apportioned = [int(share) for share in shares]
+    remainder = total_tokens - sum(apportioned)
+    by_fraction = sorted(range(len(shares)), key=lambda i: shares[i] - apportioned[i], reverse=True)
+    for i in by_fraction[:remainder]:
+        apportioned[i] += 1
+    return apportioned
+
+
+def _embed_batch(
+    embedding_client,
+    embedding_model,
+    rate_limiter,
+    batch,
+    token_counts,
+    max_retries,
+    initial_delay,
+    delay_multiplier
+):
+    """Embed one packed batch, retrying rate limits, and return (embedding, token_usage) per item."""
+    retries = 0
+    current_delay = initial_delay
+
+    while True:
+        rate_limiter.acquire()
+
+        try:
+            response = embedding_client.embeddings.create(
+                model=embedding_model,
+                input=batch
+            )
+            break
+
+        except RateLimitError as e:
+            retries += 1
+            if retries > max_retries:
+                raise
+
+            # Pausing the shared limiter backs off every in-flight batch, not just this one
+            wait_time = _get_rate_limit_wait_time(e, current_delay)
+            debug_print(
+                f"[EMBEDDING_BATCH] Rate limited, retrying in {wait_time:.2f}s "
+                f"(attempt {retries}/{max_retries})"
+            )
+            rate_limiter.pause(wait_time)
+            time.sleep(wait_time)
+            current_delay *= delay_multiplier
+
+        except Exception as e:
+            raise
+
+    response_items = sorted(response.data, key=lambda item: getattr(item, 'index', 0) or 0)
+    usage = response.usage if hasattr(response, 'usage') and response.usage else None
+    if usage:
+        prompt_tokens = _apportion_token_usage(usage.prompt_tokens, token_counts)
+        total_tokens = _apportion_token_usage(usage.total_tokens, token_counts)
+
+    batch_results = []
+    for position, item in enumerate(response_items):
+        token_usage = None
+        if usage:
+            token_usage = {
+                'prompt_tokens': prompt_tokens[position],
+                'total_tokens': total_tokens[position],
+                'model_deployment_name': embedding_model
+            }
+        batch_results.append((item.embedding, token_usage))
+    return batch_results
+
+
+def get_embedding_batch_settings(settings):
+    """Return (max_concurrency, token_budget, max_items) for batched embedding requests."""
+    return (
+        max(int(settings.get('embedding_batch_max_concurrency', 4) or 1), 1),
+        max(int(settings.get('embedding_batch_token_budget', 32000) or 1), 1),
+        max(int(settings.get('embedding_batch_max_items', 16) or 1), 1)
+    )
+
+
+# Shared pool for in-flight embedding batches. Each call is further bounded by
+# embedding_batch_max_concurrency so one large document cannot take every worker.
+EMBEDDING_BATCH_MAX_WORKERS = 16
+_embedding_batch_executor = ThreadPoolExecutor(
+    max_workers=EMBEDDING_BATCH_MAX_WORKERS,
+    thread_name_prefix="embedding-batch"
+)
+
+
 def generate_embeddings_batch(
     texts,
-    batch_size=16,
+    batch_size=None,
     max_retries=5,
     initial_delay=1.0,
     delay_multiplier=2.0
@@ -880,11 +1180,13 @@ def generate_embeddings_batch(
     """Generate embeddings for multiple texts in batches.
 
     Azure OpenAI embeddings API accepts a list of strings as input.
-    This reduces per-call overhead and delay significantly.
+    This reduces per-call overhead and delay significantly. Batches are packed
+    by token budget and up to embedding_batch_max_concurrency of them are in
+    flight at once; a 429 on any batch pauses all of them.
 
     Args:
         texts: List of text strings to embed.
-        batch_size: Number of texts per API call (default 16).
+        batch_size: Max texts per API call (default: embedding_batch_max_items setting).
         max_retries: Max retries on rate limit errors.
         initial_delay: Initial retry delay in seconds.
         delay_multiplier: Multiplier for exponential backoff.
@@ -894,81 +1196,71 @@ def generate_embeddings_batch(
     """
     settings = get_settings()
 
-    enable_embedding_apim = settings.get('enable_embedding_apim', False)
-
-    if enable_embedding_apim:
-        embedding_model = settings.get('azure_apim_embedding_deployment')
-        embedding_client = AzureOpenAI(
-            api_version=settings.get('azure_apim_embedding_api_version'),
-            azure_endpoint=settings.get('azure_apim_embedding_endpoint'),
-            api_key=settings.get('azure_apim_embedding_subscription_key'))
-    else:
-        if (settings.get('azure_openai_embedding_authentication_type') == 'managed_identity'):
-            token_provider = get_bearer_token_provider(DefaultAzureCredential(), cognitive_services_scope)
-
-            embedding_client = AzureOpenAI(
-                api_version=settings.get('azure_openai_embedding_api_version'),
-                azure_endpoint=settings.get('azure_openai_embedding_endpoint'),
-                azure_ad_token_provider=token_provider
-            )
-
-            embedding_model_obj = settings.get('embedding_model', {})
-            if embedding_model_obj and embedding_model_obj.get('selected'):
-                selected_embedding_model = embedding_model_obj['selected'][0]
-                embedding_model = selected_embedding_model['deploymentName']
+    embedding_client, embedding_model, rate_limiter = get_embedding_client(settings)
+    max_concurrency, token_budget, max_items = get_embedding_batch_settings(settings)
+    if batch_size:
+        max_items = batch_size
+
+    # Serve unchanged texts from the embedding cache and only send the misses
+    results = [None] * len(texts)
+    pending_indexes = []
+    for index, cached_embedding in enumerate(get_cached_embeddings(embedding_model, texts)):
+        if cached_embedding is None:
+            pending_indexes.append(index)
         else:
-            embedding_client = AzureOpenAI(
-                api_version=settings.get('azure_openai_embedding_api_version'),
-                azure_endpoint=settings.get('azure_openai_embedding_endpoint'),
-                api_key=settings.get('azure_openai_embedding_key')
-            )
-
-            embedding_model_obj = settings.get('embedding_model', {})
-            if embedding_model_obj and embedding_model_obj.get('selected'):
-                selected_embedding_model = embedding_model_obj['selected'][0]
-                embedding_model = selected_embedding_model['deploymentName']
+            results[index] = (cached_embedding, _get_cached_embedding_token_usage(embedding_model))
 
-    results = []
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i + batch_size]
-        retries = 0
-        current_delay = initial_delay
-
-        while True:
-            random_delay = random.uniform(0.05, 0.2)
-            time.sleep(random_delay)
+    if len(pending_indexes) < len(texts):
+        debug_print(
+            f"[EMBEDDING_BATCH] Embedding cache served {len(texts) - len(pending_indexes)}/{len(texts)} texts"
+        )
 
-            try:
-                response = embedding_client.embeddings.create(
-                    model=embedding_model,
-                    input=batch
-                )
-
-                for item in response.data:
-                    token_usage = None
-                    if hasattr(response, 'usage') and response.usage:
-                        token_usage = {
-                            'prompt_tokens': response.usage.prompt_tokens // len(batch),
-                            'total_tokens': response.usage.total_tokens // len(batch),
-                            'model_deployment_name': embedding_model
-                        }
-                    results.append((item.embedding, token_usage))
-                break
+    token_counts = {index: _estimate_embedding_tokens(texts[index]) for index in pending_indexes}
+    batches = _pack_embedding_batches(pending_indexes, token_counts, token_budget, max_items)
+
+    def embed_and_cache(batch_indexes):
+        batch_results = _embed_batch(
+            embedding_client,
+            embedding_model,
+            rate_limiter,
+            [texts[index] for index in batch_indexes],
+            [token_counts[index] for index in batch_indexes],
+            max_retries,
+            initial_delay,
+            delay_multiplier
+        )
+        cache_embeddings(
+            embedding_model,
+            [(texts[index], embedding) for index, (embedding, _) in zip(batch_indexes, batch_results)]
+        )
+        return batch_results
 
-            except RateLimitError as e:
-                retries += 1
-                if retries > max_retries:
-                    raise
+    def store(batch_indexes, batch_results):
+        for index, batch_result in zip(batch_indexes, batch_results):
+            results[index] = batch_result
 
-                wait_time = _get_rate_limit_wait_time(e, current_delay)
-                debug_print(
-                    f"[EMBEDDING_BATCH] Rate limited, retrying in {wait_time:.2f}s "
-                    f"(attempt {retries}/{max_retries})"
-                )
-                time.sleep(wait_time)
-                current_delay *= delay_multiplier
+    if max_concurrency <= 1 or len(batches) <= 1:
+        for batch_indexes in batches:
+            store(batch_indexes, embed_and_cache(batch_indexes))
+        return results
 
-            except Exception as e:
-                raise
+    debug_print(
+        f"[EMBEDDING_BATCH] Embedding {len(pending_indexes)} texts in {len(batches)} batches "
+        f"with up to {max_concurrency} in flight"
+    )
+    remaining_batches = list(reversed(batches))
+    in_flight = {}
+    try:
+        while remaining_batches or in_flight:
+            while remaining_batches and len(in_flight) < max_concurrency:
+                batch_indexes = remaining_batches.pop()
+                in_flight[_embedding_batch_executor.submit(embed_and_cache, batch_indexes)] = batch_indexes
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                store(in_flight.pop(future), future.result())
+    finally:
+        for future in in_flight:
+            future.cancel()
 
     return results
@@ -0,0 +1,337 @@
+# functions_conversation_history.py
+"""
+Incremental conversation history window for chat completions.
+
+Chat turns only use the last conversation_history_limit messages plus a summary
+of everything older. Instead of reading and re-summarizing the whole conversation
+on every turn, each worker keeps a window per conversation:
+
+- the ordered tail of messages that are not yet covered by the summary
+- a rolling summary of older messages, persisted on the conversation item
+  (history_summary) so other workers and restarts can reuse it
+- the highest Cosmos _ts seen, so a turn only reads items written since then
+
+When messages age out of the tail they are folded into the rolling summary with a
+single small completion. Edits to messages that are already summarized, new
+messages on summarized threads, and deletions or masking (which bump
+history_window_revision on the conversation) trigger a full rebuild.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from config import cosmos_messages_container, cosmos_conversations_container
+from functions_chat import sort_messages_by_thread
+from functions_debug import debug_print
+from functions_message_artifacts import is_assistant_artifact_role
+
+HISTORY_SUMMARY_FIELD = 'history_summary'
+HISTORY_WINDOW_REVISION_FIELD = 'history_window_revision'
+HISTORY_SUMMARY_SKIPPED_ROLES = ('system', 'safety', 'blocked', 'image', 'file')
+
+_history_windows = OrderedDict()
+_history_windows_lock = threading.Lock()
+
+
+def _get_thread_id(message):
+    return (message.get('metadata') or {}).get('thread_info', {}).get('thread_id')
+
+
+def _message_ts(message):
+    try:
+        return int(message.get('_ts') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _get_history_window_max_entries():
+    try:
+        from functions_settings import get_settings
+        return max(int(get_settings().get('conversation_history_window_cache_max_entries', 256) or 0), 0)
+    except Exception as e:
+        debug_print(f"[HISTORY_WINDOW] Failed to load window settings, using defaults: {e}")
+        return 256
+
+
+def _format_message_for_summary(message, assistant_content_builder=None):
+    """Return the summary line for a message, or None if it should not be summarized."""
+    metadata = message.get('metadata') or {}
+    if metadata.get('thread_info', {}).get('active_thread') is False or metadata.get('masked', False):
+        return None
+
+    role = message.get('role', 'user')
+    if role in HISTORY_SUMMARY_SKIPPED_ROLES:
+        return None
+
+    content = message.get('content', '')
+    if role == 'assistant' and assistant_content_builder:
+        content = assistant_content_builder(message, content)
+    return f"{role.upper()}: {content}"
+
+
+def _summarize_messages(previous_summary, message_lines, gpt_client, gpt_model):
+    if previous_summary:
+        prompt = (
+            "Update the running summary of this conversation with the new messages below. Keep it concise "
+            "(around 50-100 words), focusing on key facts, decisions, or context that might be relevant for "
+            "future turns. Do not add any introductory phrases like 'Here is a summary'.\n\n"
+            f"Current Summary:\n{previous_summary}\n\n"
+            "New Conversation History:\n"
+        )
+    else:
+        prompt = (
+            "Summarize the following conversation history concisely (around 50-100 words), "
+            "focusing on key facts, decisions, or context that might be relevant for future turns. "
+            "Do not add any introductory phrases like 'Here is a summary'.\n\n"
+            "Conversation History:\n"
+        )
+    response = gpt_client.chat.completions.create(
+        model=gpt_model,
+        messages=[{"role": "system", "content": prompt + "\n".join(message_lines)}],
+        max_tokens=150,
+        temperature=0.3,
+    )
+    return response.choices[0].message.content.strip()
+
+
+def _new_window(revision):
+    return {
+        'revision': revision,
+        'max_ts': 0,
+        'tail': OrderedDict(),
+        'artifacts': {},
+        'summary_text': '',
+        'summary_complete': True,
+        'summarized': {},
+        'summarized_thread_ids': set(),
+        'summarized_through_id': None,
+        'summary_source_ts': 0,
+    }
+
+
+def _add_item(window, item):
+    window['max_ts'] = max(window['max_ts'], _message_ts(item))
+    if is_assistant_artifact_role(item.get('role')):
+        window['artifacts'][item.get('id')] = item
+    else:
+        window['tail'][item.get('id')] = item
+
+
+def _rebuild_window(conversation_id, conversation_item, revision, use_persisted_summary):
+    """Load the whole conversation once and resume from the persisted summary when it is still valid."""
+    all_items = list(cosmos_messages_container.query_items(
+        query="SELECT * FROM c WHERE c.conversation_id = @conv_id ORDER BY c.timestamp ASC",
+        parameters=[{"name": "@conv_id", "value": conversation_id}],
+        partition_key=conversation_id,
+        enable_cross_partition_query=True
+    ))
+
+    window = _new_window(revision)
+    for item in all_items:
+        _add_item(window, item)
+
+    persisted = (conversation_item or {}).get(HISTORY_SUMMARY_FIELD) if use_persisted_summary else None
+    if not isinstance(persisted, dict) or not persisted.get('through_id'):
+        return window
+
+    ordered = sort_messages_by_thread(list(window['tail'].values()))
+    through_index = next(
+        (index for index, message in enumerate(ordered) if message.get('id') == persisted.get('through_id')),
+        None
+    )
+    if through_index is None or through_index + 1 != persisted.get('message_count'):
+        debug_print(f"[HISTORY_WINDOW] Persisted summary for {conversation_id} no longer matches the stored messages")
+        return window
+
+    summarized = ordered[:through_index + 1]
+    if any(_message_ts(message) > int(persisted.get('source_ts') or 0) for message in summarized):
+        debug_print(f"[HISTORY_WINDOW] Summarized messages in {conversation_id} changed after the summary was written")
+        return window
+
+    for message in summarized:
+        window['tail'].pop(message.get('id'), None)
+        window['summarized'][message.get('id')] = _message_ts(message)
+        thread_id = _get_thread_id(message)
+        if thread_id:
+            window['summarized_thread_ids'].add(thread_id)
+    window['summary_text'] = persisted.get('text') or ''
+    window['summarized_through_id'] = persisted.get('through_id')
+    window['summary_source_ts'] = int(persisted.get('source_ts') or 0)
+    return window
+
+
+def _apply_delta(conversation_id, window):
+    """Merge items written since the window was last refreshed. Returns (item_count, needs_rebuild)."""
+    delta_items = list(cosmos_messages_container.query_items(
+        query="SELECT * FROM c WHERE c.conversation_id = @conv_id AND c._ts >= @since",
+        parameters=[
+            {"name": "@conv_id", "value": conversation_id},
+            {"name": "@since", "value": window['max_ts']},
+        ],
+        partition_key=conversation_id,
+        enable_cross_partition_query=True
+    ))
+
+    for item in delta_items:
+        item_id = item.get('id')
+        if item_id in window['summarized']:
+            if _message_ts(item) > window['summarized'][item_id]:
+                return len(delta_items), True
+            continue
+        is_new_message = item_id not in window['tail'] and not is_assistant_artifact_role(item.get('role'))
+        if is_new_message and _get_thread_id(item) in window['summarized_thread_ids']:
+            # A retry or edit on a thread that is already summarized reorders history
+            return len(delta_items), True
+        _add_item(window, item)
+    return len(delta_items), False
+
+
+def _fold_aged_messages(window, history_limit, summarize, gpt_client, gpt_model, assistant_content_builder):
+    """Fold tail messages beyond history_limit into the rolling summary. Returns how many were folded."""
+    ordered = sort_messages_by_thread(list(window['tail'].values()))
+    if len(ordered) <= history_limit:
+        return 0
+
+    aged = ordered[:len(ordered) - history_limit]
+    if summarize:
+        if not gpt_client or not gpt_model:
+            return 0
+        message_lines = [
+            line for line in (_format_message_for_summary(message, assistant_content_builder) for message in aged)
+            if line
+        ]
+        if message_lines:
+            try:
+                window['summary_text'] = _summarize_messages(window['summary_text'], message_lines, gpt_client, gpt_model)
+            except Exception as e:
+                # Leave the messages in the tail so the next turn retries the fold
+                debug_print(f"[HISTORY_WINDOW] Error updating rolling summary: {e}")
+                return 0
+    else:
+        # Nothing is summarized while summarization is off, so the summary no longer covers everything older
+        window['summary_complete'] = False
+
+    for message in aged:
+        window['tail'].pop(message.get('id'), None)
+        window['summarized'][message.get('id')] = _message_ts(message)
+        thread_id = _get_thread_id(message)
+        if thread_id:
+            window['summarized_thread_ids'].add(thread_id)
+    window['summarized_through_id'] = aged[-1].get('id')
+    window['summary_source_ts'] = max([window['summary_source_ts']] + [_message_ts(message) for message in aged])
+    return len(aged)
+
+
+def _referenced_artifacts(window):
+    artifact_ids = set()
+    for message in window['tail'].values():
+        for citation in message.get('agent_citations') or []:
+            if isinstance(citation, dict) and citation.get('artifact_id'):
+                artifact_ids.add(str(citation['artifact_id']))
+
+    referenced = []
+    for artifact_id, artifact in list(window['artifacts'].items()):
+        if artifact_id in artifact_ids or artifact.get('parent_message_id') in artifact_ids:
+            referenced.append(artifact)
+        else:
+            window['artifacts'].pop(artifact_id, None)
+    return referenced
+
+
+def get_conversation_history_window(
+    conversation_id,
+    conversation_item,
+    conversation_history_limit,
+    enable_summarize_older_messages=False,
+    gpt_client=None,
+    gpt_model=None,
+    assistant_content_builder=None,
+):
+    """
+    Return the unsummarized tail of a conversation and the rolling summary of older messages.
+
+    Returns:
+        dict: messages (tail messages plus the artifacts they reference), summary_text,
+        summarized_message_count, source ('window' or 'rebuild'), delta_item_count, folded_message_count
+    """
+    revision = int((conversation_item or {}).get(HISTORY_WINDOW_REVISION_FIELD) or 0)
+    summarize = bool(enable_summarize_older_messages)
+
+    with _history_windows_lock:
+        window = _history_windows.pop(conversation_id, None)
+
+    source = 'window'
+    delta_item_count = 0
+    if window is not None and window['revision'] == revision and (window['summary_complete'] or not summarize):
+        delta_item_count, needs_rebuild = _apply_delta(conversation_id, window)
+        if needs_rebuild:
+            debug_print(f"[HISTORY_WINDOW] Summarized history changed for {conversation_id}, rebuilding")
+            window = _rebuild_window(conversation_id, conversation_item, revision, use_persisted_summary=False)
+            source = 'rebuild'
+    else:
+        window = _rebuild_window(conversation_id, conversation_item, revision, use_persisted_summary=summarize)
+        source = 'rebuild'
+
+    folded_message_count = _fold_aged_messages(
+        window, conversation_history_limit, summarize, gpt_client, gpt_model, assistant_content_builder
+    )
+
+    if summarize and folded_message_count and conversation_item is not None:
+        # Persisted with the conversation item when the chat route saves it at the end of the turn
+        conversation_item[HISTORY_SUMMARY_FIELD] = {
+            'text': window['summary_text'],
+            'through_id': window['summarized_through_id'],
+            'message_count': len(window['summarized']),
+            'source_ts': window['summary_source_ts'],
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+        }
+
+    tail_messages = sort_messages_by_thread(list(window['tail'].values()))
+    result = {
+        'messages': tail_messages + _referenced_artifacts(window),
+        'summary_text': window['summary_text'] if summarize and window['summary_complete'] else '',
+        'summarized_message_count': len(window['summarized']),
+        'source': source,
+        'delta_item_count': delta_item_count,
+        'folded_message_count': folded_message_count,
+    }
+
+    max_entries = _get_history_window_max_entries()
+    if max_entries > 0:
+        with _history_windows_lock:
+            _history_windows[conversation_id] = window
+            _history_windows.move_to_end(conversation_id)
+            while len(_history_windows) > max_entries:
+                _history_windows.popitem(last=False)
+    return result
+
+
+def invalidate_conversation_history_window(conversation_id):
+    """
+    Drop the cached window and persisted summary after messages are deleted or masked.
+
+    The revision bump makes every worker rebuild the window on its next turn, and the
+    summary is cleared so removed or masked content is never carried forward.
+    """
+    with _history_windows_lock:
+        _history_windows.pop(conversation_id, None)
+
+    try:
+        cosmos_conversations_container.patch_item(
+            item=conversation_id,
+            partition_key=conversation_id,
+            patch_operations=[
+                {"op": "incr", "path": f"/{HISTORY_WINDOW_REVISION_FIELD}", "value": 1},
+                {"op": "set", "path": f"/{HISTORY_SUMMARY_FIELD}", "value": None},
+            ]
+        )
+    except Exception as e:
+        debug_print(f"[HISTORY_WINDOW] Failed to invalidate history window for {conversation_id}: {e}")
+
+
+def clear_conversation_history_windows():
+    """Clear this worker's cached windows. Returns the number of windows removed."""
+    with _history_windows_lock:
+        removed = len(_history_windows)
+        _history_windows.clear()
+    return removed
@@ -0,0 +1,111 @@
+# functions_conversation_list.py
+"""
+Lightweight conversation list for the chat sidebar.
+
+/api/get_conversations used to return every conversation document of the user
+in full (tags, metadata, every context entry) on each sidebar refresh. The list
+now:
+
+- projects only the fields the sidebar renders, keeping just the primary context
+- pages with Cosmos continuation tokens when a page size is given
+- has a version made of the user's conversation count, latest last_updated and
+  latest _ts, read with one aggregate query, so unchanged lists are answered
+  with 304 Not Modified
+- in delta mode, returns only conversations written since a sync token (_ts).
+  Deleted conversations are not listed: a client whose merged list no longer
+  matches the response's total must fall back to a full fetch
+
+The version also moves on writes that do not bump last_updated, such as
+mark-read, because those still change _ts.
+"""
+
+import hashlib
+from config import cosmos_conversations_container
+from functions_conversation_unread import normalize_conversation_unread_state
+
+MAX_CONVERSATION_PAGE_SIZE = 500
+
+CONVERSATION_LIST_PROJECTION = (
+    "c.id, c.title, c.last_updated, c.is_pinned, c.is_hidden, c.chat_type, c.classification, "
+    "c.has_unread_assistant_response, c.last_unread_assistant_message_id, c.last_unread_assistant_at, "
+    "ARRAY(SELECT VALUE ctx FROM ctx IN c.context WHERE ctx.type = 'primary') AS context"
+)
+
+
+CONVERSATION_LIST_VERSION_QUERY = (
+    "SELECT COUNT(1) AS conversation_count, MAX(c._ts) AS sync_token, "
+    "MAX(c.last_updated) AS latest_last_updated "
+    "FROM c WHERE c.user_id = @user_id GROUP BY c.user_id"
+)
+
+
+def get_conversation_list_version(user_id):
+    """
+    Return the version of a user's conversation list.
+
+    Returns:
+        tuple: (conversation_count, sync_token, latest_last_updated), where
+            sync_token is the highest _ts of the user's conversations
+    """
+    # One cross-partition query for all three aggregates; no row means no conversations
+    results = list(cosmos_conversations_container.query_items(
+        query=CONVERSATION_LIST_VERSION_QUERY,
+        parameters=[{"name": "@user_id", "value": user_id}],
+        enable_cross_partition_query=True
+    ))
+    row = results[0] if results else {}
+    return (
+        int(row.get('conversation_count') or 0),
+        int(row.get('sync_token') or 0),
+        row.get('latest_last_updated') or ''
+    )
+
+
+def build_conversation_list_etag(version, query_string=''):
+    """Return the ETag of a conversation list response for a list version and request query string."""
+    if isinstance(query_string, bytes):
+        query_string = query_string.decode('utf-8', errors='replace')
+    version_text = '|'.join(str(part) for part in version)
+    return hashlib.sha256(f"{version_text}|{query_string}".encode('utf-8')).hexdigest()[:32]
+
+
+def query_conversation_list(user_id, page_size=None, continuation_token=None, since=None):
+    """
+    Return a user's conversations (list projection), most recently updated first.
+
+    Args:
+        user_id (str): Owner of the conversations
+        page_size (int, optional): Page size; without it every conversation is returned
+        continuation_token (str, optional): Token from the previous page
+        since (int, optional): Only return conversations written at or after this _ts
+
+    Returns:
+        tuple: (conversations, next_continuation_token)
+    """
+    query = f"SELECT {CONVERSATION_LIST_PROJECTION} FROM c WHERE c.user_id = @user_id"
+    parameters = [{"name": "@user_id", "value": user_id}]
+    if since is not None:
+        query += " AND c._ts >= @since"
+        parameters.append({"name": "@since", "value": int(since)})
+    query += " ORDER BY c.last_updated DESC"
+
+    if not page_size:
+        items = cosmos_conversations_container.query_items(
+            query=query,
+            parameters=parameters,
+            enable_cross_partition_query=True
+        )
+        return [normalize_conversation_unread_state(item) for item in items], None
+
+    pager = cosmos_conversations_container.query_items(
+        query=query,
+        parameters=parameters,
+        enable_cross_partition_query=True,
+        max_item_count=min(max(int(page_size), 1), MAX_CONVERSATION_PAGE_SIZE)
+    ).by_page(continuation_token)
+
+    conversations = []
+    for items in pager:
+        conversations = [normalize_conversation_unread_state(item) for item in items]
+        break
+    return conversations, pager.continuation_token
@@ -8,6 +8,14 @@ from functions_search import *
 from functions_logging import *
 from functions_authentication import *
 from functions_debug import *
+from utils_cache import bump_document_set_fingerprint
+from functions_tabular_snapshots import (
+    create_tabular_snapshot_from_file,
+    delete_tabular_snapshot,
+    get_tabular_blob_etag,
+    is_tabular_snapshot_enabled,
+)
+from azure.core import MatchConditions
 import azure.cognitiveservices.speech as speechsdk
 
 def allowed_file(filename, allowed_extensions=None):
@@ -300,6 +308,61 @@ def _get_search_client(group_id=None, public_workspace_id=None):
     return CLIENTS["search_client_user"]
 
 
+# Document fields that change which chunks a search can return or how they are filtered
+SEARCH_FINGERPRINT_FIELDS = {
+    'version',
+    'file_name',
+    'title',
+    'authors',
+    'document_classification',
+    'tags',
+    'shared_user_ids',
+    'shared_group_ids',
+    'is_current_version',
+    'search_visibility_state',
+}
+
+
+def _get_shared_scope_ids(shared_entries):
+    """Extract the OIDs from shared_user_ids/shared_group_ids entries ('oid,approved')."""
+    scope_ids = []
+    for entry in shared_entries or []:
+        if not isinstance(entry, str):
+            continue
+        scope_id = entry.split(',', 1)[0].strip()
+        if scope_id and scope_id not in scope_ids:
+            scope_ids.append(scope_id)
+    return scope_ids
+
+
+def bump_document_search_fingerprints(document_item=None, user_id=None, group_id=None, public_workspace_id=None):
+    """Rotate the search cache fingerprints of every scope that can see a document.
+
+    Personal documents affect the owner and every user they are shared with; group
+    documents affect the owning group and every group they are shared with. Failures
+    are logged and never block the document operation.
+    """
+    document_item = document_item or {}
+    try:
+        if public_workspace_id is not None:
+            bump_document_set_fingerprint("public", public_workspace_id)
+        elif group_id is not None:
+            group_scope_ids = [document_item.get('group_id') or group_id]
+            group_scope_ids.extend(_get_shared_scope_ids(document_item.get('shared_group_ids')))
+            for scope_id in dict.fromkeys(group_scope_ids):
+                bump_document_set_fingerprint("group", scope_id)
+        else:
+            user_scope_ids = [document_item.get('user_id') or user_id]
+            user_scope_ids.extend(_get_shared_scope_ids(document_item.get('shared_user_ids')))
+            for scope_id in dict.fromkeys(user_scope_ids):
+                bump_document_set_fingerprint("personal", scope_id)
+    except Exception as fingerprint_error:
+        debug_print(
+            f"[SearchCache] Failed to rotate document set fingerprints: {fingerprint_error}",
+            document_id=document_item.get('id'),
+        )
+
+
 def _get_document_family_key(document_item):
     revision_family_id = document_item.get("revision_family_id")
     if revision_family_id:
@@ -363,23 +426,16 @@ def sort_documents(documents, sort_by="_ts", sort_order="DESC"):
     return sorted(documents or [], key=sort_key, reverse=reverse)
 
 
-def _query_accessible_documents(user_id, group_id=None, public_workspace_id=None):
-    cosmos_container = _get_documents_container(group_id=group_id, public_workspace_id=public_workspace_id)
-
+def _get_accessible_documents_filter(user_id, group_id=None, public_workspace_id=None):
+    """Return (where_clause, parameters) matching every document a scope owns or has been shared."""
     if public_workspace_id is not None:
-        query = """
-            SELECT *
-            FROM c
-            WHERE c.public_workspace_id = @public_workspace_id
-        """
+        where_clause = "c.public_workspace_id = @public_workspace_id"
         parameters = [
             {"name": "@public_workspace_id", "value": public_workspace_id}
         ]
     elif group_id is not None:
-        query = """
-            SELECT *
-            FROM c
-            WHERE c.group_id = @group_id
+        where_clause = """
+            c.group_id = @group_id
                 OR ARRAY_CONTAINS(c.shared_group_ids, @group_id)
                 OR EXISTS(SELECT VALUE s FROM s IN c.shared_group_ids WHERE STARTSWITH(s, @group_id_prefix))
         """
@@ -388,10 +444,8 @@ def _query_accessible_documents(user_id, group_id=None, public_workspace_id=None
             {"name": "@group_id_prefix", "value": f"{group_id},"}
         ]
     else:
-        query = """
-            SELECT *
-            FROM c
-            WHERE c.user_id = @user_id
+        where_clause = """
+            c.user_id = @user_id
                 OR ARRAY_CONTAINS(c.shared_user_ids, @user_id)
                 OR EXISTS(SELECT VALUE s FROM s IN c.shared_user_ids WHERE STARTSWITH(s, @user_id_prefix))
         """
@@ -400,13 +454,175 @@ def _query_accessible_documents(user_id, group_id=None, public_workspace_id=None
             {"name": "@user_id_prefix", "value": f"{user_id},"}
         ]
 
+    return where_clause, parameters
+
+
+def _query_accessible_documents(user_id, group_id=None, public_workspace_id=None):
+    cosmos_container = _get_documents_container(group_id=group_id, public_workspace_id=public_workspace_id)
+    where_clause, parameters = _get_accessible_documents_filter(
+        user_id,
+        group_id=group_id,
+        public_workspace_id=public_workspace_id,
+    )
+
     return list(
         cosmos_container.query_items(
-            query=query,
+            query=f"SELECT * FROM c WHERE {where_clause}",
+            parameters=parameters,
+            enable_cross_partition_query=True,
+        )
+    )
+
+
+# Fields read by the workspace document list views
+DOCUMENT_LIST_FIELDS = (
+    "id", "file_name", "title", "abstract", "keywords", "authors", "publication_date",
+    "document_classification", "tags", "status", "percentage_complete", "number_of_pages",
+    "num_chunks", "version", "revision_family_id", "is_current_version", "is_current_revision",
+    "upload_date", "last_updated", "_ts", "type", "user_id", "group_id", "public_workspace_id",
+    "shared_user_ids", "shared_group_ids", "blob_path", "blob_path_mode", "archived_blob_path",
+)
+# List sort option -> stored field ordered on. Text sorts use lower-cased copies so
+# Cosmos ORDER BY stays case-insensitive like sort_documents.
+DOCUMENT_LIST_SORT_FIELDS = {"_ts": "_ts", "file_name": "file_name_sort", "title": "title_sort"}
+DOCUMENT_LIST_SORT_KEY_FIELDS = {"file_name": "file_name_sort", "title": "title_sort"}
+DOCUMENT_LIST_FIELDS_MISSING_CLAUSE = (
+    "NOT IS_DEFINED(c.is_current_revision) OR NOT IS_DEFINED(c.file_name_sort) OR NOT IS_DEFINED(c.title_sort)"
+)
+# Revision scopes whose documents this worker has confirmed carry the list fields
+_document_list_ready_scopes = set()
+
+
+def _get_document_sort_value(value):
+    if value is None:
+        return ""
+    return str(value).lower()
+
+
+def _apply_document_list_fields(document_item):
+    """Fill the fields list views collapse and sort on. Returns True when a field changed."""
+    changed = False
+    if "is_current_revision" not in document_item:
+        # Same rule as a single-revision family in normalize_document_revision_families
+        document_item["is_current_revision"] = document_item.get("is_current_version") is not False
+        changed = True
+    for field_name, sort_field_name in DOCUMENT_LIST_SORT_KEY_FIELDS.items():
+        sort_value = _get_document_sort_value(document_item.get(field_name))
+        if document_item.get(sort_field_name) != sort_value:
+            document_item[sort_field_name] = sort_value
+            changed = True
+    return changed
+
+
+def _count_documents(cosmos_container, where_clause, parameters):
+    results = list(
+        cosmos_container.query_items(
+            query=f"SELECT VALUE COUNT(1) FROM c WHERE {where_clause}",
             parameters=parameters,
             enable_cross_partition_query=True,
         )
     )
+    return results[0] if results else 0
+
+
+def _get_revision_scope_key(user_id, group_id=None, public_workspace_id=None):
+    if public_workspace_id is not None:
+        return ("public", public_workspace_id)
+    if group_id is not None:
+        return ("group", group_id)
+    return ("user", user_id)
+
+
+def _ensure_document_list_fields(revision_scopes):
+    """
+    Backfill the list fields once per revision scope in this worker.
+
+    The first listing of a scope counts its documents that predate the list
+    fields and normalizes the scope when any are found. Documents written after
+    that always carry the fields, so the scope is not checked again. Returns
+    False when a scope could not be backfilled; it is retried on the next listing.
+    """
+    ready = True
+    for revision_scope in revision_scopes or []:
+        scope_key = _get_revision_scope_key(**revision_scope)
+        if scope_key in _document_list_ready_scopes:
+            continue
+
+        try:
+            scope_clause, scope_parameters = _get_accessible_documents_filter(**revision_scope)
+            scope_container = _get_documents_container(
+                group_id=revision_scope.get("group_id"),
+                public_workspace_id=revision_scope.get("public_workspace_id"),
+            )
+            missing_clause = f"({scope_clause}) AND ({DOCUMENT_LIST_FIELDS_MISSING_CLAUSE})"
+            if _count_documents(scope_container, missing_clause, scope_parameters):
+                normalize_document_revision_families(**revision_scope)
+        except Exception as e:
+            debug_print(f"[Documents] Revision flag backfill failed for {revision_scope}: {e}")
+            ready = False
+            continue
+
+        _document_list_ready_scopes.add(scope_key)
+    return ready
+
+
+def query_current_documents_page(cosmos_container, where_clause, parameters, page=1, page_size=10,
+                                 sort_by="_ts", sort_order="DESC", revision_scopes=None):
+    """
+    Return (documents, total_count) for one page of current document revisions.
+
+    Revision collapsing, sorting, counting and paging run in Cosmos on the
+    is_current_revision flag (ORDER BY ... OFFSET/LIMIT), and only the list
+    projection of the requested page is read. Title and file name sorts order
+    on stored lower-cased copies, so they stay case-insensitive. Each
+    revision_scope (keyword arguments for normalize_document_revision_families)
+    is backfilled once per worker; if that fails, this page is collapsed in
+    memory instead.
+    """
+    order_field = DOCUMENT_LIST_SORT_FIELDS.get(sort_by)
+    if order_field is None:
+        sort_by = "_ts"
+        order_field = "_ts"
+    sort_order = "ASC" if str(sort_order).upper() == "ASC" else "DESC"
+    page = max(int(page or 1), 1)
+    page_size = max(int(page_size or 10), 1)
+    offset = (page - 1) * page_size
+
+    if not _ensure_document_list_fields(revision_scopes):
+        matching_docs = list(
+            cosmos_container.query_items(
+                query=f"SELECT * FROM c WHERE {where_clause}",
+                parameters=parameters,
+                enable_cross_partition_query=True,
+            )
+        )
+        current_docs = sort_documents(
+            select_current_documents(matching_docs),
+            sort_by=sort_by,
+            sort_order=sort_order,
+        )
+        return current_docs[offset:offset + page_size], len(current_docs)
+
+    current_clause = f"({where_clause}) AND c.is_current_revision = true"
+    total_count = _count_documents(cosmos_container, current_clause, parameters)
+    if offset >= total_count:
+        return [], total_count
+
+    projection = ", ".join(f"c.{field}" for field in DOCUMENT_LIST_FIELDS)
+    documents = list(
+        cosmos_container.query_items(
+            query=(
+                f"SELECT {projection} FROM c WHERE {current_clause} "
+                f"ORDER BY c.{order_field} {sort_order} OFFSET @list_offset LIMIT @list_limit"
+            ),
+            parameters=parameters + [
+                {"name": "@list_offset", "value": offset},
+                {"name": "@list_limit", "value": page_size},
+            ],
+            enable_cross_partition_query=True,
+        )
+    )
+    return [_normalize_document_enhanced_citations(document_item) for document_item in documents], total_count
 
 
 def _build_archived_scope_value(scope_value):
@@ -452,7 +668,42 @@ def set_document_chunk_visibility(document_item, active=True):
     return len(documents_to_update)
 
 
+def _set_document_list_fields(cosmos_container, document_item, is_current):
+    """Set the is_current_revision flag and list sort keys with one patch, leaving the rest of the document untouched."""
+    expected_fields = {"is_current_revision": is_current}
+    for field_name, sort_field_name in DOCUMENT_LIST_SORT_KEY_FIELDS.items():
+        expected_fields[sort_field_name] = _get_document_sort_value(document_item.get(field_name))
+
+    patch_operations = [
+        {"op": "set", "path": f"/{field_name}", "value": value}
+        for field_name, value in expected_fields.items()
+        if document_item.get(field_name) != value
+    ]
+    if not patch_operations:
+        return False
+
+    cosmos_container.patch_item(
+        item=document_item["id"],
+        partition_key=document_item["id"],
+        patch_operations=patch_operations,
+    )
+    document_item.update(expected_fields)
+    return True
+
+
 def normalize_document_revision_families(user_id, group_id=None, public_workspace_id=None, document_items=None):
+    """
+    Make exactly one document per revision family current.
+
+    Older revisions get is_current_version False and archived search chunks.
+    Every document, including single-revision families, gets the
+    is_current_revision flag and lower-cased sort keys that let list views
+    collapse and sort revisions in Cosmos.
+    A lone document already marked is_current_version False is an older
+    revision whose current revision is outside this scope (for example, only
+    the older revision was shared), so it is never promoted here.
+    Returns True when a change affects search results.
+    """
     documents = document_items if document_items is not None else _query_accessible_documents(
         user_id=user_id,
         group_id=group_id,
@@ -467,10 +718,15 @@ def normalize_document_revision_families(user_id, group_id=None, public_workspac
         families.setdefault(family_key, []).append(document_item)
 
     for family_documents in families.values():
+        current_document = _choose_current_document(family_documents)
         if len(family_documents) <= 1:
+            _set_document_list_fields(
+                cosmos_container,
+                current_document,
+                current_document.get("is_current_version") is not False,
+            )
             continue
 
-        current_document = _choose_current_document(family_documents)
         revision_family_id = current_document.get("revision_family_id") or current_document.get("id")
 
         for document_item in family_documents:
@@ -500,8 +756,19 @@ def normalize_document_revision_families(user_id, group_id=None, public_workspac
                     update_occurred = True
 
             if update_occurred:
+                document_item["is_current_revision"] = expected_current
+                _apply_document_list_fields(document_item)
                 cosmos_container.upsert_item(document_item)
                 changes_made = True
+            else:
+                _set_document_list_fields(cosmos_container, document_item, expected_current)
+
+    if changes_made:
+        bump_document_search_fingerprints(
+            user_id=user_id,
+            group_id=group_id,
+            public_workspace_id=public_workspace_id,
+        )
 
     return changes_made
 
@@ -578,7 +845,7 @@ def create_document(file_name, user_id, document_id, num_file_chunks, status, gr
     is_group = group_id is not None
     is_public_workspace = public_workspace_id is not None
 
-    # Choose the correct cosmos_container and query parameters
+    # Choose the correct cosmos_container
     if is_public_workspace:
         cosmos_container = cosmos_public_documents_container
     elif is_group:
@@ -664,12 +931,17 @@ def create_document(file_name, user_id, document_id, num_file_chunks, status, gr
                 existing_document['is_current_version'] = False
                 update_existing_document = True
 
+            if existing_document.get('is_current_revision') is not False:
+                existing_document['is_current_revision'] = False
+                update_existing_document = True
+
             if existing_document.get('search_visibility_state') != 'archived':
                 set_document_chunk_visibility(existing_document, active=False)
                 existing_document['search_visibility_state'] = 'archived'
                 update_existing_document = True
 
             if update_existing_document:
+                _apply_document_list_fields(existing_document)
                 cosmos_container.upsert_item(existing_document)
         
         if is_public_workspace:
@@ -685,6 +957,7 @@ def create_document(file_name, user_id, document_id, num_file_chunks, status, gr
                 "version": version,
                 "revision_family_id": revision_family_id,
                 "is_current_version": True,
+                "is_current_revision": True,
                 "search_visibility_state": "active",
                 "status": status,
                 "percentage_complete": 0,
@@ -717,6 +990,7 @@ def create_document(file_name, user_id, document_id, num_file_chunks, status, gr
                 "version": version,
                 "revision_family_id": revision_family_id,
                 "is_current_version": True,
+                "is_current_revision": True,
                 "search_visibility_state": "active",
                 "status": status,
                 "percentage_complete": 0,
@@ -749,6 +1023,7 @@ def create_document(file_name, user_id, document_id, num_file_chunks, status, gr
                 "version": version,
                 "revision_family_id": revision_family_id,
                 "is_current_version": True,
+                "is_current_revision": True,
                 "search_visibility_state": "active",
                 "status": status,
                 "percentage_complete": 0,
@@ -771,7 +1046,14 @@ def create_document(file_name, user_id, document_id, num_file_chunks, status, gr
                 "tags": carried_forward.get("tags", [])
             }
 
+        _apply_document_list_fields(document_metadata)
         cosmos_container.upsert_item(document_metadata)
+        bump_document_search_fingerprints(
+            document_metadata,
+            user_id=user_id,
+            group_id=group_id,
+            public_workspace_id=public_workspace_id,
+        )
 
         add_file_task_to_file_processing_log(
             document_id,
@@ -1846,6 +2128,51 @@ def calculate_processing_percentage(doc_metadata):
     # This ensures progress is monotonic upwards until completion or error.
     return max(final_pct, current_pct)
 
+def _normalize_document_status(status):
+    """Return a document status as lowercase text for phase checks."""
+    if isinstance(status, str):
+        return status.lower()
+    if isinstance(status, bytes):
+        return status.decode('utf-8').lower()
+    if isinstance(status, dict):
+        return json.dumps(status).lower()
+    return str(status or '').lower()
+
+def _resolve_processing_percentage(document, original_percentage):
+    """
+    Calculate the percentage for an updated document, applying the final state
+    overrides and never letting progress move backwards (except on failure).
+    """
+    new_percentage = calculate_processing_percentage(document)
+    status_lower = _normalize_document_status(document.get('status', ''))
+
+    if "processing complete" in status_lower:
+        new_percentage = 100
+
+    # Ensure percentage doesn't decrease (unless reset on failure or hitting 100)
+    # Compare against original_percentage fetched *before* any updates in this call
+    if new_percentage < original_percentage and new_percentage != 0 and "failed" not in status_lower and "error" not in status_lower:
+        return original_percentage
+    return new_percentage
+
+def _read_scoped_document(cosmos_container, document_id, user_id=None, group_id=None, public_workspace_id=None):
+    """
+    Point read a document (all document containers are partitioned on /id) and
+    return it only if it belongs to the requested workspace scope, else None.
+    """
+    try:
+        document = cosmos_container.read_item(item=document_id, partition_key=document_id)
+    except CosmosResourceNotFoundError:
+        return None
+
+    if public_workspace_id is not None:
+        owner_matches = document.get('public_workspace_id') == public_workspace_id
+    elif group_id is not None:
+        owner_matches = document.get('group_id') == group_id
+    else:
+        owner_matches = document.get('user_id') == user_id
+    return document if owner_matches else None
+
 def update_document(**kwargs):
     document_id = kwargs.get('document_id')
     user_id = kwargs.get('user_id')
@@ -1871,53 +2198,13 @@ def update_document(**kwargs):
     else:
         cosmos_container = cosmos_user_documents_container
 
-    if is_public_workspace:
-        query = """
-            SELECT * 
-            FROM c
-            WHERE c.id = @document_id 
-                AND c.public_workspace_id = @public_workspace_id
-        """
-        parameters = [
-            {"name": "@document_id", "value": document_id},
-            {"name": "@public_workspace_id", "value": public_workspace_id}
-        ]
-    elif is_group:
-        query = """
-            SELECT * 
-            FROM c
-            WHERE c.id = @document_id 
-                AND c.group_id = @group_id
-        """
-        parameters = [
-            {"name": "@document_id", "value": document_id},
-            {"name": "@group_id", "value": group_id}
-        ]
-    else:
-        query = """
-            SELECT * 
-            FROM c
-            WHERE c.id = @document_id 
-                AND c.user_id = @user_id
-        """
-        parameters = [
-            {"name": "@document_id", "value": document_id},
-            {"name": "@user_id", "value": user_id}
-        ]
-    
-    add_file_task_to_file_processing_log(
-        document_id=document_id,
-        user_id=public_workspace_id if is_public_workspace else (group_id if is_group else user_id),
-        content=f"Query is {query}, parameters are {parameters}."
-    )
-
     try:
-        existing_documents = list(
-            cosmos_container.query_items(
-                query=query, 
-                parameters=parameters, 
-                enable_cross_partition_query=True
-            )
+        existing_document = _read_scoped_document(
+            cosmos_container,
+            document_id,
+            user_id=user_id,
+            group_id=group_id,
+            public_workspace_id=public_workspace_id
         )
 
         status = kwargs.get('status', '')
@@ -1929,7 +2216,7 @@ def update_document(**kwargs):
                 content=f"Status: {status}"
             )
 
-        if not existing_documents:
+        if not existing_document:
             # Log specific error before raising
             log_msg = f"Document {document_id} not found for user {user_id} during update."
             print(log_msg)
@@ -1943,13 +2230,15 @@ def update_document(**kwargs):
                 status=404
             )
 
-
-        existing_document = existing_documents[0]
         original_percentage = existing_document.get('percentage_complete', 0) # Store for comparison
 
         # 2. Apply updates from kwargs
         update_occurred = False
         updated_fields_requiring_chunk_sync = set() # Track fields needing propagation
+        search_fingerprint_changed = False # Track changes to the searchable document set
+        previous_status = str(existing_document.get('status') or '').lower()
+        previous_shared_user_ids = list(existing_document.get('shared_user_ids') or [])
+        previous_shared_group_ids = list(existing_document.get('shared_group_ids') or [])
 
         if num_chunks_increment > 0:
             current_num_chunks = existing_document.get('num_chunks', 0)
@@ -1968,6 +2257,8 @@ def update_document(**kwargs):
                     continue # Skip direct assignment if increment was used
                 existing_document[key] = value
                 update_occurred = True
+                if key in SEARCH_FINGERPRINT_FIELDS:
+                    search_fingerprint_changed = True
                 if key in ['title', 'authors', 'file_name', 'document_classification', 'tags']:
                     updated_fields_requiring_chunk_sync.add(key)
                 # Propagate shared_group_ids to group chunks if changed
@@ -1980,29 +2271,8 @@ def update_document(**kwargs):
 
             # Calculate new percentage based on the *updated* existing_document state
             # This now includes the potentially incremented num_chunks
-            new_percentage = calculate_processing_percentage(existing_document)
-            
-            # Handle final state overrides for percentage
-
-            status_lower = existing_document.get('status', '')
-            if isinstance(status_lower, str):
-                status_lower = status_lower.lower()
-            elif isinstance(status_lower, bytes):
-                status_lower = status_lower.decode('utf-8').lower()
-            elif isinstance(status_lower, dict):
-                status_lower = json.dumps(status_lower).lower()
-
-            if "processing complete" in status_lower:
-                new_percentage = 100
-            elif "error" in status_lower or "failed" in status_lower:
-                 pass # Percentage already calculated by helper based on 'failed' status
-
-            # Ensure percentage doesn't decrease (unless reset on failure or hitting 100)
-            # Compare against original_percentage fetched *before* any updates in this call
-            if new_percentage < original_percentage and new_percentage != 0 and "failed" not in status_lower and "error" not in status_lower:
-                 existing_document['percentage_complete'] = original_percentage
-            else:
-                 existing_document['percentage_complete'] = new_percentage
+            existing_document['percentage_complete'] = _resolve_processing_percentage(existing_document, original_percentage)
+            status_lower = _normalize_document_status(existing_document.get('status', ''))
 
         # 4. Propagate relevant changes to search index chunks
         # This happens regardless of 'update_occurred' flag because the *intent* from kwargs might trigger it,
@@ -2058,8 +2328,26 @@ def update_document(**kwargs):
 
         # 5. Upsert the document if changes were made
         if update_occurred:
+            # Keep the list sort keys in step with title and file_name
+            _apply_document_list_fields(existing_document)
             cosmos_container.upsert_item(existing_document)
 
+            # Newly indexed chunks become searchable once processing completes
+            if "processing complete" in status_lower and "processing complete" not in previous_status:
+                search_fingerprint_changed = True
+
+            if search_fingerprint_changed:
+                # Include scopes that just lost access through an unshare
+                fingerprint_item = dict(existing_document)
+                fingerprint_item['shared_user_ids'] = previous_shared_user_ids + list(existing_document.get('shared_user_ids') or [])
+                fingerprint_item['shared_group_ids'] = previous_shared_group_ids + list(existing_document.get('shared_group_ids') or [])
+                bump_document_search_fingerprints(
+                    fingerprint_item,
+                    user_id=user_id,
+                    group_id=group_id,
+                    public_workspace_id=public_workspace_id,
+                )
+
     except CosmosResourceNotFoundError as e:
         # Error already logged where it was first detected
         print(f"Document {document_id} not found or access denied: {e}")
@@ -2081,6 +2369,162 @@ def update_document(**kwargs):
         #    print(f"Failed to update status to error state for {document_id}: {inner_e}")
         raise # Re-raise the original exception
 
+DOCUMENT_PROGRESS_FIELDS = {'status', 'current_file_chunk', 'number_of_pages', 'percentage_complete'}
+DOCUMENT_TERMINAL_STATUS_MARKERS = ('processing complete', 'error', 'failed')
+
+class DocumentProgressReporter:
+    """
+    Coalesces progress updates for a document while it is being processed.
+
+    Progress-only updates (status, chunk counters, page count) are merged in memory
+    and written at most once per flush interval with a single ETag-guarded patch
+    against a point-read snapshot. Terminal statuses and any other field go through
+    update_document immediately together with whatever progress is still pending.
+    """
+
+    def __init__(self, document_id, user_id, group_id=None, public_workspace_id=None, flush_interval_seconds=None):
+        self.document_id = document_id
+        self.user_id = user_id
+        self.group_id = group_id
+        self.public_workspace_id = public_workspace_id
+        if flush_interval_seconds is None:
+            flush_interval_seconds = get_settings().get('document_progress_flush_interval_seconds', 2)
+        self.flush_interval_seconds = max(float(flush_interval_seconds or 0), 0.0)
+
+        if public_workspace_id is not None:
+            self.cosmos_container = cosmos_public_documents_container
+        elif group_id is not None:
+            self.cosmos_container = cosmos_group_documents_container
+        else:
+            self.cosmos_container = cosmos_user_documents_container
+
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_chunk_increment = 0
+        self._document = None
+        self._last_flush = None
+        self.updates_received = 0
+        self.writes = 0
+
+    def _scope_id(self):
+        if self.public_workspace_id is not None:
+            return self.public_workspace_id
+        if self.group_id is not None:
+            return self.group_id
+        return self.user_id
+
+    def update(self, **kwargs):
+        """Record an update, writing it now only if it is due or must not be delayed."""
+        with self._lock:
+            self.updates_received += 1
+            self._pending_chunk_increment += kwargs.pop('num_chunks_increment', 0) or 0
+            self._pending.update({key: value for key, value in kwargs.items() if value is not None})
+
+            status_lower = _normalize_document_status(kwargs.get('status') or '')
+            is_terminal = any(marker in status_lower for marker in DOCUMENT_TERMINAL_STATUS_MARKERS)
+            if is_terminal or any(key not in DOCUMENT_PROGRESS_FIELDS for key in kwargs):
+                self._flush_full()
+            elif self._last_flush is None or time.time() - self._last_flush >= self.flush_interval_seconds:
+                self._flush_progress()
+
+    def flush(self):
+        """Write any pending progress."""
+        with self._lock:
+            if self._pending or self._pending_chunk_increment:
+                self._flush_progress()
+
+    def _clear_pending(self):
+        self._pending = {}
+        self._pending_chunk_increment = 0
+        self._last_flush = time.time()
+
+    def _flush_full(self):
+        args = {
+            "document_id": self.document_id,
+            "user_id": self.user_id,
+            **self._pending
+        }
+        if self._pending_chunk_increment:
+            args["num_chunks_increment"] = self._pending_chunk_increment
+        if self.public_workspace_id is not None:
+            args["public_workspace_id"] = self.public_workspace_id
+        elif self.group_id is not None:
+            args["group_id"] = self.group_id
+
+        update_document(**args)
+        self.writes += 1
+        # update_document wrote a new version, so the patch snapshot is stale
+        self._document = None
+        self._clear_pending()
+
+    def _flush_progress(self):
+        for attempt in range(2):
+            if self._document is None:
+                self._document = _read_scoped_document(
+                    self.cosmos_container,
+                    self.document_id,
+                    user_id=self.user_id,
+                    group_id=self.group_id,
+                    public_workspace_id=self.public_workspace_id
+                )
+                if not self._document:
+                    raise CosmosResourceNotFoundError(
+                        message=f"Document {self.document_id} not found",
+                        status=404
+                    )
+
+            document = dict(self._document)
+            original_percentage = document.get('percentage_complete', 0)
+            operations = []
+            for key, value in self._pending.items():
+                if document.get(key) != value:
+                    document[key] = value
+                    operations.append({"op": "set", "path": f"/{key}", "value": value})
+            if self._pending_chunk_increment:
+                document['num_chunks'] = document.get('num_chunks', 0) + self._pending_chunk_increment
+                operations.append({"op": "incr", "path": "/num_chunks", "value": self._pending_chunk_increment})
+
+            if not operations:
+                self._clear_pending()
+                return
+
+            document['last_updated'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+            operations.append({"op": "set", "path": "/last_updated", "value": document['last_updated']})
+            operations.append({
+                "op": "set",
+                "path": "/percentage_complete",
+                "value": _resolve_processing_percentage(document, original_percentage)
+            })
+
+            try:
+                self._document = self.cosmos_container.patch_item(
+                    item=self.document_id,
+                    partition_key=self.document_id,
+                    patch_operations=operations,
+                    etag=self._document.get('_etag'),
+                    match_condition=MatchConditions.IfNotModified
+                )
+            except Exception as e:
+                if getattr(e, 'status_code', None) == 412 and attempt == 0:
+                    # Someone else changed the document; re-read and apply on top of it
+                    self._document = None
+                    continue
+                print(f"Warning: Failed to write progress for document {self.document_id}: {e}")
+                # Keep the updates pending so the next flush retries them
+                self._document = None
+                self._last_flush = time.time()
+                return
+
+            self.writes += 1
+            if 'status' in self._pending:
+                add_file_task_to_file_processing_log(
+                    document_id=self.document_id,
+                    user_id=self._scope_id(),
+                    content=f"Status: {self._pending['status']}"
+                )
+            self._clear_pending()
+            return
+
 def save_chunks(page_text_content, page_number, file_name, user_id, document_id, group_id=None, public_workspace_id=None):
     """
     Save a single chunk (one page) at a time:
@@ -2285,7 +2729,7 @@ def save_chunks(page_text_content, page_number, file_name, user_id, document_id,
     # Return token usage information for accumulation
     return token_usage
 
-def save_chunks_batch(chunks_data, user_id, document_id, group_id=None, public_workspace_id=None):
+def save_chunks_batch(chunks_data, user_id, document_id, group_id=None, public_workspace_id=None, metadata=None):
     """
     Save multiple chunks at once using batch embedding and batch AI Search upload.
     Significantly faster than calling save_chunks() per chunk.
@@ -2296,6 +2740,7 @@ def save_chunks_batch(chunks_data, user_id, document_id, group_id=None, public_w
         document_id: The document ID
         group_id: Optional group ID for group documents
         public_workspace_id: Optional public workspace ID for public documents
+        metadata: Optional document metadata already read by the caller
 
     Returns:
         dict with 'total_tokens', 'prompt_tokens', 'model_deployment_name'
@@ -2306,25 +2751,26 @@ def save_chunks_batch(chunks_data, user_id, document_id, group_id=None, public_w
     is_group = group_id is not None
     is_public_workspace = public_workspace_id is not None
 
-    # Retrieve metadata once for all chunks
+    # Retrieve metadata once for all chunks unless the caller already has it
     try:
-        if is_public_workspace:
-            metadata = get_document_metadata(
-                document_id=document_id,
-                user_id=user_id,
-                public_workspace_id=public_workspace_id
-            )
-        elif is_group:
-            metadata = get_document_metadata(
-                document_id=document_id,
-                user_id=user_id,
-                group_id=group_id
-            )
-        else:
-            metadata = get_document_metadata(
-                document_id=document_id,
-                user_id=user_id
-            )
+        if metadata is None:
+            if is_public_workspace:
+                metadata = get_document_metadata(
+                    document_id=document_id,
+                    user_id=user_id,
+                    public_workspace_id=public_workspace_id
+                )
+            elif is_group:
+                metadata = get_document_metadata(
+                    document_id=document_id,
+                    user_id=user_id,
+                    group_id=group_id
+                )
+            else:
+                metadata = get_document_metadata(
+                    document_id=document_id,
+                    user_id=user_id
+                )
 
         if not metadata:
             raise ValueError(f"No metadata found for document {document_id}")
@@ -2363,6 +2809,11 @@ def save_chunks_batch(chunks_data, user_id, document_id, group_id=None, public_w
             vision_text_parts.append(f"\nContextual Analysis: {vision_analysis['analysis']}")
         vision_text = "\n".join(vision_text_parts)
 
+    # Document-level search fields match save_chunks()
+    author = ensure_list(metadata.get('authors'))
+    title = metadata.get('title', '')
+    document_classification = metadata.get('document_classification', 'None')
+
     # Build all chunk documents
     chunk_documents = []
     total_token_usage = {'total_tokens': 0, 'prompt_tokens': 0, 'model_deployment_name': None}
@@ -2393,9 +2844,9 @@ def save_chunks_batch(chunks_data, user_id, document_id, group_id=None, public_w
                 "chunk_keywords": [],
                 "chunk_summary": "",
                 "page_number": page_number,
-                "author": [],
-                "title": "",
-                "document_classification": "None",
+                "author": author,
+                "title": title,
+                "document_classification": document_classification,
                 "document_tags": metadata.get('tags', []),
                 "chunk_sequence": page_number,
                 "upload_date": current_time,
@@ -2414,9 +2865,9 @@ def save_chunks_batch(chunks_data, user_id, document_id, group_id=None, public_w
                 "chunk_keywords": [],
                 "chunk_summary": "",
                 "page_number": page_number,
-                "author": [],
-                "title": "",
-                "document_classification": "None",
+                "author": author,
+                "title": title,
+                "document_classification": document_classification,
                 "document_tags": metadata.get('tags', []),
                 "chunk_sequence": page_number,
                 "upload_date": current_time,
@@ -2436,9 +2887,9 @@ def save_chunks_batch(chunks_data, user_id, document_id, group_id=None, public_w
                 "chunk_keywords": [],
                 "chunk_summary": "",
                 "page_number": page_number,
-                "author": [],
-                "title": "",
-                "document_classification": "None",
+                "author": author,
+                "title": title,
+                "document_classification": document_classification,
                 "document_tags": metadata.get('tags', []),
                 "chunk_sequence": page_number,
                 "upload_date": current_time,
@@ -2925,6 +3376,11 @@ def delete_from_blob_storage(document_item, user_id=None, group_id=None, public_
             else:
                 print(f"No blob found at {container_name}/{blob_path} to delete")
 
+            if os.path.splitext(blob_path)[-1].lower().lstrip('.') in TABULAR_EXTENSIONS:
+                deleted_snapshot_count = delete_tabular_snapshot(container_name, blob_path)
+                if deleted_snapshot_count:
+                    print(f"Deleted {deleted_snapshot_count} tabular snapshot blob(s) for {container_name}/{blob_path}")
+
     except Exception as e:
         print(f"Error deleting document from blob storage: {str(e)}")
         # Don't raise the exception, as we want the Cosmos DB deletion to proceed
@@ -3014,6 +3470,12 @@ def delete_document(user_id, document_id, group_id=None, public_workspace_id=Non
             item=document_id,
             partition_key=document_id
         )
+        bump_document_search_fingerprints(
+            document_item,
+            user_id=user_id,
+            group_id=group_id,
+            public_workspace_id=public_workspace_id,
+        )
 
     except CosmosResourceNotFoundError:
         raise Exception("Document not found")
@@ -3078,6 +3540,7 @@ def delete_document_revision(user_id, document_id, delete_mode="all_versions", g
             promoted_document = _choose_current_document(remaining_documents)
             promoted_document['revision_family_id'] = target_document.get('revision_family_id') or promoted_document.get('revision_family_id') or promoted_document.get('id')
             promoted_document['is_current_version'] = True
+            promoted_document['is_current_revision'] = True
             promoted_document['search_visibility_state'] = 'active'
             _promote_document_blob_to_current_alias(
                 promoted_document,
@@ -3087,6 +3550,12 @@ def delete_document_revision(user_id, document_id, delete_mode="all_versions", g
             )
             set_document_chunk_visibility(promoted_document, active=True)
             cosmos_container.upsert_item(promoted_document)
+            bump_document_search_fingerprints(
+                promoted_document,
+                user_id=user_id,
+                group_id=group_id,
+                public_workspace_id=public_workspace_id,
+            )
             promoted_document_id = promoted_document.get('id')
 
     return {
@@ -4196,659 +4665,239 @@ def upload_to_blob(temp_file_path, user_id, document_id, blob_filename, update_c
         print(f"Error uploading {blob_filename} to Blob Storage: {str(e)}")
         raise Exception(f"Error uploading {blob_filename} to Blob Storage: {str(e)}")
 
-def process_txt(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes plain text files."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
+def _upload_source_for_enhanced_citations(enable_enhanced_citations, temp_file_path, user_id, document_id, original_filename, update_callback, group_id=None, public_workspace_id=None):
+    """Upload the original file to blob storage when enhanced citations are enabled."""
+    if not enable_enhanced_citations:
+        return
 
-    update_callback(status="Processing TXT file...")
-    total_chunks_saved = 0
-    total_embedding_tokens = 0
-    embedding_model_name = None
-    chunk_config = get_chunk_size_config(get_settings())
-    target_words_per_chunk = chunk_config.get('txt', {}).get('value', 400)
+    args = {
+        "temp_file_path": temp_file_path,
+        "user_id": user_id,
+        "document_id": document_id,
+        "blob_filename": original_filename,
+        "update_callback": update_callback
+    }
 
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
+    if public_workspace_id is not None:
+        args["public_workspace_id"] = public_workspace_id
+    elif group_id is not None:
+        args["group_id"] = group_id
 
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
+    upload_to_blob(**args)
 
-        upload_to_blob(**args)
+def iter_word_chunks(text, words_per_chunk):
+    """Yield chunks of up to words_per_chunk whitespace-separated words."""
+    words = text.split()
+    for i in range(0, len(words), words_per_chunk):
+        yield " ".join(words[i:i + words_per_chunk])
 
-    try:
-        with open(temp_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+def iter_line_chunks(lines, words_per_chunk):
+    """Yield chunks of whole lines, starting a new chunk before words_per_chunk is exceeded."""
+    current_chunk_lines = []
+    current_chunk_word_count = 0
 
-        words = content.split()
-        num_words = len(words)
-        num_chunks_estimated = math.ceil(num_words / target_words_per_chunk)
-        update_callback(number_of_pages=num_chunks_estimated) # Use number_of_pages for chunk count
+    for line in lines:
+        line_word_count = len(line.split())
 
-        for i in range(0, num_words, target_words_per_chunk):
-            chunk_words = words[i : i + target_words_per_chunk]
-            chunk_content = " ".join(chunk_words)
-            chunk_index = (i // target_words_per_chunk) + 1
+        # If adding this line exceeds target AND we already have content
+        if current_chunk_word_count + line_word_count > words_per_chunk and current_chunk_lines:
+            yield "".join(current_chunk_lines)
+            current_chunk_lines = [line]
+            current_chunk_word_count = line_word_count
+        else:
+            current_chunk_lines.append(line)
+            current_chunk_word_count += line_word_count
 
-            if chunk_content.strip():
-                update_callback(
-                    current_file_chunk=chunk_index,
-                    status=f"Saving chunk {chunk_index}/{num_chunks_estimated}..."
-                )
-                args = {
-                    "page_text_content": chunk_content,
-                    "page_number": chunk_index,
-                    "file_name": original_filename,
-                    "user_id": user_id,
-                    "document_id": document_id
-                }
+    if current_chunk_lines:
+        yield "".join(current_chunk_lines)
 
-                if is_public_workspace:
-                    args["public_workspace_id"] = public_workspace_id
-                elif is_group:
-                    args["group_id"] = group_id
+def iter_numbered_chunks(chunks, sequential_page_numbers=False, is_trivial_chunk=None):
+    """
+    Yield (page_number, chunk_text) for every non-empty chunk.
 
-                token_usage = save_chunks(**args)
-                total_chunks_saved += 1
-                
-                # Accumulate embedding tokens
-                if token_usage:
-                    total_embedding_tokens += token_usage.get('total_tokens', 0)
-                    if not embedding_model_name:
-                        embedding_model_name = token_usage.get('model_deployment_name')
+    By default the page number is the chunk's position in the source, so skipped
+    chunks leave gaps. With sequential_page_numbers, saved chunks are numbered 1..n.
+    """
+    saved_count = 0
+    for position, chunk_text in enumerate(chunks, start=1):
+        if not chunk_text or not chunk_text.strip() or (is_trivial_chunk and is_trivial_chunk(chunk_text)):
+            debug_print(f"[INGEST] Skipping empty chunk {position}")
+            continue
+        saved_count += 1
+        yield (saved_count if sequential_page_numbers else position), chunk_text
 
-    except Exception as e:
-        raise Exception(f"Failed processing TXT file {original_filename}: {e}")
+def ingest_document_chunks(numbered_chunks, document_id, user_id, file_name, update_callback, estimated_chunks=None, group_id=None, public_workspace_id=None):
+    """
+    Streaming ingestion stage shared by the text-based document processors.
 
-    return total_chunks_saved, total_embedding_tokens, embedding_model_name
+    Chunks are pulled from the numbered_chunks generator, buffered, and flushed
+    through save_chunks_batch so each flush costs one batched embedding pass and
+    bulk AI Search uploads. Document metadata is read once for the whole document.
 
-def process_xml(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes XML files using RecursiveCharacterTextSplitter for structured content."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
+    Returns:
+        tuple: (total_chunks_saved, total_embedding_tokens, embedding_model_name)
+    """
+    settings = get_settings()
+    buffer_size = max(int(settings.get('document_ingestion_buffer_size', 64) or 1), 1)
+    scope_id = public_workspace_id if public_workspace_id is not None else (group_id if group_id is not None else user_id)
 
-    update_callback(status="Processing XML file...")
+    metadata = None
     total_chunks_saved = 0
     total_embedding_tokens = 0
     embedding_model_name = None
-    # Character-based chunking for XML structure preservation
-    chunk_config = get_chunk_size_config(get_settings())
-    max_chunk_size_chars = chunk_config.get('xml', {}).get('value', 4000)
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_group:
-            args["group_id"] = group_id
-        elif is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-
-        upload_to_blob(**args)
+    chunk_buffer = []
+    progress_total = estimated_chunks or "?"
 
-    try:
-        # Read XML content
-        try:
-            with open(temp_file_path, 'r', encoding='utf-8') as f:
-                xml_content = f.read()
-        except Exception as e:
-            raise Exception(f"Error reading XML file {original_filename}: {e}")
-
-        # Use RecursiveCharacterTextSplitter with XML-aware separators
-        # This preserves XML structure better than simple word splitting
-        xml_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=max_chunk_size_chars,
-            chunk_overlap=0,
-            length_function=len,
-            separators=["\n\n", "\n", ">", " ", ""],  # XML-friendly separators
-            is_separator_regex=False
-        )
-
-        # Split the XML content
-        final_chunks = xml_splitter.split_text(xml_content)
-
-        initial_chunk_count = len(final_chunks)
-        update_callback(number_of_pages=initial_chunk_count)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            # Skip empty chunks
-            if not chunk_content or not chunk_content.strip():
-                print(f"Skipping empty XML chunk {idx}/{initial_chunk_count}")
-                continue
-
-            update_callback(
-                current_file_chunk=idx,
-                status=f"Saving chunk {idx}/{initial_chunk_count}..."
+    def flush():
+        nonlocal metadata, total_chunks_saved, total_embedding_tokens, embedding_model_name
+        if metadata is None:
+            metadata = get_document_metadata(
+                document_id=document_id,
+                user_id=user_id,
+                group_id=group_id,
+                public_workspace_id=public_workspace_id
             )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": total_chunks_saved + 1,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            token_usage = save_chunks(**args)
-            total_chunks_saved += 1
-            
-            # Accumulate embedding tokens
-            if token_usage:
-                total_embedding_tokens += token_usage.get('total_tokens', 0)
-                if not embedding_model_name:
-                    embedding_model_name = token_usage.get('model_deployment_name')
-
-        # Final update with actual chunks saved
-        if total_chunks_saved != initial_chunk_count:
-            update_callback(number_of_pages=total_chunks_saved)
-            print(f"Adjusted final chunk count from {initial_chunk_count} to {total_chunks_saved} after skipping empty chunks.")
-
-    except Exception as e:
-        print(f"Error during XML processing for {original_filename}: {type(e).__name__}: {e}")
-        raise Exception(f"Failed processing XML file {original_filename}: {e}")
-
-    return total_chunks_saved, total_embedding_tokens, embedding_model_name
-
-def process_yaml(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes YAML files using RecursiveCharacterTextSplitter for structured content."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
-    update_callback(status="Processing YAML file...")
-    total_chunks_saved = 0
-    total_embedding_tokens = 0
-    embedding_model_name = None
-    # Character-based chunking for YAML structure preservation
-    chunk_config = get_chunk_size_config(get_settings())
-    max_chunk_size_chars = chunk_config.get('yaml', {}).get('value', 4000)
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
-
-        upload_to_blob(**args)
-
-    try:
-        # Read YAML content
-        try:
-            with open(temp_file_path, 'r', encoding='utf-8') as f:
-                yaml_content = f.read()
-        except Exception as e:
-            raise Exception(f"Error reading YAML file {original_filename}: {e}")
-
-        # Use RecursiveCharacterTextSplitter with YAML-aware separators
-        # This preserves YAML structure better than simple word splitting
-        yaml_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=max_chunk_size_chars,
-            chunk_overlap=0,
-            length_function=len,
-            separators=["\n\n", "\n", "- ", " ", ""],  # YAML-friendly separators
-            is_separator_regex=False
+            if not metadata:
+                raise ValueError(f"No metadata found for document {document_id}")
+        first_page = chunk_buffer[0]["page_number"]
+        last_page = chunk_buffer[-1]["page_number"]
+        update_callback(
+            current_file_chunk=last_page,
+            status=f"Saving chunks {first_page}-{last_page}/{progress_total}..."
         )
+        add_file_task_to_file_processing_log(
+            document_id=document_id,
+            user_id=scope_id,
+            content=f"Saving {len(chunk_buffer)} chunks (pages {first_page}-{last_page}) for file_name:{file_name}"
+        )
+        batch_token_usage = save_chunks_batch(
+            chunk_buffer, user_id, document_id,
+            group_id=group_id, public_workspace_id=public_workspace_id,
+            metadata=metadata
+        )
+        total_chunks_saved += len(chunk_buffer)
+        if batch_token_usage:
+            total_embedding_tokens += batch_token_usage.get('total_tokens', 0)
+            if not embedding_model_name:
+                embedding_model_name = batch_token_usage.get('model_deployment_name')
+        chunk_buffer.clear()
+
+    for page_number, chunk_text in numbered_chunks:
+        chunk_buffer.append({
+            "page_text_content": chunk_text,
+            "page_number": page_number,
+            "file_name": file_name
+        })
+        if len(chunk_buffer) >= buffer_size:
+            flush()
 
-        # Split the YAML content
-        final_chunks = yaml_splitter.split_text(yaml_content)
-
-        initial_chunk_count = len(final_chunks)
-        update_callback(number_of_pages=initial_chunk_count)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            # Skip empty chunks
-            if not chunk_content or not chunk_content.strip():
-                print(f"Skipping empty YAML chunk {idx}/{initial_chunk_count}")
-                continue
-
-            update_callback(
-                current_file_chunk=idx,
-                status=f"Saving chunk {idx}/{initial_chunk_count}..."
-            )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": total_chunks_saved + 1,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            token_usage = save_chunks(**args)
-            total_chunks_saved += 1
-            
-            # Accumulate embedding tokens
-            if token_usage:
-                total_embedding_tokens += token_usage.get('total_tokens', 0)
-                if not embedding_model_name:
-                    embedding_model_name = token_usage.get('model_deployment_name')
-
-        # Final update with actual chunks saved
-        if total_chunks_saved != initial_chunk_count:
-            update_callback(number_of_pages=total_chunks_saved)
-            print(f"Adjusted final chunk count from {initial_chunk_count} to {total_chunks_saved} after skipping empty chunks.")
+    if chunk_buffer:
+        flush()
 
-    except Exception as e:
-        print(f"Error during YAML processing for {original_filename}: {type(e).__name__}: {e}")
-        raise Exception(f"Failed processing YAML file {original_filename}: {e}")
+    if estimated_chunks is not None and total_chunks_saved != estimated_chunks:
+        update_callback(number_of_pages=total_chunks_saved)
+        debug_print(f"[INGEST] Adjusted final chunk count from {estimated_chunks} to {total_chunks_saved} after skipping empty chunks.")
 
     return total_chunks_saved, total_embedding_tokens, embedding_model_name
 
-def process_log(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes LOG files using line-based chunking to maintain log record integrity."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
-    update_callback(status="Processing LOG file...")
-    total_chunks_saved = 0
-    total_embedding_tokens = 0
-    embedding_model_name = None
+def process_txt(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
+    """Processes plain text files."""
+    update_callback(status="Processing TXT file...")
     chunk_config = get_chunk_size_config(get_settings())
-    target_words_per_chunk = chunk_config.get('log', {}).get('value', 1000)  # Word-based chunking for better semantic grouping
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
+    target_words_per_chunk = chunk_config.get('txt', {}).get('value', 400)
 
-        upload_to_blob(**args)
+    _upload_source_for_enhanced_citations(
+        enable_enhanced_citations, temp_file_path, user_id, document_id, original_filename,
+        update_callback, group_id=group_id, public_workspace_id=public_workspace_id
+    )
 
     try:
         with open(temp_file_path, 'r', encoding='utf-8') as f:
             content = f.read()
 
-        # Split by lines to maintain log record integrity
-        lines = content.splitlines(keepends=True)  # Keep line endings
-        
-        if not lines:
-            raise Exception(f"LOG file {original_filename} is empty")
-
-        # Chunk by accumulating lines until reaching target word count
-        final_chunks = []
-        current_chunk_lines = []
-        current_chunk_word_count = 0
-
-        for line in lines:
-            line_word_count = len(line.split())
-            
-            # If adding this line exceeds target AND we already have content
-            if current_chunk_word_count + line_word_count > target_words_per_chunk and current_chunk_lines:
-                # Finalize current chunk
-                final_chunks.append("".join(current_chunk_lines))
-                # Start new chunk with current line
-                current_chunk_lines = [line]
-                current_chunk_word_count = line_word_count
-            else:
-                # Add line to current chunk
-                current_chunk_lines.append(line)
-                current_chunk_word_count += line_word_count
-
-        # Add the last remaining chunk if it has content
-        if current_chunk_lines:
-            final_chunks.append("".join(current_chunk_lines))
-
-        num_chunks = len(final_chunks)
-        update_callback(number_of_pages=num_chunks)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            if chunk_content.strip():
-                update_callback(
-                    current_file_chunk=idx,
-                    status=f"Saving chunk {idx}/{num_chunks}..."
-                )
-                args = {
-                    "page_text_content": chunk_content,
-                    "page_number": idx,
-                    "file_name": original_filename,
-                    "user_id": user_id,
-                    "document_id": document_id
-                }
-
-                if is_public_workspace:
-                    args["public_workspace_id"] = public_workspace_id
-                elif is_group:
-                    args["group_id"] = group_id
-
-                token_usage = save_chunks(**args)
-                total_chunks_saved += 1
-                
-                # Accumulate embedding tokens
-                if token_usage:
-                    total_embedding_tokens += token_usage.get('total_tokens', 0)
-                    if not embedding_model_name:
-                        embedding_model_name = token_usage.get('model_deployment_name')
-
-    except Exception as e:
-        raise Exception(f"Failed processing LOG file {original_filename}: {e}")
-
-    return total_chunks_saved, total_embedding_tokens, embedding_model_name
-
-def process_doc(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """
-    Processes legacy .doc files via OLE piece tables and .docm files via docx2txt.
-    Note: .docx files still use Document Intelligence for better formatting preservation.
-    """
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
-    update_callback(status=f"Processing {original_filename.split('.')[-1].upper()} file...")
-    total_chunks_saved = 0
-    total_embedding_tokens = 0
-    embedding_model_name = None
-    chunk_config = get_chunk_size_config(get_settings())
-    file_ext = os.path.splitext(original_filename)[1].lower().lstrip('.')
-    target_words_per_chunk = chunk_config.get(file_ext, {}).get('value', 400)
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
-
-        upload_to_blob(**args)
-
-    try:
-        try:
-            text_content = extract_word_text(temp_file_path, f'.{file_ext}')
-        except Exception as e:
-            raise Exception(f"Error extracting text from {original_filename}: {e}")
-
-        if not text_content or not text_content.strip():
-            raise Exception(f"No text content extracted from {original_filename}")
-
-        # Split into words for chunking
-        words = text_content.split()
-        if not words:
-            raise Exception(f"No text content found in {original_filename}")
-
-        # Create chunks of target_words_per_chunk words
-        final_chunks = []
-        for i in range(0, len(words), target_words_per_chunk):
-            chunk_words = words[i:i + target_words_per_chunk]
-            chunk_text = " ".join(chunk_words)
-            final_chunks.append(chunk_text)
-
-        num_chunks = len(final_chunks)
-        update_callback(number_of_pages=num_chunks)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            if chunk_content.strip():
-                update_callback(
-                    current_file_chunk=idx,
-                    status=f"Saving chunk {idx}/{num_chunks}..."
-                )
-                args = {
-                    "page_text_content": chunk_content,
-                    "page_number": idx,
-                    "file_name": original_filename,
-                    "user_id": user_id,
-                    "document_id": document_id
-                }
-
-                if is_public_workspace:
-                    args["public_workspace_id"] = public_workspace_id
-                elif is_group:
-                    args["group_id"] = group_id
-
-                token_usage = save_chunks(**args)
-                total_chunks_saved += 1
-                
-                # Accumulate embedding tokens
-                if token_usage:
-                    total_embedding_tokens += token_usage.get('total_tokens', 0)
-                    if not embedding_model_name:
-                        embedding_model_name = token_usage.get('model_deployment_name')
-
-    except Exception as e:
-        raise Exception(f"Failed processing {original_filename}: {e}")
-
-    return total_chunks_saved, total_embedding_tokens, embedding_model_name
-
-def process_xml(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes XML files using RecursiveCharacterTextSplitter for structured content."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
-    update_callback(status="Processing XML file...")
-    total_chunks_saved = 0
-    # Character-based chunking for XML structure preservation, capped by embedding context
-    chunk_config = get_chunk_size_config(get_settings())
-    max_chunk_size_chars = chunk_config.get('xml', {}).get('value', 4000)
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_group:
-            args["group_id"] = group_id
-        elif is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-
-        upload_to_blob(**args)
-
-    try:
-        # Read XML content
-        try:
-            with open(temp_file_path, 'r', encoding='utf-8') as f:
-                xml_content = f.read()
-        except Exception as e:
-            raise Exception(f"Error reading XML file {original_filename}: {e}")
+        num_chunks_estimated = math.ceil(len(content.split()) / target_words_per_chunk)
+        update_callback(number_of_pages=num_chunks_estimated) # Use number_of_pages for chunk count
 
-        # Use RecursiveCharacterTextSplitter with XML-aware separators
-        # This preserves XML structure better than simple word splitting
-        xml_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=max_chunk_size_chars,
-            chunk_overlap=0,
-            length_function=len,
-            separators=["\n\n", "\n", ">", " ", ""],  # XML-friendly separators
-            is_separator_regex=False
+        return ingest_document_chunks(
+            iter_numbered_chunks(iter_word_chunks(content, target_words_per_chunk)),
+            document_id, user_id, original_filename, update_callback,
+            estimated_chunks=num_chunks_estimated,
+            group_id=group_id, public_workspace_id=public_workspace_id
         )
 
-        # Split the XML content
-        final_chunks = xml_splitter.split_text(xml_content)
-
-        initial_chunk_count = len(final_chunks)
-        update_callback(number_of_pages=initial_chunk_count)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            # Skip empty chunks
-            if not chunk_content or not chunk_content.strip():
-                print(f"Skipping empty XML chunk {idx}/{initial_chunk_count}")
-                continue
-
-            update_callback(
-                current_file_chunk=idx,
-                status=f"Saving chunk {idx}/{initial_chunk_count}..."
-            )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": total_chunks_saved + 1,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            save_chunks(**args)
-            total_chunks_saved += 1
-
-        # Final update with actual chunks saved
-        if total_chunks_saved != initial_chunk_count:
-            update_callback(number_of_pages=total_chunks_saved)
-            print(f"Adjusted final chunk count from {initial_chunk_count} to {total_chunks_saved} after skipping empty chunks.")
-
-    except Exception as e:
-        print(f"Error during XML processing for {original_filename}: {type(e).__name__}: {e}")
-        raise Exception(f"Failed processing XML file {original_filename}: {e}")
-
-    return total_chunks_saved
-
-def process_yaml(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes YAML files using RecursiveCharacterTextSplitter for structured content."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
-    update_callback(status="Processing YAML file...")
-    total_chunks_saved = 0
-    # Character-based chunking for YAML structure preservation, capped by embedding context
-    chunk_config = get_chunk_size_config(get_settings())
-    max_chunk_size_chars = chunk_config.get('yaml', {}).get('value', 4000)
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
+    except Exception as e:
+        raise Exception(f"Failed processing TXT file {original_filename}: {e}")
 
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
+def _process_structured_text(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, file_type, separators, group_id=None, public_workspace_id=None):
+    """Processes XML and YAML files using RecursiveCharacterTextSplitter with format-aware separators."""
+    file_label = file_type.upper()
+    update_callback(status=f"Processing {file_label} file...")
+    # Character-based chunking for structure preservation, capped by embedding context
+    chunk_config = get_chunk_size_config(get_settings())
+    max_chunk_size_chars = chunk_config.get(file_type, {}).get('value', 4000)
 
-        upload_to_blob(**args)
+    _upload_source_for_enhanced_citations(
+        enable_enhanced_citations, temp_file_path, user_id, document_id, original_filename,
+        update_callback, group_id=group_id, public_workspace_id=public_workspace_id
+    )
 
     try:
-        # Read YAML content
         try:
             with open(temp_file_path, 'r', encoding='utf-8') as f:
-                yaml_content = f.read()
+                text_content = f.read()
         except Exception as e:
-            raise Exception(f"Error reading YAML file {original_filename}: {e}")
+            raise Exception(f"Error reading {file_label} file {original_filename}: {e}")
 
-        # Use RecursiveCharacterTextSplitter with YAML-aware separators
-        # This preserves YAML structure better than simple word splitting
-        yaml_splitter = RecursiveCharacterTextSplitter(
+        # This preserves document structure better than simple word splitting
+        splitter = RecursiveCharacterTextSplitter(
             chunk_size=max_chunk_size_chars,
             chunk_overlap=0,
             length_function=len,
-            separators=["\n\n", "\n", "- ", " ", ""],  # YAML-friendly separators
+            separators=separators,
             is_separator_regex=False
         )
+        final_chunks = splitter.split_text(text_content)
+        update_callback(number_of_pages=len(final_chunks))
 
-        # Split the YAML content
-        final_chunks = yaml_splitter.split_text(yaml_content)
-
-        initial_chunk_count = len(final_chunks)
-        update_callback(number_of_pages=initial_chunk_count)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            # Skip empty chunks
-            if not chunk_content or not chunk_content.strip():
-                print(f"Skipping empty YAML chunk {idx}/{initial_chunk_count}")
-                continue
-
-            update_callback(
-                current_file_chunk=idx,
-                status=f"Saving chunk {idx}/{initial_chunk_count}..."
-            )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": total_chunks_saved + 1,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            save_chunks(**args)
-            total_chunks_saved += 1
-
-        # Final update with actual chunks saved
-        if total_chunks_saved != initial_chunk_count:
-            update_callback(number_of_pages=total_chunks_saved)
-            print(f"Adjusted final chunk count from {initial_chunk_count} to {total_chunks_saved} after skipping empty chunks.")
+        return ingest_document_chunks(
+            iter_numbered_chunks(final_chunks, sequential_page_numbers=True),
+            document_id, user_id, original_filename, update_callback,
+            estimated_chunks=len(final_chunks),
+            group_id=group_id, public_workspace_id=public_workspace_id
+        )
 
     except Exception as e:
-        print(f"Error during YAML processing for {original_filename}: {type(e).__name__}: {e}")
-        raise Exception(f"Failed processing YAML file {original_filename}: {e}")
+        print(f"Error during {file_label} processing for {original_filename}: {type(e).__name__}: {e}")
+        raise Exception(f"Failed processing {file_label} file {original_filename}: {e}")
+
+def process_xml(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
+    """Processes XML files using RecursiveCharacterTextSplitter for structured content."""
+    return _process_structured_text(
+        document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback,
+        file_type='xml',
+        separators=["\n\n", "\n", ">", " ", ""],  # XML-friendly separators
+        group_id=group_id, public_workspace_id=public_workspace_id
+    )
 
-    return total_chunks_saved
+def process_yaml(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
+    """Processes YAML files using RecursiveCharacterTextSplitter for structured content."""
+    return _process_structured_text(
+        document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback,
+        file_type='yaml',
+        separators=["\n\n", "\n", "- ", " ", ""],  # YAML-friendly separators
+        group_id=group_id, public_workspace_id=public_workspace_id
+    )
 
 def process_log(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
     """Processes LOG files using line-based chunking to maintain log record integrity."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
     update_callback(status="Processing LOG file...")
-    total_chunks_saved = 0
-    target_words_per_chunk = 1000  # Word-based chunking for better semantic grouping
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
+    chunk_config = get_chunk_size_config(get_settings())
+    target_words_per_chunk = chunk_config.get('log', {}).get('value', 1000)  # Word-based chunking for better semantic grouping
 
-        upload_to_blob(**args)
+    _upload_source_for_enhanced_citations(
+        enable_enhanced_citations, temp_file_path, user_id, document_id, original_filename,
+        update_callback, group_id=group_id, public_workspace_id=public_workspace_id
+    )
 
     try:
         with open(temp_file_path, 'r', encoding='utf-8') as f:
@@ -4856,95 +4905,37 @@ def process_log(document_id, user_id, temp_file_path, original_filename, enable_
 
         # Split by lines to maintain log record integrity
         lines = content.splitlines(keepends=True)  # Keep line endings
-        
+
         if not lines:
             raise Exception(f"LOG file {original_filename} is empty")
 
-        # Chunk by accumulating lines until reaching target word count
-        final_chunks = []
-        current_chunk_lines = []
-        current_chunk_word_count = 0
-
-        for line in lines:
-            line_word_count = len(line.split())
-            
-            # If adding this line exceeds target AND we already have content
-            if current_chunk_word_count + line_word_count > target_words_per_chunk and current_chunk_lines:
-                # Finalize current chunk
-                final_chunks.append("".join(current_chunk_lines))
-                # Start new chunk with current line
-                current_chunk_lines = [line]
-                current_chunk_word_count = line_word_count
-            else:
-                # Add line to current chunk
-                current_chunk_lines.append(line)
-                current_chunk_word_count += line_word_count
-
-        # Add the last remaining chunk if it has content
-        if current_chunk_lines:
-            final_chunks.append("".join(current_chunk_lines))
-
-        num_chunks = len(final_chunks)
-        update_callback(number_of_pages=num_chunks)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            if chunk_content.strip():
-                update_callback(
-                    current_file_chunk=idx,
-                    status=f"Saving chunk {idx}/{num_chunks}..."
-                )
-                args = {
-                    "page_text_content": chunk_content,
-                    "page_number": idx,
-                    "file_name": original_filename,
-                    "user_id": user_id,
-                    "document_id": document_id
-                }
-
-                if is_public_workspace:
-                    args["public_workspace_id"] = public_workspace_id
-                elif is_group:
-                    args["group_id"] = group_id
+        final_chunks = list(iter_line_chunks(lines, target_words_per_chunk))
+        update_callback(number_of_pages=len(final_chunks))
 
-                save_chunks(**args)
-                total_chunks_saved += 1
+        return ingest_document_chunks(
+            iter_numbered_chunks(final_chunks),
+            document_id, user_id, original_filename, update_callback,
+            estimated_chunks=len(final_chunks),
+            group_id=group_id, public_workspace_id=public_workspace_id
+        )
 
     except Exception as e:
         raise Exception(f"Failed processing LOG file {original_filename}: {e}")
 
-    return total_chunks_saved
-
 def process_doc(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
     """
     Processes legacy .doc files via OLE piece tables and .docm files via docx2txt.
     Note: .docx files still use Document Intelligence for better formatting preservation.
     """
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
     update_callback(status=f"Processing {original_filename.split('.')[-1].upper()} file...")
-    total_chunks_saved = 0
-    total_embedding_tokens = 0
-    embedding_model_name = None
     chunk_config = get_chunk_size_config(get_settings())
     file_ext = os.path.splitext(original_filename)[1].lower().lstrip('.')
     target_words_per_chunk = chunk_config.get(file_ext, {}).get('value', 400)
 
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
-
-        upload_to_blob(**args)
+    _upload_source_for_enhanced_citations(
+        enable_enhanced_citations, temp_file_path, user_id, document_id, original_filename,
+        update_callback, group_id=group_id, public_workspace_id=public_workspace_id
+    )
 
     try:
         try:
@@ -4955,58 +4946,21 @@ def process_doc(document_id, user_id, temp_file_path, original_filename, enable_
         if not text_content or not text_content.strip():
             raise Exception(f"No text content extracted from {original_filename}")
 
-        # Split into words for chunking
-        words = text_content.split()
-        if not words:
-            raise Exception(f"No text content found in {original_filename}")
-
-        # Create chunks of target_words_per_chunk words
-        final_chunks = []
-        for i in range(0, len(words), target_words_per_chunk):
-            chunk_words = words[i:i + target_words_per_chunk]
-            chunk_text = " ".join(chunk_words)
-            final_chunks.append(chunk_text)
-
-        num_chunks = len(final_chunks)
+        num_chunks = math.ceil(len(text_content.split()) / target_words_per_chunk)
         update_callback(number_of_pages=num_chunks)
 
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            if chunk_content.strip():
-                update_callback(
-                    current_file_chunk=idx,
-                    status=f"Saving chunk {idx}/{num_chunks}..."
-                )
-                args = {
-                    "page_text_content": chunk_content,
-                    "page_number": idx,
-                    "file_name": original_filename,
-                    "user_id": user_id,
-                    "document_id": document_id
-                }
-
-                if is_public_workspace:
-                    args["public_workspace_id"] = public_workspace_id
-                elif is_group:
-                    args["group_id"] = group_id
-
-                token_usage = save_chunks(**args)
-                total_chunks_saved += 1
-
-                if token_usage:
-                    total_embedding_tokens += token_usage.get('total_tokens', 0)
-                    if not embedding_model_name:
-                        embedding_model_name = token_usage.get('model_deployment_name')
+        return ingest_document_chunks(
+            iter_numbered_chunks(iter_word_chunks(text_content, target_words_per_chunk)),
+            document_id, user_id, original_filename, update_callback,
+            estimated_chunks=num_chunks,
+            group_id=group_id, public_workspace_id=public_workspace_id
+        )
 
     except Exception as e:
         raise Exception(f"Failed processing {original_filename}: {e}")
 
-    return total_chunks_saved, total_embedding_tokens, embedding_model_name
-
 def process_html(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
     """Processes HTML files."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
     update_callback(status="Processing HTML file...")
     total_chunks_saved = 0
     total_embedding_tokens = 0
@@ -5015,20 +4969,10 @@ def process_html(document_id, user_id, temp_file_path, original_filename, enable
     target_chunk_words = chunk_config.get('html', {}).get('value', 1200) # Target size based on requirement
     min_chunk_words = max(1, int(target_chunk_words * 0.5)) # Minimum size based on requirement
 
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
-
-        upload_to_blob(**args)
+    _upload_source_for_enhanced_citations(
+        enable_enhanced_citations, temp_file_path, user_id, document_id, original_filename,
+        update_callback, group_id=group_id, public_workspace_id=public_workspace_id
+    )
 
     try:
         # --- CHANGE HERE: Open in binary mode ('rb') ---
@@ -5071,32 +5015,12 @@ def process_html(document_id, user_id, temp_file_path, original_filename, enable
         num_chunks_final = len(final_chunks)
         update_callback(number_of_pages=num_chunks_final) # Use number_of_pages for chunk count
 
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            update_callback(
-                current_file_chunk=idx,
-                status=f"Saving chunk {idx}/{num_chunks_final}..."
-            )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": idx,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            token_usage = save_chunks(**args)
-            total_chunks_saved += 1
-            
-            # Accumulate embedding tokens
-            if token_usage:
-                total_embedding_tokens += token_usage.get('total_tokens', 0)
-                if not embedding_model_name:
-                    embedding_model_name = token_usage.get('model_deployment_name')
+        total_chunks_saved, total_embedding_tokens, embedding_model_name = ingest_document_chunks(
+            enumerate(final_chunks, start=1),
+            document_id, user_id, original_filename, update_callback,
+            estimated_chunks=num_chunks_final,
+            group_id=group_id, public_workspace_id=public_workspace_id
+        )
 
     except Exception as e:
         # Catch potential BeautifulSoup errors too
@@ -5135,9 +5059,6 @@ def process_html(document_id, user_id, temp_file_path, original_filename, enable
 
 def process_md(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
     """Processes Markdown files."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
     update_callback(status="Processing Markdown file...")
     total_chunks_saved = 0
     total_embedding_tokens = 0
@@ -5146,21 +5067,10 @@ def process_md(document_id, user_id, temp_file_path, original_filename, enable_e
     target_chunk_words = chunk_config.get('md', {}).get('value', 1200) # Target size based on requirement
     min_chunk_words = max(1, int(target_chunk_words * 0.5)) # Minimum size based on requirement
 
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_group:
-            args["group_id"] = group_id
-        elif is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-
-        upload_to_blob(**args)
+    _upload_source_for_enhanced_citations(
+        enable_enhanced_citations, temp_file_path, user_id, document_id, original_filename,
+        update_callback, group_id=group_id, public_workspace_id=public_workspace_id
+    )
 
     try:
         with open(temp_file_path, 'r', encoding='utf-8') as f:
@@ -5209,32 +5119,12 @@ def process_md(document_id, user_id, temp_file_path, original_filename, enable_e
         num_chunks_final = len(final_chunks)
         update_callback(number_of_pages=num_chunks_final)
 
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            update_callback(
-                current_file_chunk=idx,
-                status=f"Saving chunk {idx}/{num_chunks_final}..."
-            )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": idx,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            token_usage = save_chunks(**args)
-            total_chunks_saved += 1
-            
-            # Accumulate embedding tokens
-            if token_usage:
-                total_embedding_tokens += token_usage.get('total_tokens', 0)
-                if not embedding_model_name:
-                    embedding_model_name = token_usage.get('model_deployment_name')
+        total_chunks_saved, total_embedding_tokens, embedding_model_name = ingest_document_chunks(
+            enumerate(final_chunks, start=1),
+            document_id, user_id, original_filename, update_callback,
+            estimated_chunks=num_chunks_final,
+            group_id=group_id, public_workspace_id=public_workspace_id
+        )
 
     except Exception as e:
         raise Exception(f"Failed processing Markdown file {original_filename}: {e}")
@@ -5272,9 +5162,6 @@ def process_md(document_id, user_id, temp_file_path, original_filename, enable_e
 
 def process_json(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
     """Processes JSON files using RecursiveJsonSplitter."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
     update_callback(status="Processing JSON file...")
     total_chunks_saved = 0
     total_embedding_tokens = 0
@@ -5283,22 +5170,10 @@ def process_json(document_id, user_id, temp_file_path, original_filename, enable
     # Reflects character count limit for the splitter
     max_chunk_size_chars = chunk_config.get('json', {}).get('value', 4000)
 
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_group:
-            args["group_id"] = group_id
-        elif is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-
-        upload_to_blob(**args)
-
+    _upload_source_for_enhanced_citations(
+        enable_enhanced_citations, temp_file_path, user_id, document_id, original_filename,
+        update_callback, group_id=group_id, public_workspace_id=public_workspace_id
+    )
 
     try:
         # Load the JSON data first to ensure it's valid
@@ -5328,44 +5203,17 @@ def process_json(document_id, user_id, temp_file_path, original_filename, enable
         initial_chunk_count = len(final_chunks_text)
         update_callback(number_of_pages=initial_chunk_count) # Initial estimate
 
-        for idx, chunk_content in enumerate(final_chunks_text, start=1):
-            # Skip potentially empty or trivial chunks (e.g., "{}" or "[]" or just "")
-            # Stripping allows checking for empty strings potentially generated
-            if not chunk_content or chunk_content == '""' or chunk_content == '{}' or chunk_content == '[]' or not chunk_content.strip('{}[]" '):
-                print(f"Skipping empty or trivial JSON chunk {idx}/{initial_chunk_count}")
-                continue # Skip saving this chunk
-
-            update_callback(
-                current_file_chunk=idx, # Use original index for progress display
-                # Keep number_of_pages as initial estimate during saving loop
-                status=f"Saving chunk {idx}/{initial_chunk_count}..."
-            )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": total_chunks_saved + 1,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            token_usage = save_chunks(**args)
-            total_chunks_saved += 1 # Increment only when a chunk is actually saved
-            
-            # Accumulate embedding tokens
-            if token_usage:
-                total_embedding_tokens += token_usage.get('total_tokens', 0)
-                if not embedding_model_name:
-                    embedding_model_name = token_usage.get('model_deployment_name')
-
-        # Final update with the actual number of chunks saved
-        if total_chunks_saved != initial_chunk_count:
-            update_callback(number_of_pages=total_chunks_saved)
-            print(f"Adjusted final chunk count from {initial_chunk_count} to {total_chunks_saved} after skipping empty chunks.")
+        # Skip potentially empty or trivial chunks (e.g., "{}" or "[]" or just "")
+        total_chunks_saved, total_embedding_tokens, embedding_model_name = ingest_document_chunks(
+            iter_numbered_chunks(
+                final_chunks_text,
+                sequential_page_numbers=True,
+                is_trivial_chunk=lambda chunk_content: chunk_content in ('""', '{}', '[]') or not chunk_content.strip('{}[]" ')
+            ),
+            document_id, user_id, original_filename, update_callback,
+            estimated_chunks=initial_chunk_count,
+            group_id=group_id, public_workspace_id=public_workspace_id
+        )
 
 
     except Exception as e:
@@ -5659,6 +5507,34 @@ def process_single_tabular_sheet(df, document_id, user_id, file_name, update_cal
 
     return total_chunks_saved, total_embedding_tokens, embedding_model_name
 
+def _create_tabular_snapshot_for_upload(document_id, blob_path, temp_file_path, original_filename, update_callback, group_id=None, public_workspace_id=None):
+    """Write the columnar snapshot the tabular plugin reads instead of re-parsing the uploaded file."""
+    if not is_tabular_snapshot_enabled(get_settings()):
+        return
+
+    try:
+        current_document = _get_documents_container(group_id=group_id, public_workspace_id=public_workspace_id).read_item(
+            item=document_id,
+            partition_key=document_id,
+        )
+        container_name = current_document.get("blob_container") or _get_blob_container_name(
+            group_id=group_id,
+            public_workspace_id=public_workspace_id,
+        )
+        update_callback(status=f"Building tabular snapshot for {original_filename}...")
+        create_tabular_snapshot_from_file(
+            container_name,
+            blob_path,
+            temp_file_path,
+            source_etag=get_tabular_blob_etag(container_name, blob_path),
+        )
+    except Exception as snapshot_error:
+        # The plugin backfills the snapshot on first use, so this never fails the upload
+        log_event(
+            f"[process_tabular] Could not build tabular snapshot for {original_filename}: {snapshot_error}",
+            level=logging.WARNING,
+        )
+
 def process_tabular(document_id, user_id, temp_file_path, original_filename, file_ext, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
     """Processes CSV, XLSX, or XLS files using pandas."""
     is_group = group_id is not None
@@ -5684,8 +5560,17 @@ def process_tabular(document_id, user_id, temp_file_path, original_filename, fil
         elif is_group:
             args["group_id"] = group_id
 
-        upload_to_blob(**args)
+        blob_path = upload_to_blob(**args)
         update_callback(enhanced_citations=True, status=f"Enhanced citations enabled for {file_ext}")
+        _create_tabular_snapshot_for_upload(
+            document_id,
+            blob_path,
+            temp_file_path,
+            original_filename,
+            update_callback,
+            group_id=group_id,
+            public_workspace_id=public_workspace_id,
+        )
 
     # When enhanced citations is on, index a single schema summary chunk
     # instead of row-by-row chunking. The tabular processing plugin handles analysis.
@@ -6594,20 +6479,18 @@ def process_document_upload_background(document_id, user_id, temp_file_path, ori
     audio_extensions = tuple('.' + ext for ext in AUDIO_EXTENSIONS)
 
     # --- Define update_document callback wrapper ---
-    # This makes it easier to pass the update function to helpers without repeating args
-    def update_doc_callback(**kwargs):
-        args = {
-            "document_id": document_id,
-            "user_id": user_id,
-            **kwargs  # includes any dynamic update fields
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
+    # This makes it easier to pass the update function to helpers without repeating args.
+    # Progress updates are coalesced so large documents don't write once per chunk.
+    progress_reporter = DocumentProgressReporter(
+        document_id=document_id,
+        user_id=user_id,
+        group_id=group_id if is_group and not is_public_workspace else None,
+        public_workspace_id=public_workspace_id,
+        flush_interval_seconds=settings.get('document_progress_flush_interval_seconds', 2)
+    )
 
-        update_document(**args)
+    def update_doc_callback(**kwargs):
+        progress_reporter.update(**kwargs)
 
 
     total_chunks_saved = 0
@@ -6963,6 +6846,11 @@ def process_document_upload_background(document_id, user_id, temp_file_path, ori
 
     finally:
         # --- 3. Cleanup ---
+        try:
+            progress_reporter.flush()
+        except Exception as flush_e:
+            print(f"Warning: Failed to flush progress for document {document_id}: {flush_e}")
+
         # Clean up the original temporary file path regardless of success or failure
         if temp_file_path and os.path.exists(temp_file_path):
             try:
@@ -7106,6 +6994,7 @@ def share_document_with_user(document_id, owner_user_id, target_user_id):
             
             # Update the document
             cosmos_user_documents_container.upsert_item(document_item)
+            bump_document_set_fingerprint("personal", target_user_id)
             
             # Update all chunks with the new shared_user_ids
             try:
@@ -7170,6 +7059,7 @@ def unshare_document_from_user(document_id, owner_user_id, target_user_id):
             document_item['last_updated'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
             # Update the document
             cosmos_user_documents_container.upsert_item(document_item)
+            bump_document_set_fingerprint("personal", target_user_id)
             
             # Update all chunks with the new shared_user_ids
             try:
@@ -7333,6 +7223,7 @@ def share_document_with_group(document_id, owner_group_id, target_group_id):
             
             # Update the document
             cosmos_group_documents_container.upsert_item(document_item)
+            bump_document_set_fingerprint("group", target_group_id)
             return True
 
         return True  # Already shared
@@ -7372,6 +7263,7 @@ def unshare_document_from_group(document_id, owner_group_id, target_group_id):
             
             # Update the document
             cosmos_group_documents_container.upsert_item(document_item)
+            bump_document_set_fingerprint("group", target_group_id)
         
         return True
         
@@ -2,6 +2,7 @@
 
 from config import *
 from functions_settings import *
+from utils_log_writer import enqueue_log_item
 
 def add_file_task_to_file_processing_log(document_id, user_id, content):
     settings = get_settings()
@@ -17,7 +18,8 @@ def add_file_task_to_file_processing_log(document_id, user_id, content):
                 "log": content,
                 "timestamp": datetime.utcnow().isoformat()
             }
-            cosmos_file_processing_container.create_item(log_item)
+            # Written by the background log writer so chunk loops don't wait on Cosmos
+            enqueue_log_item(cosmos_file_processing_container, log_item, partition_key_path="document_id")
         except Exception as e:
             raise e
         
@@ -7,16 +7,32 @@ This module handles all operations related to notifications stored in the
 notifications container. Supports personal, group, and public workspace scoped
 notifications with per-user read/dismiss tracking.
 
-Version: 0.234.032
+Every user has an inbox in their own partition of the notifications container:
+one entry per notification with its own is_read/is_dismissed flags, plus an
+inbox state document holding the unread and total counters. Group and public
+workspace notifications are fanned out to the members' inboxes when they are
+created. Membership is checked again when the inbox is read: copies from a group
+or public workspace the user has left are removed, and earlier notifications of
+a scope the user has joined are copied in. Assignment notifications target
+roles, which cannot be enumerated at write time, so they are copied into an
+inbox when the user next reads it. The navbar badge is a point read of the
+inbox state and the notification list is a single-partition query paged with
+continuation tokens.
+
+Version: 0.241.027
 Implemented in: 0.234.032
 """
 
 # Imports (grouped after docstring)
+import threading
+import time
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from azure.core import MatchConditions
 from azure.cosmos import exceptions
 from flask import current_app
 import logging
+import app_settings_cache
 from config import cosmos_notifications_container
 from functions_group import find_group_by_id
 from functions_debug import debug_print
@@ -25,6 +41,17 @@ from functions_public_workspaces import find_public_workspace_by_id, get_user_pu
 # Constants
 TTL_60_DAYS = 60 * 24 * 60 * 60  # 60 days in seconds (5184000)
 ASSIGNMENT_NOTIFICATIONS_PARTITION_KEY = 'assignment-notifications'
+INBOX_STATE_ID_PREFIX = 'notification_inbox_state_'
+ASSIGNMENT_FEED_REFRESH_SECONDS = 30
+ASSIGNMENT_FEED_VERSION_NAME = 'notification_assignment_feed'
+ASSIGNMENT_SYNC_OVERLAP_SECONDS = 300
+SCOPE_MEMBERSHIP_REFRESH_SECONDS = 30
+UNREAD_BADGE_CAP = 10
+
+# Per-worker copy of the assignment notifications, shared by every user's inbox sync.
+# Creating or deleting an assignment notification bumps a shared version, so every worker reloads.
+_assignment_feed_lock = threading.Lock()
+_assignment_feed = {'loaded_at': 0.0, 'version': None, 'notifications': []}
 
 # Notification type registry for extensibility
 NOTIFICATION_TYPES = {
@@ -97,6 +124,9 @@ NOTIFICATION_TYPES = {
 
 def _get_notification_partition_key(notification):
     """Resolve the Cosmos partition key for a notification document."""
+    if notification.get('inbox_entry'):
+        return notification.get('user_id')
+
     if notification.get('scope') == 'assignment':
         return ASSIGNMENT_NOTIFICATIONS_PARTITION_KEY
 
@@ -127,6 +157,534 @@ def _get_notification_display_message(notification):
     return message
 
 
+def _decorate_notification(notification):
+    """Add the UI fields the notifications page and dropdown render."""
+    notification['message'] = _get_notification_display_message(notification)
+    notification['is_read'] = bool(notification.get('is_read'))
+    notification['is_dismissed'] = bool(notification.get('is_dismissed'))
+    notification['type_config'] = NOTIFICATION_TYPES.get(
+        notification.get('notification_type'),
+        NOTIFICATION_TYPES['system_announcement']
+    )
+    return notification
+
+
+def _notification_matches_assignment(notification, user_id, user_roles):
+    """Check whether an assignment notification targets the user by broadcast, role, or ownership."""
+    assignment = notification.get('assignment')
+    if not assignment:
+        return False
+
+    # Broadcast to all users regardless of role/ownership
+    if assignment.get('all_users'):
+        return True
+
+    if user_roles and any(role in user_roles for role in assignment.get('roles') or []):
+        return True
+
+    return user_id in (
+        assignment.get('personal_workspace_owner_id'),
+        assignment.get('group_owner_id'),
+        assignment.get('public_workspace_owner_id'),
+    )
+
+
+def _get_remaining_ttl(notification):
+    """Return the TTL that keeps an inbox copy from outliving its source notification."""
+    ttl = notification.get('ttl')
+    if not isinstance(ttl, int) or ttl <= 0:
+        return ttl
+
+    try:
+        created_at = datetime.fromisoformat(notification.get('created_at'))
+        age_seconds = (datetime.now(timezone.utc) - created_at).total_seconds()
+    except (TypeError, ValueError):
+        return ttl
+    return max(int(ttl - age_seconds), 60)
+
+
+def _get_inbox_reconcile_seconds():
+    """Return how often the inbox counters are recounted from the partition."""
+    try:
+        from functions_settings import get_settings
+        settings = get_settings() or {}
+    except Exception:
+        settings = {}
+    return max(int(settings.get('notification_inbox_reconcile_minutes', 60) or 0), 1) * 60
+
+
+def _get_inbox_state_id(user_id):
+    return f"{INBOX_STATE_ID_PREFIX}{user_id}"
+
+
+def _read_inbox_state(user_id):
+    """Point read of the user's inbox state, or None before the inbox exists."""
+    try:
+        return cosmos_notifications_container.read_item(
+            item=_get_inbox_state_id(user_id),
+            partition_key=user_id
+        )
+    except exceptions.CosmosResourceNotFoundError:
+        return None
+
+
+def _patch_inbox_state(user_id, unread_delta=0, total_delta=0, extra_operations=None):
+    """Apply counter deltas (and optional extra patch operations) to the inbox state."""
+    operations = []
+    if unread_delta:
+        operations.append({'op': 'incr', 'path': '/unread_count', 'value': unread_delta})
+    if total_delta:
+        operations.append({'op': 'incr', 'path': '/total_count', 'value': total_delta})
+    operations.extend(extra_operations or [])
+    if not operations:
+        return None
+
+    try:
+        return cosmos_notifications_container.patch_item(
+            item=_get_inbox_state_id(user_id),
+            partition_key=user_id,
+            patch_operations=operations
+        )
+    except exceptions.CosmosResourceNotFoundError:
+        # The inbox is created, and counted, on the user's next read
+        return None
+    except Exception as e:
+        debug_print(f"Error updating notification inbox state for {user_id}: {e}")
+        return None
+
+
+def _count_inbox_entries(user_id, include_read=True, include_dismissed=False):
+    query = "SELECT VALUE COUNT(1) FROM c WHERE c.inbox_entry = true"
+    if not include_dismissed:
+        query += " AND c.is_dismissed = false"
+    if not include_read:
+        query += " AND c.is_read = false"
+
+    results = list(cosmos_notifications_container.query_items(
+        query=query,
+        partition_key=user_id
+    ))
+    return int(results[0]) if results else 0
+
+
+def _reconcile_inbox_state(user_id, state):
+    """
+    Recount the inbox counters from the partition.
+
+    Counters are kept with incremental patches; entries removed by TTL expiry
+    and lost races are corrected here on a fixed interval.
+    """
+    state = state or {}
+    state = {
+        'id': _get_inbox_state_id(user_id),
+        'user_id': user_id,
+        'type': 'notification_inbox_state',
+        'assignment_watermark': state.get('assignment_watermark', ''),
+        'assignment_roles': state.get('assignment_roles'),
+        'assignment_checked_ids': state.get('assignment_checked_ids'),
+        'scope_memberships': state.get('scope_memberships'),
+        'scopes_checked_at': state.get('scopes_checked_at'),
+        'unread_count': _count_inbox_entries(user_id, include_read=False),
+        'total_count': _count_inbox_entries(user_id),
+        'reconciled_at': datetime.now(timezone.utc).isoformat(),
+    }
+    return cosmos_notifications_container.upsert_item(state)
+
+
+def _is_older_than(timestamp, max_age_seconds):
+    try:
+        recorded_at = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return True
+    return (datetime.now(timezone.utc) - recorded_at).total_seconds() >= max_age_seconds
+
+
+def _is_reconcile_due(state):
+    return _is_older_than(state.get('reconciled_at'), _get_inbox_reconcile_seconds())
+
+
+def _build_inbox_entry(notification, user_id, is_read=False, is_dismissed=False):
+    """Copy a group, public workspace, or assignment notification into a user's inbox."""
+    entry = {
+        key: value for key, value in notification.items()
+        if not key.startswith('_') and key not in ('read_by', 'dismissed_by')
+    }
+    entry.update({
+        # Deterministic id so a repeated fan-out or sync never duplicates an entry
+        'id': f"{notification['id']}_{user_id}",
+        'user_id': user_id,
+        'inbox_entry': True,
+        'source_notification_id': notification['id'],
+        'is_read': is_read,
+        'is_dismissed': is_dismissed,
+        'ttl': _get_remaining_ttl(notification),
+    })
+    return entry
+
+
+def _store_inbox_entry(entry):
+    """Create an inbox entry. Returns (unread_delta, total_delta) for the counters, zero if it already existed."""
+    try:
+        cosmos_notifications_container.create_item(entry)
+    except exceptions.CosmosResourceExistsError:
+        return 0, 0
+
+    if entry.get('is_dismissed'):
+        return 0, 0
+    return (0 if entry.get('is_read') else 1), 1
+
+
+def _get_notification_recipients(notification):
+    """Resolve the member user IDs of a group or public workspace notification."""
+    recipients = []
+    if notification.get('scope') == 'group':
+        group = find_group_by_id(notification['group_id']) or {}
+        recipients = [member.get('userId') for member in group.get('users', [])]
+    elif notification.get('scope') == 'public_workspace':
+        workspace = find_public_workspace_by_id(notification['public_workspace_id']) or {}
+        recipients.append((workspace.get('owner') or {}).get('userId'))
+        for admin in workspace.get('admins', []):
+            recipients.append(admin.get('userId') if isinstance(admin, dict) else admin)
+        recipients.extend(manager.get('userId') for manager in workspace.get('documentManagers', []))
+
+    return list(dict.fromkeys(user_id for user_id in recipients if user_id))
+
+
+def _fan_out_notification(notification):
+    """Write a group or public workspace notification into every member's inbox."""
+    delivered = 0
+    for user_id in _get_notification_recipients(notification):
+        try:
+            unread_delta, total_delta = _store_inbox_entry(_build_inbox_entry(notification, user_id))
+        except Exception as e:
+            debug_print(f"Error delivering notification {notification['id']} to {user_id}: {e}")
+            continue
+        _patch_inbox_state(user_id, unread_delta, total_delta)
+        delivered += 1
+    return delivered
+
+
+def _get_assignment_feed():
+    """
+    Return the assignment notifications.
+
+    The feed is reloaded when the shared feed version moves, which creating or
+    deleting an assignment notification does on any worker, and at least every
+    ASSIGNMENT_FEED_REFRESH_SECONDS so expired notifications drop out.
+    """
+    version = app_settings_cache.get_shared_cache_version(ASSIGNMENT_FEED_VERSION_NAME)
+    with _assignment_feed_lock:
+        if (
+            _assignment_feed['version'] == version
+            and time.monotonic() - _assignment_feed['loaded_at'] < ASSIGNMENT_FEED_REFRESH_SECONDS
+        ):
+            return _assignment_feed['notifications']
+
+    notifications = list(cosmos_notifications_container.query_items(
+        query="SELECT * FROM c WHERE c.scope = 'assignment' AND NOT IS_DEFINED(c.inbox_entry)",
+        enable_cross_partition_query=True
+    ))
+    with _assignment_feed_lock:
+        _assignment_feed['notifications'] = notifications
+        _assignment_feed['version'] = version
+        _assignment_feed['loaded_at'] = time.monotonic()
+    return notifications
+
+
+def _invalidate_assignment_feed():
+    """Make every worker reload the assignment feed on its next inbox sync."""
+    app_settings_cache.bump_shared_cache_version(ASSIGNMENT_FEED_VERSION_NAME)
+
+
+def _get_assignment_window_start(watermark):
+    """Return the created_at above which notifications are checked again for a watermark."""
+    if not watermark:
+        return ''
+    try:
+        return (datetime.fromisoformat(watermark) - timedelta(seconds=ASSIGNMENT_SYNC_OVERLAP_SECONDS)).isoformat()
+    except ValueError:
+        return ''
+
+
+def _sync_assignment_notifications(user_id, user_roles, state):
+    """
+    Copy assignment notifications created since the user's watermark into their inbox.
+
+    A notification can be committed after one with a later created_at (concurrent
+    writers, clock skew between workers), so the last ASSIGNMENT_SYNC_OVERLAP_SECONDS
+    below the watermark are checked again. The ids already checked in that window
+    are kept in the state, so nothing is checked twice.
+
+    The watermark only covers notifications checked against the roles stored
+    next to it. When the user's roles change the watermark is reset, so the
+    notifications of a newly gained role are copied in however old they are.
+    """
+    roles = sorted(set(user_roles or []))
+    roles_changed = state.get('assignment_roles') != roles
+    watermark = '' if roles_changed else (state.get('assignment_watermark') or '')
+    checked_ids = set() if roles_changed else set(state.get('assignment_checked_ids') or [])
+    window_start = _get_assignment_window_start(watermark)
+    feed = _get_assignment_feed()
+    newer = [
+        notification for notification in feed
+        if (notification.get('created_at') or '') > window_start and notification['id'] not in checked_ids
+    ]
+    if not newer and not roles_changed:
+        return state
+
+    unread_delta = 0
+    total_delta = 0
+    for notification in newer:
+        if not _notification_matches_assignment(notification, user_id, roles):
+            continue
+        entry = _build_inbox_entry(
+            notification,
+            user_id,
+            is_read=user_id in notification.get('read_by', []),
+            is_dismissed=user_id in notification.get('dismissed_by', [])
+        )
+        entry_unread, entry_total = _store_inbox_entry(entry)
+        unread_delta += entry_unread
+        total_delta += entry_total
+
+    new_watermark = max([watermark] + [notification.get('created_at') or '' for notification in newer])
+    new_window_start = _get_assignment_window_start(new_watermark)
+    checked_ids.update(notification['id'] for notification in newer)
+    patched = _patch_inbox_state(
+        user_id,
+        unread_delta,
+        total_delta,
+        [
+            {'op': 'set', 'path': '/assignment_watermark', 'value': new_watermark},
+            {'op': 'set', 'path': '/assignment_roles', 'value': roles},
+            {'op': 'set', 'path': '/assignment_checked_ids', 'value': sorted(
+                notification['id'] for notification in feed
+                if notification['id'] in checked_ids and (notification.get('created_at') or '') > new_window_start
+            )},
+        ]
+    )
+    return patched or state
+
+
+def _get_scope_key(notification):
+    """Return 'group:<id>' or 'public_workspace:<id>' for a scoped notification, else None."""
+    if notification.get('scope') == 'group':
+        return f"group:{notification.get('group_id')}"
+    if notification.get('scope') == 'public_workspace':
+        return f"public_workspace:{notification.get('public_workspace_id')}"
+    return None
+
+
+def _get_user_scope_keys(user_id):
+    """Return the scope keys of the groups and public workspaces the user currently receives notifications for."""
+    from functions_group import get_user_groups
+
+    scope_keys = [f"group:{group['id']}" for group in get_user_groups(user_id)]
+    scope_keys.extend(
+        f"public_workspace:{workspace['id']}" for workspace in get_user_public_workspaces(user_id)
+    )
+    return sorted(set(scope_keys))
+
+
+def _get_scope_source_notifications(scope_key):
+    """Return the group or public workspace notifications (not inbox copies) of a scope."""
+    scope, scope_id = scope_key.split(':', 1)
+    if scope == 'group':
+        query = "SELECT * FROM c WHERE c.group_id = @group_id AND NOT IS_DEFINED(c.inbox_entry)"
+        parameters = [{"name": "@group_id", "value": scope_id}]
+    else:
+        query = "SELECT * FROM c WHERE c.public_workspace_id = @workspace_id AND NOT IS_DEFINED(c.inbox_entry)"
+        parameters = [{"name": "@workspace_id", "value": scope_id}]
+
+    return [
+        notification for notification in cosmos_notifications_container.query_items(
+            query=query,
+            parameters=parameters,
+            enable_cross_partition_query=True
+        )
+        if _get_scope_key(notification) == scope_key
+    ]
+
+
+def _sync_scope_memberships(user_id, state):
+    """
+    Bring the inbox in line with the user's current group and public workspace memberships.
+
+    Fan-out only reaches the members at write time. Here the copies from scopes
+    the user has left are removed, and the notifications of scopes the user has
+    joined since the last check are copied in, keeping the read and dismissed
+    state recorded in their read_by/dismissed_by lists. The check runs at most
+    every SCOPE_MEMBERSHIP_REFRESH_SECONDS per user, for the list and the badge alike.
+    """
+    if not _is_older_than(state.get('scopes_checked_at'), SCOPE_MEMBERSHIP_REFRESH_SECONDS):
+        return state
+
+    memberships = _get_user_scope_keys(user_id)
+    previous = state.get('scope_memberships')
+    current = set(memberships)
+
+    if previous is None or set(previous) - current:
+        stale_entries = [
+            entry for entry in cosmos_notifications_container.query_items(
+                query="SELECT * FROM c WHERE c.inbox_entry = true AND c.scope IN ('group', 'public_workspace')",
+                partition_key=user_id
+            )
+            if _get_scope_key(entry) and _get_scope_key(entry) not in current
+        ]
+        # Counters are patched per deleted entry
+        _delete_notification_documents(stale_entries)
+
+    unread_delta = 0
+    total_delta = 0
+    for scope_key in sorted(current.difference(previous or [])):
+        for notification in _get_scope_source_notifications(scope_key):
+            entry_unread, entry_total = _store_inbox_entry(_build_inbox_entry(
+                notification,
+                user_id,
+                is_read=user_id in notification.get('read_by', []),
+                is_dismissed=user_id in notification.get('dismissed_by', [])
+            ))
+            unread_delta += entry_unread
+            total_delta += entry_total
+
+    patched = _patch_inbox_state(
+        user_id,
+        unread_delta,
+        total_delta,
+        [
+            {'op': 'set', 'path': '/scope_memberships', 'value': memberships},
+            {'op': 'set', 'path': '/scopes_checked_at', 'value': datetime.now(timezone.utc).isoformat()},
+        ]
+    )
+    return patched or state
+
+
+def _backfill_notification_inbox(user_id):
+    """
+    Convert a user's personal notifications created before inboxes existed.
+
+    Runs once per user, keeping the read and dismissed state recorded in their
+    read_by/dismissed_by lists. Group and public workspace notifications are
+    copied in by the first membership sync, and assignment notifications by
+    the first assignment sync.
+    """
+    personal_notifications = cosmos_notifications_container.query_items(
+        query="SELECT * FROM c WHERE c.user_id = @user_id AND NOT IS_DEFINED(c.inbox_entry)",
+        parameters=[{"name": "@user_id", "value": user_id}],
+        partition_key=user_id
+    )
+    for notification in personal_notifications:
+        if notification.get('id') == _get_inbox_state_id(user_id):
+            continue
+        notification['inbox_entry'] = True
+        notification['is_read'] = user_id in notification.get('read_by', [])
+        notification['is_dismissed'] = user_id in notification.get('dismissed_by', [])
+        cosmos_notifications_container.upsert_item(notification)
+
+    debug_print(f"Notification inbox backfilled for user {user_id}")
+
+
+def _ensure_notification_inbox(user_id, user_roles=None):
+    """
+    Return the user's inbox state, creating the inbox on first use.
+
+    Scope memberships are checked when the last check is too old. Assignment
+    notifications are synced only when the caller knows the user's roles; the
+    counters are recounted when the last reconcile is too old.
+    """
+    state = _read_inbox_state(user_id)
+    if state is None:
+        _backfill_notification_inbox(user_id)
+        state = _reconcile_inbox_state(user_id, None)
+
+    state = _sync_scope_memberships(user_id, state)
+
+    if user_roles is not None:
+        state = _sync_assignment_notifications(user_id, user_roles, state)
+
+    if _is_reconcile_due(state):
+        state = _reconcile_inbox_state(user_id, state)
+
+    return state
+
+
+def _update_inbox_entry(entry, is_read=None, is_dismissed=None):
+    """
+    Set the read/dismissed flags of an inbox entry.
+
+    Returns (unread_delta, total_delta) for the owner's counters. The patch is
+    conditional on the entry's ETag, so two concurrent marks count only once.
+    """
+    was_read = bool(entry.get('is_read'))
+    was_dismissed = bool(entry.get('is_dismissed'))
+    now_read = was_read if is_read is None else is_read
+    now_dismissed = was_dismissed if is_dismissed is None else is_dismissed
+    if (now_read, now_dismissed) == (was_read, was_dismissed):
+        return 0, 0
+
+    operations = [
+        {'op': 'set', 'path': '/is_read', 'value': now_read},
+        {'op': 'set', 'path': '/is_dismissed', 'value': now_dismissed},
+    ]
+    try:
+        cosmos_notifications_container.patch_item(
+            item=entry['id'],
+            partition_key=entry['user_id'],
+            patch_operations=operations,
+            etag=entry.get('_etag'),
+            match_condition=MatchConditions.IfNotModified
+        )
+    except exceptions.CosmosHttpResponseError as e:
+        if e.status_code == 412:
+            # Someone else changed the entry first; their update did the counting
+            return 0, 0
+        raise
+
+    was_unread = not was_read and not was_dismissed
+    now_unread = not now_read and not now_dismissed
+    return int(now_unread) - int(was_unread), int(not now_dismissed) - int(not was_dismissed)
+
+
+def _read_inbox_entry(notification_id, user_id):
+    try:
+        return cosmos_notifications_container.read_item(
+            item=notification_id,
+            partition_key=user_id
+        )
+    except exceptions.CosmosResourceNotFoundError:
+        return None
+
+
+def _delete_notification_documents(notifications):
+    """Delete notification documents and keep the owners' inbox counters in step."""
+    deleted_count = 0
+    for notification in notifications:
+        partition_key = _get_notification_partition_key(notification)
+        if not partition_key:
+            continue
+
+        try:
+            cosmos_notifications_container.delete_item(
+                item=notification['id'],
+                partition_key=partition_key
+            )
+            deleted_count += 1
+        except Exception as e:
+            debug_print(f"Error deleting notification {notification.get('id')}: {e}")
+            continue
+
+        if notification.get('inbox_entry') and not notification.get('is_dismissed'):
+            _patch_inbox_state(
+                notification['user_id'],
+                unread_delta=0 if notification.get('is_read') else -1,
+                total_delta=-1
+            )
+
+    if any(notification.get('scope') == 'assignment' and not notification.get('inbox_entry') for notification in notifications):
+        _invalidate_assignment_feed()
+    return deleted_count
+
+
 def get_notifications_by_metadata(metadata_filters=None, notification_types=None):
     """Fetch notifications matching metadata values and optional types."""
     try:
@@ -160,29 +718,12 @@ def get_notifications_by_metadata(metadata_filters=None, notification_types=None
 
 def delete_notifications_by_metadata(metadata_filters=None, notification_types=None):
     """Delete notifications matching metadata values and optional types."""
-    deleted_count = 0
+    # Inbox copies carry the same type and metadata, so they are matched and removed too
     notifications = get_notifications_by_metadata(
         metadata_filters=metadata_filters,
         notification_types=notification_types
     )
-
-    for notification in notifications:
-        partition_key = _get_notification_partition_key(notification)
-        if not partition_key:
-            continue
-
-        try:
-            cosmos_notifications_container.delete_item(
-                item=notification['id'],
-                partition_key=partition_key
-            )
-            deleted_count += 1
-        except Exception as e:
-            debug_print(
-                f"Error deleting notification {notification.get('id')} by metadata: {e}"
-            )
-
-    return deleted_count
+    return _delete_notification_documents(notifications)
 
 
 def create_notification(
@@ -252,7 +793,8 @@ def create_notification(
         
         notification_doc = {
             'id': str(uuid.uuid4()),
-            'user_id': user_id,
+            # The container is partitioned on /user_id, so assignment notifications carry their partition there
+            'user_id': user_id or (partition_key if scope == 'assignment' else None),
             'group_id': group_id,
             'public_workspace_id': public_workspace_id,
             'scope': scope,
@@ -269,9 +811,20 @@ def create_notification(
             'assignment': assignment or None
         }
         
+        if scope == 'personal':
+            # A personal notification is written straight into the user's inbox
+            notification_doc.update({'inbox_entry': True, 'is_read': False, 'is_dismissed': False})
+
         # Create in Cosmos with partition key based on scope
         cosmos_notifications_container.create_item(notification_doc)
-        
+
+        if scope == 'personal':
+            _patch_inbox_state(user_id, unread_delta=1, total_delta=1)
+        elif scope in ('group', 'public_workspace'):
+            _fan_out_notification(notification_doc)
+        else:
+            _invalidate_assignment_feed()
+
         debug_print(
             f"Notification created: {notification_doc['id']} "
             f"[{scope}] [{notification_type}] for partition: {partition_key}"
@@ -395,18 +948,30 @@ def create_chat_response_notification(
     )
 
 
-def get_user_notifications(user_id, page=1, per_page=20, include_read=True, include_dismissed=False, user_roles=None):
+def get_user_notifications(
+    user_id,
+    page=1,
+    per_page=20,
+    include_read=True,
+    include_dismissed=False,
+    user_roles=None,
+    continuation_token=None
+):
     """
-    Fetch notifications visible to a user from personal, group, and public workspace scopes.
-    Supports assignment-based notifications that target users by roles and/or ownership.
+    Fetch a page of the user's notification inbox, newest first.
+    The user's group and public workspace memberships are checked first when
+    the last check is too old, and assignment notifications targeting the
+    user's roles or ownership are synced into the inbox when user_roles is
+    provided.
     
     Args:
         user_id (str): User's unique identifier
-        page (int): Page number (1-indexed)
+        page (int): Page number (1-indexed), used when no continuation token is given
         per_page (int): Items per page
         include_read (bool): Include notifications already read by user
         include_dismissed (bool): Include notifications dismissed by user
         user_roles (list, optional): User's roles for assignment-based notifications
+        continuation_token (str, optional): Token from the previous page's response
         
     Returns:
         dict: {
@@ -414,135 +979,48 @@ def get_user_notifications(user_id, page=1, per_page=20, include_read=True, incl
             'total': int,
             'page': int,
             'per_page': int,
-            'has_more': bool
+            'has_more': bool,
+            'continuation_token': str or None
         }
     """
     try:
-        all_notifications = []
-        
-        # 1. Fetch personal notifications
-        personal_query = "SELECT * FROM c WHERE c.user_id = @user_id"
-        personal_params = [{"name": "@user_id", "value": user_id}]
-        
-        personal_notifications = list(cosmos_notifications_container.query_items(
-            query=personal_query,
-            parameters=personal_params,
-            partition_key=user_id
-        ))
-        all_notifications.extend(personal_notifications)
-        
-        # 2. Fetch group notifications for user's groups
-        from functions_group import get_user_groups
-        user_groups = get_user_groups(user_id)
-        
-        for group in user_groups:
-            group_id = group['id']
-            group_query = "SELECT * FROM c WHERE c.group_id = @group_id"
-            group_params = [{"name": "@group_id", "value": group_id}]
-            
-            group_notifications = list(cosmos_notifications_container.query_items(
-                query=group_query,
-                parameters=group_params,
-                enable_cross_partition_query=True
-            ))
-            all_notifications.extend(group_notifications)
-        
-        # 3. Fetch public workspace notifications
-        from functions_public_workspaces import get_user_public_workspaces
-        user_workspaces = get_user_public_workspaces(user_id)
-        
-        for workspace in user_workspaces:
-            workspace_id = workspace['id']
-            workspace_query = "SELECT * FROM c WHERE c.public_workspace_id = @workspace_id"
-            workspace_params = [{"name": "@workspace_id", "value": workspace_id}]
-            
-            workspace_notifications = list(cosmos_notifications_container.query_items(
-                query=workspace_query,
-                parameters=workspace_params,
-                enable_cross_partition_query=True
-            ))
-            all_notifications.extend(workspace_notifications)
-        
-        # 4. Fetch assignment-based notifications
-        assignment_query = "SELECT * FROM c WHERE c.scope = 'assignment'"
-        assignment_notifications = list(cosmos_notifications_container.query_items(
-            query=assignment_query,
-            enable_cross_partition_query=True
-        ))
-        
-        # Filter assignment notifications based on user's roles and ownership
-        for notif in assignment_notifications:
-            assignment = notif.get('assignment')
-            if not assignment:
-                continue
-            
-            # Check if user matches assignment criteria
-            user_matches = False
-
-            # Broadcast to all users regardless of role/ownership
-            if assignment.get('all_users'):
-                user_matches = True
-            
-            # Check roles
-            if not user_matches and user_roles and assignment.get('roles'):
-                for role in assignment.get('roles', []):
-                    if role in user_roles:
-                        user_matches = True
-                        break
-            
-            # Check ownership IDs
-            if not user_matches:
-                if assignment.get('personal_workspace_owner_id') == user_id:
-                    user_matches = True
-                elif assignment.get('group_owner_id') == user_id:
-                    user_matches = True
-                elif assignment.get('public_workspace_owner_id') == user_id:
-                    user_matches = True
-            
-            if user_matches:
-                all_notifications.append(notif)
-        
-        # Filter based on read/dismissed status
-        filtered_notifications = []
-        for notif in all_notifications:
-            notif_id = notif.get('id', 'unknown')
-            read_by = notif.get('read_by', [])
-            dismissed_by = notif.get('dismissed_by', [])
-            
-            if not include_dismissed and user_id in dismissed_by:
-                continue
-            if not include_read and user_id in read_by:
+        state = _ensure_notification_inbox(user_id, user_roles)
+
+        query = "SELECT * FROM c WHERE c.inbox_entry = true"
+        if not include_dismissed:
+            query += " AND c.is_dismissed = false"
+        if not include_read:
+            query += " AND c.is_read = false"
+        query += " ORDER BY c.created_at DESC"
+
+        pager = cosmos_notifications_container.query_items(
+            query=query,
+            partition_key=user_id,
+            max_item_count=per_page
+        ).by_page(continuation_token)
+
+        # Without a token, walk forward to the requested page number
+        pages_to_skip = 0 if continuation_token else max(page - 1, 0)
+        notifications = []
+        for page_index, items in enumerate(pager):
+            if page_index < pages_to_skip:
                 continue
-            
-            # Add UI metadata
-            notif['message'] = _get_notification_display_message(notif)
-            notif['is_read'] = user_id in read_by
-            notif['is_dismissed'] = user_id in dismissed_by
-            notif['type_config'] = NOTIFICATION_TYPES.get(
-                notif.get('notification_type'),
-                NOTIFICATION_TYPES['system_announcement']
-            )
-            
-            filtered_notifications.append(notif)
-        
-        # Sort by created_at descending (newest first)
-        filtered_notifications.sort(
-            key=lambda x: x.get('created_at', ''),
-            reverse=True
-        )
-        
-        # Pagination
-        total = len(filtered_notifications)
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated = filtered_notifications[start_idx:end_idx]
-        
+            notifications = [_decorate_notification(item) for item in items]
+            break
+        next_token = pager.continuation_token
+
+        if include_dismissed:
+            total = _count_inbox_entries(user_id, include_read=include_read, include_dismissed=True)
+        else:
+            total = max(int(state.get('unread_count' if not include_read else 'total_count') or 0), 0)
+
         return {
-            'notifications': paginated,
+            'notifications': notifications,
             'total': total,
             'page': page,
             'per_page': per_page,
-            'has_more': end_idx < total
+            'has_more': bool(next_token),
+            'continuation_token': next_token
         }
         
     except Exception as e:
@@ -552,31 +1030,25 @@ def get_user_notifications(user_id, page=1, per_page=20, include_read=True, incl
             'total': 0,
             'page': page,
             'per_page': per_page,
-            'has_more': False
+            'has_more': False,
+            'continuation_token': None
         }
 
 
-def get_unread_notification_count(user_id):
+def get_unread_notification_count(user_id, user_roles=None):
     """
     Get count of unread notifications for a user across all scopes.
     
     Args:
         user_id (str): User's unique identifier
+        user_roles (list, optional): User's roles, to pick up new assignment notifications
         
     Returns:
-        int: Count of unread notifications (capped at 10 for efficiency)
+        int: Count of unread notifications (capped at 10 for the badge)
     """
     try:
-        # Get notifications without pagination
-        result = get_user_notifications(
-            user_id=user_id,
-            page=1,
-            per_page=10,  # Only need first 10 for badge display
-            include_read=False,
-            include_dismissed=False
-        )
-        
-        return min(result['total'], 10)  # Cap at 10 for display purposes
+        state = _ensure_notification_inbox(user_id, user_roles)
+        return min(max(int(state.get('unread_count') or 0), 0), UNREAD_BADGE_CAP)
         
     except Exception as e:
         debug_print(f"Error counting unread notifications for {user_id}: {e}")
@@ -588,45 +1060,21 @@ def mark_notification_read(notification_id, user_id):
     Mark a notification as read by a specific user.
     
     Args:
-        notification_id (str): Notification ID
+        notification_id (str): Inbox entry ID
         user_id (str): User ID marking as read
         
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        # First, find the notification across all partition keys
-        query = "SELECT * FROM c WHERE c.id = @notification_id"
-        params = [{"name": "@notification_id", "value": notification_id}]
-        
-        notifications = list(cosmos_notifications_container.query_items(
-            query=query,
-            parameters=params,
-            enable_cross_partition_query=True
-        ))
-        
-        if not notifications:
+        entry = _read_inbox_entry(notification_id, user_id)
+        if not entry or not entry.get('inbox_entry'):
             debug_print(f"Notification {notification_id} not found")
             return False
-        
-        notification = notifications[0]
-        
-        # Determine partition key
-        partition_key = _get_notification_partition_key(notification)
-        
-        if not partition_key:
-            debug_print(f"No partition key found for notification {notification_id}")
-            return False
-        
-        # Add user to read_by if not already present
-        read_by = notification.get('read_by', [])
-        if user_id not in read_by:
-            read_by.append(user_id)
-            notification['read_by'] = read_by
-            
-            cosmos_notifications_container.upsert_item(notification)
-            debug_print(f"Notification {notification_id} marked read by {user_id}")
-        
+
+        unread_delta, total_delta = _update_inbox_entry(entry, is_read=True)
+        _patch_inbox_state(user_id, unread_delta, total_delta)
+        debug_print(f"Notification {notification_id} marked read by {user_id}")
         return True
         
     except Exception as e:
@@ -634,39 +1082,42 @@ def mark_notification_read(notification_id, user_id):
         return False
 
 
+def _mark_inbox_entries_read(user_id, entries):
+    """Mark inbox entries read and apply the counter change in one patch."""
+    marked_count = 0
+    unread_delta = 0
+    total_delta = 0
+    for entry in entries:
+        entry_unread, entry_total = _update_inbox_entry(entry, is_read=True)
+        unread_delta += entry_unread
+        total_delta += entry_total
+        marked_count += 1
+
+    _patch_inbox_state(user_id, unread_delta, total_delta)
+    return marked_count
+
+
 def mark_chat_response_notifications_read_for_conversation(user_id, conversation_id):
     """Mark personal chat-completion notifications read for a conversation."""
     try:
         query = """
             SELECT * FROM c
-            WHERE c.user_id = @user_id
+            WHERE c.inbox_entry = true
+            AND c.is_read = false
             AND c.notification_type = @notification_type
             AND c.metadata.conversation_id = @conversation_id
         """
         params = [
-            {'name': '@user_id', 'value': user_id},
             {'name': '@notification_type', 'value': 'chat_response_complete'},
             {'name': '@conversation_id', 'value': conversation_id},
         ]
 
-        notifications = list(cosmos_notifications_container.query_items(
+        notifications = cosmos_notifications_container.query_items(
             query=query,
             parameters=params,
             partition_key=user_id
-        ))
-
-        marked_count = 0
-        for notification in notifications:
-            read_by = notification.get('read_by', [])
-            if user_id in read_by:
-                continue
-
-            read_by.append(user_id)
-            notification['read_by'] = read_by
-            cosmos_notifications_container.upsert_item(notification)
-            marked_count += 1
-
-        return marked_count
+        )
+        return _mark_inbox_entries_read(user_id, notifications)
     except Exception as e:
         debug_print(
             f"Error marking chat response notifications as read for conversation {conversation_id}: {e}"
@@ -676,48 +1127,24 @@ def mark_chat_response_notifications_read_for_conversation(user_id, conversation
 
 def dismiss_notification(notification_id, user_id):
     """
-    Dismiss a notification for a specific user (adds to dismissed_by).
+    Dismiss a notification for a specific user.
     
     Args:
-        notification_id (str): Notification ID
+        notification_id (str): Inbox entry ID
         user_id (str): User ID dismissing the notification
         
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        # Find notification across all partitions
-        query = "SELECT * FROM c WHERE c.id = @notification_id"
-        params = [{"name": "@notification_id", "value": notification_id}]
-        
-        notifications = list(cosmos_notifications_container.query_items(
-            query=query,
-            parameters=params,
-            enable_cross_partition_query=True
-        ))
-        
-        if not notifications:
+        entry = _read_inbox_entry(notification_id, user_id)
+        if not entry or not entry.get('inbox_entry'):
             debug_print(f"Notification {notification_id} not found")
             return False
-        
-        notification = notifications[0]
-        
-        # Determine partition key
-        partition_key = _get_notification_partition_key(notification)
-        
-        if not partition_key:
-            debug_print(f"No partition key found for notification {notification_id}")
-            return False
-        
-        # Add user to dismissed_by
-        dismissed_by = notification.get('dismissed_by', [])
-        if user_id not in dismissed_by:
-            dismissed_by.append(user_id)
-            notification['dismissed_by'] = dismissed_by
-            
-            cosmos_notifications_container.upsert_item(notification)
-            debug_print(f"Notification {notification_id} dismissed by {user_id}")
-        
+
+        unread_delta, total_delta = _update_inbox_entry(entry, is_dismissed=True)
+        _patch_inbox_state(user_id, unread_delta, total_delta)
+        debug_print(f"Notification {notification_id} dismissed by {user_id}")
         return True
         
     except Exception as e:
@@ -736,19 +1163,12 @@ def mark_all_read(user_id):
         int: Number of notifications marked as read
     """
     try:
-        # Get all unread notifications
-        result = get_user_notifications(
-            user_id=user_id,
-            page=1,
-            per_page=1000,  # Get all unread
-            include_read=False,
-            include_dismissed=True
+        _ensure_notification_inbox(user_id)
+        unread_entries = cosmos_notifications_container.query_items(
+            query="SELECT * FROM c WHERE c.inbox_entry = true AND c.is_read = false",
+            partition_key=user_id
         )
-        
-        count = 0
-        for notification in result['notifications']:
-            if mark_notification_read(notification['id'], user_id):
-                count += 1
+        count = _mark_inbox_entries_read(user_id, unread_entries)
         
         debug_print(f"Marked {count} notifications as read for user {user_id}")
         return count
@@ -761,6 +1181,7 @@ def mark_all_read(user_id):
 def delete_notification(notification_id):
     """
     Permanently delete a notification (admin only).
+    Deleting a source notification also removes its copies from every inbox.
     
     Args:
         notification_id (str): Notification ID to delete
@@ -769,8 +1190,7 @@ def delete_notification(notification_id):
         bool: True if successful, False otherwise
     """
     try:
-        # Find notification to get partition key
-        query = "SELECT * FROM c WHERE c.id = @notification_id"
+        query = "SELECT * FROM c WHERE c.id = @notification_id OR c.source_notification_id = @notification_id"
         params = [{"name": "@notification_id", "value": notification_id}]
         
         notifications = list(cosmos_notifications_container.query_items(
@@ -782,17 +1202,9 @@ def delete_notification(notification_id):
         if not notifications:
             return False
         
-        notification = notifications[0]
-        partition_key = _get_notification_partition_key(notification)
-        
-        if not partition_key:
+        if not _delete_notification_documents(notifications):
             return False
         
-        cosmos_notifications_container.delete_item(
-            item=notification_id,
-            partition_key=partition_key
-        )
-        
         debug_print(f"Notification {notification_id} permanently deleted")
         return True
         
@@ -0,0 +1,219 @@
+# functions_pdf_citation_cache.py
+"""
+Page-window cache for PDF enhanced citations.
+
+A PDF citation shows the cited page and its neighbours, extracted from the
+source PDF into a small sub-document. Clicking through several citations of
+the same large document used to download the whole PDF from Blob Storage on
+every click. Extracted page windows, and the page count of each source PDF,
+are now kept in a bounded disk cache shared by the worker processes of the
+container:
+
+    <cache_dir>/<sha256(container, blob, etag, start, end)>.pdf
+    <cache_dir>/<sha256(container, blob, etag)>.pages
+
+Keys include the source blob ETag, so a replaced PDF never serves an older
+extract. When the cache grows past its budget, the least recently used files
+are removed. The source PDF is only downloaded on a miss, and it is opened
+from memory without a temporary file.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Optional, Tuple
+
+from azure.core import MatchConditions
+
+from functions_debug import debug_print
+
+PDF_CITATION_CACHE_DIR_ENV = 'SIMPLECHAT_PDF_CITATION_CACHE_DIR'
+
+_pdf_citation_cache_lock = threading.Lock()
+_pdf_citation_cache_stats = {
+    "hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0,
+    "source_downloads": 0,
+}
+
+
+def get_pdf_citation_cache_settings(settings) -> Tuple[bool, int, str]:
+    """
+    Return (cache_enabled, max_bytes, cache_dir) for the PDF citation cache.
+
+    The directory defaults to the system temp directory and can be moved with
+    SIMPLECHAT_PDF_CITATION_CACHE_DIR.
+    """
+    settings = settings or {}
+    max_bytes = max(int(settings.get('pdf_citation_cache_max_mb', 512) or 0), 0) * 1024 * 1024
+    cache_dir = os.environ.get(PDF_CITATION_CACHE_DIR_ENV) or os.path.join(tempfile.gettempdir(), 'simplechat_pdf_citation_cache')
+    return bool(settings.get('enable_pdf_citation_cache', True)) and max_bytes > 0, max_bytes, cache_dir
+
+
+def get_pdf_citation_page_window(page_number: int, total_pages: int, show_all: bool = False) -> Optional[Tuple[int, int, int]]:
+    """
+    Return (start_idx, end_idx, new_page_number) for a citation, or None when the page is out of range.
+
+    Without show_all the window is the cited page and its neighbours (±1 page);
+    new_page_number is the position of the cited page inside the extracted document.
+    """
+    current_idx = page_number - 1  # zero-based
+    if current_idx < 0 or current_idx >= total_pages:
+        return None
+
+    if show_all:
+        return 0, total_pages - 1, page_number
+
+    start_idx = max(current_idx - 1, 0)
+    end_idx = min(current_idx + 1, total_pages - 1)
+    return start_idx, end_idx, current_idx - start_idx + 1
+
+
+def _get_cache_path(cache_dir: str, suffix: str, *key_parts) -> str:
+    key_text = '\n'.join(str(part) for part in key_parts)
+    return os.path.join(cache_dir, f"{hashlib.sha256(key_text.encode('utf-8')).hexdigest()}{suffix}")
+
+
+def _read_cache_file(cache_path: str) -> Optional[bytes]:
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            data = cache_file.read()
+        os.utime(cache_path)  # Mark as recently used for eviction
+    except OSError:
+        return None
+    return data
+
+
+def _write_cache_file(cache_dir: str, cache_path: str, data: bytes, max_bytes: int) -> None:
+    """Atomically write a cache file (owner-only, the extracts hold document content) and enforce the budget."""
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=cache_dir, prefix='.pdf_citation_', suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, cache_path)
+        except Exception:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    except OSError as e:
+        debug_print(f"[PDF Citation Cache] Failed to write {cache_path}: {e}")
+        return
+
+    with _pdf_citation_cache_lock:
+        _pdf_citation_cache_stats["stores"] += 1
+    _evict_to_budget(cache_dir, max_bytes)
+
+
+def _evict_to_budget(cache_dir: str, max_bytes: int) -> None:
+    """Remove least recently used cache files until the directory fits the budget."""
+    cache_files = []
+    total_bytes = 0
+    try:
+        with os.scandir(cache_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                stat_result = entry.stat()
+                cache_files.append((stat_result.st_mtime, stat_result.st_size, entry.path))
+                total_bytes += stat_result.st_size
+    except OSError:
+        return
+
+    if total_bytes <= max_bytes:
+        return
+
+    evicted = 0
+    for _, size_bytes, cache_path in sorted(cache_files):
+        if total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(cache_path)
+        except OSError:
+            continue  # Another worker removed it first
+        total_bytes -= size_bytes
+        evicted += 1
+
+    with _pdf_citation_cache_lock:
+        _pdf_citation_cache_stats["evictions"] += evicted
+
+
+def read_cached_pdf_page_count(settings, container_name: str, blob_name: str, etag: Optional[str]) -> Optional[int]:
+    """Return the cached page count of a source PDF revision, or None."""
+    cache_enabled, _, cache_dir = get_pdf_citation_cache_settings(settings)
+    if not cache_enabled or not etag:
+        return None
+    data = _read_cache_file(_get_cache_path(cache_dir, '.pages', container_name, blob_name, etag))
+    try:
+        return int(data) if data else None
+    except ValueError:
+        return None
+
+
+def store_pdf_page_count(settings, container_name: str, blob_name: str, etag: Optional[str], page_count: int) -> None:
+    """Cache the page count of a source PDF revision."""
+    cache_enabled, max_bytes, cache_dir = get_pdf_citation_cache_settings(settings)
+    if not cache_enabled or not etag:
+        return
+    cache_path = _get_cache_path(cache_dir, '.pages', container_name, blob_name, etag)
+    _write_cache_file(cache_dir, cache_path, str(int(page_count)).encode('ascii'), max_bytes)
+
+
+def read_cached_pdf_page_window(settings, container_name: str, blob_name: str, etag: Optional[str], start_idx: int, end_idx: int) -> Optional[bytes]:
+    """Return a cached extracted page window (zero-based, inclusive), or None on a miss."""
+    cache_enabled, _, cache_dir = get_pdf_citation_cache_settings(settings)
+    if not cache_enabled or not etag:
+        return None
+    data = _read_cache_file(_get_cache_path(cache_dir, '.pdf', container_name, blob_name, etag, start_idx, end_idx))
+    with _pdf_citation_cache_lock:
+        _pdf_citation_cache_stats["hits" if data is not None else "misses"] += 1
+    return data
+
+
+def store_pdf_page_window(settings, container_name: str, blob_name: str, etag: Optional[str], start_idx: int, end_idx: int, content: bytes) -> None:
+    """Cache an extracted page window. Windows larger than the whole budget are not cached."""
+    cache_enabled, max_bytes, cache_dir = get_pdf_citation_cache_settings(settings)
+    if not cache_enabled or not etag or len(content) > max_bytes:
+        return
+    cache_path = _get_cache_path(cache_dir, '.pdf', container_name, blob_name, etag, start_idx, end_idx)
+    _write_cache_file(cache_dir, cache_path, content, max_bytes)
+
+
+def open_pdf_citation_source(blob_client, etag: Optional[str] = None):
+    """Download a source PDF and open it from memory with PyMuPDF."""
+    import fitz  # PyMuPDF
+
+    download_kwargs = {}
+    if etag:
+        download_kwargs = {'etag': etag, 'match_condition': MatchConditions.IfNotModified}
+    content = blob_client.download_blob(**download_kwargs).readall()
+    with _pdf_citation_cache_lock:
+        _pdf_citation_cache_stats["source_downloads"] += 1
+    return fitz.open(stream=content, filetype='pdf')
+
+
+def extract_pdf_page_window(pdf_document, start_idx: int, end_idx: int) -> bytes:
+    """Return a new PDF holding pages start_idx..end_idx (zero-based, inclusive) of pdf_document."""
+    import fitz  # PyMuPDF
+
+    extracted_pdf = fitz.open()
+    try:
+        extracted_pdf.insert_pdf(pdf_document, from_page=start_idx, to_page=end_idx)
+        return extracted_pdf.tobytes()
+    finally:
+        extracted_pdf.close()
+
+
+def get_pdf_citation_cache_stats():
+    """Return this worker's PDF citation cache counters."""
+    with _pdf_citation_cache_lock:
+        stats = dict(_pdf_citation_cache_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
@@ -1,7 +1,10 @@
 # functions_search.py
 
 import logging
-from typing import List, Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
+from typing import Callable, List, Dict, Any, Tuple
 from config import *
 from functions_content import *
 from functions_public_workspaces import get_user_visible_public_workspace_docs, get_user_visible_public_workspace_ids_from_settings
@@ -15,6 +18,14 @@ from functions_debug import *
 
 logger = logging.getLogger(__name__)
 
+# Shared pool for fanning out per-index Azure AI Search queries. Sized for the
+# default gunicorn thread count (8) times the three document indexes.
+SEARCH_FANOUT_MAX_WORKERS = 24
+_search_fanout_executor = ThreadPoolExecutor(
+    max_workers=SEARCH_FANOUT_MAX_WORKERS,
+    thread_name_prefix="search-fanout"
+)
+
 
 def normalize_scores(results: List[Dict[str, Any]], index_name: str = "unknown") -> List[Dict[str, Any]]:
     """
@@ -94,6 +105,110 @@ def build_tags_filter(tags_filter):
     tag_conditions = [f"document_tags/any(t: t eq '{tag}')" for tag in safe_tags]
     return " and ".join(tag_conditions)
 
+def get_search_fanout_settings() -> Tuple[bool, float]:
+    """
+    Get the multi-index fan-out settings from app settings (admin configurable).
+    Falls back to defaults if settings are unavailable.
+
+    Returns:
+        tuple: (fanout_enabled, per_index_timeout_seconds)
+    """
+    try:
+        settings = get_settings()
+        timeout_seconds = float(settings.get('search_fanout_index_timeout_seconds', 10) or 0)
+        return (
+            bool(settings.get('enable_parallel_search_fanout', True)),
+            max(timeout_seconds, 0.0)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to load search fan-out settings, using defaults: {e}")
+        return (True, 10.0)
+
+
+def _execute_index_search(search_call: Callable[[], Any], top_n: int) -> List[Dict[str, Any]]:
+    """Run a deferred index search and materialize its results.
+
+    Azure AI Search returns a lazy pager, so the HTTP round-trip only happens
+    while the results are iterated. Extraction therefore runs inside the same
+    worker as the search call.
+    """
+    return extract_search_results(search_call(), top_n)
+
+
+def run_index_searches(
+    index_searches: Dict[str, Callable[[], Any]],
+    top_n: int
+) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+    """
+    Execute deferred per-index searches and return their extracted results.
+
+    When fan-out is enabled the searches run concurrently on a shared thread
+    pool and every index must answer within the configured per-index deadline
+    (measured from the start of the fan-out). An index that misses its
+    deadline contributes no results instead of holding up the whole turn.
+    When fan-out is disabled the searches run one after another with no
+    deadline, matching the original behavior.
+
+    Args:
+        index_searches: Mapping of index name to a zero-argument search callable
+        top_n: Maximum number of results to extract per index
+
+    Returns:
+        tuple: (results keyed by index name, list of index names that timed out)
+    """
+    if not index_searches:
+        return {}, []
+
+    fanout_enabled, timeout_seconds = get_search_fanout_settings()
+
+    if not fanout_enabled or len(index_searches) == 1:
+        return (
+            {
+                index_name: _execute_index_search(search_call, top_n)
+                for index_name, search_call in index_searches.items()
+            },
+            []
+        )
+
+    started_at = time.monotonic()
+    deadline = started_at + timeout_seconds if timeout_seconds > 0 else None
+    futures = {
+        index_name: _search_fanout_executor.submit(_execute_index_search, search_call, top_n)
+        for index_name, search_call in index_searches.items()
+    }
+
+    index_results = {}
+    timed_out_indexes = []
+    for index_name, future in futures.items():
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+        try:
+            index_results[index_name] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            future.cancel()
+            timed_out_indexes.append(index_name)
+            index_results[index_name] = []
+            logger.warning(
+                f"[SearchFanout] {index_name} exceeded the {timeout_seconds}s deadline; "
+                "continuing without its results"
+            )
+            debug_print(
+                "Index search exceeded fan-out deadline",
+                "SEARCH",
+                index=index_name,
+                timeout_seconds=timeout_seconds
+            )
+
+    debug_print(
+        "Parallel index fan-out complete",
+        "SEARCH",
+        index_count=len(futures),
+        timed_out=",".join(timed_out_indexes) or "none",
+        elapsed_ms=f"{(time.monotonic() - started_at) * 1000:.1f}"
+    )
+
+    return index_results, timed_out_indexes
+
+
 def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12, doc_scope="all", active_group_id=None, active_group_ids=None, active_public_workspace_id=None, enable_file_sharing=True, tags_filter=None):
     """
     Hybrid search that queries the user doc index, group doc index, or public doc index
@@ -232,7 +347,13 @@ def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12,
     # Build tags filter clause if provided
     tags_filter_clause = build_tags_filter(tags_filter)
 
+    # Results from an index that missed its fan-out deadline are dropped, so
+    # the merged result set is partial and must not be cached.
+    timed_out_indexes = []
+
     if doc_scope == "all":
+        # Deferred per-index searches, keyed by the index name used for normalization
+        index_searches = {}
         if doc_id_filter:
             # Build user filter with optional tags
             user_base_filter = (
@@ -245,7 +366,8 @@ def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12,
             )
             user_filter = f"{user_base_filter} and {tags_filter_clause}" if tags_filter_clause else user_base_filter
             
-            user_results = search_client_user.search(
+            index_searches["user_index"] = partial(
+                search_client_user.search,
                 search_text=query,
                 vector_queries=[vector_query],
                 filter=user_filter,
@@ -263,7 +385,8 @@ def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12,
                 group_base_filter = f"({group_conditions} or {shared_conditions}) and {doc_id_filter}"
                 group_filter = f"{group_base_filter} and {tags_filter_clause}" if tags_filter_clause else group_base_filter
 
-                group_results = search_client_group.search(
+                index_searches["group_index"] = partial(
+                    search_client_group.search,
                     search_text=query,
                     vector_queries=[vector_query],
                     filter=group_filter,
@@ -273,8 +396,6 @@ def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12,
                     query_answer="extractive",
                     select=["id", "chunk_text", "chunk_id", "file_name", "group_id", "version", "chunk_sequence", "upload_date", "document_classification", "document_tags", "page_number", "author", "chunk_keywords", "title", "chunk_summary"]
                 )
-            else:
-                group_results = []
 
             # Get visible public workspace IDs from user settings
             visible_public_workspace_ids = get_user_visible_public_workspace_ids_from_settings(user_id)
@@ -290,7 +411,8 @@ def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12,
             
             public_filter = f"{public_base_filter} and {tags_filter_clause}" if tags_filter_clause else public_base_filter
                 
-            public_results = search_client_public.search(
+            index_searches["public_index"] = partial(
+                search_client_public.search,
                 search_text=query,
                 vector_queries=[vector_query],
                 filter=public_filter,
@@ -309,7 +431,8 @@ def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12,
             )
             user_filter = f"{user_base_filter} and {tags_filter_clause}" if tags_filter_clause else user_base_filter.strip()
             
-            user_results = search_client_user.search(
+            index_searches["user_index"] = partial(
+                search_client_user.search,
                 search_text=query,
                 vector_queries=[vector_query],
                 filter=user_filter,
@@ -327,7 +450,8 @@ def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12,
                 group_base_filter = f"({group_conditions} or {shared_conditions})"
                 group_filter = f"{group_base_filter} and {tags_filter_clause}" if tags_filter_clause else group_base_filter
 
-                group_results = search_client_group.search(
+                index_searches["group_index"] = partial(
+                    search_client_group.search,
                     search_text=query,
                     vector_queries=[vector_query],
                     filter=group_filter,
@@ -337,8 +461,6 @@ def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12,
                     query_answer="extractive",
                     select=["id", "chunk_text", "chunk_id", "file_name", "group_id", "version", "chunk_sequence", "upload_date", "document_classification", "document_tags", "page_number", "author", "chunk_keywords", "title", "chunk_summary"]
                 )
-            else:
-                group_results = []
 
             # Get visible public workspace IDs from user settings
             visible_public_workspace_ids = get_user_visible_public_workspace_ids_from_settings(user_id)
@@ -354,7 +476,8 @@ def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12,
             
             public_filter = f"{public_base_filter} and {tags_filter_clause}" if tags_filter_clause else public_base_filter
                 
-            public_results = search_client_public.search(
+            index_searches["public_index"] = partial(
+                search_client_public.search,
                 search_text=query,
                 vector_queries=[vector_query],
                 filter=public_filter,
@@ -365,17 +488,19 @@ def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12,
                 select=["id", "chunk_text", "chunk_id", "file_name", "public_workspace_id", "version", "chunk_sequence", "upload_date", "document_classification", "document_tags", "page_number", "author", "chunk_keywords", "title", "chunk_summary"]
             )
 
-        # Extract results from each index
-        user_results_final = extract_search_results(user_results, top_n)
-        group_results_final = extract_search_results(group_results, top_n)
-        public_results_final = extract_search_results(public_results, top_n)
+        # Execute the per-index queries (concurrently when fan-out is enabled)
+        index_results, timed_out_indexes = run_index_searches(index_searches, top_n)
+        user_results_final = index_results.get("user_index", [])
+        group_results_final = index_results.get("group_index", [])
+        public_results_final = index_results.get("public_index", [])
         
         debug_print(
             "Extracted raw results from indexes",
             "SEARCH",
             user_count=len(user_results_final),
             group_count=len(group_results_final),
-            public_count=len(public_results_final)
+            public_count=len(public_results_final),
+            timed_out=",".join(timed_out_indexes) or "none"
         )
         
         # Normalize scores from each index to [0, 1] range for fair comparison
@@ -589,15 +714,17 @@ def hybrid_search(query, user_id, document_id=None, document_ids=None, top_n=12,
                     chunk=r['chunk_sequence']
                 )
     
-    # Cache the results before returning (pass scope parameters for correct partition key)
-    cache_search_results(
-        cache_key,
-        results,
-        user_id,
-        doc_scope,
-        active_group_ids=active_group_ids,
-        active_public_workspace_id=active_public_workspace_id
-    )
+    # Cache the results before returning (pass scope parameters for correct partition key).
+    # Partial results from a timed-out fan-out are not cached so the next turn retries.
+    if not timed_out_indexes:
+        cache_search_results(
+            cache_key,
+            results,
+            user_id,
+            doc_scope,
+            active_group_ids=active_group_ids,
+            active_public_workspace_id=active_public_workspace_id
+        )
     
     debug_print(
         "Search complete - returning results",
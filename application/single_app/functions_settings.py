@@ -5,6 +5,10 @@ from functions_appinsights import log_event
 import app_settings_cache
 import inspect
 import copy
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
 from support_menu_config import (
     get_default_support_latest_features_visibility,
     has_visible_support_latest_features,
@@ -27,7 +31,192 @@ def is_tabular_processing_enabled(settings):
     """Tabular processing is available whenever enhanced citations is enabled."""
     return bool((settings or {}).get('enable_enhanced_citations', False))
 
+class SettingsCopy(dict):
+    """
+    A caller's copy of the settings snapshot, copied lazily.
+
+    Top-level keys are the caller's own from the start. Nested dicts and lists are
+    still the snapshot's objects until they are first read through this
+    dictionary, at which point only that value is deep-copied. Changing the
+    result, nested values included, therefore never changes the snapshot, and a
+    request pays for copying only the nested values it actually reads.
+    """
+
+    __slots__ = ('_shared_keys',)
+
+    def __init__(self, data, shared_keys=()):
+        super().__init__(data)
+        self._shared_keys = set(shared_keys)
+
+    def _own(self, key):
+        if key in self._shared_keys:
+            self._shared_keys.discard(key)
+            if dict.__contains__(self, key):
+                dict.__setitem__(self, key, copy.deepcopy(dict.__getitem__(self, key)))
+
+    def _own_all(self):
+        for key in list(self._shared_keys):
+            self._own(key)
+
+    def __getitem__(self, key):
+        self._own(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        self._own(key)
+        return dict.get(self, key, default)
+
+    def setdefault(self, key, default=None):
+        self._own(key)
+        return dict.setdefault(self, key, default)
+
+    def pop(self, key, *default):
+        self._own(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        self._own_all()
+        return dict.popitem(self)
+
+    def __setitem__(self, key, value):
+        self._shared_keys.discard(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._shared_keys.discard(key)
+        dict.__delitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __or__(self, other):
+        return dict(self) | other
+
+    def __iter__(self):
+        # Overriding __iter__ makes dict(settings) and {**settings} copy through __getitem__
+        return dict.__iter__(self)
+
+    def items(self):
+        self._own_all()
+        return dict.items(self)
+
+    def values(self):
+        self._own_all()
+        return dict.values(self)
+
+    def copy(self):
+        return dict(self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class SettingsSnapshot:
+    """
+    Immutable, pre-merged app settings tagged with the cache version they were built from.
+
+    get_settings hands out a SettingsCopy, so callers can change their copy, nested
+    values included, without touching the snapshot other requests read.
+    """
+
+    __slots__ = ('data', 'version', 'etag', 'loaded_at', 'checked_at', 'nested_keys')
+
+    def __init__(self, settings_item, version):
+        self.data = MappingProxyType(copy.deepcopy(settings_item))
+        self.version = version
+        self.etag = settings_item.get('_etag')
+        self.loaded_at = time.time()
+        self.checked_at = self.loaded_at
+        self.nested_keys = frozenset(
+            key for key, value in self.data.items() if isinstance(value, (dict, list, set))
+        )
+
+    def to_dict(self):
+        return SettingsCopy(self.data, self.nested_keys)
+
+
+_settings_snapshot = None
+_settings_snapshot_lock = threading.Lock()
+
+
+def _read_settings_cache_version():
+    """Return the app settings cache version, or None when it cannot be read."""
+    version_accessor = getattr(app_settings_cache, "get_settings_cache_version", None)
+    if not callable(version_accessor):
+        return None
+    try:
+        return version_accessor()
+    except Exception as version_error:
+        log_event(
+            "Error reading app settings cache version.",
+            extra={
+                "error": str(version_error)
+            },
+            level=logging.WARNING
+        )
+        return None
+
+
+def get_settings_snapshot():
+    """
+    Return this worker's settings snapshot if it still matches the cache version.
+
+    The version is re-checked at most once per settings_snapshot_version_check_seconds,
+    which is a small integer GET in Redis mode instead of the whole settings document.
+    """
+    snapshot = _settings_snapshot
+    if snapshot is None:
+        return None
+
+    now = time.time()
+    check_interval = snapshot.data.get('settings_snapshot_version_check_seconds', 1) or 0
+    if now - snapshot.checked_at < check_interval:
+        return snapshot
+
+    version = _read_settings_cache_version()
+    if version is None or version != snapshot.version:
+        invalidate_settings_snapshot(snapshot)
+        return None
+    snapshot.checked_at = now
+    return snapshot
+
+
+def _store_settings_snapshot(settings_item, version):
+    global _settings_snapshot
+    if version is None or not settings_item.get('enable_settings_snapshot', True):
+        return
+    snapshot = SettingsSnapshot(settings_item, version)
+    with _settings_snapshot_lock:
+        _settings_snapshot = snapshot
+
+
+def invalidate_settings_snapshot(expected_snapshot=None):
+    """Drop this worker's settings snapshot so the next get_settings rebuilds it."""
+    global _settings_snapshot
+    with _settings_snapshot_lock:
+        if expected_snapshot is None or _settings_snapshot is expected_snapshot:
+            _settings_snapshot = None
+
 def get_settings(use_cosmos=False, include_source=False):
+    if not use_cosmos:
+        snapshot = get_settings_snapshot()
+        if snapshot is not None:
+            settings_payload = snapshot.to_dict()
+            if include_source:
+                return settings_payload, "snapshot"
+            return settings_payload
+
     import secrets
     default_settings = {
         # External health check
@@ -48,12 +237,20 @@ def get_settings(use_cosmos=False, include_source=False):
         'enable_default_embedding_model_plugin': False,
         'enable_fact_memory_plugin': True,
         'enable_tabular_processing_plugin': False,
+        'enable_tabular_snapshots': True,
+        'enable_tabular_dataframe_cache': True,
+        'tabular_dataframe_cache_max_mb': 512,
+        'enable_tabular_lookup_index': True,
+        'tabular_lookup_index_min_rows': 5000,
         'enable_multi_agent_orchestration': False,
         'max_rounds_per_agent': 1,
         'enable_semantic_kernel': False,
         'per_user_semantic_kernel': False,
         'orchestration_type': 'default_agent',
         'merge_global_semantic_kernel_with_workspace': False,
+        'enable_semantic_kernel_pool': True,
+        'semantic_kernel_pool_max_entries': 64,
+        'semantic_kernel_pool_ttl_seconds': 900,
         'global_selected_agent': {
             'name': 'researcher',
             'is_global': True
@@ -86,10 +283,13 @@ def get_settings(use_cosmos=False, include_source=False):
         'show_logo': False,
         'hide_app_title': False,
         'custom_logo_base64': '',
+        'custom_logo_hash': '',
         'logo_version': 1,
         'custom_logo_dark_base64': '',
+        'custom_logo_dark_hash': '',
         'logo_dark_version': 1,
         'custom_favicon_base64': '',
+        'custom_favicon_hash': '',
         'favicon_version': 1,
         'enable_dark_mode_default': False,
         'enable_left_nav_default': True,
@@ -146,6 +346,17 @@ def get_settings(use_cosmos=False, include_source=False):
         'azure_apim_embedding_subscription_key': '',
         'azure_apim_embedding_deployment': '',
         'azure_apim_embedding_api_version': '',
+        'embedding_rate_limit_requests_per_second': 10,
+        'embedding_rate_limit_burst': 10,
+        'embedding_batch_max_concurrency': 4,
+        'embedding_batch_token_budget': 32000,
+        'embedding_batch_max_items': 16,
+        'document_ingestion_buffer_size': 64,
+        'document_progress_flush_interval_seconds': 2,
+        'enable_embedding_cache': True,
+        'embedding_cache_l1_max_entries': 2048,
+        'embedding_cache_persistent_tier': 'redis',
+        'embedding_cache_ttl_seconds': 604800,
 
         # Image Generation Settings
         'enable_image_generation': False,
@@ -170,7 +381,9 @@ def get_settings(use_cosmos=False, include_source=False):
         'redis_url': '',
         'redis_key': '',
         'redis_auth_type': '',
-
+        'enable_shared_settings_cache_file': True,
+        'enable_settings_snapshot': True,
+        'settings_snapshot_version_check_seconds': 1,
 
         # Workspaces
         'enable_user_workspace': True,
@@ -233,6 +446,8 @@ def get_settings(use_cosmos=False, include_source=False):
         'enable_enhanced_citations': False,
         'enable_enhanced_citations_mount': False,
         'enhanced_citations_mount': '/view_documents',
+        'enable_pdf_citation_cache': True,
+        'pdf_citation_cache_max_mb': 512,
         'office_docs_storage_account_url': '',
         'office_docs_storage_account_blob_endpoint': '',
         'office_docs_authentication_type': 'key',
@@ -294,6 +509,14 @@ def get_settings(use_cosmos=False, include_source=False):
         # Search Result Caching
         'enable_search_result_caching': True,
         'search_cache_ttl_seconds': 300,
+        'enable_search_cache_l1': True,
+        'search_cache_l1_max_entries': 512,
+        'search_cache_l1_ttl_seconds': 60,
+        'enable_search_cache_l1_redis_invalidation': True,
+
+        # Multi-index search fan-out (doc_scope="all")
+        'enable_parallel_search_fanout': True,
+        'search_fanout_index_timeout_seconds': 10,
 
         'azure_document_intelligence_endpoint': '',
         'azure_document_intelligence_key': '',
@@ -338,6 +561,14 @@ def get_settings(use_cosmos=False, include_source=False):
         'max_file_size_mb': 150,
         'tabular_preview_max_blob_size_mb': 200,
         'conversation_history_limit': 10,
+        'enable_conversation_history_window': True,
+        'conversation_history_window_cache_max_entries': 256,
+        'notification_inbox_reconcile_minutes': 60,
+        'enable_user_settings_cache': True,
+        'user_settings_cache_ttl_seconds': 30,
+        'user_settings_cache_max_entries': 2048,
+        'enable_bearer_token_cache': True,
+        'bearer_token_cache_max_entries': 1024,
         'enable_idle_timeout': False,
         'idle_timeout_minutes': 30,
         'idle_warning_minutes': 28,
@@ -347,6 +578,10 @@ def get_settings(use_cosmos=False, include_source=False):
         # Default is hard-coded; admins can override via Admin Settings (persisted in Cosmos DB).
         'access_denied_message': 'You are logged in but do not have the required permissions to access this application.\nPlease contact an administrator for access.',
         'enable_file_processing_logs': True,
+        'enable_async_log_writer': True,
+        'log_writer_queue_size': 10000,
+        'log_writer_batch_size': 100,
+        'log_writer_flush_interval_seconds': 1.0,
         'file_processing_logs_timer_enabled': False,
         'file_timer_value': 1,
         'file_timer_unit': 'hours',
@@ -437,6 +672,8 @@ def get_settings(use_cosmos=False, include_source=False):
         else:
             settings_item = None
             settings_source = "cache"
+            # Read the version before the document so a concurrent update can only make the snapshot look older
+            settings_version = _read_settings_cache_version()
 
             cache_accessor = getattr(app_settings_cache, "get_settings_cache", None)
             if callable(cache_accessor):
@@ -492,11 +729,17 @@ def get_settings(use_cosmos=False, include_source=False):
         merge_changed = deep_merge_dicts(default_settings, settings_item)
         merged = settings_item
         migration_updated = apply_custom_endpoint_setting_migration(merged)
+        # Local import: functions_settings_assets needs the Cosmos clients from config
+        from functions_settings_assets import migrate_settings_assets
+        assets_migrated = migrate_settings_assets(merged)
 
         merged['enable_tabular_processing_plugin'] = is_tabular_processing_enabled(merged)
 
+        if not use_cosmos and not (merge_changed or migration_updated or assets_migrated):
+            _store_settings_snapshot(merged, settings_version)
+
         # If merging added anything new, upsert back to Cosmos so future reads remain up to date
-        if merge_changed or migration_updated:
+        if merge_changed or migration_updated or assets_migrated:
             cosmos_settings_container.upsert_item(merged)
             cache_updater = getattr(app_settings_cache, "update_settings_cache", None)
             if callable(cache_updater):
@@ -563,6 +806,7 @@ def update_settings(new_settings):
         cache_updater = getattr(app_settings_cache, "update_settings_cache", None)
         if callable(cache_updater):
             cache_updater(settings_item)
+        invalidate_settings_snapshot()
         log_event(
             "App settings updated successfully.",
             level=logging.INFO
@@ -1035,61 +1279,168 @@ def decrypt_key(encrypted_key):
         )
         return None
 
+_user_settings_cache = OrderedDict()
+_user_settings_cache_lock = threading.Lock()
+_user_settings_cache_stats = {
+    "hits": 0,
+    "misses": 0,
+    "request_hits": 0,
+    "invalidations": 0,
+}
+# Every write bumps a per-user shared version, so other workers drop their cached copy of that user
+USER_SETTINGS_VERSION_PREFIX = 'user_settings_'
+
+
+def _get_user_settings_cache_config():
+    """Return (enabled, ttl_seconds, max_entries) for the process-local user settings cache."""
+    try:
+        settings = get_settings() or {}
+    except Exception:
+        settings = {}
+    ttl_seconds = max(float(settings.get('user_settings_cache_ttl_seconds', 30) or 0), 0)
+    max_entries = max(int(settings.get('user_settings_cache_max_entries', 2048) or 0), 0)
+    enabled = bool(settings.get('enable_user_settings_cache', True)) and ttl_seconds > 0 and max_entries > 0
+    return enabled, ttl_seconds, max_entries
+
+
+def _get_user_settings_version_name(user_id):
+    return f"{USER_SETTINGS_VERSION_PREFIX}{user_id}"
+
+
+def _get_request_user_settings_memo():
+    """Return this request's user settings memo, or None outside a request."""
+    from flask import g, has_request_context
+    if not has_request_context():
+        return None
+    memo = getattr(g, '_user_settings_memo', None)
+    if memo is None:
+        memo = {}
+        g._user_settings_memo = memo
+    return memo
+
+
+def _read_cached_user_settings(user_id):
+    """Return the cached user settings document from this request or this worker, or None."""
+    memo = _get_request_user_settings_memo()
+    if memo is not None and user_id in memo:
+        with _user_settings_cache_lock:
+            _user_settings_cache_stats["request_hits"] += 1
+        return memo[user_id]
+
+    enabled, ttl_seconds, _ = _get_user_settings_cache_config()
+    if not enabled:
+        return None
+
+    shared_version = app_settings_cache.get_shared_cache_version(_get_user_settings_version_name(user_id))
+    with _user_settings_cache_lock:
+        entry = _user_settings_cache.get(user_id)
+        if entry is None or time.time() - entry[0] >= ttl_seconds or entry[2] != shared_version:
+            _user_settings_cache.pop(user_id, None)
+            _user_settings_cache_stats["misses"] += 1
+            return None
+        _user_settings_cache.move_to_end(user_id)
+        _user_settings_cache_stats["hits"] += 1
+        doc = entry[1]
+
+    if memo is not None:
+        memo[user_id] = doc
+    return doc
+
+
+def _store_user_settings(user_id, doc):
+    """Cache a user settings document for this request and, if enabled, this worker (write-through)."""
+    doc = copy.deepcopy(doc)
+    memo = _get_request_user_settings_memo()
+    if memo is not None:
+        memo[user_id] = doc
+
+    enabled, _, max_entries = _get_user_settings_cache_config()
+    if not enabled:
+        return
+
+    shared_version = app_settings_cache.get_shared_cache_version(_get_user_settings_version_name(user_id))
+    with _user_settings_cache_lock:
+        _user_settings_cache[user_id] = (time.time(), doc, shared_version)
+        _user_settings_cache.move_to_end(user_id)
+        while len(_user_settings_cache) > max_entries:
+            _user_settings_cache.popitem(last=False)
+
+
+def invalidate_user_settings_cache(user_id=None):
+    """
+    Drop one user's cached settings (or all of them) from this request and this worker.
+
+    Invalidating one user also bumps that user's shared version, so every other
+    worker drops its copy on the next read.
+    """
+    memo = _get_request_user_settings_memo()
+    if user_id is not None:
+        app_settings_cache.bump_shared_cache_version(_get_user_settings_version_name(user_id))
+    with _user_settings_cache_lock:
+        if user_id is None:
+            _user_settings_cache.clear()
+        else:
+            _user_settings_cache.pop(user_id, None)
+        _user_settings_cache_stats["invalidations"] += 1
+    if memo is not None:
+        if user_id is None:
+            memo.clear()
+        else:
+            memo.pop(user_id, None)
+
+
+def get_user_settings_cache_stats():
+    """Return this worker's user settings cache counters."""
+    with _user_settings_cache_lock:
+        stats = dict(_user_settings_cache_stats)
+        stats["entries"] = len(_user_settings_cache)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def _prepare_user_settings_doc(user_id, doc):
+    """Apply the settings defaults every reader expects. Returns True when the change should be persisted."""
+    updated = False
+
+    # Ensure the settings key exists for consistency downstream
+    if 'settings' not in doc or not isinstance(doc.get('settings'), dict):
+        previous_type = type(doc.get('settings')).__name__ if 'settings' in doc else 'missing'
+        doc['settings'] = {}
+        updated = True
+        log_event("[UserSettings] Malformed settings repaired", {
+            "user_id": user_id,
+            "previous_type": previous_type,
+        })
+
+    if 'personal_model_endpoints' not in doc['settings']:
+        doc['settings']['personal_model_endpoints'] = []
+    if 'showTutorialButtons' not in doc['settings']:
+        doc['settings']['showTutorialButtons'] = True
+        updated = True
+    return updated
+
+
 def get_user_settings(user_id):
-    """Fetches the user settings document from Cosmos DB, ensuring email and display_name are present if possible."""
+    """
+    Fetches the user settings document from Cosmos DB.
+
+    Reads are memoized for the current request and cached per worker for
+    user_settings_cache_ttl_seconds; writes through update_user_settings refresh
+    the cache. Email, display name and profile image are synced once per login
+    by sync_user_profile_on_login instead of on every read.
+    """
     from flask import session
+
+    cached_doc = _read_cached_user_settings(user_id)
+    if cached_doc is not None:
+        return copy.deepcopy(cached_doc)
+
     try:
         doc = cosmos_user_settings_container.read_item(item=user_id, partition_key=user_id)
-        updated = False
-
-        # Ensure the settings key exists for consistency downstream
-        if 'settings' not in doc or not isinstance(doc.get('settings'), dict):
-            previous_type = type(doc.get('settings')).__name__ if 'settings' in doc else 'missing'
-            doc['settings'] = {}
-            updated = True
-            log_event("[UserSettings] Malformed settings repaired", {
-                "user_id": user_id,
-                "previous_type": previous_type,
-            })
-
-        if 'personal_model_endpoints' not in doc['settings']:
-            doc['settings']['personal_model_endpoints'] = []
-        if 'showTutorialButtons' not in doc['settings']:
-            doc['settings']['showTutorialButtons'] = True
-            updated = True
-        
-        # Try to update email/display_name if missing and available in session
-        user = session.get("user", {})
-        email = user.get("preferred_username") or user.get("email")
-        display_name = user.get("name")
-        if email and doc.get("email") != email:
-            doc["email"] = email
-            updated = True
-        if display_name and doc.get("display_name") != display_name:
-            doc["display_name"] = display_name
-            updated = True
-            
-        # Check if profile image needs to be fetched
-        if 'profileImage' not in doc['settings']:
-            from functions_authentication import get_user_profile_image
-            try:
-                profile_image = get_user_profile_image()
-                doc['settings']['profileImage'] = profile_image
-                updated = True
-            except Exception as e:
-                log_event(
-                    "Could not fetch profile image for existing user.",
-                    extra={
-                        "user_id": user_id,
-                        "error": str(e)
-                    },
-                    level=logging.WARNING
-                )
-                doc['settings']['profileImage'] = None
-                updated = True
-        
-        if updated:
+        if _prepare_user_settings_doc(user_id, doc):
             cosmos_user_settings_container.upsert_item(body=doc)
+        _store_user_settings(user_id, doc)
         return doc
     except exceptions.CosmosResourceNotFoundError:
         # Return a default structure if the user has no settings saved yet
@@ -1103,24 +1454,14 @@ def get_user_settings(user_id):
             doc["email"] = email
         if display_name:
             doc["display_name"] = display_name
-            
-        # Try to fetch profile image for new user
-        from functions_authentication import get_user_profile_image
+
         try:
-            profile_image = get_user_profile_image()
-            doc['settings']['profileImage'] = profile_image
-        except Exception as e:
-            log_event(
-                "Could not fetch profile image for new user.",
-                extra={
-                    "user_id": user_id,
-                    "error": str(e)
-                },
-                level=logging.WARNING
-            )
-            doc['settings']['profileImage'] = None
-            
-        cosmos_user_settings_container.upsert_item(body=doc)
+            cosmos_user_settings_container.create_item(body=doc)
+        except exceptions.CosmosResourceExistsError:
+            # Created meanwhile (for example by the login sync); never overwrite it with defaults
+            doc = cosmos_user_settings_container.read_item(item=user_id, partition_key=user_id)
+            _prepare_user_settings_doc(user_id, doc)
+        _store_user_settings(user_id, doc)
         return doc
     except Exception as e:
         log_event(
@@ -1133,7 +1474,96 @@ def get_user_settings(user_id):
             exceptionTraceback=True
         )
         raise # Re-raise the exception to be handled by the route
-    
+
+
+def sync_user_profile_on_login(user_id, email=None, display_name=None, access_token=None):
+    """
+    Sync the user's email, display name and profile image into their settings.
+
+    Runs once per login as a background job, so the Graph photo request and the
+    extra write stay off the request path. Only these three fields are written,
+    with patch set operations, so settings saved concurrently by
+    update_user_settings are never overwritten.
+    """
+    profile_image_state = {}
+
+    def _fetch_profile_image():
+        # Fetched at most once, even if the document is re-read after a create conflict
+        if 'value' not in profile_image_state:
+            from functions_authentication import get_user_profile_image
+            try:
+                profile_image_state['value'] = get_user_profile_image(access_token=access_token)
+            except Exception as e:
+                log_event(
+                    "Could not fetch profile image at login.",
+                    extra={
+                        "user_id": user_id,
+                        "error": str(e)
+                    },
+                    level=logging.WARNING
+                )
+                profile_image_state['value'] = None
+        return profile_image_state['value']
+
+    try:
+        for _ in range(2):
+            try:
+                doc = cosmos_user_settings_container.read_item(item=user_id, partition_key=user_id)
+            except exceptions.CosmosResourceNotFoundError:
+                doc = None
+
+            if doc is None:
+                # No settings yet: create the default document with the profile fields
+                new_doc = {"id": user_id, "settings": {"profileImage": _fetch_profile_image()}}
+                if email:
+                    new_doc["email"] = email
+                if display_name:
+                    new_doc["display_name"] = display_name
+                _prepare_user_settings_doc(user_id, new_doc)
+                try:
+                    cosmos_user_settings_container.create_item(body=new_doc)
+                except exceptions.CosmosResourceExistsError:
+                    # The first settings read created the document meanwhile; patch that one instead
+                    continue
+                invalidate_user_settings_cache(user_id)
+                return True
+
+            patch_operations = []
+            if email and doc.get("email") != email:
+                patch_operations.append({"op": "set", "path": "/email", "value": email})
+            if display_name and doc.get("display_name") != display_name:
+                patch_operations.append({"op": "set", "path": "/display_name", "value": display_name})
+
+            # Fetch the profile image only for users that have never had one resolved
+            user_settings = doc.get("settings")
+            if not isinstance(user_settings, dict):
+                # Malformed settings are replaced anyway when the document is next read
+                patch_operations.append({"op": "set", "path": "/settings", "value": {"profileImage": _fetch_profile_image()}})
+            elif 'profileImage' not in user_settings:
+                patch_operations.append({"op": "set", "path": "/settings/profileImage", "value": _fetch_profile_image()})
+
+            if not patch_operations:
+                return False
+
+            cosmos_user_settings_container.patch_item(
+                item=user_id,
+                partition_key=user_id,
+                patch_operations=patch_operations
+            )
+            invalidate_user_settings_cache(user_id)
+            return True
+        return False
+    except Exception as e:
+        log_event(
+            "Error syncing user profile at login.",
+            extra={
+                "user_id": user_id,
+                "error": str(e)
+            },
+            level=logging.WARNING
+        )
+        return False
+
 def update_user_settings(user_id, settings_to_update):
     """
     Updates or creates user settings in Cosmos DB, merging new settings
@@ -1277,6 +1707,13 @@ def update_user_settings(user_id, settings_to_update):
         # Upsert the modified document
         cosmos_user_settings_container.upsert_item(body=doc) # Use body=doc for clarity
 
+        # Other workers must not keep serving the old active group, workspace, agent or access settings
+        app_settings_cache.bump_shared_cache_version(_get_user_settings_version_name(user_id))
+
+        # Write through so this worker's next read sees the change immediately
+        _prepare_user_settings_doc(user_id, doc)
+        _store_user_settings(user_id, doc)
+
         return True
 
     except exceptions.CosmosHttpResponseError as e:
@@ -1343,13 +1780,14 @@ def sanitize_settings_for_user(full_settings: dict) -> dict:
             sanitized[k] = v
 
     # Add boolean flags for logo/favicon existence so templates can check without exposing base64 data
-    # These fields are stripped by the base64 filter above, but templates need to know if logos exist
-    if 'custom_logo_base64' in full_settings:
-        sanitized['custom_logo_base64'] = bool(full_settings.get('custom_logo_base64'))
-    if 'custom_logo_dark_base64' in full_settings:
-        sanitized['custom_logo_dark_base64'] = bool(full_settings.get('custom_logo_dark_base64'))
-    if 'custom_favicon_base64' in full_settings:
-        sanitized['custom_favicon_base64'] = bool(full_settings.get('custom_favicon_base64'))
+    # These fields are stripped by the base64 filter above, but templates need to know if logos exist.
+    # The assets themselves now live outside the settings document and are tracked by content hash.
+    if 'custom_logo_base64' in full_settings or 'custom_logo_hash' in full_settings:
+        sanitized['custom_logo_base64'] = bool(full_settings.get('custom_logo_base64') or full_settings.get('custom_logo_hash'))
+    if 'custom_logo_dark_base64' in full_settings or 'custom_logo_dark_hash' in full_settings:
+        sanitized['custom_logo_dark_base64'] = bool(full_settings.get('custom_logo_dark_base64') or full_settings.get('custom_logo_dark_hash'))
+    if 'custom_favicon_base64' in full_settings or 'custom_favicon_hash' in full_settings:
+        sanitized['custom_favicon_base64'] = bool(full_settings.get('custom_favicon_base64') or full_settings.get('custom_favicon_hash'))
 
     if 'support_latest_features_visibility' in full_settings or 'enable_support_latest_features' in full_settings:
         sanitized['support_latest_features_visibility'] = normalize_support_latest_features_visibility(
@@ -1444,6 +1882,7 @@ def add_search_to_history(user_id, search_term):
         
         doc['search_history'] = search_history
         cosmos_user_settings_container.upsert_item(body=doc)
+        invalidate_user_settings_cache(user_id)
         
         return search_history
     except Exception as e:
@@ -1468,6 +1907,7 @@ def clear_user_search_history(user_id):
         
         doc['search_history'] = []
         cosmos_user_settings_container.upsert_item(body=doc)
+        invalidate_user_settings_cache(user_id)
         
         return True
     except Exception as e:
@@ -0,0 +1,176 @@
+# functions_settings_assets.py
+"""
+Branding assets (logos and favicon) stored outside the app_settings document.
+
+The settings document only carries a content hash per asset (custom_logo_hash,
+custom_logo_dark_hash, custom_favicon_hash). The bytes live in their own items in
+the settings container and are served by /settings-assets/<asset_name> with a
+strong ETag, so get_settings() no longer moves megabytes of base64 around.
+"""
+
+import base64
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from config import cosmos_settings_container
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+from functions_appinsights import log_event
+
+SETTINGS_ASSETS = {
+    'custom_logo': {
+        'hash_field': 'custom_logo_hash',
+        'legacy_field': 'custom_logo_base64',
+        'content_type': 'image/png',
+    },
+    'custom_logo_dark': {
+        'hash_field': 'custom_logo_dark_hash',
+        'legacy_field': 'custom_logo_dark_base64',
+        'content_type': 'image/png',
+    },
+    'custom_favicon': {
+        'hash_field': 'custom_favicon_hash',
+        'legacy_field': 'custom_favicon_base64',
+        'content_type': 'image/x-icon',
+    },
+}
+
+_asset_cache = {}
+_asset_cache_lock = threading.Lock()
+
+
+def _asset_item_id(asset_name):
+    return f"settings_asset_{asset_name}"
+
+
+def _hash_content(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def get_settings_asset_hash(settings, asset_name):
+    """Return the content hash the settings document records for an asset, or '' if none is set."""
+    asset_config = SETTINGS_ASSETS.get(asset_name)
+    if not asset_config or not isinstance(settings, dict):
+        return ''
+    return settings.get(asset_config['hash_field']) or ''
+
+
+def save_settings_asset(asset_name, content):
+    """
+    Store an asset's bytes in its own settings container item.
+
+    Args:
+        asset_name (str): One of SETTINGS_ASSETS
+        content (bytes): Encoded image bytes
+
+    Returns:
+        str: The sha256 content hash to record in the settings document
+    """
+    asset_config = SETTINGS_ASSETS[asset_name]
+    content_hash = _hash_content(content)
+    cosmos_settings_container.upsert_item({
+        'id': _asset_item_id(asset_name),
+        'type': 'settings_asset',
+        'asset_name': asset_name,
+        'content_type': asset_config['content_type'],
+        'content_base64': base64.b64encode(content).decode('utf-8'),
+        'sha256': content_hash,
+        'size': len(content),
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+    })
+
+    with _asset_cache_lock:
+        _asset_cache[asset_name] = {
+            'content': content,
+            'sha256': content_hash,
+            'content_type': asset_config['content_type'],
+        }
+    return content_hash
+
+
+def get_settings_asset(asset_name, expected_hash):
+    """
+    Return {'content', 'sha256', 'content_type'} for an asset, or None if it is not stored.
+
+    The decoded bytes are kept per worker and reused while their hash matches the one
+    recorded in the settings document.
+    """
+    if asset_name not in SETTINGS_ASSETS or not expected_hash:
+        return None
+
+    with _asset_cache_lock:
+        cached = _asset_cache.get(asset_name)
+    if cached and cached['sha256'] == expected_hash:
+        return cached
+
+    try:
+        item = cosmos_settings_container.read_item(
+            item=_asset_item_id(asset_name),
+            partition_key=_asset_item_id(asset_name)
+        )
+    except CosmosResourceNotFoundError:
+        return None
+
+    asset = {
+        'content': base64.b64decode(item.get('content_base64') or ''),
+        'sha256': item.get('sha256'),
+        'content_type': item.get('content_type') or SETTINGS_ASSETS[asset_name]['content_type'],
+    }
+    if asset['sha256'] != expected_hash:
+        # The settings document and the asset item are written separately; serve what is stored
+        log_event(
+            f"[SettingsAssets] Stored {asset_name} hash does not match settings.",
+            extra={'asset_name': asset_name},
+            level=logging.WARNING
+        )
+    with _asset_cache_lock:
+        _asset_cache[asset_name] = asset
+    return asset
+
+
+def resolve_settings_asset(settings, asset_name):
+    """Return the asset for the current settings, falling back to a legacy inline base64 value."""
+    asset = get_settings_asset(asset_name, get_settings_asset_hash(settings, asset_name))
+    if asset is not None:
+        return asset
+
+    asset_config = SETTINGS_ASSETS.get(asset_name)
+    legacy_value = (settings or {}).get(asset_config['legacy_field']) if asset_config else None
+    if not legacy_value:
+        return None
+    content = base64.b64decode(legacy_value)
+    return {
+        'content': content,
+        'sha256': _hash_content(content),
+        'content_type': asset_config['content_type'],
+    }
+
+
+def migrate_settings_assets(settings_item):
+    """
+    Move inline base64 logos and favicon out of the settings document.
+
+    Returns:
+        bool: True if settings_item was changed and should be persisted
+    """
+    if not isinstance(settings_item, dict):
+        return False
+
+    updated = False
+    for asset_name, asset_config in SETTINGS_ASSETS.items():
+        legacy_value = settings_item.get(asset_config['legacy_field'])
+        if not legacy_value:
+            continue
+        try:
+            content_hash = save_settings_asset(asset_name, base64.b64decode(legacy_value))
+        except Exception as e:
+            log_event(
+                f"[SettingsAssets] Failed to move {asset_name} out of app settings: {e}",
+                extra={'asset_name': asset_name},
+                level=logging.WARNING
+            )
+            continue
+        settings_item[asset_config['hash_field']] = content_hash
+        settings_item[asset_config['legacy_field']] = ''
+        updated = True
+    return updated
@@ -0,0 +1,289 @@
+# functions_tabular_snapshots.py
+"""
+Columnar snapshots of tabular files for the TabularProcessingPlugin.
+
+Parsing a workbook with openpyxl/xlrd is by far the slowest part of a tabular
+tool call, and the plugin is instantiated per chat request, so its in-memory
+caches never survive between turns. At upload time (and lazily on first use
+for files uploaded earlier), each sheet is parsed once and written as Parquet
+next to the original blob, together with a manifest holding the workbook
+metadata the plugin needs to resolve sheets:
+
+    <blob_name>.snapshot/manifest.json
+    <blob_name>.snapshot/sheet_000.parquet
+    ...
+
+Sheets are stored exactly as the plugin reads them (string cells, normalized
+column labels), so analysis results do not depend on which path loaded them.
+The manifest records the source blob ETag; a snapshot whose ETag no longer
+matches the blob is ignored and rebuilt.
+
+Parquet support requires pyarrow. Without it snapshots are skipped and the
+plugin parses the original file as before.
+"""
+
+import io
+import json
+import logging
+import os
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+import pandas
+from azure.core.exceptions import ResourceNotFoundError
+from config import CLIENTS
+from functions_appinsights import log_event
+
+try:
+    import pyarrow  # noqa: F401 - required by pandas.DataFrame.to_parquet
+    TABULAR_SNAPSHOTS_AVAILABLE = True
+except ImportError:
+    TABULAR_SNAPSHOTS_AVAILABLE = False
+
+TABULAR_SNAPSHOT_FORMAT_VERSION = 1
+TABULAR_SNAPSHOT_SUFFIX = '.snapshot'
+TABULAR_SNAPSHOT_MANIFEST_NAME = 'manifest.json'
+
+
+def is_tabular_snapshot_enabled(settings) -> bool:
+    """Return True when snapshots are enabled in settings and pyarrow is installed."""
+    return TABULAR_SNAPSHOTS_AVAILABLE and bool((settings or {}).get('enable_tabular_snapshots', True))
+
+
+def get_tabular_excel_engine(file_name: str) -> Optional[str]:
+    """Return the pandas Excel engine for a workbook, or None for CSV files."""
+    name_lower = str(file_name or '').lower()
+    if name_lower.endswith('.xlsx') or name_lower.endswith('.xlsm'):
+        return 'openpyxl'
+    if name_lower.endswith('.xls'):
+        return 'xlrd'
+    return None
+
+
+def get_tabular_snapshot_prefix(blob_name: str) -> str:
+    """Return the blob prefix that holds the snapshot for a tabular blob."""
+    return f"{blob_name}{TABULAR_SNAPSHOT_SUFFIX}/"
+
+
+def format_datetime_column_label(value) -> str:
+    """Render date-like Excel header labels into stable analysis-friendly strings."""
+    timestamp_value = pandas.Timestamp(value)
+
+    if (
+        timestamp_value.hour == 0
+        and timestamp_value.minute == 0
+        and timestamp_value.second == 0
+        and timestamp_value.microsecond == 0
+    ):
+        if timestamp_value.day == 1:
+            return timestamp_value.strftime('%b-%y')
+        return timestamp_value.strftime('%Y-%m-%d')
+
+    return timestamp_value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def normalize_column_label(label, fallback_index: int) -> str:
+    """Convert arbitrary DataFrame column labels into stable string names."""
+    if label is None or (not isinstance(label, str) and pandas.isna(label)):
+        return f"Column {fallback_index}"
+
+    if isinstance(label, pandas.Timestamp):
+        return format_datetime_column_label(label)
+
+    if isinstance(label, datetime):
+        return format_datetime_column_label(label)
+
+    if isinstance(label, date):
+        return format_datetime_column_label(datetime.combine(label, datetime.min.time()))
+
+    normalized_label = str(label).strip()
+    return normalized_label or f"Column {fallback_index}"
+
+
+def normalize_dataframe_columns(df: pandas.DataFrame) -> pandas.DataFrame:
+    """Rename DataFrame columns to unique, JSON-safe string labels."""
+    normalized_df = df.copy()
+    normalized_columns = []
+    normalized_label_counts = {}
+
+    for column_index, column_label in enumerate(normalized_df.columns, start=1):
+        base_label = normalize_column_label(column_label, column_index)
+        occurrence_count = normalized_label_counts.get(base_label, 0) + 1
+        normalized_label_counts[base_label] = occurrence_count
+
+        if occurrence_count == 1:
+            normalized_columns.append(base_label)
+        else:
+            normalized_columns.append(f"{base_label} ({occurrence_count})")
+
+    normalized_df.columns = normalized_columns
+    return normalized_df
+
+
+def read_tabular_sheets(source, file_name: str) -> Dict[Optional[str], pandas.DataFrame]:
+    """
+    Parse every sheet of a tabular file the way the plugin reads it.
+
+    Args:
+        source: A file path or the raw file bytes
+        file_name: Original file or blob name, used to pick the parser
+
+    Returns:
+        dict: sheet name -> DataFrame with normalized columns. CSV files use the key None.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    engine = get_tabular_excel_engine(file_name)
+    if engine:
+        sheets = pandas.read_excel(
+            source,
+            engine=engine,
+            keep_default_na=False,
+            dtype=str,
+            sheet_name=None,
+        )
+    elif str(file_name or '').lower().endswith('.csv'):
+        sheets = {None: pandas.read_csv(source, keep_default_na=False, dtype=str)}
+    else:
+        raise ValueError(f"Unsupported tabular file type: {file_name}")
+
+    return {sheet_name: normalize_dataframe_columns(df) for sheet_name, df in sheets.items()}
+
+
+def build_tabular_snapshot_manifest(file_name: str, sheet_dataframes: Dict[Optional[str], pandas.DataFrame], source_etag: Optional[str]) -> dict:
+    """Return the manifest describing a set of parsed sheets."""
+    is_workbook = bool(get_tabular_excel_engine(file_name))
+    sheet_names = [sheet_name for sheet_name in sheet_dataframes if sheet_name is not None]
+    sheets = []
+    for sheet_index, (sheet_name, df) in enumerate(sheet_dataframes.items()):
+        sheets.append({
+            'sheet_name': sheet_name,
+            'blob_suffix': f"sheet_{sheet_index:03d}.parquet",
+            'row_count': int(len(df)),
+            'columns': [str(column) for column in df.columns],
+        })
+
+    return {
+        'format_version': TABULAR_SNAPSHOT_FORMAT_VERSION,
+        'source_etag': source_etag,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'is_workbook': is_workbook,
+        'sheet_names': sheet_names,
+        'sheet_count': len(sheet_names),
+        'default_sheet': sheet_names[0] if sheet_names else None,
+        'sheets': sheets,
+    }
+
+
+def get_tabular_snapshot_sheet_entry(manifest: dict, sheet_name: Optional[str]) -> Optional[dict]:
+    """Return the manifest entry for a sheet (None selects the CSV or first sheet)."""
+    sheets = (manifest or {}).get('sheets') or []
+    if sheet_name is None:
+        return sheets[0] if sheets else None
+    for sheet_entry in sheets:
+        if sheet_entry.get('sheet_name') == sheet_name:
+            return sheet_entry
+    return None
+
+
+def _get_blob_service_client():
+    blob_service_client = CLIENTS.get("storage_account_office_docs_client")
+    if not blob_service_client:
+        raise RuntimeError("Blob service client not available or not configured.")
+    return blob_service_client
+
+
+def get_tabular_blob_etag(container_name: str, blob_name: str) -> Optional[str]:
+    """Return the current ETag of a tabular source blob."""
+    blob_client = _get_blob_service_client().get_blob_client(container=container_name, blob=blob_name)
+    return blob_client.get_blob_properties().etag
+
+
+def write_tabular_snapshot(container_name: str, blob_name: str, sheet_dataframes: Dict[Optional[str], pandas.DataFrame], source_etag: Optional[str]) -> dict:
+    """
+    Write parsed sheets as Parquet next to the source blob and return the manifest.
+
+    The manifest is written last, so a partially written snapshot is never used.
+    """
+    blob_service_client = _get_blob_service_client()
+    prefix = get_tabular_snapshot_prefix(blob_name)
+    manifest = build_tabular_snapshot_manifest(blob_name, sheet_dataframes, source_etag)
+
+    for sheet_entry, df in zip(manifest['sheets'], sheet_dataframes.values()):
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False, engine='pyarrow')
+        blob_service_client.get_blob_client(
+            container=container_name,
+            blob=f"{prefix}{sheet_entry['blob_suffix']}",
+        ).upload_blob(buffer.getvalue(), overwrite=True)
+
+    blob_service_client.get_blob_client(
+        container=container_name,
+        blob=f"{prefix}{TABULAR_SNAPSHOT_MANIFEST_NAME}",
+    ).upload_blob(json.dumps(manifest).encode('utf-8'), overwrite=True)
+
+    log_event(
+        f"[Tabular Snapshot] Wrote snapshot for {container_name}/{blob_name} ({len(manifest['sheets'])} sheet(s))",
+        level=logging.INFO,
+    )
+    return manifest
+
+
+def create_tabular_snapshot_from_file(container_name: str, blob_name: str, temp_file_path: str, source_etag: Optional[str]) -> dict:
+    """Parse a local tabular file and write its snapshot (used at upload time)."""
+    sheet_dataframes = read_tabular_sheets(temp_file_path, os.path.basename(blob_name))
+    return write_tabular_snapshot(container_name, blob_name, sheet_dataframes, source_etag)
+
+
+def read_tabular_snapshot_manifest(container_name: str, blob_name: str, source_etag: Optional[str] = None) -> Optional[dict]:
+    """
+    Return the snapshot manifest for a blob, or None when it is missing or stale.
+
+    Args:
+        source_etag: Current ETag of the source blob. A manifest built from another ETag is treated as stale.
+    """
+    blob_client = _get_blob_service_client().get_blob_client(
+        container=container_name,
+        blob=f"{get_tabular_snapshot_prefix(blob_name)}{TABULAR_SNAPSHOT_MANIFEST_NAME}",
+    )
+    try:
+        manifest = json.loads(blob_client.download_blob().readall())
+    except ResourceNotFoundError:
+        return None
+
+    if manifest.get('format_version') != TABULAR_SNAPSHOT_FORMAT_VERSION:
+        return None
+    if source_etag is not None and manifest.get('source_etag') != source_etag:
+        return None
+    return manifest
+
+
+def load_tabular_snapshot_sheet(container_name: str, blob_name: str, manifest: dict, sheet_name: Optional[str] = None, columns: Optional[List[str]] = None) -> pandas.DataFrame:
+    """
+    Load one sheet (optionally only some columns) from a snapshot.
+
+    Empty cells are returned as NaN, matching a direct pandas read with dtype=str.
+    """
+    sheet_entry = get_tabular_snapshot_sheet_entry(manifest, sheet_name)
+    if sheet_entry is None:
+        raise KeyError(f"Sheet '{sheet_name}' is not part of the snapshot for {blob_name}")
+
+    blob_client = _get_blob_service_client().get_blob_client(
+        container=container_name,
+        blob=f"{get_tabular_snapshot_prefix(blob_name)}{sheet_entry['blob_suffix']}",
+    )
+    data = blob_client.download_blob().readall()
+    df = pandas.read_parquet(io.BytesIO(data), engine='pyarrow', columns=columns)
+    df = df.astype(object)
+    return df.mask(df.isna())
+
+
+def delete_tabular_snapshot(container_name: str, blob_name: str) -> int:
+    """Delete every snapshot blob for a tabular blob. Returns the number deleted."""
+    container_client = _get_blob_service_client().get_container_client(container_name)
+    deleted_count = 0
+    for snapshot_blob in container_client.list_blobs(name_starts_with=get_tabular_snapshot_prefix(blob_name)):
+        container_client.delete_blob(snapshot_blob['name'])
+        deleted_count += 1
+    return deleted_count
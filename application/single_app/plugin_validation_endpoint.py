@@ -281,9 +281,11 @@ def repair_plugin(plugin_name):
             plugins[plugin_index] = plugin_manifest
             # NOTE: Update container-based storage instead of legacy settings
             from functions_global_actions import save_global_action
+            from semantic_kernel_pool import invalidate_global_kernel_manifests
             try:
                 # Save to container instead of settings
                 save_global_action(plugin_manifest)
+                invalidate_global_kernel_manifests()
                 # Remove from legacy settings if present
                 if 'semantic_kernel_plugins' in settings:
                     del settings['semantic_kernel_plugins']
@@ -318,9 +320,11 @@ def repair_plugin(plugin_name):
                 plugins[plugin_index] = plugin_manifest
                 # NOTE: Update container-based storage instead of legacy settings
                 from functions_global_actions import save_global_action
+                from semantic_kernel_pool import invalidate_global_kernel_manifests
                 try:
                     # Save to container instead of settings
                     save_global_action(plugin_manifest)
+                    invalidate_global_kernel_manifests()
                     # Remove from legacy settings if present
                     if 'semantic_kernel_plugins' in settings:
                         del settings['semantic_kernel_plugins']
@@ -11,6 +11,7 @@ from config import (
     cosmos_personal_agents_container,
 )
 from semantic_kernel_loader import get_agent_orchestration_types
+from semantic_kernel_pool import invalidate_user_kernels, invalidate_global_kernel_manifests
 from functions_settings import get_settings, update_settings, get_user_settings, update_user_settings, sanitize_model_endpoints_for_frontend
 from functions_global_agents import get_global_agents, save_global_agent, delete_global_agent
 from functions_personal_agents import get_personal_agents, ensure_migration_complete, save_personal_agent, delete_personal_agent
@@ -634,6 +635,7 @@ def set_user_agents():
     agents_to_delete = current_agent_names - new_agent_names
     for agent_name in agents_to_delete:
         delete_personal_agent(user_id, agent_name)
+    invalidate_user_kernels(user_id)
     
     # Log individual agent activities
     for agent in filtered_agents:
@@ -674,6 +676,7 @@ def delete_user_agent(agent_name):
     
     # Delete from personal_agents container
     delete_personal_agent(user_id, agent_name)
+    invalidate_user_kernels(user_id)
     
     # Log agent deletion activity
     log_agent_deletion(user_id=user_id, agent_id=agent_to_delete.get('id', agent_name), agent_name=agent_name, scope='personal')
@@ -1129,6 +1132,7 @@ def run_default_model_agent_migration():
                 result = save_group_agent(scope_id, agent, user_id=admin_user_id)
             else:
                 result = save_personal_agent(scope_id, agent, actor_user_id=admin_user_id)
+                invalidate_user_kernels(scope_id)
 
             if not result:
                 raise ValueError('Agent save did not return a result.')
@@ -1151,6 +1155,8 @@ def run_default_model_agent_migration():
     migrated_count = sum(migrated_by_scope.values())
     if migrated_count:
         setattr(builtins, 'kernel_reload_needed', True)
+    if migrated_by_scope['global']:
+        invalidate_global_kernel_manifests()
 
     refreshed_settings = get_settings()
     refreshed_preview = _build_default_model_agent_migration_preview(refreshed_settings)
@@ -1228,6 +1234,7 @@ def add_agent():
         log_event("Agent added", extra={"action": "add", "agent": {k: v for k, v in cleaned_agent.items() if k != 'id'}, "user": str(get_current_user_id())})
         # --- HOT RELOAD TRIGGER ---
         setattr(builtins, "kernel_reload_needed", True)
+        invalidate_global_kernel_manifests()
         return jsonify({'success': True})
     except Exception as e:
         log_event(f"Error adding agent: {e}", level=logging.ERROR)
@@ -1347,6 +1354,7 @@ def edit_agent(agent_name):
         )
         # --- HOT RELOAD TRIGGER ---
         setattr(builtins, "kernel_reload_needed", True)
+        invalidate_global_kernel_manifests()
         return jsonify({'success': True})
     except Exception as e:
         log_event(f"Error editing agent: {e}", level=logging.ERROR, exceptionTraceback=True)
@@ -1382,6 +1390,7 @@ def delete_agent(agent_name):
         log_event("Agent deleted", extra={"action": "delete", "agent_name": agent_name, "user": str(get_current_user_id())})
         # --- HOT RELOAD TRIGGER ---
         setattr(builtins, "kernel_reload_needed", True)
+        invalidate_global_kernel_manifests()
         return jsonify({'success': True})
     except Exception as e:
         log_event(f"Error deleting agent: {e}", level=logging.ERROR,exceptionTraceback=True)
@@ -8,6 +8,7 @@ from semantic_kernel.connectors.ai.chat_completion_client_base import ChatComple
 from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_prompt_execution_settings import AzureChatPromptExecutionSettings
 from semantic_kernel_fact_memory_store import FactMemoryStore
 from semantic_kernel_loader import initialize_semantic_kernel
+from semantic_kernel_pool import mark_request_kernel_poisoned
 from semantic_kernel_plugins.plugin_invocation_thoughts import (
     format_plugin_invocation_thought,
     register_plugin_invocation_thought_callback,
@@ -38,6 +39,7 @@ from functions_chat import *
 from functions_content import generate_embedding, generate_embeddings_batch
 from functions_conversation_metadata import collect_conversation_metadata, update_conversation_with_metadata
 from functions_conversation_unread import mark_conversation_unread
+from functions_conversation_history import get_conversation_history_window, invalidate_conversation_history_window
 from functions_debug import debug_print
 from functions_notifications import create_chat_response_notification
 from functions_activity_logging import log_chat_activity, log_conversation_creation, log_token_usage
@@ -5863,6 +5865,7 @@ def register_route_backend_chats(app):
                     publish_background_event(event)
             except Exception as e:
                 debug_print(f"[STREAM BACKGROUND] Worker error: {e}")
+                mark_request_kernel_poisoned()
                 error_event = f"data: {json.dumps({'error': f'Internal server error: {str(e)}'})}\n\n"
                 publish_background_event(error_event)
             finally:
@@ -6760,18 +6763,9 @@ def register_route_backend_chats(app):
                         detail=f"grounded_documents={len(prior_grounded_document_refs)}"
                     )
                     try:
-                        preflight_messages_query = (
-                            "SELECT * FROM c WHERE c.conversation_id = @conv_id ORDER BY c.timestamp ASC"
-                        )
-                        preflight_messages_params = [{"name": "@conv_id", "value": conversation_id}]
-                        preflight_messages = list(cosmos_messages_container.query_items(
-                            query=preflight_messages_query,
-                            parameters=preflight_messages_params,
-                            partition_key=conversation_id,
-                            enable_cross_partition_query=True,
-                        ))
-                        preflight_history_segments = build_conversation_history_segments(
-                            all_messages=preflight_messages,
+                        preflight_history_segments = build_windowed_conversation_history_segments(
+                            conversation_id=conversation_id,
+                            conversation_item=conversation_item,
                             conversation_history_limit=conversation_history_limit,
                             enable_summarize_older_messages=enable_summarize_content_history_beyond_conversation_history_limit,
                             gpt_client=gpt_client,
@@ -7719,14 +7713,9 @@ def register_route_backend_chats(app):
 
 
             try:
-                # Fetch ALL messages for potential summarization, sorted OLD->NEW
-                all_messages_query = "SELECT * FROM c WHERE c.conversation_id = @conv_id ORDER BY c.timestamp ASC"
-                params_all = [{"name": "@conv_id", "value": conversation_id}]
-                all_messages = list(cosmos_messages_container.query_items(
-                    query=all_messages_query, parameters=params_all, partition_key=conversation_id, enable_cross_partition_query=True
-                ))
-                history_segments = build_conversation_history_segments(
-                    all_messages=all_messages,
+                history_segments = build_windowed_conversation_history_segments(
+                    conversation_id=conversation_id,
+                    conversation_item=conversation_item,
                     conversation_history_limit=conversation_history_limit,
                     enable_summarize_older_messages=enable_summarize_content_history_beyond_conversation_history_limit,
                     gpt_client=gpt_client,
@@ -7872,6 +7861,7 @@ def register_route_backend_chats(app):
 
             except Exception as e:
                 debug_print(f"Error preparing conversation history: {e}")
+                mark_request_kernel_poisoned()
                 return jsonify({'error': f'Error preparing conversation history: {str(e)}'}), 500
 
         # region 6 - Final GPT Call
@@ -8860,6 +8850,7 @@ def register_route_backend_chats(app):
             error_traceback = traceback.format_exc()
             debug_print(f"[CHAT API ERROR] Unhandled exception in chat_api: {str(e)}")
             debug_print(f"[CHAT API ERROR] Full traceback:\n{error_traceback}")
+            mark_request_kernel_poisoned()
             log_event(
                 f"[CHAT API ERROR] Unhandled exception in chat_api: {str(e)}",
                 extra={
@@ -9017,6 +9008,7 @@ def register_route_backend_chats(app):
 
                 yield f"data: {json.dumps(normalize_legacy_chat_payload(payload))}\n\n"
             except Exception as compatibility_error:
+                mark_request_kernel_poisoned()
                 yield f"data: {json.dumps({'error': str(compatibility_error)})}\n\n"
 
         if compatibility_mode:
@@ -9702,18 +9694,9 @@ def register_route_backend_chats(app):
                             detail=f"grounded_documents={len(prior_grounded_document_refs)}"
                         )
                         try:
-                            preflight_messages_query = (
-                                "SELECT * FROM c WHERE c.conversation_id = @conv_id ORDER BY c.timestamp ASC"
-                            )
-                            preflight_messages_params = [{"name": "@conv_id", "value": conversation_id}]
-                            preflight_messages = list(cosmos_messages_container.query_items(
-                                query=preflight_messages_query,
-                                parameters=preflight_messages_params,
-                                partition_key=conversation_id,
-                                enable_cross_partition_query=True,
-                            ))
-                            preflight_history_segments = build_conversation_history_segments(
-                                all_messages=preflight_messages,
+                            preflight_history_segments = build_windowed_conversation_history_segments(
+                                conversation_id=conversation_id,
+                                conversation_item=conversation_item,
                                 conversation_history_limit=conversation_history_limit,
                                 enable_summarize_older_messages=enable_summarize_content_history_beyond_conversation_history_limit,
                                 gpt_client=gpt_client,
@@ -10204,14 +10187,9 @@ def register_route_backend_chats(app):
                 final_api_source_refs = []
                 
                 try:
-                    all_messages_query = "SELECT * FROM c WHERE c.conversation_id = @conv_id ORDER BY c.timestamp ASC"
-                    params_all = [{"name": "@conv_id", "value": conversation_id}]
-                    all_messages = list(cosmos_messages_container.query_items(
-                        query=all_messages_query, parameters=params_all, 
-                        partition_key=conversation_id, enable_cross_partition_query=True
-                    ))
-                    history_segments = build_conversation_history_segments(
-                        all_messages=all_messages,
+                    history_segments = build_windowed_conversation_history_segments(
+                        conversation_id=conversation_id,
+                        conversation_item=conversation_item,
                         conversation_history_limit=conversation_history_limit,
                         enable_summarize_older_messages=enable_summarize_content_history_beyond_conversation_history_limit,
                         gpt_client=gpt_client,
@@ -10985,6 +10963,7 @@ def register_route_backend_chats(app):
                 except Exception as e:
                     error_msg = str(e)
                     debug_print(f"Error during streaming: {error_msg}")
+                    mark_request_kernel_poisoned()
                     
                     # Save partial response if we have content
                     if accumulated_content:
@@ -11037,6 +11016,7 @@ def register_route_backend_chats(app):
                 error_traceback = traceback.format_exc()
                 debug_print(f"[STREAM API ERROR] Unhandled exception: {str(e)}")
                 debug_print(f"[STREAM API ERROR] Full traceback:\n{error_traceback}")
+                mark_request_kernel_poisoned()
                 yield f"data: {json.dumps({'error': f'Internal server error: {str(e)}'})}\n\n"
         
         return build_background_stream_response(generate, stream_session=stream_session)
@@ -11207,6 +11187,9 @@ def register_route_backend_chats(app):
             except Exception as e:
                 debug_print(f"Error updating message {message_id}: {str(e)}")
                 return jsonify({'error': f'Error updating message: {str(e)}'}), 500
+
+            # Masked content must not survive in cached history windows or the rolling summary
+            invalidate_conversation_history_window(conversation_id)
             
             return jsonify({
                 'success': True,
@@ -12181,6 +12164,75 @@ def build_conversation_history_segments(
     }
 
 
+def build_windowed_conversation_history_segments(
+    conversation_id,
+    conversation_item,
+    conversation_history_limit,
+    enable_summarize_older_messages=False,
+    gpt_client=None,
+    gpt_model=None,
+    user_message_id=None,
+    fallback_user_message="",
+):
+    """
+    Build conversation history segments from the incremental history window.
+
+    Only messages written since the previous turn are read and only messages that
+    age out of the window are summarized, so per-turn cost does not grow with the
+    conversation. Falls back to reading the whole conversation when the window is
+    disabled.
+    """
+    settings = get_settings()
+    if not settings.get('enable_conversation_history_window', True):
+        all_messages = list(cosmos_messages_container.query_items(
+            query="SELECT * FROM c WHERE c.conversation_id = @conv_id ORDER BY c.timestamp ASC",
+            parameters=[{"name": "@conv_id", "value": conversation_id}],
+            partition_key=conversation_id,
+            enable_cross_partition_query=True
+        ))
+        return build_conversation_history_segments(
+            all_messages=all_messages,
+            conversation_history_limit=conversation_history_limit,
+            enable_summarize_older_messages=enable_summarize_older_messages,
+            gpt_client=gpt_client,
+            gpt_model=gpt_model,
+            user_message_id=user_message_id,
+            fallback_user_message=fallback_user_message,
+        )
+
+    history_window = get_conversation_history_window(
+        conversation_id,
+        conversation_item,
+        conversation_history_limit,
+        enable_summarize_older_messages=enable_summarize_older_messages,
+        gpt_client=gpt_client,
+        gpt_model=gpt_model,
+        assistant_content_builder=build_assistant_history_content_with_citations,
+    )
+    history_segments = build_conversation_history_segments(
+        all_messages=history_window['messages'],
+        conversation_history_limit=conversation_history_limit,
+        enable_summarize_older_messages=False,
+        user_message_id=user_message_id,
+        fallback_user_message=fallback_user_message,
+    )
+
+    history_segments['summary_of_older'] = history_window['summary_text']
+    debug_info = history_segments['debug_info']
+    summarized_message_count = history_window['summarized_message_count']
+    debug_info['summary_requested'] = bool(enable_summarize_older_messages)
+    debug_info['summary_used'] = bool(history_window['summary_text'])
+    debug_info['stored_total_messages'] += summarized_message_count
+    debug_info['older_message_count'] += summarized_message_count
+    debug_info['summarized_message_count'] = summarized_message_count if history_window['summary_text'] else 0
+    debug_info['history_window'] = {
+        'source': history_window['source'],
+        'delta_item_count': history_window['delta_item_count'],
+        'folded_message_count': history_window['folded_message_count'],
+    }
+    return history_segments
+
+
 def _extract_web_search_citations_from_content(content: str) -> List[Dict[str, str]]:
     if not content:
         return []
@@ -5313,17 +5313,22 @@ def register_route_backend_control_center(app):
     @control_center_required('admin')  
     def api_get_refresh_status():
         """
-        Get the last refresh timestamp for Control Center data.
+        Get the last refresh timestamp for Control Center data, along with this
+        worker's embedding cache statistics.
         """
         try:
             from functions_settings import get_settings
+            from utils_embedding_cache import get_embedding_cache_stats
             
             settings = get_settings()
             last_refresh = settings.get('control_center_last_refresh')
             
             return jsonify({
                 'last_refresh': last_refresh,
-                'last_refresh_formatted': None if not last_refresh else datetime.fromisoformat(last_refresh.replace('Z', '+00:00') if 'Z' in last_refresh else last_refresh).strftime('%m/%d/%Y %I:%M %p UTC')
+                'last_refresh_formatted': None if not last_refresh else datetime.fromisoformat(last_refresh.replace('Z', '+00:00') if 'Z' in last_refresh else last_refresh).strftime('%m/%d/%Y %I:%M %p UTC'),
+                'cache_stats': {
+                    'embedding': get_embedding_cache_stats()
+                }
             }), 200
             
         except Exception as e:
@@ -5,10 +5,12 @@ from functions_authentication import *
 from functions_settings import *
 from functions_conversation_metadata import get_conversation_metadata, update_conversation_with_metadata
 from functions_conversation_unread import clear_conversation_unread, normalize_conversation_unread_state
+from functions_conversation_list import build_conversation_list_etag, get_conversation_list_version, query_conversation_list
 from functions_notifications import mark_chat_response_notifications_read_for_conversation
 from flask import Response, request
 from functions_debug import debug_print
 from functions_message_artifacts import filter_assistant_artifact_items
+from functions_conversation_history import invalidate_conversation_history_window
 from swagger_wrapper import swagger_route, get_auth_security
 from functions_activity_logging import log_conversation_creation, log_conversation_deletion, log_conversation_archival
 from functions_thoughts import archive_thoughts_for_conversation, delete_thoughts_for_conversation
@@ -346,15 +348,51 @@ def register_route_backend_conversations(app):
     @login_required
     @user_required
     def get_conversations():
+        """
+        List the current user's conversations for the sidebar, most recently updated first.
+
+        Query Parameters:
+            page_size (int): Conversations per page (default: all conversations)
+            continuation_token (str): Token from the previous response to fetch the next page
+            since (int): sync_token from a previous response; only conversations changed since then are returned.
+                Deletions are not listed, so a client whose merged list size differs from total must fetch in full.
+
+        Responds 304 Not Modified when If-None-Match matches the list's current ETag.
+        """
         user_id = get_current_user_id()
         if not user_id:
             return jsonify({'error': 'User not authenticated'}), 401
-        query = f"SELECT * FROM c WHERE c.user_id = '{user_id}' ORDER BY c.last_updated DESC"
-        items = list(cosmos_conversations_container.query_items(query=query, enable_cross_partition_query=True))
-        normalized_items = [normalize_conversation_unread_state(item) for item in items]
-        return jsonify({
-            'conversations': normalized_items
-        }), 200
+
+        page_size = request.args.get('page_size', type=int)
+        continuation_token = request.args.get('continuation_token') or None
+        since = request.args.get('since', type=int)
+
+        conversation_count, sync_token, latest_last_updated = get_conversation_list_version(user_id)
+        etag = build_conversation_list_etag(
+            (conversation_count, sync_token, latest_last_updated),
+            request.query_string
+        )
+        if request.if_none_match.contains_weak(etag):
+            not_modified = Response(status=304)
+            not_modified.set_etag(etag, weak=True)
+            not_modified.headers['Cache-Control'] = 'private, no-cache'
+            return not_modified
+
+        conversations, next_token = query_conversation_list(
+            user_id,
+            page_size=page_size,
+            continuation_token=continuation_token,
+            since=since
+        )
+        response = jsonify({
+            'conversations': conversations,
+            'continuation_token': next_token,
+            'sync_token': sync_token,
+            'total': conversation_count
+        })
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response, 200
 
 
     @app.route('/api/create_conversation', methods=['POST'])
@@ -1622,6 +1660,9 @@ def register_route_backend_conversations(app):
                     cosmos_messages_container.delete_item(msg_id, partition_key=conversation_id)
                 
                 deleted_message_ids.append(msg_id)
+
+            # Deleted content must not survive in cached history windows or the rolling summary
+            invalidate_conversation_history_window(conversation_id)
             
             return jsonify({
                 'success': True,
@@ -526,27 +526,18 @@ def register_route_backend_documents(app):
         # Combine conditions into the WHERE clause
         where_clause = " AND ".join(query_conditions)
 
-        # --- 3) Query matching documents, then collapse to current revisions before paginating ---
+        # --- 3) Count, sort and page current revisions in Cosmos ---
         try:
-            offset = (page - 1) * page_size
-            data_query_str = f"""
-                SELECT *
-                FROM c
-                WHERE {where_clause}
-            """
-            matching_docs = list(cosmos_user_documents_container.query_items(
-                query=data_query_str,
-                parameters=query_params,
-                enable_cross_partition_query=True
-            ))
-
-            current_docs = sort_documents(
-                select_current_documents(matching_docs),
+            docs, total_count = query_current_documents_page(
+                cosmos_user_documents_container,
+                where_clause,
+                query_params,
+                page=page,
+                page_size=page_size,
                 sort_by=sort_by,
                 sort_order=sort_order,
+                revision_scopes=[{'user_id': user_id}],
             )
-            total_count = len(current_docs)
-            docs = current_docs[offset:offset + page_size]
 
             # Add shared_approval_status and owner_id for each doc
             for doc in docs:
@@ -22,6 +22,7 @@ def register_route_backend_notifications(app):
             per_page (int): Items per page (default: 20)
             include_read (bool): Include read notifications (default: true)
             include_dismissed (bool): Include dismissed notifications (default: false)
+            continuation_token (str): Token from the previous response to fetch the next page
         """
         try:
             user_id = get_current_user_id()
@@ -33,6 +34,7 @@ def register_route_backend_notifications(app):
             per_page = int(request.args.get('per_page', 20))
             include_read = request.args.get('include_read', 'true').lower() == 'true'
             include_dismissed = request.args.get('include_dismissed', 'false').lower() == 'true'
+            continuation_token = request.args.get('continuation_token') or None
             
             # Validate per_page
             if per_page not in [10, 20, 50]:
@@ -44,7 +46,8 @@ def register_route_backend_notifications(app):
                 per_page=per_page,
                 include_read=include_read,
                 include_dismissed=include_dismissed,
-                user_roles=user_roles
+                user_roles=user_roles,
+                continuation_token=continuation_token
             )
             
             return jsonify({
@@ -69,7 +72,8 @@ def register_route_backend_notifications(app):
         """
         try:
             user_id = get_current_user_id()
-            count = get_unread_notification_count(user_id)
+            user_roles = session.get('user', {}).get('roles', [])
+            count = get_unread_notification_count(user_id, user_roles=user_roles)
             
             return jsonify({
                 'success': True,
@@ -15,6 +15,7 @@ import os
 from functions_debug import debug_print
 import importlib.util
 from functions_plugins import get_merged_plugin_settings
+from semantic_kernel_pool import invalidate_user_kernels, invalidate_global_kernel_manifests
 from semantic_kernel_plugins.base_plugin import BasePlugin
 
 from functions_global_actions import *
@@ -416,6 +417,8 @@ def set_user_plugins():
     except Exception as e:
         debug_print(f"Error saving personal actions for user {user_id}: {e}")
         return jsonify({'error': 'Failed to save plugins'}), 500
+    finally:
+        invalidate_user_kernels(user_id)
 
     # Log individual action activities
     for plugin in filtered_plugins:
@@ -445,6 +448,7 @@ def delete_user_plugin(plugin_name):
     
     if not deleted:
         return jsonify({'error': 'Plugin not found.'}), 404
+    invalidate_user_kernels(user_id)
     
     log_action_deletion(user_id=user_id, action_id=plugin_name, action_name=plugin_name, scope='personal')
     log_event("User plugin deleted", extra={"user_id": user_id, "plugin_name": plugin_name})
@@ -809,6 +813,7 @@ def add_plugin():
         
         # --- HOT RELOAD TRIGGER ---
         setattr(builtins, "kernel_reload_needed", True)
+        invalidate_global_kernel_manifests()
         return jsonify({'success': True})
     except Exception as e:
         log_event(f"Error adding plugin: {e}", level=logging.ERROR)
@@ -875,6 +880,7 @@ def edit_plugin(plugin_name):
             log_event("Plugin edited", extra={"action": "edit", "plugin": _redact_plugin_for_logging(updated_plugin), "user": str(get_current_user_id())})
             # --- HOT RELOAD TRIGGER ---
             setattr(builtins, "kernel_reload_needed", True)
+            invalidate_global_kernel_manifests()
             return jsonify({'success': True})
         
         log_event("Edit plugin failed: not found", level=logging.WARNING, extra={"action": "edit", "plugin_name": plugin_name})
@@ -917,6 +923,7 @@ def delete_plugin(plugin_name):
         log_event("Plugin deleted", extra={"action": "delete", "plugin_name": plugin_name, "user": str(get_current_user_id())})
         # --- HOT RELOAD TRIGGER ---
         setattr(builtins, "kernel_reload_needed", True)
+        invalidate_global_kernel_manifests()
         return jsonify({'success': True})
     except Exception as e:
         log_event(f"Error deleting plugin: {e}", level=logging.ERROR)
@@ -142,7 +142,6 @@ def register_route_backend_public_documents(app):
         except: page_size = 10
         if page < 1: page = 1
         if page_size < 1: page_size = 10
-        offset = (page - 1) * page_size
 
         # filters
         search = request.args.get('search', '').strip()
@@ -207,17 +206,16 @@ def register_route_backend_public_documents(app):
 
         where = ' AND '.join(conds)
 
-        data_q = f'SELECT * FROM c WHERE {where}'
-        matching_docs = list(cosmos_public_documents_container.query_items(
-            query=data_q, parameters=params, enable_cross_partition_query=True
-        ))
-        current_docs = sort_documents(
-            select_current_documents(matching_docs),
+        docs, total_count = query_current_documents_page(
+            cosmos_public_documents_container,
+            where,
+            params,
+            page=page,
+            page_size=page_size,
             sort_by=sort_by,
             sort_order=sort_order,
+            revision_scopes=[{'user_id': user_id, 'public_workspace_id': active_ws}],
         )
-        total_count = len(current_docs)
-        docs = current_docs[offset:offset + page_size]
 
         # legacy
         legacy_q = 'SELECT VALUE COUNT(1) FROM c WHERE c.public_workspace_id = @ws AND NOT IS_DEFINED(c.percentage_complete)'
@@ -274,16 +272,16 @@ def register_route_backend_public_documents(app):
 
         # Query documents from all visible public workspaces
         workspace_conditions = " OR ".join([f"c.public_workspace_id = @ws_{i}" for i in range(len(workspace_ids))])
-        query = f'SELECT * FROM c WHERE {workspace_conditions} ORDER BY c._ts DESC'
         params = [{'name': f'@ws_{i}', 'value': workspace_id} for i, workspace_id in enumerate(workspace_ids)]
-        
-        docs = list(cosmos_public_documents_container.query_items(
-            query=query,
-            parameters=params,
-            enable_cross_partition_query=True
-        ))
 
-        docs = sort_documents(select_current_documents(docs))[:page_size]
+        docs, _ = query_current_documents_page(
+            cosmos_public_documents_container,
+            workspace_conditions,
+            params,
+            page=1,
+            page_size=page_size,
+            revision_scopes=[{'user_id': user_id, 'public_workspace_id': workspace_id} for workspace_id in workspace_ids],
+        )
 
         return jsonify({
             'documents': docs,
@@ -18,6 +18,16 @@ from functions_public_workspaces import get_user_visible_public_workspace_ids_fr
 from swagger_wrapper import swagger_route, get_auth_security
 from config import CLIENTS, storage_account_user_documents_container_name, storage_account_group_documents_container_name, storage_account_public_documents_container_name, storage_account_personal_chat_container_name, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, AUDIO_EXTENSIONS, TABULAR_EXTENSIONS, cosmos_messages_container, cosmos_conversations_container
 from functions_debug import debug_print
+from functions_blob_streaming import build_blob_stream_response
+from functions_pdf_citation_cache import (
+    extract_pdf_page_window,
+    get_pdf_citation_page_window,
+    open_pdf_citation_source,
+    read_cached_pdf_page_count,
+    read_cached_pdf_page_window,
+    store_pdf_page_count,
+    store_pdf_page_window,
+)
 
 
 def _sanitize_tabular_preview_value(value):
@@ -636,10 +646,7 @@ def serve_enhanced_citation_content(raw_doc, content_type=None, force_download=F
     blob_name = get_blob_name(raw_doc, workspace_type)
     
     try:
-        # Download blob content directly
         blob_client = container_client.get_blob_client(blob_name)
-        blob_data = blob_client.download_blob()
-        content = blob_data.readall()
         
         # Determine content type if not provided
         if not content_type:
@@ -663,15 +670,14 @@ def serve_enhanced_citation_content(raw_doc, content_type=None, force_download=F
         # Set content disposition based on force_download parameter
         disposition = 'attachment' if force_download else 'inline'
         
-        # Create Response with the blob content
-        response = Response(
-            content,
-            content_type=content_type,
+        # Stream the blob (or the requested byte range) in chunks instead of loading it into memory
+        response = build_blob_stream_response(
+            blob_client,
+            request,
+            content_type,
             headers={
-                'Content-Length': str(len(content)),
                 'Cache-Control': 'private, max-age=300',  # Cache for 5 minutes
                 'Content-Disposition': f'{disposition}; filename="{raw_doc["file_name"]}"',
-                'Accept-Ranges': 'bytes'  # Support range requests for video/audio
             }
         )
         
@@ -693,11 +699,7 @@ def serve_enhanced_citation_pdf_content(raw_doc, page_number, show_all=False):
     """
     debug_print(f"serve_enhanced_citation_pdf_content called with show_all: {show_all}")
     
-    import io
-    import uuid
-    import tempfile
-    import fitz  # PyMuPDF
-    
+    settings = get_settings()
     blob_service_client = CLIENTS.get("storage_account_office_docs_client")
     if not blob_service_client:
         raise Exception("Blob storage client not available")
@@ -710,107 +712,63 @@ def serve_enhanced_citation_pdf_content(raw_doc, page_number, show_all=False):
     blob_name = get_blob_name(raw_doc, workspace_type)
     
     try:
-        # Download blob content directly
         blob_client = container_client.get_blob_client(blob_name)
-        blob_data = blob_client.download_blob()
-        content = blob_data.readall()
-        
-        # Create temporary file for PDF processing
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-            temp_file.write(content)
-            temp_pdf_path = temp_file.name
+        etag = blob_client.get_blob_properties().etag
+        pdf_document = None
         
         try:
-            # Process PDF with page extraction logic (from original view_pdf)
-            pdf_document = fitz.open(temp_pdf_path)
-            total_pages = pdf_document.page_count
-            current_idx = page_number - 1  # zero-based
+            # The page count and extracted page windows are cached per blob ETag,
+            # so the source PDF is only downloaded on a cache miss
+            total_pages = read_cached_pdf_page_count(settings, container_name, blob_name, etag)
+            if total_pages is None:
+                pdf_document = open_pdf_citation_source(blob_client, etag)
+                total_pages = pdf_document.page_count
+                store_pdf_page_count(settings, container_name, blob_name, etag, total_pages)
 
-            if current_idx < 0 or current_idx >= total_pages:
-                pdf_document.close()
-                os.remove(temp_pdf_path)
+            # Process PDF with page extraction logic (from original view_pdf)
+            page_window = get_pdf_citation_page_window(page_number, total_pages, show_all=show_all)
+            if page_window is None:
                 return jsonify({"error": "Requested page out of range"}), 400
+            start_idx, end_idx, new_page_number = page_window
+
+            extracted_content = read_cached_pdf_page_window(settings, container_name, blob_name, etag, start_idx, end_idx)
+            if extracted_content is None:
+                if pdf_document is None:
+                    pdf_document = open_pdf_citation_source(blob_client, etag)
+                extracted_content = extract_pdf_page_window(pdf_document, start_idx, end_idx)
+                store_pdf_page_window(settings, container_name, blob_name, etag, start_idx, end_idx, extracted_content)
+        finally:
+            if pdf_document is not None:
+                pdf_document.close()
 
-            if show_all:
-                # Show all pages
-                start_idx = 0
-                end_idx = total_pages - 1
-                new_page_number = page_number  # Keep original page number
-            else:
-                # Default to just the current page
-                start_idx = current_idx
-                end_idx = current_idx
-
-                # If a previous page exists, include it
-                if current_idx > 0:
-                    start_idx = current_idx - 1
-
-                # If a next page exists, include it
-                if current_idx < total_pages - 1:
-                    end_idx = current_idx + 1
-
-                # Determine new_page_number (within the sub-document)
-                extracted_count = end_idx - start_idx + 1
-                
-                if extracted_count == 1:
-                    # Only current page
-                    new_page_number = 1
-                elif extracted_count == 3:
-                    # current page is in the middle
-                    new_page_number = 2
-                else:
-                    # Exactly 2 pages
-                    # If start_idx == current_idx, the user is on the first page
-                    # If current_idx == end_idx, the user is on the second page
-                    if start_idx == current_idx:
-                        # e.g. pages = [current, next]
-                        new_page_number = 1
-                    else:
-                        # e.g. pages = [previous, current]
-                        new_page_number = 2
-
-            # Create new PDF with only start_idx..end_idx
-            extracted_pdf = fitz.open()
-            extracted_pdf.insert_pdf(pdf_document, from_page=start_idx, to_page=end_idx)
-            
-            # Save extracted PDF to memory
-            extracted_content = extracted_pdf.tobytes()
-            extracted_pdf.close()
-            pdf_document.close()
-
-            # Return the extracted PDF
-            headers = {
-                'Content-Length': str(len(extracted_content)),
-                'Cache-Control': 'private, max-age=300',  # Cache for 5 minutes
-                'Content-Disposition': f'inline; filename="{raw_doc["file_name"]}"',
-                'X-Sub-PDF-Page': str(new_page_number),  # Custom header with page info
-                'Accept-Ranges': 'bytes'
-            }
-            
-            # When show_all is True, allow iframe embedding
-            if show_all:
-                debug_print(f"Setting CSP headers for iframe embedding (show_all={show_all})")
-                headers['Content-Security-Policy'] = (
-                    "default-src 'self'; "
-                    "frame-ancestors 'self'; "  # Allow embedding in same origin
-                    "object-src 'none';"
-                )
-                headers['X-Frame-Options'] = 'SAMEORIGIN'  # Allow same-origin framing
-            else:
-                debug_print(f"NOT setting CSP headers for iframe embedding (show_all={show_all})")
-            
-            response = Response(
-                extracted_content,
-                content_type='application/pdf',
-                headers=headers
+        # Return the extracted PDF
+        headers = {
+            'Content-Length': str(len(extracted_content)),
+            'Cache-Control': 'private, max-age=300',  # Cache for 5 minutes
+            'Content-Disposition': f'inline; filename="{raw_doc["file_name"]}"',
+            'X-Sub-PDF-Page': str(new_page_number)  # Custom header with page info
+        }
+        
+        # When show_all is True, allow iframe embedding
+        if show_all:
+            debug_print(f"Setting CSP headers for iframe embedding (show_all={show_all})")
+            headers['Content-Security-Policy'] = (
+                "default-src 'self'; "
+                "frame-ancestors 'self'; "  # Allow embedding in same origin
+                "object-src 'none';"
             )
-            return response
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_pdf_path):
-                os.remove(temp_pdf_path)
+            headers['X-Frame-Options'] = 'SAMEORIGIN'  # Allow same-origin framing
+        else:
+            debug_print(f"NOT setting CSP headers for iframe embedding (show_all={show_all})")
         
+        response = Response(
+            extracted_content,
+            content_type='application/pdf',
+            headers=headers
+        )
+        # Serve Range requests (206 with Content-Range) from the extracted window
+        return response.make_conditional(request, accept_ranges=True, complete_length=len(extracted_content))
+
     except Exception as e:
         print(f"Error serving PDF citation content: {e}")
         raise Exception(f"Failed to load PDF content: {str(e)}")
@@ -181,22 +181,16 @@ def register_route_external_public_documents(app):
 
         where_clause = " AND ".join(query_conditions)
 
-        # --- 3) Query matching documents, then collapse to current revisions before paginating ---
+        # --- 3) Count, sort and page current revisions in Cosmos ---
         try:
-            offset = (page - 1) * page_size
-            data_query_str = f"""
-                SELECT *
-                FROM c
-                WHERE {where_clause}
-            """
-            matching_docs = list(cosmos_public_documents_container.query_items(
-                query=data_query_str,
-                parameters=query_params,
-                enable_cross_partition_query=True
-            ))
-            current_docs = sort_documents(select_current_documents(matching_docs))
-            total_count = len(current_docs)
-            docs = current_docs[offset:offset + page_size]
+            docs, total_count = query_current_documents_page(
+                cosmos_public_documents_container,
+                where_clause,
+                query_params,
+                page=page,
+                page_size=page_size,
+                revision_scopes=[{'user_id': user_id, 'public_workspace_id': active_workspace_id}],
+            )
         except Exception as e:
             print(f"Error fetching public documents: {e}")
             return jsonify({"error": f"Error fetching documents: {str(e)}"}), 500
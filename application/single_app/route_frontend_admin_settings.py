@@ -5,6 +5,7 @@ from functions_documents import *
 from functions_authentication import *
 from functions_keyvault import keyvault_model_endpoint_cleanup_helper, keyvault_model_endpoint_delete_helper, keyvault_model_endpoint_save_helper, redact_model_endpoint_secret_values
 from functions_settings import *
+from functions_settings_assets import save_settings_asset
 from functions_activity_logging import log_web_search_consent_acceptance, log_general_admin_action
 from functions_notifications import broadcast_system_notification
 from functions_logging import *
@@ -1085,10 +1086,13 @@ def register_route_frontend_admin_settings(app):
                 'show_logo': form_data.get('show_logo') == 'on',
                 'hide_app_title': form_data.get('hide_app_title') == 'on',
                 'custom_logo_base64': settings.get('custom_logo_base64', ''),
+                'custom_logo_hash': settings.get('custom_logo_hash', ''),
                 'logo_version': settings.get('logo_version', 1),
                 'custom_logo_dark_base64': settings.get('custom_logo_dark_base64', ''),
+                'custom_logo_dark_hash': settings.get('custom_logo_dark_hash', ''),
                 'logo_dark_version': settings.get('logo_dark_version', 1),
                 'custom_favicon_base64': settings.get('custom_favicon_base64', ''),
+                'custom_favicon_hash': settings.get('custom_favicon_hash', ''),
                 'favicon_version': settings.get('favicon_version', 1),
                 'landing_page_text': form_data.get('landing_page_text', ''),
                 'landing_page_alignment': form_data.get('landing_page_alignment', 'left'),
@@ -1439,17 +1443,18 @@ def register_route_frontend_admin_settings(app):
                         content=f"Converted image to PNG for processing: {logo_file.filename}"
                     )
 
-                    # 6) Turn to base64
-                    base64_str = base64.b64encode(png_data).decode('utf-8')
+                    # 6) Store the bytes outside the settings document, keyed by content hash
+                    asset_hash = save_settings_asset('custom_logo', png_data)
 
                     add_file_task_to_file_processing_log(
                         document_id='Image_Upload', # Placeholder if needed
                         user_id='New_image',
-                        content=f"Converted image to base64 for processing: {base64_str}"
+                        content=f"Stored image as settings asset custom_logo ({asset_hash})"
                     )
 
                     # ****** CHANGE HERE: Update only on success *****
-                    new_settings['custom_logo_base64'] = base64_str
+                    new_settings['custom_logo_hash'] = asset_hash
+                    new_settings['custom_logo_base64'] = ''
 
                     current_version = settings.get('logo_version', 1) # Get version from settings loaded at start
                     new_settings['logo_version'] = current_version + 1 # Increment
@@ -1521,17 +1526,18 @@ def register_route_frontend_admin_settings(app):
                         content=f"Converted dark mode logo image to PNG for processing: {logo_dark_file.filename}"
                     )
 
-                    # 6) Turn to base64
-                    base64_str = base64.b64encode(png_data).decode('utf-8')
+                    # 6) Store the bytes outside the settings document, keyed by content hash
+                    asset_hash = save_settings_asset('custom_logo_dark', png_data)
 
                     add_file_task_to_file_processing_log(
                         document_id='Image_Upload', # Placeholder if needed
                         user_id='New_image',
-                        content=f"Converted dark mode logo image to base64 for processing: {base64_str}"
+                        content=f"Stored dark mode logo image as settings asset custom_logo_dark ({asset_hash})"
                     )
 
                     # ****** CHANGE HERE: Update only on success *****
-                    new_settings['custom_logo_dark_base64'] = base64_str
+                    new_settings['custom_logo_dark_hash'] = asset_hash
+                    new_settings['custom_logo_dark_base64'] = ''
 
                     current_version = settings.get('logo_dark_version', 1) # Get version from settings loaded at start
                     new_settings['logo_dark_version'] = current_version + 1 # Increment
@@ -1596,17 +1602,18 @@ def register_route_frontend_admin_settings(app):
                         content=f"Converted favicon image to ICO for processing: {favicon_file.filename}"
                     )
 
-                    # 6) Turn to base64
-                    base64_str = base64.b64encode(ico_data).decode('utf-8')
+                    # 6) Store the bytes outside the settings document, keyed by content hash
+                    asset_hash = save_settings_asset('custom_favicon', ico_data)
 
                     add_file_task_to_file_processing_log(
                         document_id='Image_Upload', # Placeholder if needed
                         user_id='New_image',
-                        content=f"Converted favicon image to base64 for processing: {base64_str}"
+                        content=f"Stored favicon image as settings asset custom_favicon ({asset_hash})"
                     )
 
                     # Update only on success
-                    new_settings['custom_favicon_base64'] = base64_str
+                    new_settings['custom_favicon_hash'] = asset_hash
+                    new_settings['custom_favicon_base64'] = ''
 
                     current_version = settings.get('favicon_version', 1) # Get version from settings loaded at start
                     new_settings['favicon_version'] = current_version + 1 # Increment
@@ -1617,7 +1624,7 @@ def register_route_frontend_admin_settings(app):
                     log_event(f"Error processing favicon file: {e}", level=logging.ERROR)
 
             # --- Update settings in DB ---
-            # new_settings now contains either the new logo/favicon base64 or the original ones
+            # new_settings now contains either the new logo/favicon hashes or the original ones
             if update_settings(new_settings):
                 flash("Admin settings updated successfully.", "success")
                 # Reconfigure Application Insights logging immediately if the setting changed
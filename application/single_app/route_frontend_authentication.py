@@ -139,6 +139,21 @@ def register_route_frontend_authentication(app):
                 log_user_login(user_id, 'azure_ad')
         except Exception as e:
             debug_print(f"Could not log login activity: {e}")
+
+        # Sync email, display name and profile image once per login, off the request path
+        try:
+            from functions_settings import sync_user_profile_on_login
+            user_id = session['user'].get('oid') or session['user'].get('sub')
+            if user_id:
+                current_app.extensions['executor'].submit(
+                    sync_user_profile_on_login,
+                    user_id,
+                    email=session['user'].get('preferred_username') or session['user'].get('email'),
+                    display_name=session['user'].get('name'),
+                    access_token=result.get('access_token')
+                )
+        except Exception as e:
+            debug_print(f"Could not schedule user profile sync: {e}")
         
         # Redirect to the originally intended page or home
         # You might want to store the original destination in the session during /login
@@ -8,6 +8,7 @@ Loader for Semantic Kernel plugins/actions from app settings.
 import logging
 import builtins
 import os
+import time
 from azure.identity import AzureAuthorityHosts, ClientSecretCredential, DefaultAzureCredential, get_bearer_token_provider
 from agent_orchestrator_groupchat import OrchestratorAgent, SCGroupChatManager
 from semantic_kernel import Kernel
@@ -49,6 +50,12 @@ from semantic_kernel_plugins.plugin_loader import discover_plugins
 from semantic_kernel_plugins.openapi_plugin_factory import OpenApiPluginFactory
 from functions_agent_scope import find_agent_by_scope
 import app_settings_cache
+from semantic_kernel_pool import (
+    KERNEL_POOL_LEASE_ATTRIBUTE,
+    acquire_pooled_kernel,
+    get_kernel_pool_settings,
+    get_user_kernel_pool_identity,
+)
 
 # Agent and Azure OpenAI chat service imports
 log_event("[SK Loader] Starting loader imports")
@@ -837,6 +844,56 @@ def load_core_plugins_only(kernel: Kernel, settings):
         log_event("[SK Loader] Loaded Tabular Processing plugin.", level=logging.INFO)
 
 # =================== Semantic Kernel Initialization ===================
+def load_pooled_user_semantic_kernel(kernel: Kernel, settings, user_id: str, redis_client):
+    """
+    Check out a warmed per-user kernel from this worker's pool, or build one.
+
+    The built kernel is leased to the current request through flask.g and returned
+    to the pool by the app's teardown handler, so plugin instances, resolved secrets
+    and agents are reused across messages until the user's manifests or the app
+    settings change.
+    """
+    enabled, max_entries, _ = get_kernel_pool_settings(settings)
+    if not enabled or max_entries <= 0:
+        return load_user_semantic_kernel(kernel, settings, user_id=user_id, redis_client=redis_client)
+
+    try:
+        user_settings = get_user_settings(user_id).get('settings', {})
+        request_state = {
+            'force_enable_agents': bool(getattr(g, 'force_enable_agents', False)),
+            'request_agent_info': getattr(g, 'request_agent_info', None),
+            'conversation_group_id': getattr(g, 'conversation_group_id', None),
+        }
+        version_accessor = getattr(app_settings_cache, 'get_settings_cache_version', None)
+        settings_version = version_accessor() if callable(version_accessor) else None
+        pool_key, manifest_version = get_user_kernel_pool_identity(
+            user_id,
+            user_settings,
+            request_state,
+            settings_version,
+        )
+    except Exception as e:
+        log_event(f"[SK Pool] Could not fingerprint kernel for user {user_id}, building without pool: {e}", level=logging.WARNING)
+        return load_user_semantic_kernel(kernel, settings, user_id=user_id, redis_client=redis_client)
+
+    pooled = acquire_pooled_kernel(settings, pool_key, manifest_version)
+    if pooled:
+        kernel, kernel_agents, built_at = pooled
+        debug_print(f"[SK Pool] Reusing pooled kernel for user {user_id}")
+        log_event(f"[SK Pool] Reusing pooled kernel for user {user_id}", level=logging.INFO)
+    else:
+        built_at = time.time()
+        kernel, kernel_agents = load_user_semantic_kernel(kernel, settings, user_id=user_id, redis_client=redis_client)
+
+    setattr(g, KERNEL_POOL_LEASE_ATTRIBUTE, {
+        'pool_key': pool_key,
+        'manifest_version': manifest_version,
+        'kernel': kernel,
+        'kernel_agents': kernel_agents,
+        'built_at': built_at,
+    })
+    return kernel, kernel_agents
+
 def initialize_semantic_kernel(user_id: str=None, redis_client=None):
     debug_print(f"[SK Loader] Initializing Semantic Kernel and plugins...")
     log_event(
@@ -860,7 +917,7 @@ def initialize_semantic_kernel(user_id: str=None, redis_client=None):
     if settings.get('per_user_semantic_kernel', False) and user_id is not None:
         debug_print(f"[SK Loader] Using per-user semantic kernel mode")
         log_event("[SK Loader] Using per-user semantic kernel mode", level=logging.INFO)
-        kernel, kernel_agents = load_user_semantic_kernel(kernel, settings, user_id=user_id, redis_client=redis_client)
+        kernel, kernel_agents = load_pooled_user_semantic_kernel(kernel, settings, user_id=user_id, redis_client=redis_client)
         g.kernel = kernel
         g.kernel_agents = kernel_agents
         print(f"[SK Loader] Per-user mode - stored g.kernel_agents: {type(kernel_agents)} with {len(kernel_agents) if kernel_agents else 0} agents")
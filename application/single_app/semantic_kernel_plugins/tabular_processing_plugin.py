@@ -8,18 +8,41 @@ and chat-uploaded documents (personal-chat container).
 """
 import asyncio
 import copy
-from datetime import date, datetime
 import io
 import json
 import logging
 import re
 import warnings
+import numpy
 import pandas
 from typing import Annotated, Dict, List, Optional, Set
 from urllib.parse import urlsplit, urlunsplit
 from semantic_kernel.functions import kernel_function
 from semantic_kernel_plugins.plugin_invocation_logger import plugin_function_logger
 from functions_appinsights import log_event
+from functions_settings import get_settings
+from functions_tabular_snapshots import (
+    format_datetime_column_label,
+    get_tabular_blob_etag,
+    get_tabular_excel_engine,
+    get_tabular_snapshot_sheet_entry,
+    is_tabular_snapshot_enabled,
+    load_tabular_snapshot_sheet,
+    normalize_column_label,
+    normalize_dataframe_columns,
+    read_tabular_sheets,
+    read_tabular_snapshot_manifest,
+    write_tabular_snapshot,
+)
+from utils_tabular_cache import (
+    TabularSheetProfile,
+    get_cached_tabular_dataframe,
+    get_dataframe_view,
+    get_tabular_cache_key,
+    get_tabular_index_settings,
+    get_tabular_sheet_profile,
+    store_tabular_dataframe,
+)
 from config import (
     CLIENTS,
     TABULAR_EXTENSIONS,
@@ -108,9 +131,13 @@ class TabularProcessingPlugin:
     SOURCE_VALUE_MATCH_COUNT_LIMIT = 100
 
     def __init__(self):
-        self._df_cache = {}  # Per-instance cache: (container, blob_name, sheet_name) -> DataFrame
+        self._df_cache = {}  # Fallback when the blob ETag is unknown: (container, blob_name, sheet_name) -> DataFrame
         self._blob_data_cache = {}  # Per-instance cache: (container, blob_name) -> raw bytes
         self._workbook_metadata_cache = {}  # Per-instance cache: (container, blob_name) -> workbook metadata
+        self._snapshot_manifest_cache = {}  # Per-instance cache: (container, blob_name) -> snapshot manifest or None
+        self._source_etag_cache = {}  # Per-instance cache: (container, blob_name) -> source blob ETag or None
+        self._backfilled_blobs = set()  # (container, blob_name) whose sheets were all parsed by a snapshot backfill
+        self._sheet_profiles = {}  # Typed profiles for sheets kept in the fallback _df_cache
         self._default_sheet_overrides = {}  # (container, blob_name) -> default sheet name
         self._resolved_blob_location_overrides = {}  # (source, filename) -> (container, blob_name)
 
@@ -213,12 +240,94 @@ class TabularProcessingPlugin:
 
     def _get_excel_engine(self, blob_name: str) -> Optional[str]:
         """Return the pandas Excel engine for a workbook, or None for CSV files."""
-        name_lower = blob_name.lower()
-        if name_lower.endswith('.xlsx') or name_lower.endswith('.xlsm'):
-            return 'openpyxl'
-        if name_lower.endswith('.xls'):
-            return 'xlrd'
-        return None
+        return get_tabular_excel_engine(blob_name)
+
+    def _get_tabular_snapshot_manifest(self, container_name: str, blob_name: str) -> Optional[dict]:
+        """Return a current columnar snapshot manifest for a blob, backfilling it on first use."""
+        cache_key = (container_name, blob_name)
+        if cache_key in self._snapshot_manifest_cache:
+            return self._snapshot_manifest_cache[cache_key]
+
+        manifest = None
+        try:
+            source_etag = self._get_source_etag(container_name, blob_name)
+            if source_etag and is_tabular_snapshot_enabled(get_settings()):
+                manifest = read_tabular_snapshot_manifest(container_name, blob_name, source_etag=source_etag)
+                if manifest is None:
+                    manifest = self._backfill_tabular_snapshot(container_name, blob_name, source_etag)
+        except Exception as exc:
+            log_event(
+                f"[TabularProcessingPlugin] Snapshot unavailable for {blob_name}, reading the original file: {exc}",
+                level=logging.WARNING,
+            )
+            manifest = None
+
+        self._snapshot_manifest_cache[cache_key] = manifest
+        return manifest
+
+    def _backfill_tabular_snapshot(self, container_name: str, blob_name: str, source_etag: Optional[str]) -> dict:
+        """Parse the original file once, write its snapshot, and keep the parsed sheets for this run."""
+        data = self._download_tabular_blob_bytes(container_name, blob_name)
+        sheet_dataframes = read_tabular_sheets(data, blob_name)
+        manifest = write_tabular_snapshot(container_name, blob_name, sheet_dataframes, source_etag)
+        for sheet_name, df in sheet_dataframes.items():
+            self._cache_sheet_dataframe(container_name, blob_name, sheet_name, df)
+        self._backfilled_blobs.add((container_name, blob_name))
+        return manifest
+
+    def _get_source_etag(self, container_name: str, blob_name: str) -> Optional[str]:
+        """Return the source blob ETag that versions its cached sheets and snapshot."""
+        cache_key = (container_name, blob_name)
+        if cache_key not in self._source_etag_cache:
+            try:
+                self._source_etag_cache[cache_key] = get_tabular_blob_etag(container_name, blob_name)
+            except Exception as exc:
+                log_event(
+                    f"[TabularProcessingPlugin] Could not read ETag for {blob_name}; caching for this request only: {exc}",
+                    level=logging.WARNING,
+                )
+                self._source_etag_cache[cache_key] = None
+        return self._source_etag_cache[cache_key]
+
+    def _get_cached_sheet_dataframe(self, container_name: str, blob_name: str, sheet_name: Optional[str]) -> Optional[pandas.DataFrame]:
+        """Return a parsed sheet from the process-wide cache (or this instance's fallback cache)."""
+        source_etag = self._get_source_etag(container_name, blob_name)
+        if source_etag:
+            cached_df = get_cached_tabular_dataframe(
+                get_tabular_cache_key(container_name, blob_name, source_etag, sheet_name),
+            )
+            if cached_df is not None:
+                return cached_df
+
+        return self._df_cache.get((container_name, blob_name, sheet_name or '__default__'))
+
+    def _get_sheet_profile(self, container_name: str, blob_name: str, sheet_name: Optional[str]) -> Optional[TabularSheetProfile]:
+        """Return the typed profile kept with a loaded sheet, or None when the sheet is not loaded."""
+        source_etag = self._get_source_etag(container_name, blob_name)
+        if source_etag:
+            sheet_profile = get_tabular_sheet_profile(
+                get_tabular_cache_key(container_name, blob_name, source_etag, sheet_name),
+            )
+            if sheet_profile is not None:
+                return sheet_profile
+
+        instance_key = (container_name, blob_name, sheet_name or '__default__')
+        df = self._df_cache.get(instance_key)
+        if df is None:
+            return None
+        if instance_key not in self._sheet_profiles:
+            self._sheet_profiles[instance_key] = TabularSheetProfile(df)
+        return self._sheet_profiles[instance_key]
+
+    def _cache_sheet_dataframe(self, container_name: str, blob_name: str, sheet_name: Optional[str], df: pandas.DataFrame):
+        """Cache a parsed sheet process-wide, keeping it for this instance when it cannot be shared."""
+        source_etag = self._get_source_etag(container_name, blob_name)
+        if source_etag and store_tabular_dataframe(
+            get_tabular_cache_key(container_name, blob_name, source_etag, sheet_name),
+            df,
+        ):
+            return
+        self._df_cache[(container_name, blob_name, sheet_name or '__default__')] = df
 
     def _get_workbook_metadata(self, container_name: str, blob_name: str) -> dict:
         """Return workbook metadata including available sheet names for Excel files."""
@@ -234,7 +343,14 @@ class TabularProcessingPlugin:
             'default_sheet': None,
         }
 
-        if engine:
+        snapshot_manifest = self._get_tabular_snapshot_manifest(container_name, blob_name) if engine else None
+        if snapshot_manifest:
+            metadata.update({
+                'sheet_names': list(snapshot_manifest.get('sheet_names') or []),
+                'sheet_count': snapshot_manifest.get('sheet_count', 0),
+                'default_sheet': snapshot_manifest.get('default_sheet'),
+            })
+        elif engine:
             data = self._download_tabular_blob_bytes(container_name, blob_name)
             excel_file = pandas.ExcelFile(io.BytesIO(data), engine=engine)
             sheet_names = list(excel_file.sheet_names)
@@ -375,8 +491,9 @@ class TabularProcessingPlugin:
                 container_name,
                 blob_name,
                 sheet_name=sheet,
+                typed=True,
             )
-            df = self._try_numeric_conversion(df)
+            sheet_profile = self._get_sheet_profile(container_name, blob_name, sheet)
 
             if column not in df.columns:
                 continue
@@ -391,6 +508,7 @@ class TabularProcessingPlugin:
                     additional_filter_operator=additional_filter_operator,
                     additional_filter_value=additional_filter_value,
                     normalize_match=normalize_match,
+                    sheet_profile=sheet_profile,
                 )
             except (KeyError, ValueError):
                 continue
@@ -477,8 +595,9 @@ class TabularProcessingPlugin:
                 container_name,
                 blob_name,
                 sheet_name=sheet,
+                typed=True,
             )
-            df = self._try_numeric_conversion(df)
+            sheet_profile = self._get_sheet_profile(container_name, blob_name, sheet)
 
             try:
                 filtered_df, sheet_filters = self._apply_optional_dataframe_filters(
@@ -491,6 +610,7 @@ class TabularProcessingPlugin:
                     additional_filter_operator=additional_filter_operator,
                     additional_filter_value=additional_filter_value,
                     normalize_match=normalize_match,
+                    sheet_profile=sheet_profile,
                 )
             except KeyError:
                 continue
@@ -514,6 +634,7 @@ class TabularProcessingPlugin:
                     return_columns=requested_return_columns,
                     normalize_match=normalize_match,
                     max_rows=remaining_capacity,
+                    sheet_profile=sheet_profile,
                 )
             except KeyError:
                 continue
@@ -621,8 +742,9 @@ class TabularProcessingPlugin:
                 container_name,
                 blob_name,
                 sheet_name=sheet,
+                typed=True,
             )
-            df = self._try_numeric_conversion(df)
+            sheet_profile = self._get_sheet_profile(container_name, blob_name, sheet)
 
             if lookup_column not in df.columns:
                 continue
@@ -634,6 +756,7 @@ class TabularProcessingPlugin:
                     operator,
                     normalized_lookup_value,
                     normalize_match=normalize_match,
+                    sheet_profile=sheet_profile,
                 )
             except ValueError:
                 mask = self._build_series_match_mask(
@@ -641,6 +764,7 @@ class TabularProcessingPlugin:
                     'equals',
                     normalized_lookup_value,
                     normalize_match=normalize_match,
+                    sheet_profile=sheet_profile,
                 )
 
             sheet_matches = int(mask.sum())
@@ -653,12 +777,12 @@ class TabularProcessingPlugin:
             if remaining_capacity > 0:
                 matched_df = df[mask].head(remaining_capacity)
                 if target_column and target_column in df.columns:
-                    for _, row in matched_df.iterrows():
+                    for row in matched_df.to_dict(orient='records'):
                         combined_results.append({
                             '_sheet': sheet,
                             lookup_column: row[lookup_column],
                             target_column: row[target_column],
-                            '_full_row': {str(k): v for k, v in row.to_dict().items()},
+                            '_full_row': {str(k): v for k, v in row.items()},
                         })
                 else:
                     for row in matched_df.to_dict(orient='records'):
@@ -718,8 +842,8 @@ class TabularProcessingPlugin:
                 container_name,
                 blob_name,
                 sheet_name=sheet,
+                typed=True,
             )
-            df = self._try_numeric_conversion(df)
 
             try:
                 result_df, _ = self._apply_query_expression_with_fallback(
@@ -825,8 +949,9 @@ class TabularProcessingPlugin:
                 container_name,
                 blob_name,
                 sheet_name=sheet,
+                typed=True,
             )
-            df = self._try_numeric_conversion(df)
+            sheet_profile = self._get_sheet_profile(container_name, blob_name, sheet)
 
             try:
                 filtered_df, sheet_filters = self._apply_optional_dataframe_filters(
@@ -839,6 +964,7 @@ class TabularProcessingPlugin:
                     additional_filter_operator=additional_filter_operator,
                     additional_filter_value=additional_filter_value,
                     normalize_match=normalize_match,
+                    sheet_profile=sheet_profile,
                 )
             except KeyError:
                 continue
@@ -1067,17 +1193,16 @@ class TabularProcessingPlugin:
             blob_name,
             sheet_name=source_sheet,
             require_explicit_sheet=True,
+            typed=True,
         )
         target_df = self._read_tabular_blob_to_dataframe(
             container_name,
             blob_name,
             sheet_name=target_sheet,
             require_explicit_sheet=True,
+            typed=True,
         )
 
-        source_df = self._try_numeric_conversion(source_df)
-        target_df = self._try_numeric_conversion(target_df)
-
         source_required_columns = [source_value_column]
         if source_alias_column:
             source_required_columns.append(source_alias_column)
@@ -1300,55 +1425,15 @@ class TabularProcessingPlugin:
 
     def _format_datetime_column_label(self, value) -> str:
         """Render date-like Excel header labels into stable analysis-friendly strings."""
-        timestamp_value = pandas.Timestamp(value)
-
-        if (
-            timestamp_value.hour == 0
-            and timestamp_value.minute == 0
-            and timestamp_value.second == 0
-            and timestamp_value.microsecond == 0
-        ):
-            if timestamp_value.day == 1:
-                return timestamp_value.strftime('%b-%y')
-            return timestamp_value.strftime('%Y-%m-%d')
-
-        return timestamp_value.strftime('%Y-%m-%d %H:%M:%S')
+        return format_datetime_column_label(value)
 
     def _normalize_column_label(self, label, fallback_index: int) -> str:
         """Convert arbitrary DataFrame column labels into stable string names."""
-        if label is None or (not isinstance(label, str) and pandas.isna(label)):
-            return f"Column {fallback_index}"
-
-        if isinstance(label, pandas.Timestamp):
-            return self._format_datetime_column_label(label)
-
-        if isinstance(label, datetime):
-            return self._format_datetime_column_label(label)
-
-        if isinstance(label, date):
-            return self._format_datetime_column_label(datetime.combine(label, datetime.min.time()))
-
-        normalized_label = str(label).strip()
-        return normalized_label or f"Column {fallback_index}"
+        return normalize_column_label(label, fallback_index)
 
     def _normalize_dataframe_columns(self, df: pandas.DataFrame) -> pandas.DataFrame:
         """Rename DataFrame columns to unique, JSON-safe string labels."""
-        normalized_df = df.copy()
-        normalized_columns = []
-        normalized_label_counts = {}
-
-        for column_index, column_label in enumerate(normalized_df.columns, start=1):
-            base_label = self._normalize_column_label(column_label, column_index)
-            occurrence_count = normalized_label_counts.get(base_label, 0) + 1
-            normalized_label_counts[base_label] = occurrence_count
-
-            if occurrence_count == 1:
-                normalized_columns.append(base_label)
-            else:
-                normalized_columns.append(f"{base_label} ({occurrence_count})")
-
-        normalized_df.columns = normalized_columns
-        return normalized_df
+        return normalize_dataframe_columns(df)
 
     def _normalize_entity_match_text(self, value) -> Optional[str]:
         """Normalize entity-style text for stable name and owner comparisons."""
@@ -1570,7 +1655,12 @@ class TabularProcessingPlugin:
         matched_cell_count = 0
         extracted_match_count = 0
 
-        for cell_value in series.tolist():
+        # Candidates depend only on the cell value, so evaluate each distinct value once
+        # (in first-appearance order) and weight it by how many cells hold it.
+        value_codes, unique_values = pandas.factorize(series, use_na_sentinel=False)
+        value_counts = numpy.bincount(value_codes, minlength=len(unique_values))
+
+        for cell_value, cell_count in zip(unique_values.tolist(), value_counts.tolist()):
             candidates = self._collect_distinct_value_candidates(
                 cell_value,
                 normalize_match=normalize_match,
@@ -1581,8 +1671,8 @@ class TabularProcessingPlugin:
             if not candidates:
                 continue
 
-            matched_cell_count += 1
-            extracted_match_count += len(candidates)
+            matched_cell_count += cell_count
+            extracted_match_count += len(candidates) * cell_count
             for candidate in candidates:
                 distinct_display_values.setdefault(
                     candidate['canonical_key'],
@@ -1640,6 +1730,7 @@ class TabularProcessingPlugin:
         return_columns=None,
         normalize_match: bool = False,
         max_rows: int = 100,
+        sheet_profile: Optional[TabularSheetProfile] = None,
     ) -> dict:
         """Search one or more columns in a DataFrame and return row-context results."""
         requested_search_columns = self._parse_optional_column_list_argument(search_columns)
@@ -1660,47 +1751,48 @@ class TabularProcessingPlugin:
             if column_name in df.columns
         ]
 
-        combined_mask = pandas.Series([False] * len(df), index=df.index)
-        column_masks = {}
-        for column_name in resolved_search_columns:
-            column_mask = self._build_series_match_mask(
-                df[column_name],
-                search_operator,
-                search_value,
-                normalize_match=normalize_match,
-            ).fillna(False)
-            column_masks[column_name] = column_mask
-            combined_mask = combined_mask | column_mask
+        # One boolean column per searched column, stacked into a rows x columns matrix
+        if resolved_search_columns:
+            mask_matrix = numpy.column_stack([
+                self._build_series_match_mask(
+                    df[column_name],
+                    search_operator,
+                    search_value,
+                    normalize_match=normalize_match,
+                    sheet_profile=sheet_profile,
+                ).fillna(False).to_numpy(dtype=bool)
+                for column_name in resolved_search_columns
+            ])
+        else:
+            mask_matrix = numpy.zeros((len(df), 0), dtype=bool)
+
+        matched_positions = numpy.flatnonzero(mask_matrix.any(axis=1))
+        returned_positions = matched_positions[:int(max_rows)]
+        returned_df = df.iloc[returned_positions]
+        returned_masks = mask_matrix[returned_positions]
+
+        payload_columns = list(dict.fromkeys(resolved_return_columns)) or list(returned_df.columns)
+        payload_rows = returned_df[payload_columns].to_dict(orient='records')
+        matched_value_rows = returned_df[resolved_search_columns].to_dict(orient='records')
 
-        matched_df = df[combined_mask]
         matched_columns = []
         seen_matched_columns = set()
         result_rows = []
-
-        for row_index, row in matched_df.head(int(max_rows)).iterrows():
-            row_matched_columns = []
-            for column_name in resolved_search_columns:
-                if not bool(column_masks[column_name].loc[row_index]):
-                    continue
-                row_matched_columns.append(column_name)
+        for row_payload, matched_value_row, row_mask in zip(payload_rows, matched_value_rows, returned_masks):
+            row_matched_columns = [
+                column_name
+                for column_name, column_matched in zip(resolved_search_columns, row_mask)
+                if column_matched
+            ]
+            for column_name in row_matched_columns:
                 lowered_column = column_name.casefold()
                 if lowered_column not in seen_matched_columns:
                     seen_matched_columns.add(lowered_column)
                     matched_columns.append(column_name)
 
-            if resolved_return_columns:
-                row_payload = {
-                    column_name: row.get(column_name)
-                    for column_name in resolved_return_columns
-                }
-            else:
-                row_payload = {
-                    str(key): value for key, value in row.to_dict().items()
-                }
-
             row_payload['_matched_columns'] = row_matched_columns
             row_payload['_matched_values'] = {
-                column_name: row.get(column_name)
+                column_name: matched_value_row.get(column_name)
                 for column_name in row_matched_columns
             }
             result_rows.append(row_payload)
@@ -1709,44 +1801,140 @@ class TabularProcessingPlugin:
             'searched_columns': resolved_search_columns,
             'matched_columns': matched_columns,
             'return_columns': resolved_return_columns or None,
-            'total_matches': len(matched_df),
+            'total_matches': int(len(matched_positions)),
             'returned_rows': len(result_rows),
             'data': result_rows,
         }
 
+    def _get_profiled_series(
+        self,
+        series: pandas.Series,
+        kind: str,
+        builder,
+        sheet_profile: Optional[TabularSheetProfile] = None,
+    ) -> pandas.Series:
+        """
+        Return builder(series), reusing the sheet profile's precomputed result when available.
+
+        The series must be a column (or a row subset of a column) of the sheet's typed frame.
+        Callers must not modify the returned series.
+        """
+        if sheet_profile is None or series.name not in sheet_profile.columns:
+            return builder(series)
+
+        derived_series = sheet_profile.get_derived_series(kind, series.name, builder)
+        if len(derived_series) == len(series) and derived_series.index.equals(series.index):
+            return derived_series
+        return derived_series.loc[series.index]
+
+    def _build_lower_text_series(self, series: pandas.Series) -> pandas.Series:
+        """Lower-cased text of a column, as compared by non-normalized matches."""
+        return series.astype(str).str.lower()
+
+    def _build_entity_text_series(self, series: pandas.Series) -> pandas.Series:
+        """Entity-normalized text of a column, as compared by normalize_match matches."""
+        return series.map(self._normalize_entity_match_text)
+
+    def _get_indexed_match_mask(
+        self,
+        series: pandas.Series,
+        op: str,
+        value,
+        normalize_match: bool,
+        sheet_profile: Optional[TabularSheetProfile],
+    ) -> Optional[pandas.Series]:
+        """
+        Answer an equals, startswith or plain-text contains match from the sheet's inverted index.
+
+        Returns None when the match has to scan the column instead: no profile, a small
+        sheet, the index disabled, regex patterns, or any other operator.
+        """
+        if op not in {'==', 'equals', 'startswith', 'contains'}:
+            return None
+        if sheet_profile is None or series.name not in sheet_profile.columns:
+            return None
+
+        index_enabled, index_min_rows = get_tabular_index_settings()
+        if not index_enabled or sheet_profile.row_count < index_min_rows:
+            return None
+
+        if normalize_match:
+            query_text = self._normalize_entity_match_text(value)
+            if not query_text:
+                return None
+            column_index = sheet_profile.get_column_index('entity_text', series.name, self._build_entity_text_series)
+        else:
+            if op == 'contains' and re.search(r'[.^$*+?{}\[\]\\|()]', str(value)):
+                return None
+            query_text = str(value).lower()
+            column_index = sheet_profile.get_column_index('lower_text', series.name, self._build_lower_text_series)
+
+        if op == 'startswith':
+            sheet_mask = column_index.match_prefix(query_text)
+        elif op == 'contains':
+            sheet_mask = column_index.match_substring(query_text)
+        else:
+            sheet_mask = column_index.match_equal(query_text)
+
+        if sheet_mask is None:
+            return None
+        if len(sheet_mask) == len(series) and sheet_mask.index.equals(series.index):
+            return sheet_mask
+        return sheet_mask.loc[series.index]
+
     def _build_series_match_mask(
         self,
         series: pandas.Series,
         operator: str,
         value,
         normalize_match: bool = False,
+        sheet_profile: Optional[TabularSheetProfile] = None,
     ) -> pandas.Series:
         """Build a boolean mask for a comparison against a DataFrame column."""
         op = (operator or 'equals').strip().lower()
 
+        def lower_text_series():
+            return self._get_profiled_series(
+                series,
+                'lower_text',
+                self._build_lower_text_series,
+                sheet_profile,
+            )
+
+        def entity_text_series():
+            return self._get_profiled_series(
+                series,
+                'entity_text',
+                self._build_entity_text_series,
+                sheet_profile,
+            )
+
         numeric_value = None
         try:
             numeric_value = float(value)
         except (ValueError, TypeError):
             numeric_value = None
 
+        if not (numeric_value is not None and op in {'==', 'equals'} and pandas.api.types.is_numeric_dtype(series)):
+            indexed_mask = self._get_indexed_match_mask(series, op, value, normalize_match, sheet_profile)
+            if indexed_mask is not None:
+                return indexed_mask
+
         if op in {'==', 'equals'}:
             if numeric_value is not None and pandas.api.types.is_numeric_dtype(series):
                 return series == numeric_value
             if normalize_match:
                 normalized_value = self._normalize_entity_match_text(value)
-                normalized_series = series.map(self._normalize_entity_match_text)
-                return normalized_series == normalized_value
-            return series.astype(str).str.lower() == str(value).lower()
+                return entity_text_series() == normalized_value
+            return lower_text_series() == str(value).lower()
 
         if op == '!=':
             if numeric_value is not None and pandas.api.types.is_numeric_dtype(series):
                 return series != numeric_value
             if normalize_match:
                 normalized_value = self._normalize_entity_match_text(value)
-                normalized_series = series.map(self._normalize_entity_match_text)
-                return normalized_series != normalized_value
-            return series.astype(str).str.lower() != str(value).lower()
+                return entity_text_series() != normalized_value
+            return lower_text_series() != str(value).lower()
 
         if op == '>':
             if numeric_value is None:
@@ -1770,7 +1958,7 @@ class TabularProcessingPlugin:
 
         if normalize_match:
             normalized_value = self._normalize_entity_match_text(value)
-            normalized_series = series.map(self._normalize_entity_match_text).fillna('')
+            normalized_series = entity_text_series().fillna('')
             if not normalized_value:
                 return pandas.Series([False] * len(series), index=series.index)
 
@@ -1781,14 +1969,16 @@ class TabularProcessingPlugin:
             if op == 'endswith':
                 return normalized_series.str.endswith(normalized_value, na=False)
         else:
-            text_series = series.astype(str)
             value_text = str(value)
             if op == 'contains':
-                return text_series.str.contains(value_text, case=False, na=False)
+                if not re.search(r'[.^$*+?{}\[\]\\|()]', value_text):
+                    # Plain text: a substring test on the cached lower-cased column matches the regex search
+                    return lower_text_series().str.contains(value_text.lower(), regex=False, na=False)
+                return series.astype(str).str.contains(value_text, case=False, na=False)
             if op == 'startswith':
-                return text_series.str.lower().str.startswith(value_text.lower())
+                return lower_text_series().str.startswith(value_text.lower())
             if op == 'endswith':
-                return text_series.str.lower().str.endswith(value_text.lower())
+                return lower_text_series().str.endswith(value_text.lower())
 
         raise ValueError(f"Unsupported operator: {operator}")
 
@@ -2010,6 +2200,7 @@ class TabularProcessingPlugin:
         additional_filter_operator: str = 'equals',
         additional_filter_value=None,
         normalize_match: bool = False,
+        sheet_profile: Optional[TabularSheetProfile] = None,
     ) -> tuple:
         """Apply optional query and up to two single-column filters to a DataFrame."""
         filtered_df = df
@@ -2063,6 +2254,7 @@ class TabularProcessingPlugin:
                 current_filter_operator,
                 current_filter_value,
                 normalize_match=normalize_match,
+                sheet_profile=sheet_profile,
             )
             filtered_df = filtered_df[mask]
             applied_filters.append(
@@ -2309,10 +2501,19 @@ class TabularProcessingPlugin:
             'relationship_hints': relationship_hints[:self.RELATIONSHIP_HINT_LIMIT],
         }
 
-    def _build_sheet_schema_summary(self, df: pandas.DataFrame, sheet_name: Optional[str], preview_rows: int = 3) -> dict:
+    def _build_sheet_schema_summary(
+        self,
+        df: pandas.DataFrame,
+        sheet_name: Optional[str],
+        preview_rows: int = 3,
+        sheet_profile: Optional[TabularSheetProfile] = None,
+    ) -> dict:
         """Build a compact schema summary for a single table or worksheet."""
         df = self._normalize_dataframe_columns(df)
-        df_numeric = self._try_numeric_conversion(df.copy())
+        if sheet_profile is not None:
+            df_numeric = sheet_profile.get_typed_dataframe()
+        else:
+            df_numeric = self._try_numeric_conversion(df.copy())
         return {
             'selected_sheet': sheet_name,
             'row_count': len(df),
@@ -2328,7 +2529,12 @@ class TabularProcessingPlugin:
         workbook_metadata = self._get_workbook_metadata(container_name, blob_name)
         if not workbook_metadata.get('is_workbook'):
             df = self._read_tabular_blob_to_dataframe(container_name, blob_name)
-            summary = self._build_sheet_schema_summary(df, None, preview_rows=preview_rows)
+            summary = self._build_sheet_schema_summary(
+                df,
+                None,
+                preview_rows=preview_rows,
+                sheet_profile=self._get_sheet_profile(container_name, blob_name, None),
+            )
             summary.update({
                 'filename': filename,
                 'is_workbook': False,
@@ -2345,11 +2551,12 @@ class TabularProcessingPlugin:
                 blob_name,
                 sheet_name=workbook_sheet_name,
             )
-            sheet_dataframes[workbook_sheet_name] = df.copy()
+            sheet_dataframes[workbook_sheet_name] = df
             per_sheet_schemas[workbook_sheet_name] = self._build_sheet_schema_summary(
                 df,
                 workbook_sheet_name,
                 preview_rows=preview_rows,
+                sheet_profile=self._get_sheet_profile(container_name, blob_name, workbook_sheet_name),
             )
 
         relationship_metadata = self._build_workbook_relationship_metadata(sheet_dataframes)
@@ -2456,8 +2663,21 @@ class TabularProcessingPlugin:
         sheet_name: Optional[str] = None,
         sheet_index: Optional[str] = None,
         require_explicit_sheet: bool = False,
+        writable: bool = False,
+        typed: bool = False,
+        columns: Optional[List[str]] = None,
     ) -> pandas.DataFrame:
-        """Download a blob and read it into a pandas DataFrame. Uses per-instance cache."""
+        """
+        Download a blob and read it into a pandas DataFrame. Uses the process-wide sheet cache.
+
+        The returned frame shares column data with the cache. Filtering, aggregation and
+        column assignment are safe; pass writable=True before modifying values in place.
+        With typed=True, numeric-looking columns come back converted, using the sheet's
+        cached typed profile instead of converting on every call.
+
+        columns lists every column the caller reads. When the sheet is not cached yet,
+        only those columns are read from its snapshot, and the pruned frame is not cached.
+        """
         resolved_sheet_name, workbook_metadata = self._resolve_sheet_selection(
             container_name,
             blob_name,
@@ -2465,15 +2685,88 @@ class TabularProcessingPlugin:
             sheet_index=sheet_index,
             require_explicit_sheet=require_explicit_sheet,
         )
-        sheet_cache_key = resolved_sheet_name or '__default__'
-        cache_key = (container_name, blob_name, sheet_cache_key)
-        if cache_key in self._df_cache:
+        if columns:
+            pruned_df = self._load_snapshot_columns(container_name, blob_name, resolved_sheet_name, columns)
+            if pruned_df is not None:
+                # The pruned frame belongs to this call, so it can be converted in place
+                return self._try_numeric_conversion(pruned_df) if typed else pruned_df
+
+        df = self._load_sheet_dataframe(container_name, blob_name, resolved_sheet_name)
+        if not typed:
+            return get_dataframe_view(df, writable=writable)
+
+        sheet_profile = self._get_sheet_profile(container_name, blob_name, resolved_sheet_name)
+        if sheet_profile is None:
+            return self._try_numeric_conversion(get_dataframe_view(df, writable=writable))
+        return get_dataframe_view(sheet_profile.get_typed_dataframe(), writable=writable)
+
+    def _load_snapshot_columns(
+        self,
+        container_name: str,
+        blob_name: str,
+        resolved_sheet_name: Optional[str],
+        columns: List[str],
+    ) -> Optional[pandas.DataFrame]:
+        """Read only some columns of an uncached sheet from its snapshot, or return None to load the whole sheet."""
+        if self._get_cached_sheet_dataframe(container_name, blob_name, resolved_sheet_name) is not None:
+            return None
+
+        snapshot_manifest = self._get_tabular_snapshot_manifest(container_name, blob_name)
+        if (container_name, blob_name) in self._backfilled_blobs:
+            # Backfilling the snapshot just parsed and cached every sheet of this file
+            return None
+        sheet_entry = get_tabular_snapshot_sheet_entry(snapshot_manifest, resolved_sheet_name)
+        if not sheet_entry:
+            return None
+
+        requested_columns = list(dict.fromkeys(column for column in columns if column))
+        available_columns = set(sheet_entry.get('columns') or [])
+        if not requested_columns or any(column not in available_columns for column in requested_columns):
+            # Missing-column errors list every available column, so they need the whole sheet
+            return None
+
+        df = load_tabular_snapshot_sheet(
+            container_name,
+            blob_name,
+            snapshot_manifest,
+            resolved_sheet_name,
+            columns=requested_columns,
+        )
+        log_event(
+            f"[TabularProcessingPlugin] Loaded {len(requested_columns)} snapshot column(s) for {blob_name}"
+            + (f" [{resolved_sheet_name}]" if resolved_sheet_name else '')
+            + f" ({len(df)} rows)",
+            level=logging.DEBUG,
+        )
+        return df
+
+    def _load_sheet_dataframe(self, container_name: str, blob_name: str, resolved_sheet_name: Optional[str]) -> pandas.DataFrame:
+        """Return the cached string frame for a resolved sheet, loading it on a miss. Callers must not modify it."""
+        cached_df = self._get_cached_sheet_dataframe(container_name, blob_name, resolved_sheet_name)
+        if cached_df is not None:
             log_event(
                 f"[TabularProcessingPlugin] Cache hit for {blob_name}"
                 + (f" [{resolved_sheet_name}]" if resolved_sheet_name else ''),
                 level=logging.DEBUG,
             )
-            return self._df_cache[cache_key].copy()
+            return cached_df
+
+        snapshot_manifest = self._get_tabular_snapshot_manifest(container_name, blob_name)
+        if (container_name, blob_name) in self._backfilled_blobs:
+            # Backfilling the snapshot just parsed every sheet of this file
+            cached_df = self._get_cached_sheet_dataframe(container_name, blob_name, resolved_sheet_name)
+            if cached_df is not None:
+                return cached_df
+        if get_tabular_snapshot_sheet_entry(snapshot_manifest, resolved_sheet_name):
+            df = load_tabular_snapshot_sheet(container_name, blob_name, snapshot_manifest, resolved_sheet_name)
+            self._cache_sheet_dataframe(container_name, blob_name, resolved_sheet_name, df)
+            log_event(
+                f"[TabularProcessingPlugin] Loaded snapshot for {blob_name}"
+                + (f" [{resolved_sheet_name}]" if resolved_sheet_name else '')
+                + f" ({len(df)} rows)",
+                level=logging.DEBUG,
+            )
+            return df
 
         data = self._download_tabular_blob_bytes(container_name, blob_name)
 
@@ -2500,14 +2793,14 @@ class TabularProcessingPlugin:
             raise ValueError(f"Unsupported tabular file type: {blob_name}")
 
         df = self._normalize_dataframe_columns(df)
-        self._df_cache[cache_key] = df
+        self._cache_sheet_dataframe(container_name, blob_name, resolved_sheet_name, df)
         log_event(
             f"[TabularProcessingPlugin] Cached DataFrame for {blob_name}"
             + (f" [{resolved_sheet_name}]" if resolved_sheet_name else '')
             + f" ({len(df)} rows)",
             level=logging.DEBUG,
         )
-        return df.copy()
+        return df
 
     def _try_numeric_conversion(self, df: pandas.DataFrame) -> pandas.DataFrame:
         """Attempt to convert string columns to numeric where possible."""
@@ -2955,7 +3248,12 @@ class TabularProcessingPlugin:
                         sheet_name=selected_sheet,
                         require_explicit_sheet=False,
                     )
-                    summary = self._build_sheet_schema_summary(df, selected_sheet, preview_rows=5)
+                    summary = self._build_sheet_schema_summary(
+                        df,
+                        selected_sheet,
+                        preview_rows=5,
+                        sheet_profile=self._get_sheet_profile(container, blob_path, selected_sheet),
+                    )
                     summary.update({
                         "filename": filename,
                         "is_workbook": workbook_metadata.get('is_workbook', False),
@@ -3027,8 +3325,9 @@ class TabularProcessingPlugin:
                     blob_path,
                     sheet_name=selected_sheet,
                     require_explicit_sheet=True,
+                    typed=True,
                 )
-                df = self._try_numeric_conversion(df)
+                sheet_profile = self._get_sheet_profile(container, blob_path, selected_sheet)
 
                 if lookup_column not in df.columns:
                     return json.dumps(
@@ -3066,6 +3365,7 @@ class TabularProcessingPlugin:
                         operator,
                         normalized_lookup_value,
                         normalize_match=normalize_match_flag,
+                        sheet_profile=sheet_profile,
                     )
                 except ValueError:
                     return json.dumps({"error": f"Unsupported match_operator: {match_operator}"})
@@ -3334,8 +3634,11 @@ class TabularProcessingPlugin:
                     blob_path,
                     sheet_name=selected_sheet,
                     require_explicit_sheet=True,
+                    typed=True,
+                    # A query expression can reference any column
+                    columns=None if query_expression else [filter_column, additional_filter_column],
                 )
-                df = self._try_numeric_conversion(df)
+                sheet_profile = self._get_sheet_profile(container, blob_path, selected_sheet)
 
                 try:
                     filtered_df, applied_filters = self._apply_optional_dataframe_filters(
@@ -3348,6 +3651,7 @@ class TabularProcessingPlugin:
                         additional_filter_operator=additional_filter_operator,
                         additional_filter_value=additional_filter_value,
                         normalize_match=normalize_match_flag,
+                        sheet_profile=sheet_profile,
                     )
                 except KeyError as missing_column_error:
                     missing_column = str(missing_column_error).strip("'")
@@ -3427,8 +3731,9 @@ class TabularProcessingPlugin:
                     blob_path,
                     sheet_name=selected_sheet,
                     require_explicit_sheet=True,
+                    typed=True,
+                    columns=[column],
                 )
-                df = self._try_numeric_conversion(df)
 
                 if column not in df.columns:
                     return json.dumps(
@@ -3546,8 +3851,9 @@ class TabularProcessingPlugin:
                     blob_path,
                     sheet_name=selected_sheet,
                     require_explicit_sheet=True,
+                    typed=True,
                 )
-                df = self._try_numeric_conversion(df)
+                sheet_profile = self._get_sheet_profile(container, blob_path, selected_sheet)
 
                 if column not in df.columns:
                     return json.dumps(
@@ -3573,6 +3879,7 @@ class TabularProcessingPlugin:
                         additional_filter_operator=additional_filter_operator,
                         additional_filter_value=additional_filter_value,
                         normalize_match=normalize_match_flag,
+                        sheet_profile=sheet_profile,
                     )
                 except KeyError as missing_column_error:
                     missing_column = str(missing_column_error).strip("'")
@@ -3686,8 +3993,9 @@ class TabularProcessingPlugin:
                     blob_path,
                     sheet_name=selected_sheet,
                     require_explicit_sheet=True,
+                    typed=True,
                 )
-                df = self._try_numeric_conversion(df)
+                sheet_profile = self._get_sheet_profile(container, blob_path, selected_sheet)
 
                 try:
                     filtered_df, applied_filters = self._apply_optional_dataframe_filters(
@@ -3700,6 +4008,7 @@ class TabularProcessingPlugin:
                         additional_filter_operator=additional_filter_operator,
                         additional_filter_value=additional_filter_value,
                         normalize_match=normalize_match_flag,
+                        sheet_profile=sheet_profile,
                     )
                 except KeyError as missing_column_error:
                     missing_column = str(missing_column_error).strip("'")
@@ -3740,6 +4049,7 @@ class TabularProcessingPlugin:
                         return_columns=parsed_return_columns,
                         normalize_match=normalize_match_flag,
                         max_rows=int(max_rows),
+                        sheet_profile=sheet_profile,
                     )
                 except KeyError as missing_column_error:
                     missing_column = str(missing_column_error).strip("'")
@@ -3842,8 +4152,8 @@ class TabularProcessingPlugin:
                     blob_path,
                     sheet_name=selected_sheet,
                     require_explicit_sheet=True,
+                    typed=True,
                 )
-                df = self._try_numeric_conversion(df)
 
                 result_df, used_reviewer_style_fallback = self._apply_query_expression_with_fallback(
                     df,
@@ -4060,8 +4370,9 @@ class TabularProcessingPlugin:
                     blob_path,
                     sheet_name=selected_sheet,
                     require_explicit_sheet=True,
+                    typed=True,
+                    columns=[group_by_column, aggregate_column],
                 )
-                df = self._try_numeric_conversion(df)
 
                 for col in [group_by_column, aggregate_column]:
                     if col not in df.columns:
@@ -4165,8 +4476,10 @@ class TabularProcessingPlugin:
                     blob_path,
                     sheet_name=selected_sheet,
                     require_explicit_sheet=True,
+                    typed=True,
+                    # A filter expression can reference any column
+                    columns=None if filter_expression else [datetime_column, (aggregate_column or '').strip()],
                 )
-                df = self._try_numeric_conversion(df)
 
                 if filter_expression:
                     try:
@@ -4191,7 +4504,12 @@ class TabularProcessingPlugin:
                         )
                     )
 
-                parsed_datetime = self._parse_datetime_like_series(df[datetime_column])
+                parsed_datetime = self._get_profiled_series(
+                    df[datetime_column],
+                    'datetime',
+                    self._parse_datetime_like_series,
+                    self._get_sheet_profile(container, blob_path, selected_sheet),
+                )
                 valid_mask = parsed_datetime.notna()
                 if not valid_mask.any():
                     return json.dumps({
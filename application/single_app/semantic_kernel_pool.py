@@ -0,0 +1,332 @@
+# semantic_kernel_pool.py
+"""
+Per-worker pool of warmed per-user Semantic Kernel instances.
+
+Building a per-user kernel resolves Key Vault secrets, instantiates every plugin
+and agent, and can query live SQL schemas, so doing it on every chat message is
+expensive. The pool keeps built kernels keyed by the user's selection (user,
+selected or requested agent, conversation group) and tags each entry with a
+manifest version: a digest of the agent/action item ETags, the group document
+and the app settings version. A changed manifest version evicts the entry.
+
+Global agent and action ETags are read with cross-partition queries, so they are
+cached per worker for each (settings version, global manifest version) pair.
+Saving or deleting a global agent or action bumps the shared global manifest
+version through app_settings_cache, which reaches every worker.
+
+Kernels are checked out exclusively for the duration of a request, because chat
+routes temporarily adjust agent settings (for example tool-less retries), and
+are returned to the pool when the request context is torn down. Chat routes
+catch their own errors (streaming workers never re-raise), so they mark the lease
+poisoned from their exception handlers; a poisoned kernel may hold partial plugin
+or chat state and is discarded on teardown instead of being returned.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+import app_settings_cache
+from flask import g, has_app_context
+from config import (
+    cosmos_global_actions_container,
+    cosmos_global_agents_container,
+    cosmos_group_actions_container,
+    cosmos_group_agents_container,
+    cosmos_groups_container,
+    cosmos_personal_actions_container,
+    cosmos_personal_agents_container,
+)
+from functions_appinsights import log_event
+
+KERNEL_POOL_LEASE_ATTRIBUTE = 'kernel_pool_lease'
+GLOBAL_MANIFEST_CACHE_VERSION_NAME = 'global_agent_manifests'
+
+_global_manifest_cache = {'version': None, 'value': None}
+_global_manifest_lock = threading.Lock()
+
+
+def get_kernel_pool_settings(settings):
+    """
+    Resolve kernel pool settings from app settings.
+
+    Returns:
+        tuple: (enabled, max_entries, ttl_seconds)
+    """
+    settings = settings or {}
+    try:
+        return (
+            bool(settings.get('enable_semantic_kernel_pool', True)),
+            max(int(settings.get('semantic_kernel_pool_max_entries', 64) or 0), 0),
+            max(int(settings.get('semantic_kernel_pool_ttl_seconds', 900) or 0), 0),
+        )
+    except (TypeError, ValueError) as e:
+        log_event(f"[SK Pool] Invalid kernel pool settings, using defaults: {e}", level=logging.WARNING)
+        return (True, 64, 900)
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def build_kernel_pool_key(user_id, selection):
+    """Return the pool key for a user's kernel selection (agent choice and request overrides)."""
+    return f"{user_id}:{_digest(selection)}"
+
+
+def build_kernel_manifest_version(manifest_parts):
+    """Return a digest of everything the built kernel was derived from."""
+    return _digest(manifest_parts)
+
+
+def _get_item_versions(container, scope_field=None, scope_id=None):
+    """Return sorted id:_etag pairs for a manifest container without loading the manifests."""
+    if scope_field:
+        items = container.query_items(
+            query=f"SELECT c.id, c._etag FROM c WHERE c.{scope_field} = @scope_id",
+            parameters=[{"name": "@scope_id", "value": scope_id}],
+            partition_key=scope_id
+        )
+    else:
+        items = container.query_items(
+            query="SELECT c.id, c._etag FROM c",
+            enable_cross_partition_query=True
+        )
+    return sorted(f"{item.get('id')}:{item.get('_etag')}" for item in items)
+
+
+def _get_global_manifest_versions(settings_version):
+    """Return the global agent and action versions, cached per settings and global manifest version."""
+    cache_version = (settings_version, app_settings_cache.get_shared_cache_version(GLOBAL_MANIFEST_CACHE_VERSION_NAME))
+    with _global_manifest_lock:
+        if _global_manifest_cache['version'] == cache_version:
+            return _global_manifest_cache['value']
+
+    global_versions = {
+        'global_agents': _get_item_versions(cosmos_global_agents_container),
+        'global_actions': _get_item_versions(cosmos_global_actions_container),
+    }
+    with _global_manifest_lock:
+        _global_manifest_cache['version'] = cache_version
+        _global_manifest_cache['value'] = global_versions
+    return global_versions
+
+
+def _get_group_version(group_id):
+    try:
+        group_doc = cosmos_groups_container.read_item(item=group_id, partition_key=group_id)
+    except Exception:
+        return None
+    # Membership and role changes update the group document
+    return group_doc.get('_etag')
+
+
+def get_user_kernel_pool_identity(user_id, user_settings, request_state, settings_version):
+    """
+    Return (pool_key, manifest_version) for a per-user kernel.
+
+    Args:
+        user_id (str): The user the kernel is built for
+        user_settings (dict): The user's settings (the 'settings' sub-document)
+        request_state (dict): Request overrides read by the loader (forced or requested agent, conversation group)
+        settings_version: Version of the app settings the kernel would be built from
+
+    Returns:
+        tuple: (pool_key, manifest_version)
+    """
+    user_settings = user_settings or {}
+    selected_agent = user_settings.get('selected_agent')
+    selection = {
+        'enable_agents': user_settings.get('enable_agents', True),
+        'selected_agent': selected_agent,
+        'active_group_id': user_settings.get('activeGroupOid'),
+        'request_state': request_state,
+    }
+
+    group_ids = {
+        str(group_id) for group_id in (
+            user_settings.get('activeGroupOid'),
+            selected_agent.get('group_id') if isinstance(selected_agent, dict) else None,
+            (request_state or {}).get('conversation_group_id'),
+        ) if group_id
+    }
+    global_versions = _get_global_manifest_versions(settings_version)
+    manifest_parts = {
+        'settings_version': settings_version,
+        'personal_model_endpoints': user_settings.get('personal_model_endpoints'),
+        'personal_agents': _get_item_versions(cosmos_personal_agents_container, 'user_id', user_id),
+        'personal_actions': _get_item_versions(cosmos_personal_actions_container, 'user_id', user_id),
+        'global_agents': global_versions['global_agents'],
+        'global_actions': global_versions['global_actions'],
+        'groups': {
+            group_id: {
+                'group': _get_group_version(group_id),
+                'agents': _get_item_versions(cosmos_group_agents_container, 'group_id', group_id),
+                'actions': _get_item_versions(cosmos_group_actions_container, 'group_id', group_id),
+            }
+            for group_id in sorted(group_ids)
+        },
+    }
+    return build_kernel_pool_key(user_id, selection), build_kernel_manifest_version(manifest_parts)
+
+
+class KernelPool:
+    """Bounded LRU of built kernels with exclusive checkout."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale_evictions': 0,
+            'expired_evictions': 0,
+            'lru_evictions': 0,
+            'released': 0,
+            'discarded': 0,
+            'poisoned': 0,
+        }
+
+    def acquire(self, pool_key, manifest_version, ttl_seconds):
+        """Check out a pooled (kernel, kernel_agents) pair, or return None on a miss."""
+        with self._lock:
+            entry = self._entries.pop(pool_key, None)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            if entry['manifest_version'] != manifest_version:
+                self._stats['stale_evictions'] += 1
+                self._stats['misses'] += 1
+                return None
+            if ttl_seconds and time.time() - entry['built_at'] > ttl_seconds:
+                self._stats['expired_evictions'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._stats['hits'] += 1
+            return entry
+
+    def release(self, pool_key, manifest_version, kernel, kernel_agents, built_at, max_entries):
+        """Return a kernel to the pool after the request that used it has finished."""
+        if kernel is None or max_entries <= 0:
+            return False
+        with self._lock:
+            if pool_key in self._entries:
+                # A concurrent request for the same selection already returned a kernel
+                self._stats['discarded'] += 1
+                return False
+            self._entries[pool_key] = {
+                'manifest_version': manifest_version,
+                'kernel': kernel,
+                'kernel_agents': kernel_agents,
+                'built_at': built_at,
+            }
+            self._stats['released'] += 1
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+                self._stats['lru_evictions'] += 1
+        return True
+
+    def discard_poisoned(self):
+        """Record a kernel dropped because the request that used it failed."""
+        with self._lock:
+            self._stats['poisoned'] += 1
+
+    def invalidate_user(self, user_id):
+        """Drop every pooled kernel for a user. Returns the number removed."""
+        prefix = f"{user_id}:"
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+        return removed
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_kernel_pool = KernelPool()
+
+
+def acquire_pooled_kernel(settings, pool_key, manifest_version):
+    """Check out a warmed kernel for this request. Returns (kernel, kernel_agents, built_at) or None."""
+    enabled, max_entries, ttl_seconds = get_kernel_pool_settings(settings)
+    if not enabled or max_entries <= 0:
+        return None
+    entry = _kernel_pool.acquire(pool_key, manifest_version, ttl_seconds)
+    if entry is None:
+        return None
+    return entry['kernel'], entry['kernel_agents'], entry['built_at']
+
+
+def release_pooled_kernel(lease, settings):
+    """Return a leased kernel to the pool. lease is the dict stored on flask.g by the loader."""
+    if not lease:
+        return False
+    if lease.get('poisoned'):
+        # The request failed and may have left agent settings or plugin state mid-adjustment
+        _kernel_pool.discard_poisoned()
+        return False
+    enabled, max_entries, _ = get_kernel_pool_settings(settings)
+    if not enabled:
+        return False
+    return _kernel_pool.release(
+        lease['pool_key'],
+        lease['manifest_version'],
+        lease['kernel'],
+        lease['kernel_agents'],
+        lease['built_at'],
+        max_entries,
+    )
+
+
+def mark_request_kernel_poisoned():
+    """Keep the kernel leased by the current request out of the pool. Returns True when a lease was marked."""
+    if not has_app_context():
+        return False
+    lease = g.get(KERNEL_POOL_LEASE_ATTRIBUTE)
+    if not lease:
+        return False
+    lease['poisoned'] = True
+    return True
+
+
+def invalidate_user_kernels(user_id):
+    """Drop this worker's pooled kernels for a user, for example after their agents or actions change."""
+    return _kernel_pool.invalidate_user(user_id)
+
+
+def clear_kernel_pool():
+    """Drop every pooled kernel in this worker. Returns the number removed."""
+    return _kernel_pool.clear()
+
+
+def invalidate_global_kernel_manifests():
+    """
+    Mark global agents and actions as changed in every worker and drop this worker's kernels.
+
+    Other workers pick up the change through the shared global manifest version and
+    evict their kernels on the next checkout.
+    """
+    app_settings_cache.bump_shared_cache_version(GLOBAL_MANIFEST_CACHE_VERSION_NAME)
+    with _global_manifest_lock:
+        _global_manifest_cache['version'] = None
+        _global_manifest_cache['value'] = None
+    return clear_kernel_pool()
+
+
+def get_kernel_pool_stats():
+    """Get this worker's kernel pool statistics for monitoring."""
+    return _kernel_pool.get_stats()
@@ -19,6 +19,7 @@
     let currentPerPage = 20;
     let currentFilter = 'all';
     let currentSearch = '';
+    let pageTokens = {}; // Continuation token that fetches each page after the first
     let pollTimeout = null;
     let isPolling = false;
     
@@ -255,6 +256,9 @@
             include_read: currentFilter !== 'unread',
             include_dismissed: false
         });
+        if (pageTokens[currentPage]) {
+            params.set('continuation_token', pageTokens[currentPage]);
+        }
         
         fetch(`/api/notifications?${params}`)
             .then(response => response.json())
@@ -266,6 +270,10 @@
                     return;
                 }
                 
+                if (data.continuation_token) {
+                    pageTokens[currentPage + 1] = data.continuation_token;
+                }
+                
                 // Filter by search if needed
                 let notifications = data.notifications;
                 
@@ -476,6 +484,7 @@
             perPageSelect.addEventListener('change', function() {
                 currentPerPage = parseInt(this.value);
                 currentPage = 1;
+                pageTokens = {};
                 
                 // Save preference
                 fetch('/api/notifications/settings', {
@@ -499,6 +508,7 @@
                 this.classList.add('active');
                 currentFilter = this.dataset.filter;
                 currentPage = 1;
+                pageTokens = {};
                 loadNotifications();
             });
         });
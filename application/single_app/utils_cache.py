@@ -13,13 +13,36 @@ Cache Strategy:
 - Group searches: Shared cache across all group members (invalidated on group document changes)
 - Public searches: Shared cache across all workspace users (invalidated on public document changes)
 - "All" scope: Combines fingerprints from all applicable scopes
+
+Process-Local L1 Tier:
+- A size-bounded LRU/TTL cache in each worker sits in front of Cosmos DB for both
+  search results and document set fingerprints, so repeated queries skip Cosmos
+- Entries are tagged with the scopes they depend on and dropped by the same
+  invalidate_* / fingerprint rotation calls that invalidate Cosmos
+- Invalidations are also published on a Redis pub/sub channel so every gunicorn
+  worker drops its local copy. The tier is only used while this worker is
+  subscribed to that channel; without Redis it is skipped, since other workers
+  could not learn about document changes
+
+Document Set Fingerprints:
+- Each scope (personal user, group, public workspace) has a maintained fingerprint
+  document in the search cache container holding a random generation token
+- Document create/update/delete/share/unshare and every invalidate_* call rotate
+  the token, so computing a cache key is a single point read per scope
 """
 
+import copy
 import hashlib
+import json
 import logging
 import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
+import app_settings_cache
 from config import (
     cosmos_user_documents_container,
     cosmos_group_documents_container,
@@ -33,6 +56,27 @@ logger = logging.getLogger(__name__)
 # Debug logging control - set environment variable DEBUG_SEARCH_CACHE=1 to enable
 DEBUG_ENABLED = os.environ.get('DEBUG_SEARCH_CACHE', '0') == '1'
 
+# Maintained document set fingerprints live in the search cache container
+DOCUMENT_SET_FINGERPRINT_ITEM_TYPE = "document_set_fingerprint"
+DOCUMENT_SET_FINGERPRINT_ID_PREFIX = "fingerprint:"
+
+# Process-local L1 tier in front of the Cosmos DB search cache
+SEARCH_CACHE_INVALIDATION_CHANNEL = "simplechat:search_cache_invalidation"
+_L1_PROCESS_ID = f"{os.getpid()}:{uuid.uuid4().hex}"
+_l1_cache = OrderedDict()
+_l1_lock = threading.Lock()
+_l1_stats = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "invalidations": 0,
+    "remote_invalidations": 0,
+    "stale_fills_skipped": 0,
+}
+# Per scope tag ("*" for full clears): bumped on every invalidation, so a fill that raced one can be dropped
+_l1_invalidation_counters = {}
+_l1_subscriber_state = {"pid": None, "thread": None, "listening": False}
+
 
 def get_cache_settings():
     """
@@ -54,6 +98,238 @@ def get_cache_settings():
         return (True, 300)  # Default: enabled with 5 minute TTL
 
 
+def get_l1_cache_settings():
+    """
+    Get process-local L1 cache settings from app settings (admin configurable).
+    Falls back to defaults if settings unavailable.
+    
+    The L1 tier is only enabled when invalidations can be fanned out over Redis.
+    Without Redis, other workers would keep serving results for deleted or
+    unshared documents until their L1 entries expire.
+    
+    Returns:
+        tuple: (l1_enabled, max_entries, ttl_seconds, redis_invalidation_enabled)
+    """
+    try:
+        from functions_settings import get_settings
+        settings = get_settings()
+        l1_enabled = bool(settings.get('enable_search_cache_l1', True))
+        max_entries = max(int(settings.get('search_cache_l1_max_entries', 512) or 0), 0)
+        ttl_seconds = max(int(settings.get('search_cache_l1_ttl_seconds', 60) or 0), 0)
+        redis_invalidation_enabled = bool(settings.get('enable_search_cache_l1_redis_invalidation', True))
+    except Exception as e:
+        logger.warning(f"Failed to load L1 cache settings, using defaults: {e}")
+        l1_enabled, max_entries, ttl_seconds, redis_invalidation_enabled = (True, 512, 60, True)
+
+    redis_invalidation_enabled = redis_invalidation_enabled and app_settings_cache.get_app_redis_client() is not None
+    return (l1_enabled and redis_invalidation_enabled, max_entries, ttl_seconds, redis_invalidation_enabled)
+
+
+def _l1_get(entry_key: tuple) -> Optional[Any]:
+    """
+    Return an unexpired L1 value and mark it most recently used.
+    
+    Nothing is served until the invalidation subscriber of this worker is listening,
+    so a missed invalidation can't be answered from worker memory.
+    """
+    now = time.time()
+    with _l1_lock:
+        entry = _l1_cache.get(entry_key) if _l1_subscriber_state["listening"] else None
+        if entry is None:
+            _l1_stats["misses"] += 1
+            return None
+        if entry["expires_at"] <= now:
+            _l1_cache.pop(entry_key, None)
+            _l1_stats["misses"] += 1
+            return None
+        _l1_cache.move_to_end(entry_key)
+        _l1_stats["hits"] += 1
+        return entry["value"]
+
+
+def _l1_invalidation_snapshot(scope_tags: Iterable[str]) -> tuple:
+    """Return the invalidation counters of the given scope tags, to be passed to _l1_set."""
+    with _l1_lock:
+        return tuple(_l1_invalidation_counters.get(tag, 0) for tag in ["*", *sorted(scope_tags)])
+
+
+def _l1_set(
+    entry_key: tuple,
+    value: Any,
+    scope_tags: Iterable[str],
+    ttl_seconds: float,
+    l1_settings: tuple,
+    invalidation_snapshot: Optional[tuple] = None
+) -> None:
+    """
+    Store a value in the L1 tier, evicting least recently used entries over the limit.
+    
+    The entry lives for the shorter of ttl_seconds and the configured L1 TTL.
+    When invalidation_snapshot (from _l1_invalidation_snapshot, taken before the
+    value was read) no longer matches, one of its scopes was invalidated while
+    the value was being read and the value is not stored.
+    """
+    l1_enabled, max_entries, l1_ttl_seconds, redis_invalidation_enabled = l1_settings
+    ttl = min(ttl_seconds, l1_ttl_seconds)
+    if not l1_enabled or max_entries <= 0 or ttl <= 0:
+        return
+
+    _ensure_l1_invalidation_subscriber()
+
+    scope_tags = frozenset(scope_tags)
+    with _l1_lock:
+        if invalidation_snapshot is not None and invalidation_snapshot != tuple(
+            _l1_invalidation_counters.get(tag, 0) for tag in ["*", *sorted(scope_tags)]
+        ):
+            _l1_stats["stale_fills_skipped"] += 1
+            return
+        _l1_cache[entry_key] = {
+            "value": value,
+            "scope_tags": scope_tags,
+            "expires_at": time.time() + ttl,
+        }
+        _l1_cache.move_to_end(entry_key)
+        while len(_l1_cache) > max_entries:
+            _l1_cache.popitem(last=False)
+            _l1_stats["evictions"] += 1
+
+
+def _get_search_scope_tags(
+    doc_scope: str,
+    user_id: str,
+    active_group_ids: Optional[List[str]] = None,
+    active_public_workspace_id: Optional[str] = None
+) -> List[str]:
+    """List the scope tags ("personal:<id>", "group:<id>", "public:<id>") a search depends on."""
+    scope_tags = []
+    if doc_scope in ["personal", "all"] and user_id:
+        scope_tags.append(f"personal:{user_id}")
+    if doc_scope in ["group", "all"] and active_group_ids:
+        scope_tags.extend(f"group:{gid}" for gid in active_group_ids)
+    if doc_scope in ["public", "all"] and active_public_workspace_id:
+        scope_tags.append(f"public:{active_public_workspace_id}")
+    return scope_tags
+
+
+def invalidate_l1_scope(scope: str, scope_id: str, publish: bool = True) -> int:
+    """
+    Drop every L1 entry (results and fingerprint) that depends on a scope.
+    
+    Args:
+        scope: "personal", "group" or "public"
+        scope_id: User ID, group ID or public workspace ID
+        publish: Fan the invalidation out to other workers over Redis pub/sub
+        
+    Returns:
+        Number of local L1 entries removed
+    """
+    scope_tag = f"{scope}:{scope_id}"
+    with _l1_lock:
+        _l1_invalidation_counters[scope_tag] = _l1_invalidation_counters.get(scope_tag, 0) + 1
+        stale_keys = [key for key, entry in _l1_cache.items() if scope_tag in entry["scope_tags"]]
+        for key in stale_keys:
+            _l1_cache.pop(key, None)
+        _l1_stats["invalidations"] += len(stale_keys)
+
+    if publish:
+        _publish_l1_invalidation(scope, scope_id)
+
+    if stale_keys:
+        _debug_print(
+            f"Dropped {len(stale_keys)} L1 cache entries",
+            "INVALIDATION",
+            scope=scope,
+            scope_id=scope_id[:8]
+        )
+    return len(stale_keys)
+
+
+def clear_l1_cache() -> int:
+    """Drop every entry from this worker's L1 tier."""
+    with _l1_lock:
+        _l1_invalidation_counters["*"] = _l1_invalidation_counters.get("*", 0) + 1
+        count = len(_l1_cache)
+        _l1_cache.clear()
+        _l1_stats["invalidations"] += count
+    return count
+
+
+def _publish_l1_invalidation(scope: str, scope_id: str) -> None:
+    """Publish an invalidation to the other workers when the app cache uses Redis."""
+    _, _, _, redis_invalidation_enabled = get_l1_cache_settings()
+    if not redis_invalidation_enabled:
+        return
+
+    redis_client = app_settings_cache.get_app_redis_client()
+    if redis_client is None:
+        return
+
+    try:
+        redis_client.publish(
+            SEARCH_CACHE_INVALIDATION_CHANNEL,
+            json.dumps({"scope": scope, "scope_id": scope_id, "origin": _L1_PROCESS_ID})
+        )
+    except Exception as e:
+        logger.warning(f"[SearchCache] Failed to publish L1 invalidation for {scope}:{scope_id}: {e}")
+
+
+def _listen_for_l1_invalidations(redis_client) -> None:
+    """Apply invalidations published by other workers to this worker's L1 tier."""
+    while True:
+        with _l1_lock:
+            _l1_subscriber_state["listening"] = False
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(SEARCH_CACHE_INVALIDATION_CHANNEL)
+            # Entries stored before the subscription may have missed invalidations
+            clear_l1_cache()
+            with _l1_lock:
+                _l1_subscriber_state["listening"] = True
+            for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                payload = json.loads(message.get("data") or "{}")
+                if payload.get("origin") == _L1_PROCESS_ID:
+                    continue
+                if payload.get("scope") == "all":
+                    clear_l1_cache()
+                elif payload.get("scope") and payload.get("scope_id"):
+                    invalidate_l1_scope(payload["scope"], payload["scope_id"], publish=False)
+                else:
+                    continue
+                with _l1_lock:
+                    _l1_stats["remote_invalidations"] += 1
+        except Exception as e:
+            # Stop serving and drop the local tier so a missed message can't leave stale entries behind
+            with _l1_lock:
+                _l1_subscriber_state["listening"] = False
+            clear_l1_cache()
+            logger.warning(f"[SearchCache] L1 invalidation subscriber error, retrying: {e}")
+            time.sleep(5)
+
+
+def _ensure_l1_invalidation_subscriber() -> None:
+    """Start the Redis invalidation subscriber once per worker process."""
+    redis_client = app_settings_cache.get_app_redis_client()
+    if redis_client is None:
+        return
+
+    current_pid = os.getpid()
+    with _l1_lock:
+        if _l1_subscriber_state["pid"] == current_pid:
+            return
+        _l1_subscriber_state["pid"] = current_pid
+        _l1_subscriber_state["listening"] = False
+        subscriber = threading.Thread(
+            target=_listen_for_l1_invalidations,
+            args=(redis_client,),
+            name="search-cache-l1-invalidation",
+            daemon=True
+        )
+        _l1_subscriber_state["thread"] = subscriber
+    subscriber.start()
+
+
 def _debug_print(message: str, context: str = "CACHE", **kwargs):
     """
     Conditional debug logging with timestamp and context.
@@ -82,156 +358,145 @@ def _debug_print(message: str, context: str = "CACHE", **kwargs):
     print(debug_message, flush=True)  # Also print to stdout for visibility
 
 
-def get_personal_document_fingerprint(user_id: str) -> str:
+def _get_document_set_fingerprint_item_id(scope: str, scope_id: str) -> str:
+    """Build the id (and partition key) of a scope's fingerprint document."""
+    return f"{DOCUMENT_SET_FINGERPRINT_ID_PREFIX}{scope}:{scope_id}"
+
+
+def bump_document_set_fingerprint(scope: str, scope_id: str) -> Optional[str]:
     """
-    Generate a fingerprint of user's personal documents (including shared with them).
+    Rotate the document set fingerprint for a scope.
+    
+    Call this whenever the set of searchable documents in a scope changes
+    (upload, update, delete, share/unshare). A fresh random generation token is
+    used instead of an incrementing counter so a fingerprint document that was
+    removed (e.g. by clear_all_cache) can never resurrect an old cache key.
     
     Args:
-        user_id: User ID to get document fingerprint for
+        scope: "personal", "group" or "public"
+        scope_id: User ID, group ID or public workspace ID
         
     Returns:
-        SHA256 hash of sorted document IDs
+        The new generation token, or None if the fingerprint could not be written
     """
-    _debug_print("Generating personal document fingerprint", "FINGERPRINT", user_id=user_id[:8])
-    
+    if not scope_id:
+        return None
+
+    item_id = _get_document_set_fingerprint_item_id(scope, scope_id)
+    generation = uuid.uuid4().hex
+    fingerprint_item = {
+        "id": item_id,
+        "user_id": item_id,  # Own partition so the fingerprint is a single point read
+        "doc_scope": DOCUMENT_SET_FINGERPRINT_ITEM_TYPE,
+        "item_type": DOCUMENT_SET_FINGERPRINT_ITEM_TYPE,
+        "scope": scope,
+        "scope_id": scope_id,
+        "generation": generation,
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+
     try:
-        query = """
-            SELECT c.id, c.version
-            FROM c
-            WHERE c.user_id = @user_id OR ARRAY_CONTAINS(c.shared_user_ids, @user_id)
-            ORDER BY c.id
-        """
-        parameters = [{"name": "@user_id", "value": user_id}]
-        
-        documents = list(
-            cosmos_user_documents_container.query_items(
-                query=query,
-                parameters=parameters,
-                enable_cross_partition_query=True
-            )
-        )
-        
-        # Include both ID and version to detect document updates
-        doc_identifiers = [f"{doc['id']}:v{doc['version']}" for doc in documents]
-        doc_identifiers.sort()
-        
-        fingerprint_string = '|'.join(doc_identifiers)
-        fingerprint = hashlib.sha256(fingerprint_string.encode()).hexdigest()
-        
+        cosmos_search_cache_container.upsert_item(fingerprint_item)
         _debug_print(
-            f"Generated personal fingerprint: {fingerprint[:16]}...",
+            f"Rotated {scope} document set fingerprint: {generation[:16]}...",
             "FINGERPRINT",
-            user_id=user_id[:8],
-            doc_count=len(documents)
+            scope_id=scope_id[:8]
         )
-        
-        return fingerprint
-        
+        return generation
+    except Exception as e:
+        logger.error(f"Error rotating {scope} document set fingerprint for {scope_id}: {e}")
+        _debug_print(f"ERROR rotating fingerprint: {e}", "FINGERPRINT", scope_id=scope_id[:8])
+        return None
+    finally:
+        # Drop this worker's (and, via Redis, every worker's) L1 copies for the scope
+        invalidate_l1_scope(scope, scope_id)
+
+
+def _get_document_set_fingerprint(scope: str, scope_id: str) -> str:
+    """
+    Read the maintained fingerprint for a scope with a single point read.
+    
+    A missing fingerprint document is created on first use. On any error a
+    timestamp-based fingerprint is returned so the result is never cached.
+    """
+    item_id = _get_document_set_fingerprint_item_id(scope, scope_id)
+    l1_settings = get_l1_cache_settings()
+    l1_key = ("fingerprint", item_id)
+    scope_tags = [f"{scope}:{scope_id}"]
+
+    if l1_settings[0]:
+        cached_generation = _l1_get(l1_key)
+        if cached_generation:
+            return cached_generation
+
+    # Taken before the read: a rotation landing mid-read must not leave the old generation in L1
+    invalidation_snapshot = _l1_invalidation_snapshot(scope_tags)
+
+    try:
+        fingerprint_item = cosmos_search_cache_container.read_item(
+            item=item_id,
+            partition_key=item_id
+        )
+        generation = fingerprint_item.get('generation')
+        if generation:
+            _debug_print(
+                f"Read {scope} document set fingerprint: {generation[:16]}...",
+                "FINGERPRINT",
+                scope_id=scope_id[:8]
+            )
+            _l1_set(l1_key, generation, scope_tags, l1_settings[2], l1_settings, invalidation_snapshot)
+            return generation
+    except CosmosResourceNotFoundError:
+        pass
     except Exception as e:
-        logger.error(f"Error generating personal document fingerprint for user {user_id}: {e}")
-        _debug_print(f"ERROR generating fingerprint: {e}", "FINGERPRINT", user_id=user_id[:8])
-        # Return timestamp-based fingerprint to prevent caching on error
+        logger.error(f"Error reading {scope} document set fingerprint for {scope_id}: {e}")
+        _debug_print(f"ERROR reading fingerprint: {e}", "FINGERPRINT", scope_id=scope_id[:8])
         return hashlib.sha256(str(datetime.now().timestamp()).encode()).hexdigest()
 
+    generation = bump_document_set_fingerprint(scope, scope_id)
+    if generation:
+        return generation
+    # Return timestamp-based fingerprint to prevent caching on error
+    return hashlib.sha256(str(datetime.now().timestamp()).encode()).hexdigest()
 
-def get_group_document_fingerprint(group_id: str) -> str:
+
+def get_personal_document_fingerprint(user_id: str) -> str:
     """
-    Generate a fingerprint of group documents (including shared with group).
+    Get the fingerprint of a user's personal documents (including shared with them).
     
     Args:
-        group_id: Group ID to get document fingerprint for
+        user_id: User ID to get document fingerprint for
         
     Returns:
-        SHA256 hash of sorted document IDs
+        Generation token that changes whenever the user's document set changes
+    """
+    return _get_document_set_fingerprint("personal", user_id)
+
+
+def get_group_document_fingerprint(group_id: str) -> str:
     """
-    _debug_print("Generating group document fingerprint", "FINGERPRINT", group_id=group_id[:8])
+    Get the fingerprint of group documents (including shared with group).
     
-    try:
-        query = """
-            SELECT c.id, c.version
-            FROM c
-            WHERE c.group_id = @group_id OR ARRAY_CONTAINS(c.shared_group_ids, @group_id)
-            ORDER BY c.id
-        """
-        parameters = [{"name": "@group_id", "value": group_id}]
-        
-        documents = list(
-            cosmos_group_documents_container.query_items(
-                query=query,
-                parameters=parameters,
-                enable_cross_partition_query=True
-            )
-        )
-        
-        doc_identifiers = [f"{doc['id']}:v{doc['version']}" for doc in documents]
-        doc_identifiers.sort()
-        
-        fingerprint_string = '|'.join(doc_identifiers)
-        fingerprint = hashlib.sha256(fingerprint_string.encode()).hexdigest()
-        
-        _debug_print(
-            f"Generated group fingerprint: {fingerprint[:16]}...",
-            "FINGERPRINT",
-            group_id=group_id[:8],
-            doc_count=len(documents)
-        )
-        
-        return fingerprint
+    Args:
+        group_id: Group ID to get document fingerprint for
         
-    except Exception as e:
-        logger.error(f"Error generating group document fingerprint for group {group_id}: {e}")
-        _debug_print(f"ERROR generating fingerprint: {e}", "FINGERPRINT", group_id=group_id[:8])
-        return hashlib.sha256(str(datetime.now().timestamp()).encode()).hexdigest()
+    Returns:
+        Generation token that changes whenever the group's document set changes
+    """
+    return _get_document_set_fingerprint("group", group_id)
 
 
 def get_public_workspace_document_fingerprint(public_workspace_id: str) -> str:
     """
-    Generate a fingerprint of public workspace documents.
+    Get the fingerprint of public workspace documents.
     
     Args:
         public_workspace_id: Public workspace ID to get document fingerprint for
         
     Returns:
-        SHA256 hash of sorted document IDs
+        Generation token that changes whenever the workspace's document set changes
     """
-    _debug_print("Generating public workspace document fingerprint", "FINGERPRINT", workspace_id=public_workspace_id[:8])
-    
-    try:
-        query = """
-            SELECT c.id, c.version
-            FROM c
-            WHERE c.public_workspace_id = @public_workspace_id
-            ORDER BY c.id
-        """
-        parameters = [{"name": "@public_workspace_id", "value": public_workspace_id}]
-        
-        documents = list(
-            cosmos_public_documents_container.query_items(
-                query=query,
-                parameters=parameters,
-                enable_cross_partition_query=True
-            )
-        )
-        
-        doc_identifiers = [f"{doc['id']}:v{doc['version']}" for doc in documents]
-        doc_identifiers.sort()
-        
-        fingerprint_string = '|'.join(doc_identifiers)
-        fingerprint = hashlib.sha256(fingerprint_string.encode()).hexdigest()
-        
-        _debug_print(
-            f"Generated public workspace fingerprint: {fingerprint[:16]}...",
-            "FINGERPRINT",
-            workspace_id=public_workspace_id[:8],
-            doc_count=len(documents)
-        )
-        
-        return fingerprint
-        
-    except Exception as e:
-        logger.error(f"Error generating public workspace document fingerprint for workspace {public_workspace_id}: {e}")
-        _debug_print(f"ERROR generating fingerprint: {e}", "FINGERPRINT", workspace_id=public_workspace_id[:8])
-        return hashlib.sha256(str(datetime.now().timestamp()).encode()).hexdigest()
+    return _get_document_set_fingerprint("public", public_workspace_id)
 
 
 def get_cache_partition_key(
@@ -403,7 +668,26 @@ def get_cached_search_results(
 
     # Determine correct partition key based on scope for shared cache access
     partition_key = get_cache_partition_key(doc_scope, user_id, active_group_id, active_group_ids, active_public_workspace_id)
-    
+
+    # Check the process-local L1 tier before paying for a Cosmos DB read
+    l1_settings = get_l1_cache_settings()
+    l1_key = ("results", partition_key, cache_key)
+    if not active_group_ids and active_group_id:
+        active_group_ids = [active_group_id]
+    scope_tags = _get_search_scope_tags(doc_scope, user_id, active_group_ids, active_public_workspace_id)
+    invalidation_snapshot = _l1_invalidation_snapshot(scope_tags)
+    if l1_settings[0]:
+        l1_results = _l1_get(l1_key)
+        if l1_results is not None:
+            _debug_print(
+                "L1 CACHE HIT - Returning cached results from worker memory",
+                "CACHE",
+                cache_key=cache_key[:16],
+                result_count=len(l1_results),
+                scope=doc_scope
+            )
+            return copy.deepcopy(l1_results)
+
     try:
         # Try to read from Cosmos DB using scope-based partition key
         cache_item = cosmos_search_cache_container.read_item(
@@ -428,6 +712,15 @@ def get_cached_search_results(
                 ttl_remaining=f"{seconds_remaining:.1f}s"
             )
             logger.info(f"Cache hit for key: {cache_key} (scope: {doc_scope}, partition: {partition_key[:25]})")
+
+            _l1_set(
+                l1_key,
+                copy.deepcopy(results),
+                scope_tags,
+                seconds_remaining,
+                l1_settings,
+                invalidation_snapshot
+            )
             return results
         else:
             # Expired - delete from cache
@@ -484,6 +777,17 @@ def cache_search_results(cache_key: str, results: List[Dict[str, Any]], user_id:
         # No ttl field - app logic handles expiry and deletion manually
     }
     
+    # Populate the process-local L1 tier alongside Cosmos DB
+    if not active_group_ids and active_group_id:
+        active_group_ids = [active_group_id]
+    _l1_set(
+        ("results", partition_key, cache_key),
+        copy.deepcopy(results),
+        _get_search_scope_tags(doc_scope, user_id, active_group_ids, active_public_workspace_id),
+        ttl_seconds,
+        get_l1_cache_settings()
+    )
+
     try:
         cosmos_search_cache_container.upsert_item(cache_item)
         
@@ -532,6 +836,9 @@ def invalidate_personal_search_cache(user_id: str) -> int:
         user_id=user_id[:8]
     )
     
+    # Rotate the fingerprint first so new cache keys stop matching stale entries
+    bump_document_set_fingerprint("personal", user_id)
+
     try:
         # Query all cache entries for this user (partition key = user_id)
         query = "SELECT c.id FROM c WHERE c.user_id = @user_id"
@@ -595,6 +902,9 @@ def invalidate_group_search_cache(group_id: str) -> int:
         group_id=group_id[:8]
     )
     
+    # Rotate the fingerprint first so new cache keys stop matching stale entries
+    bump_document_set_fingerprint("group", group_id)
+
     try:
         # Cross-partition query to find all cache entries containing this group
         # Looking for doc_scope containing group references
@@ -658,6 +968,9 @@ def invalidate_public_workspace_search_cache(public_workspace_id: str) -> int:
         workspace_id=public_workspace_id[:8]
     )
     
+    # Rotate the fingerprint first so new cache keys stop matching stale entries
+    bump_document_set_fingerprint("public", public_workspace_id)
+
     try:
         # Cross-partition query to find all cache entries containing this public workspace
         # Looking for doc_scope containing workspace references
@@ -742,6 +1055,9 @@ def clear_all_cache() -> int:
         Number of cache entries cleared
     """
     _debug_print("Clearing ALL cache entries from Cosmos DB", "ADMIN")
+
+    clear_l1_cache()
+    _publish_l1_invalidation("all", "all")
     
     try:
         # Query all items (cross-partition query)
@@ -774,6 +1090,27 @@ def clear_all_cache() -> int:
         return 0
 
 
+def get_l1_cache_stats() -> Dict[str, Any]:
+    """
+    Get this worker's L1 tier statistics for monitoring.
+    
+    Returns:
+        Dictionary with entry count, hit/miss/eviction counters and hit rate
+    """
+    l1_enabled, max_entries, l1_ttl_seconds, redis_invalidation_enabled = get_l1_cache_settings()
+    with _l1_lock:
+        stats = dict(_l1_stats)
+        stats["entries"] = len(_l1_cache)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["enabled"] = l1_enabled
+    stats["max_entries"] = max_entries
+    stats["ttl_seconds"] = l1_ttl_seconds
+    stats["redis_invalidation"] = redis_invalidation_enabled
+    stats["listening"] = _l1_subscriber_state["listening"]
+    return stats
+
+
 def get_cache_stats() -> Dict[str, Any]:
     """
     Get current cache statistics for monitoring from Cosmos DB.
@@ -782,11 +1119,13 @@ def get_cache_stats() -> Dict[str, Any]:
         Dictionary with cache metrics
     """
     try:
-        # Query all items to count (cross-partition query)
-        query = "SELECT VALUE COUNT(1) FROM c"
+        # Query all cached result items to count (cross-partition query),
+        # excluding the maintained document set fingerprint documents
+        query = "SELECT VALUE COUNT(1) FROM c WHERE c.doc_scope != @fingerprint_scope"
         
         result = list(cosmos_search_cache_container.query_items(
             query=query,
+            parameters=[{"name": "@fingerprint_scope", "value": DOCUMENT_SET_FINGERPRINT_ITEM_TYPE}],
             enable_cross_partition_query=True
         ))
         
@@ -817,6 +1156,7 @@ def get_cache_stats() -> Dict[str, Any]:
             "storage_type": "cosmos_db",
             "cache_enabled": cache_enabled,
             "cache_ttl_seconds": ttl_seconds,
+            "l1": get_l1_cache_stats(),
             "note": "Expired entries deleted on-demand by app logic (no Cosmos DB TTL)"
         }
         
@@ -0,0 +1,287 @@
+# utils_embedding_cache.py
+"""
+Embedding Caching Utility
+
+This module provides a content-addressed cache for embedding vectors so the same
+text is not sent to the embedding deployment again and again (re-uploaded
+document revisions, repeated queries, fact memory lookups on every turn).
+
+Cache Strategy:
+- Entries are keyed by (model deployment, SHA-256 of the NFC-normalized text)
+- Whitespace and case are kept exactly, so only texts that embed identically
+  share an entry
+- L1: a size-bounded LRU in each worker holding compact float arrays
+- L2 (optional): Redis (when the app cache is Redis-backed) or the Cosmos DB
+  embedding_cache container, shared by every worker and instance. The container
+  is created on first use, so deployments without the Cosmos tier never get it
+- Cache failures never fail an embedding call; they are counted and logged
+"""
+
+import hashlib
+import logging
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+import app_settings_cache
+from config import cosmos_database, cosmos_embedding_cache_container_name
+from azure.cosmos import PartitionKey
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_REDIS_PREFIX = "simplechat:embedding:"
+EMBEDDING_CACHE_PERSISTENT_TIERS = ("none", "redis", "cosmos")
+
+_embedding_l1_cache = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+_embedding_cache_stats = {
+    "l1_hits": 0,
+    "persistent_hits": 0,
+    "misses": 0,
+    "writes": 0,
+    "evictions": 0,
+    "errors": 0,
+}
+_embedding_cache_container = None
+
+
+def get_embedding_cache_settings():
+    """
+    Get embedding cache settings from app settings (admin configurable).
+    Falls back to defaults if settings unavailable.
+
+    Returns:
+        tuple: (cache_enabled, l1_max_entries, persistent_tier, ttl_seconds)
+    """
+    try:
+        from functions_settings import get_settings
+        settings = get_settings()
+        persistent_tier = str(settings.get('embedding_cache_persistent_tier', 'redis') or 'none').lower()
+        if persistent_tier not in EMBEDDING_CACHE_PERSISTENT_TIERS:
+            persistent_tier = 'none'
+        return (
+            bool(settings.get('enable_embedding_cache', True)),
+            max(int(settings.get('embedding_cache_l1_max_entries', 2048) or 0), 0),
+            persistent_tier,
+            max(int(settings.get('embedding_cache_ttl_seconds', 604800) or 0), 0)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to load embedding cache settings, using defaults: {e}")
+        return (True, 2048, 'redis', 604800)
+
+
+def normalize_embedding_text(text: Any) -> str:
+    """Normalize text for cache addressing (Unicode NFC only, whitespace is kept exactly)."""
+    return unicodedata.normalize('NFC', str(text or ''))
+
+
+def get_embedding_cache_key(deployment: str, text: Any) -> str:
+    """Return the content address for a (deployment, text) pair."""
+    text_hash = hashlib.sha256(normalize_embedding_text(text).encode('utf-8')).hexdigest()
+    return f"{deployment or 'default'}:{text_hash}"
+
+
+def _record(stat_name: str, count: int = 1) -> None:
+    with _embedding_cache_lock:
+        _embedding_cache_stats[stat_name] += count
+
+
+def _l1_get_many(cache_keys: List[str]) -> Dict[str, List[float]]:
+    found = {}
+    with _embedding_cache_lock:
+        for cache_key in cache_keys:
+            vector = _embedding_l1_cache.get(cache_key)
+            if vector is not None:
+                _embedding_l1_cache.move_to_end(cache_key)
+                found[cache_key] = vector.tolist()
+    return found
+
+
+def _l1_set_many(entries: Iterable[Tuple[str, List[float]]], max_entries: int) -> None:
+    if max_entries <= 0:
+        return
+    with _embedding_cache_lock:
+        for cache_key, embedding in entries:
+            # Doubles keep vectors bit-exact at a fraction of the size of a float list
+            _embedding_l1_cache[cache_key] = array('d', embedding)
+            _embedding_l1_cache.move_to_end(cache_key)
+        while len(_embedding_l1_cache) > max_entries:
+            _embedding_l1_cache.popitem(last=False)
+            _embedding_cache_stats["evictions"] += 1
+
+
+def _get_embedding_cache_container():
+    """Return the Cosmos DB embedding_cache container, creating it on first use."""
+    global _embedding_cache_container
+    if _embedding_cache_container is None:
+        with _embedding_cache_lock:
+            if _embedding_cache_container is None:
+                _embedding_cache_container = cosmos_database.create_container_if_not_exists(
+                    id=cosmos_embedding_cache_container_name,
+                    partition_key=PartitionKey(path="/id"),
+                    default_ttl=-1  # TTL disabled by default, enabled per-document
+                )
+    return _embedding_cache_container
+
+
+def _persistent_get_many(persistent_tier: str, cache_keys: List[str]) -> Dict[str, List[float]]:
+    found = {}
+    if not cache_keys:
+        return found
+
+    if persistent_tier == 'redis':
+        redis_client = app_settings_cache.get_app_redis_client()
+        if redis_client is None:
+            return found
+        values = redis_client.mget([f"{EMBEDDING_CACHE_REDIS_PREFIX}{cache_key}" for cache_key in cache_keys])
+        for cache_key, value in zip(cache_keys, values):
+            if value:
+                vector = array('d')
+                vector.frombytes(value)
+                found[cache_key] = vector.tolist()
+    elif persistent_tier == 'cosmos':
+        container = _get_embedding_cache_container()
+        for cache_key in cache_keys:
+            try:
+                item = container.read_item(item=cache_key, partition_key=cache_key)
+            except CosmosResourceNotFoundError:
+                continue
+            embedding = item.get('embedding')
+            if isinstance(embedding, list) and embedding:
+                found[cache_key] = embedding
+    return found
+
+
+def _persistent_set_many(persistent_tier: str, entries: List[Tuple[str, str, List[float]]], ttl_seconds: int) -> None:
+    if not entries:
+        return
+
+    if persistent_tier == 'redis':
+        redis_client = app_settings_cache.get_app_redis_client()
+        if redis_client is None:
+            return
+        pipeline = redis_client.pipeline(transaction=False)
+        for cache_key, _, embedding in entries:
+            redis_key = f"{EMBEDDING_CACHE_REDIS_PREFIX}{cache_key}"
+            payload = array('d', embedding).tobytes()
+            if ttl_seconds > 0:
+                pipeline.set(redis_key, payload, ex=ttl_seconds)
+            else:
+                pipeline.set(redis_key, payload)
+        pipeline.execute()
+    elif persistent_tier == 'cosmos':
+        container = _get_embedding_cache_container()
+        for cache_key, deployment, embedding in entries:
+            container.upsert_item({
+                "id": cache_key,
+                "deployment": deployment,
+                "embedding": embedding,
+                "dimensions": len(embedding),
+                "ttl": ttl_seconds if ttl_seconds > 0 else -1,
+            })
+
+
+def get_cached_embeddings(deployment: str, texts: List[Any]) -> List[Optional[List[float]]]:
+    """
+    Look up embeddings for texts, checking the worker L1 tier then the persistent tier.
+
+    Args:
+        deployment: Embedding model deployment name
+        texts: Texts to look up
+
+    Returns:
+        List aligned with texts holding the cached vector or None for a miss
+    """
+    cache_enabled, l1_max_entries, persistent_tier, _ = get_embedding_cache_settings()
+    if not cache_enabled or not texts:
+        return [None] * len(texts)
+
+    cache_keys = [get_embedding_cache_key(deployment, text) for text in texts]
+    unique_keys = list(dict.fromkeys(cache_keys))
+    found = _l1_get_many(unique_keys)
+    _record("l1_hits", sum(1 for cache_key in cache_keys if cache_key in found))
+
+    missing_keys = [cache_key for cache_key in unique_keys if cache_key not in found]
+    if missing_keys and persistent_tier != 'none':
+        try:
+            persistent_found = _persistent_get_many(persistent_tier, missing_keys)
+        except Exception as e:
+            _record("errors")
+            logger.warning(f"[EmbeddingCache] Persistent {persistent_tier} lookup failed: {e}")
+            persistent_found = {}
+        if persistent_found:
+            _l1_set_many(persistent_found.items(), l1_max_entries)
+            _record("persistent_hits", sum(1 for cache_key in cache_keys if cache_key in persistent_found))
+            found.update(persistent_found)
+
+    _record("misses", sum(1 for cache_key in cache_keys if cache_key not in found))
+    return [found.get(cache_key) for cache_key in cache_keys]
+
+
+def cache_embeddings(deployment: str, items: Iterable[Tuple[Any, List[float]]]) -> int:
+    """
+    Store freshly generated embeddings in the L1 and persistent tiers.
+
+    Args:
+        deployment: Embedding model deployment name
+        items: (text, embedding) pairs
+
+    Returns:
+        Number of entries written
+    """
+    cache_enabled, l1_max_entries, persistent_tier, ttl_seconds = get_embedding_cache_settings()
+    if not cache_enabled:
+        return 0
+
+    entries = OrderedDict()
+    for text, embedding in items:
+        if embedding:
+            entries[get_embedding_cache_key(deployment, text)] = list(embedding)
+    if not entries:
+        return 0
+
+    _l1_set_many(entries.items(), l1_max_entries)
+    if persistent_tier != 'none':
+        try:
+            _persistent_set_many(
+                persistent_tier,
+                [(cache_key, deployment, embedding) for cache_key, embedding in entries.items()],
+                ttl_seconds
+            )
+        except Exception as e:
+            _record("errors")
+            logger.warning(f"[EmbeddingCache] Persistent {persistent_tier} write failed: {e}")
+
+    _record("writes", len(entries))
+    return len(entries)
+
+
+def clear_embedding_cache() -> int:
+    """Clear this worker's L1 tier. Returns the number of entries removed."""
+    with _embedding_cache_lock:
+        removed = len(_embedding_l1_cache)
+        _embedding_l1_cache.clear()
+    return removed
+
+
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    """
+    Get this worker's embedding cache statistics for monitoring.
+
+    Returns:
+        Dictionary with hit/miss counters per tier and overall hit rate
+    """
+    cache_enabled, l1_max_entries, persistent_tier, ttl_seconds = get_embedding_cache_settings()
+    with _embedding_cache_lock:
+        stats = dict(_embedding_cache_stats)
+        stats["l1_entries"] = len(_embedding_l1_cache)
+    hits = stats["l1_hits"] + stats["persistent_hits"]
+    lookups = hits + stats["misses"]
+    stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+    stats["enabled"] = cache_enabled
+    stats["l1_max_entries"] = l1_max_entries
+    stats["persistent_tier"] = persistent_tier
+    stats["ttl_seconds"] = ttl_seconds
+    return stats
@@ -0,0 +1,267 @@
+# utils_log_writer.py
+"""
+Background Log Writer
+
+This module ships audit and diagnostic records (file processing logs and
+activity logs) to Cosmos DB from a background thread, so request paths and
+chunk loops no longer wait on a write per record.
+
+Write Strategy:
+- Records are put on a bounded in-memory queue; a full queue drops the record
+  and counts it instead of blocking the caller
+- A worker thread drains the queue in batches and groups records by container,
+  operation and partition key value
+- Each group is written with a transactional batch (up to 100 operations per
+  partition); if a batch fails, its records are retried one by one
+- The queue is flushed on interpreter shutdown, and the worker is restarted
+  lazily in forked worker processes
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LOG_WRITER_MAX_BATCH_OPERATIONS = 100
+LOG_WRITER_OPERATIONS = ("create", "upsert")
+
+
+def get_log_writer_settings():
+    """
+    Get background log writer settings from app settings (admin configurable).
+    Falls back to defaults if settings unavailable.
+
+    Returns:
+        tuple: (enabled, queue_size, batch_size, flush_interval_seconds)
+    """
+    try:
+        from functions_settings import get_settings
+        settings = get_settings() or {}
+        return (
+            bool(settings.get('enable_async_log_writer', True)),
+            max(int(settings.get('log_writer_queue_size', 10000) or 1), 1),
+            max(int(settings.get('log_writer_batch_size', 100) or 1), 1),
+            max(float(settings.get('log_writer_flush_interval_seconds', 1.0) or 0), 0.05)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to load log writer settings, using defaults: {e}")
+        return (True, 10000, 100, 1.0)
+
+
+def _write_item(container, operation: str, item: Dict[str, Any]) -> None:
+    if operation == "upsert":
+        container.upsert_item(body=item)
+    else:
+        container.create_item(body=item)
+
+
+class BackgroundLogWriter:
+    """Bounded queue plus worker thread that batches Cosmos DB log writes."""
+
+    def __init__(self, queue_size: int, batch_size: int, flush_interval_seconds: float):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "batch_fallbacks": 0,
+            "dropped_overflow": 0,
+            "failed": 0,
+        }
+        self._reset_worker_state()
+
+    def _reset_worker_state(self) -> None:
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._pid = os.getpid()
+
+    def _record(self, stat_name: str, count: int = 1) -> None:
+        with self._lock:
+            self._stats[stat_name] += count
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads do not survive fork; start fresh in the child process
+                self._reset_worker_state()
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, container, item: Dict[str, Any], partition_key_path: str, operation: str = "create") -> bool:
+        """Queue a record for writing. Returns False if it was dropped because the queue is full."""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((container, operation, partition_key_path, item))
+        except queue.Full:
+            self._record("dropped_overflow")
+            return False
+        self._record("enqueued")
+        return True
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval_seconds)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+
+            pending = [first]
+            linger_deadline = time.time() + min(self.flush_interval_seconds, 0.25)
+            while len(pending) < self.batch_size:
+                remaining = linger_deadline - time.time()
+                try:
+                    pending.append(self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_pending(pending)
+            except Exception as e:
+                logger.error(f"[LogWriter] Unexpected error writing {len(pending)} records: {e}")
+                self._record("failed", len(pending))
+            finally:
+                for _ in pending:
+                    self._queue.task_done()
+
+    def _write_pending(self, pending) -> None:
+        groups = {}
+        for container, operation, partition_key_path, item in pending:
+            partition_value = item.get(partition_key_path)
+            groups.setdefault((id(container), operation, partition_value), (container, []))[1].append(item)
+
+        for (_, operation, partition_value), (container, items) in groups.items():
+            for start in range(0, len(items), LOG_WRITER_MAX_BATCH_OPERATIONS):
+                self._write_group(container, operation, partition_value, items[start:start + LOG_WRITER_MAX_BATCH_OPERATIONS])
+
+    def _write_group(self, container, operation: str, partition_value: Any, items) -> None:
+        # Transactional batches need a real partition key value and more than one record to pay off
+        if len(items) > 1 and partition_value is not None and hasattr(container, "execute_item_batch"):
+            try:
+                container.execute_item_batch(
+                    batch_operations=[(operation, (item,)) for item in items],
+                    partition_key=partition_value
+                )
+                self._record("batches")
+                self._record("written", len(items))
+                return
+            except Exception as e:
+                self._record("batch_fallbacks")
+                logger.warning(f"[LogWriter] Batch of {len(items)} {operation} operations failed, writing individually: {e}")
+
+        for item in items:
+            try:
+                _write_item(container, operation, item)
+                self._record("written")
+            except Exception as e:
+                self._record("failed")
+                logger.warning(f"[LogWriter] Failed to {operation} log record {item.get('id')}: {e}")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued record has been written. Returns False on timeout."""
+        if self._pid != os.getpid() or self._thread is None:
+            return True
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks:
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def shutdown(self, timeout: float = 5.0) -> bool:
+        """Flush outstanding records and stop the worker thread."""
+        flushed = self.flush(timeout)
+        self._stopping.set()
+        if not flushed:
+            logger.warning(f"[LogWriter] Shutdown with {self._queue.qsize()} log records still queued")
+        return flushed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        stats["queue_size"] = self.queue_size
+        stats["worker_alive"] = bool(self._thread and self._thread.is_alive() and self._pid == os.getpid())
+        return stats
+
+
+_log_writer: Optional[BackgroundLogWriter] = None
+_log_writer_enabled: Optional[bool] = None
+_log_writer_lock = threading.Lock()
+
+
+def _get_log_writer() -> Optional[BackgroundLogWriter]:
+    global _log_writer, _log_writer_enabled
+    if _log_writer_enabled is None:
+        with _log_writer_lock:
+            if _log_writer_enabled is None:
+                enabled, queue_size, batch_size, flush_interval_seconds = get_log_writer_settings()
+                if enabled:
+                    _log_writer = BackgroundLogWriter(queue_size, batch_size, flush_interval_seconds)
+                _log_writer_enabled = enabled
+    return _log_writer
+
+
+def enqueue_log_item(container, item: Dict[str, Any], partition_key_path: str, operation: str = "create") -> bool:
+    """
+    Write a log record in the background, or synchronously when the writer is disabled.
+
+    Args:
+        container: Cosmos DB container proxy to write to
+        item: Record body
+        partition_key_path: Field holding the container's partition key value (without "/")
+        operation: "create" or "upsert"
+
+    Returns:
+        bool: False if the record was dropped because the queue was full
+    """
+    if operation not in LOG_WRITER_OPERATIONS:
+        raise ValueError(f"Unsupported log write operation: {operation}")
+
+    log_writer = _get_log_writer()
+    if log_writer is None:
+        _write_item(container, operation, item)
+        return True
+    return log_writer.enqueue(container, item, partition_key_path, operation)
+
+
+def flush_log_writer(timeout: float = 5.0) -> bool:
+    """Block until queued log records are written. Returns False on timeout."""
+    log_writer = _log_writer
+    return log_writer.flush(timeout) if log_writer else True
+
+
+def shutdown_log_writer(timeout: float = 5.0) -> bool:
+    """Flush and stop the background log writer."""
+    log_writer = _log_writer
+    return log_writer.shutdown(timeout) if log_writer else True
+
+
+def get_log_writer_stats() -> Dict[str, Any]:
+    """
+    Get this worker's background log writer statistics for monitoring.
+
+    Returns:
+        Dictionary with enqueue, write, batch, overflow and failure counters
+    """
+    log_writer = _log_writer
+    if log_writer is None:
+        return {"enabled": bool(_log_writer_enabled) if _log_writer_enabled is not None else None}
+    stats = log_writer.get_stats()
+    stats["enabled"] = True
+    return stats
+
+
+atexit.register(shutdown_log_writer)
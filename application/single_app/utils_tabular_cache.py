@@ -0,0 +1,446 @@
+# utils_tabular_cache.py
+"""
+Tabular DataFrame Caching Utility
+
+This module provides a process-wide cache of parsed tabular sheets shared by
+every TabularProcessingPlugin instance in a worker, so a large workbook is not
+re-parsed (and copied) for each tool call of a multi-tool agent turn or for
+each chat request.
+
+Cache Strategy:
+- Entries are keyed by (container, blob name, source blob ETag, sheet), so a
+  new revision of a file never reads an older parse
+- The cache is bounded by memory (deep DataFrame size in bytes), not by entry
+  count; least recently used sheets are evicted first
+- Cached frames are never handed out directly. Readers get shallow copies that
+  share the column data: filtering, aggregation and column assignment leave the
+  cached frame untouched, and callers that need in-place writes ask for a deep copy
+- Each entry carries a TabularSheetProfile with the typed (numeric-converted)
+  frame and per-column derived series, computed once on first use and counted
+  against the same memory budget
+- Large sheets also get per-column inverted indexes (TabularColumnIndex), built
+  on the first lookup of a column, so equality, prefix and token-contains
+  matches do not rescan every row on later tool calls
+"""
+
+import bisect
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy
+import pandas
+
+logger = logging.getLogger(__name__)
+
+_tabular_dataframe_cache = OrderedDict()  # key -> [DataFrame, size_bytes, TabularSheetProfile]
+_tabular_cache_lock = threading.Lock()
+_tabular_cache_bytes = 0
+_tabular_cache_stats = {
+    "hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0,
+    "evicted_bytes": 0,
+    "oversized": 0,
+}
+
+
+class TabularColumnIndex:
+    """
+    Inverted index over one derived text column of a sheet.
+
+    Rows are grouped by distinct value, so an equality lookup touches only the
+    matching rows. Prefix lookups binary-search the sorted distinct values, and
+    substring lookups use a token index to narrow the distinct values before an
+    exact substring check. Each part is built on first use.
+    """
+
+    TOKEN_PATTERN = re.compile(r'\w+')
+    POSITION_LOOKUP_MAX_VALUES = 64
+
+    def __init__(self, text_series: pandas.Series, on_grow=None):
+        self._row_index = text_series.index
+        self._on_grow = on_grow
+        self._lock = threading.Lock()
+
+        row_codes, distinct_values = pandas.factorize(text_series, use_na_sentinel=True)
+        self._row_codes = row_codes
+        self._values = [str(value) for value in distinct_values]
+        self._code_by_value = {value: code for code, value in enumerate(self._values)}
+        self._row_order = numpy.argsort(row_codes, kind='stable')
+        self._code_starts = numpy.searchsorted(row_codes[self._row_order], numpy.arange(len(self._values) + 1))
+        self._sorted_values = None
+        self._sorted_codes = None
+        self._token_codes = None
+        self._tokens = None
+
+        self.size_bytes = (
+            self._row_codes.nbytes
+            + self._row_order.nbytes
+            + self._code_starts.nbytes
+            + sum(len(value) + 100 for value in self._values)
+        )
+
+    def _grow(self, size_bytes: int) -> None:
+        self.size_bytes += size_bytes
+        if self._on_grow is not None and size_bytes > 0:
+            self._on_grow(size_bytes)
+
+    def _mask_for_codes(self, codes) -> pandas.Series:
+        """Return a row mask selecting every row holding one of the distinct value codes."""
+        if len(codes) <= self.POSITION_LOOKUP_MAX_VALUES:
+            mask = numpy.zeros(len(self._row_codes), dtype=bool)
+            for code in codes:
+                mask[self._row_order[self._code_starts[code]:self._code_starts[code + 1]]] = True
+        else:
+            # Rows without a value have code -1, which selects the trailing False slot
+            selected = numpy.zeros(len(self._values) + 1, dtype=bool)
+            selected[numpy.asarray(codes, dtype=numpy.int64)] = True
+            mask = selected[self._row_codes]
+        return pandas.Series(mask, index=self._row_index)
+
+    def _ensure_sorted_values(self) -> None:
+        if self._sorted_values is not None:
+            return
+        sort_order = sorted(range(len(self._values)), key=self._values.__getitem__)
+        with self._lock:
+            if self._sorted_values is not None:
+                return
+            self._sorted_codes = numpy.asarray(sort_order, dtype=numpy.int64)
+            self._sorted_values = [self._values[code] for code in sort_order]
+        self._grow(self._sorted_codes.nbytes + 8 * len(sort_order))
+
+    def _ensure_token_index(self) -> None:
+        if self._token_codes is not None:
+            return
+        token_codes = {}
+        posting_count = 0
+        for code, value in enumerate(self._values):
+            for token in set(self.TOKEN_PATTERN.findall(value)):
+                token_codes.setdefault(token, []).append(code)
+                posting_count += 1
+        with self._lock:
+            if self._token_codes is not None:
+                return
+            self._token_codes = token_codes
+            self._tokens = list(token_codes)
+        self._grow(8 * posting_count + sum(len(token) + 100 for token in self._tokens))
+
+    def match_equal(self, value: str) -> pandas.Series:
+        """Rows whose value equals the given text."""
+        code = self._code_by_value.get(value)
+        return self._mask_for_codes([] if code is None else [code])
+
+    def match_prefix(self, prefix: str) -> pandas.Series:
+        """Rows whose value starts with the given text."""
+        self._ensure_sorted_values()
+        start = bisect.bisect_left(self._sorted_values, prefix)
+        if not prefix:
+            end = len(self._sorted_values)
+        elif ord(prefix[-1]) < 0x10FFFF:
+            end = bisect.bisect_left(self._sorted_values, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        else:
+            end = start
+            while end < len(self._sorted_values) and self._sorted_values[end].startswith(prefix):
+                end += 1
+        return self._mask_for_codes(self._sorted_codes[start:end])
+
+    def match_substring(self, fragment: str) -> Optional[pandas.Series]:
+        """
+        Rows whose value contains the given text, or None when the text has no word characters.
+
+        Every word-character run of the fragment lies inside a token of any value that
+        contains it, so the longest run narrows the candidates before the exact check.
+        """
+        fragment_tokens = self.TOKEN_PATTERN.findall(fragment)
+        if not fragment_tokens:
+            return None
+
+        self._ensure_token_index()
+        longest_token = max(fragment_tokens, key=len)
+        candidate_codes = set()
+        for token in self._tokens:
+            if longest_token in token:
+                candidate_codes.update(self._token_codes[token])
+
+        return self._mask_for_codes(sorted(
+            code for code in candidate_codes if fragment in self._values[code]
+        ))
+
+
+class TabularSheetProfile:
+    """
+    Typed view and per-column derived data for one parsed sheet.
+
+    Cells are read as strings, so numeric conversion, lower-cased text and parsed
+    datetimes used to be recomputed on every tool call. The profile computes each
+    of them once per sheet and keeps the result with the cached frame.
+    """
+
+    def __init__(self, df: pandas.DataFrame, on_grow=None):
+        self._df = df
+        self._on_grow = on_grow
+        self._lock = threading.Lock()
+        self._typed_df = None
+        self._column_types = {}
+        self._derived_series = {}
+        self._column_indexes = {}
+
+    @property
+    def columns(self):
+        return self._df.columns
+
+    @property
+    def row_count(self) -> int:
+        return len(self._df)
+
+    def _grow(self, size_bytes: int) -> None:
+        if self._on_grow is not None and size_bytes > 0:
+            self._on_grow(size_bytes)
+
+    def get_typed_dataframe(self) -> pandas.DataFrame:
+        """Return the sheet with numeric-looking columns converted, built on first use."""
+        if self._typed_df is not None:
+            return self._typed_df
+
+        typed_df = self._df.copy(deep=False)
+        column_types = {}
+        converted_bytes = 0
+        for column_name in typed_df.columns:
+            series = typed_df[column_name]
+            if pandas.api.types.is_datetime64_any_dtype(series) or pandas.api.types.is_timedelta64_dtype(series):
+                column_types[column_name] = 'datetime'
+                continue
+            try:
+                typed_df[column_name] = pandas.to_numeric(series)
+            except (ValueError, TypeError):
+                column_types[column_name] = 'text'
+                continue
+            column_types[column_name] = 'numeric'
+            converted_bytes += int(typed_df[column_name].memory_usage(index=False, deep=True))
+
+        with self._lock:
+            if self._typed_df is None:
+                self._typed_df = typed_df
+                self._column_types = column_types
+            else:
+                converted_bytes = 0
+        self._grow(converted_bytes)
+        return self._typed_df
+
+    def get_column_types(self) -> Dict[str, str]:
+        """Return column name -> 'numeric', 'datetime' or 'text' for the typed frame."""
+        self.get_typed_dataframe()
+        return dict(self._column_types)
+
+    def get_derived_series(self, kind: str, column_name: str, builder) -> pandas.Series:
+        """
+        Return builder(typed column) for the whole sheet, computed once per (kind, column).
+
+        Args:
+            kind: Name of the derived data, for example 'lower_text'
+            column_name: Column of the typed frame
+            builder: Function from the typed column Series to the derived Series
+        """
+        cache_key = (kind, column_name)
+        derived_series = self._derived_series.get(cache_key)
+        if derived_series is not None:
+            return derived_series
+
+        derived_series = builder(self.get_typed_dataframe()[column_name])
+        with self._lock:
+            existing_series = self._derived_series.setdefault(cache_key, derived_series)
+        if existing_series is derived_series:
+            self._grow(int(derived_series.memory_usage(index=False, deep=True)))
+        return existing_series
+
+    def get_column_index(self, kind: str, column_name: str, builder) -> TabularColumnIndex:
+        """Return the inverted index over get_derived_series(kind, column_name, builder)."""
+        cache_key = (kind, column_name)
+        column_index = self._column_indexes.get(cache_key)
+        if column_index is not None:
+            return column_index
+
+        column_index = TabularColumnIndex(
+            self.get_derived_series(kind, column_name, builder),
+            on_grow=self._grow,
+        )
+        with self._lock:
+            existing_index = self._column_indexes.setdefault(cache_key, column_index)
+        if existing_index is column_index:
+            self._grow(column_index.size_bytes)
+        return existing_index
+
+
+def get_tabular_index_settings():
+    """
+    Get tabular lookup index settings from app settings (admin configurable).
+    Falls back to defaults if settings unavailable.
+
+    Returns:
+        tuple: (index_enabled, min_rows)
+    """
+    try:
+        from functions_settings import get_settings
+        settings = get_settings()
+        return (
+            bool(settings.get('enable_tabular_lookup_index', True)),
+            max(int(settings.get('tabular_lookup_index_min_rows', 5000) or 0), 0)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to load tabular index settings, using defaults: {e}")
+        return (True, 5000)
+
+
+def get_tabular_cache_settings():
+    """
+    Get tabular DataFrame cache settings from app settings (admin configurable).
+    Falls back to defaults if settings unavailable.
+
+    Returns:
+        tuple: (cache_enabled, max_bytes)
+    """
+    try:
+        from functions_settings import get_settings
+        settings = get_settings()
+        return (
+            bool(settings.get('enable_tabular_dataframe_cache', True)),
+            max(int(settings.get('tabular_dataframe_cache_max_mb', 512) or 0), 0) * 1024 * 1024
+        )
+    except Exception as e:
+        logger.warning(f"Failed to load tabular cache settings, using defaults: {e}")
+        return (True, 512 * 1024 * 1024)
+
+
+def get_tabular_cache_key(container_name: str, blob_name: str, source_etag: str, sheet_name: Optional[str]) -> Tuple[str, str, str, str]:
+    """Return the cache key for one parsed sheet of one blob revision."""
+    return (container_name, blob_name, source_etag, sheet_name or '__default__')
+
+
+def estimate_dataframe_bytes(df: pandas.DataFrame) -> int:
+    """Return the deep in-memory size of a DataFrame, including Python string objects."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def get_dataframe_view(df: pandas.DataFrame, writable: bool = False) -> pandas.DataFrame:
+    """Return a frame that is safe to hand out from the cache."""
+    return df.copy(deep=True) if writable else df.copy(deep=False)
+
+
+def _evict_to_budget(max_bytes: int) -> None:
+    global _tabular_cache_bytes
+    while _tabular_dataframe_cache and _tabular_cache_bytes > max_bytes:
+        _, (_, evicted_bytes, _) = _tabular_dataframe_cache.popitem(last=False)
+        _tabular_cache_bytes -= evicted_bytes
+        _tabular_cache_stats["evictions"] += 1
+        _tabular_cache_stats["evicted_bytes"] += evicted_bytes
+
+
+def get_cached_tabular_dataframe(cache_key: Tuple, writable: bool = False) -> Optional[pandas.DataFrame]:
+    """
+    Return a cached sheet, or None on a miss.
+
+    Args:
+        cache_key: Key from get_tabular_cache_key
+        writable: Return a deep copy for callers that modify the frame in place
+    """
+    cache_enabled, _ = get_tabular_cache_settings()
+    if not cache_enabled:
+        return None
+
+    with _tabular_cache_lock:
+        entry = _tabular_dataframe_cache.get(cache_key)
+        if entry is None:
+            _tabular_cache_stats["misses"] += 1
+            return None
+        _tabular_dataframe_cache.move_to_end(cache_key)
+        _tabular_cache_stats["hits"] += 1
+        df = entry[0]
+
+    return get_dataframe_view(df, writable=writable)
+
+
+def get_tabular_sheet_profile(cache_key: Tuple) -> Optional[TabularSheetProfile]:
+    """Return the profile of a cached sheet, or None when the sheet is not cached."""
+    with _tabular_cache_lock:
+        entry = _tabular_dataframe_cache.get(cache_key)
+        if entry is None:
+            return None
+        _tabular_dataframe_cache.move_to_end(cache_key)
+        return entry[2]
+
+
+def _grow_entry(cache_key: Tuple, size_bytes: int) -> None:
+    """Count data a profile derived from a cached sheet against the memory budget."""
+    global _tabular_cache_bytes
+    _, max_bytes = get_tabular_cache_settings()
+    with _tabular_cache_lock:
+        entry = _tabular_dataframe_cache.get(cache_key)
+        if entry is None:
+            return
+        entry[1] += size_bytes
+        _tabular_cache_bytes += size_bytes
+        _evict_to_budget(max_bytes)
+
+
+def store_tabular_dataframe(cache_key: Tuple, df: pandas.DataFrame) -> bool:
+    """
+    Store a parsed sheet, evicting least recently used sheets to stay within the memory budget.
+
+    The caller must not modify df afterwards; read it back through get_cached_tabular_dataframe.
+
+    Returns:
+        bool: True if the sheet was cached
+    """
+    global _tabular_cache_bytes
+    cache_enabled, max_bytes = get_tabular_cache_settings()
+    if not cache_enabled or max_bytes <= 0:
+        return False
+
+    size_bytes = estimate_dataframe_bytes(df)
+    with _tabular_cache_lock:
+        if size_bytes > max_bytes:
+            _tabular_cache_stats["oversized"] += 1
+            return False
+
+        previous_entry = _tabular_dataframe_cache.pop(cache_key, None)
+        if previous_entry is not None:
+            _tabular_cache_bytes -= previous_entry[1]
+        profile = TabularSheetProfile(df, on_grow=lambda grown_bytes: _grow_entry(cache_key, grown_bytes))
+        _tabular_dataframe_cache[cache_key] = [df, size_bytes, profile]
+        _tabular_cache_bytes += size_bytes
+        _tabular_cache_stats["stores"] += 1
+        _evict_to_budget(max_bytes)
+    return True
+
+
+def clear_tabular_dataframe_cache() -> int:
+    """Drop every cached sheet. Returns the number of entries removed."""
+    global _tabular_cache_bytes
+    with _tabular_cache_lock:
+        removed = len(_tabular_dataframe_cache)
+        _tabular_dataframe_cache.clear()
+        _tabular_cache_bytes = 0
+    return removed
+
+
+def get_tabular_cache_stats() -> Dict[str, Any]:
+    """
+    Get this worker's tabular DataFrame cache statistics for monitoring.
+
+    Returns:
+        Dictionary with hit/miss/eviction counters, current size and hit rate
+    """
+    cache_enabled, max_bytes = get_tabular_cache_settings()
+    with _tabular_cache_lock:
+        stats = dict(_tabular_cache_stats)
+        stats["entries"] = len(_tabular_dataframe_cache)
+        stats["bytes"] = _tabular_cache_bytes
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["enabled"] = cache_enabled
+    stats["max_bytes"] = max_bytes
+    return stats
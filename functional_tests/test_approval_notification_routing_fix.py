@@ -2,7 +2,7 @@
 # test_approval_notification_routing_fix.py
 """
 Functional test for approval notification routing, cleanup, and template activity logging.
-Version: 0.239.162
+Version: 0.241.027
 Implemented in: 0.239.159
 
 This test ensures that approval requests notify submitters and reviewers,
@@ -20,12 +20,36 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
 
 
+class FakeQueryResult(list):
+    """Query result that can be read page by page like a Cosmos query iterator."""
+
+    def by_page(self, continuation_token=None):
+        return iter([list(self)])
+
+
 class FakeNotificationContainer:
     """In-memory Cosmos-like container for notification tests."""
 
     def __init__(self):
         self.items = {}
 
+    def read_item(self, item=None, partition_key=None):
+        if item not in self.items:
+            raise exceptions.CosmosResourceNotFoundError(message='Notification not found')
+        return copy.deepcopy(self.items[item])
+
+    def patch_item(self, item=None, partition_key=None, patch_operations=None, **kwargs):
+        if item not in self.items:
+            raise exceptions.CosmosResourceNotFoundError(message='Notification not found')
+        stored = self.items[item]
+        for operation in patch_operations or []:
+            field = operation['path'].lstrip('/')
+            if operation['op'] == 'incr':
+                stored[field] = stored.get(field, 0) + operation['value']
+            else:
+                stored[field] = operation['value']
+        return copy.deepcopy(stored)
+
     def create_item(self, item):
         self.items[item['id']] = copy.deepcopy(item)
         return copy.deepcopy(item)
@@ -40,13 +64,26 @@ class FakeNotificationContainer:
             raise exceptions.CosmosResourceNotFoundError(message='Notification not found')
         del self.items[item_id]
 
-    def query_items(self, query=None, parameters=None, partition_key=None, enable_cross_partition_query=False):
+    def query_items(self, query=None, parameters=None, partition_key=None, enable_cross_partition_query=False, max_item_count=None):
         results = [copy.deepcopy(item) for item in self.items.values()]
         parameter_map = {param['name']: param['value'] for param in (parameters or [])}
+        query = query or ''
+
+        if partition_key is not None:
+            results = [item for item in results if item.get('user_id') == partition_key]
 
-        if "c.scope = 'assignment'" in (query or ''):
+        if "c.scope = 'assignment'" in query:
             results = [item for item in results if item.get('scope') == 'assignment']
 
+        if 'c.inbox_entry = true' in query:
+            results = [item for item in results if item.get('inbox_entry') is True]
+        if 'NOT IS_DEFINED(c.inbox_entry)' in query:
+            results = [item for item in results if 'inbox_entry' not in item]
+        if 'c.is_dismissed = false' in query:
+            results = [item for item in results if not item.get('is_dismissed')]
+        if 'c.is_read = false' in query:
+            results = [item for item in results if not item.get('is_read')]
+
         if '@notification_id' in parameter_map:
             results = [item for item in results if item.get('id') == parameter_map['@notification_id']]
 
@@ -75,7 +112,11 @@ class FakeNotificationContainer:
                     if item.get('metadata', {}).get(metadata_key) == parameter_map[parameter_name]
                 ]
 
-        return results
+        if 'COUNT(1)' in query:
+            return [len(results)]
+        if 'ORDER BY c.created_at DESC' in query:
+            results.sort(key=lambda item: item.get('created_at', ''), reverse=True)
+        return FakeQueryResult(results)
 
 
 class FakeApprovalsContainer:
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# test_background_log_writer.py
+"""
+Functional test for the background log writer.
+Version: 0.241.015
+Implemented in: 0.241.015
+
+This test ensures that file processing and activity log records are queued
+instead of written on the caller's thread, that the worker groups them into
+transactional batches per partition key, falls back to single writes when a
+batch fails, counts records dropped on overflow, and flushes on shutdown.
+"""
+
+import importlib
+import os
+import sys
+import threading
+import types
+from contextlib import contextmanager
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'application', 'single_app'))
+
+
+class FakeLogContainer:
+    """Container proxy recording single writes and transactional batches."""
+
+    def __init__(self, fail_batches=False, write_delay=None):
+        self.fail_batches = fail_batches
+        self.write_delay = write_delay
+        self.items = []
+        self.batches = []
+        self.single_writes = 0
+        self.lock = threading.Lock()
+
+    def create_item(self, body):
+        if self.write_delay:
+            self.write_delay.wait(2)
+        with self.lock:
+            self.single_writes += 1
+            self.items.append(body)
+
+    def upsert_item(self, body):
+        self.create_item(body)
+
+    def execute_item_batch(self, batch_operations, partition_key):
+        if self.write_delay:
+            self.write_delay.wait(2)
+        if self.fail_batches:
+            raise RuntimeError('Batch request failed')
+        with self.lock:
+            self.batches.append((partition_key, [operation for operation, _ in batch_operations]))
+            self.items.extend(args[0] for _, args in batch_operations)
+
+
+@contextmanager
+def _load_log_writer(**settings_overrides):
+    settings = {
+        'enable_async_log_writer': True,
+        'log_writer_queue_size': 100,
+        'log_writer_batch_size': 50,
+        'log_writer_flush_interval_seconds': 0.05,
+    }
+    settings.update(settings_overrides)
+
+    settings_stub = types.ModuleType('functions_settings')
+    settings_stub.get_settings = lambda: settings
+
+    original_modules = {name: sys.modules.get(name) for name in ('functions_settings', 'utils_log_writer')}
+    sys.modules['functions_settings'] = settings_stub
+    sys.modules.pop('utils_log_writer', None)
+    log_writer = importlib.import_module('utils_log_writer')
+    try:
+        yield log_writer
+    finally:
+        log_writer.shutdown_log_writer(timeout=2)
+        for module_name, original_module in original_modules.items():
+            if original_module is None:
+                sys.modules.pop(module_name, None)
+            else:
+                sys.modules[module_name] = original_module
+
+
+def test_records_are_batched_per_partition():
+    """Verify records are grouped into one transactional batch per partition key value."""
+    print('🔍 Testing partition batching...')
+
+    with _load_log_writer() as log_writer:
+        container = FakeLogContainer()
+        release = threading.Event()
+        container.write_delay = release
+
+        for index in range(6):
+            log_writer.enqueue_log_item(container, {'id': f'a-{index}', 'document_id': 'doc-a'}, partition_key_path='document_id')
+        for index in range(4):
+            log_writer.enqueue_log_item(container, {'id': f'b-{index}', 'document_id': 'doc-b'}, partition_key_path='document_id')
+        assert not container.items, 'Records should not be written on the caller thread'
+
+        release.set()
+        assert log_writer.flush_log_writer(timeout=2)
+
+        assert sorted((key, len(ops)) for key, ops in container.batches) == [('doc-a', 6), ('doc-b', 4)], container.batches
+        assert len(container.items) == 10 and container.single_writes == 0
+        stats = log_writer.get_log_writer_stats()
+        assert stats['written'] == 10 and stats['batches'] == 2 and stats['queued'] == 0, stats
+
+    print('✅ Partition batching verified')
+
+
+def test_failed_batch_falls_back_to_single_writes():
+    """Verify a failed batch is retried record by record."""
+    print('🔍 Testing batch fallback...')
+
+    with _load_log_writer() as log_writer:
+        container = FakeLogContainer(fail_batches=True)
+        for index in range(3):
+            log_writer.enqueue_log_item(container, {'id': str(index), 'user_id': 'user-1'}, partition_key_path='user_id', operation='upsert')
+        assert log_writer.flush_log_writer(timeout=2)
+
+        assert container.single_writes == 3
+        stats = log_writer.get_log_writer_stats()
+        assert stats['batch_fallbacks'] == 1 and stats['written'] == 3 and stats['failed'] == 0, stats
+
+    print('✅ Batch fallback verified')
+
+
+def test_overflow_drops_and_counts():
+    """Verify a full queue drops records without blocking the caller."""
+    print('🔍 Testing overflow handling...')
+
+    with _load_log_writer(log_writer_queue_size=3, log_writer_batch_size=1) as log_writer:
+        release = threading.Event()
+        container = FakeLogContainer(write_delay=release)
+
+        accepted = [
+            log_writer.enqueue_log_item(container, {'id': str(index), 'user_id': 'user-1'}, partition_key_path='user_id')
+            for index in range(10)
+        ]
+        release.set()
+        assert log_writer.flush_log_writer(timeout=2)
+
+        stats = log_writer.get_log_writer_stats()
+        assert accepted.count(False) == stats['dropped_overflow'] > 0, stats
+        assert stats['written'] == accepted.count(True) == len(container.items), stats
+
+    print('✅ Overflow handling verified')
+
+
+def test_shutdown_flushes_and_disabled_writes_inline():
+    """Verify shutdown drains the queue and the disabled writer writes synchronously."""
+    print('🔍 Testing shutdown and disabled mode...')
+
+    with _load_log_writer() as log_writer:
+        container = FakeLogContainer()
+        log_writer.enqueue_log_item(container, {'id': '1', 'user_id': 'user-1'}, partition_key_path='user_id')
+        assert log_writer.shutdown_log_writer(timeout=2)
+        assert len(container.items) == 1
+
+    with _load_log_writer(enable_async_log_writer=False) as log_writer:
+        container = FakeLogContainer()
+        log_writer.enqueue_log_item(container, {'id': '1', 'user_id': 'user-1'}, partition_key_path='user_id')
+        assert len(container.items) == 1 and container.single_writes == 1
+        assert log_writer.get_log_writer_stats() == {'enabled': False}
+
+        try:
+            log_writer.enqueue_log_item(container, {'id': '2'}, partition_key_path='user_id', operation='replace')
+            raise AssertionError('Expected unsupported operation to be rejected')
+        except ValueError:
+            pass
+
+    print('✅ Shutdown and disabled mode verified')
+
+
+def test_log_functions_use_background_writer():
+    """Verify file processing and activity logs no longer write on the caller thread."""
+    print('🔍 Testing log function wiring...')
+
+    app_dir = os.path.join(ROOT_DIR, 'application', 'single_app')
+    with open(os.path.join(app_dir, 'functions_logging.py'), 'r', encoding='utf-8') as source_file:
+        logging_source = source_file.read()
+    with open(os.path.join(app_dir, 'functions_activity_logging.py'), 'r', encoding='utf-8') as source_file:
+        activity_source = source_file.read()
+
+    assert 'cosmos_file_processing_container.create_item' not in logging_source
+    assert 'enqueue_log_item(cosmos_file_processing_container' in logging_source
+    # Only the agreement acceptance record stays synchronous for read-after-write
+    assert activity_source.count('cosmos_activity_logs_container.create_item') == 1
+    assert 'cosmos_activity_logs_container.upsert_item' not in activity_source
+    assert activity_source.count('enqueue_log_item(cosmos_activity_logs_container') >= 20
+
+    print('✅ Log function wiring verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_records_are_batched_per_partition,
+        test_failed_batch_falls_back_to_single_writes,
+        test_overflow_drops_and_counts,
+        test_shutdown_flushes_and_disabled_writes_inline,
+        test_log_functions_use_background_writer,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
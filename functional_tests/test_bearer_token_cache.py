@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# test_bearer_token_cache.py
+"""
+Functional test for the bearer token signing key and validated token caches.
+Version: 0.241.029
+Implemented in: 0.241.029
+
+This test ensures that validate_bearer_token parses each JWKS key once, refetches
+the JWKS (throttled) when a token names an unknown kid after key rotation, and
+skips signature verification for a token that was already validated until its
+exp claim.
+"""
+
+import ast
+import copy
+import hashlib
+import os
+import sys
+import threading
+import types
+from collections import OrderedDict
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUTH_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_authentication.py')
+TARGET_FUNCTIONS = {
+    '_get_bearer_token_cache_config',
+    '_fetch_microsoft_entra_jwks',
+    'get_microsoft_entra_jwks',
+    '_get_signing_key',
+    '_read_validated_token',
+    '_store_validated_token',
+    'get_bearer_token_cache_stats',
+    'validate_bearer_token',
+}
+TARGET_ASSIGNMENTS = ('JWKS_', '_signing_key_', '_validated_token_cache', '_bearer_token_cache_stats')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class _InvalidTokenError(Exception):
+    pass
+
+
+class _ExpiredSignatureError(_InvalidTokenError):
+    pass
+
+
+class FakeJwt:
+    """Tokens are '<kid>.<subject>.<exp>'; a token verifies against the key parsed from its kid."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.parsed_keys = 0
+        self.verifications = 0
+        self.exceptions = types.SimpleNamespace(
+            ExpiredSignatureError=_ExpiredSignatureError,
+            InvalidAudienceError=type('InvalidAudienceError', (_InvalidTokenError,), {}),
+            InvalidIssuerError=type('InvalidIssuerError', (_InvalidTokenError,), {}),
+            InvalidTokenError=_InvalidTokenError,
+        )
+        self.algorithms = types.SimpleNamespace(RSAAlgorithm=types.SimpleNamespace(from_jwk=self._from_jwk))
+
+    def _from_jwk(self, key_data):
+        self.parsed_keys += 1
+        return f"public-key:{key_data['kid']}"
+
+    def get_unverified_header(self, token):
+        return {'kid': token.split('.')[0]}
+
+    def decode(self, token, public_key, **kwargs):
+        self.verifications += 1
+        kid, subject, exp = token.split('.')
+        if public_key != f'public-key:{kid}':
+            raise _InvalidTokenError('Signature verification failed')
+        if self.clock.now >= float(exp):
+            raise _ExpiredSignatureError('Signature has expired')
+        return {'sub': subject, 'exp': int(exp), 'roles': ['ExternalApi']}
+
+
+class FakeRequests:
+    def __init__(self, kids):
+        self.kids = list(kids)
+        self.jwks_fetches = 0
+        self.exceptions = types.SimpleNamespace(RequestException=OSError)
+
+    def get(self, url, timeout=None):
+        if url == 'https://login.example/openid-configuration':
+            return types.SimpleNamespace(json=lambda: {'jwks_uri': 'https://login.example/keys'})
+        self.jwks_fetches += 1
+        keys = [{'kid': kid, 'kty': 'RSA'} for kid in self.kids]
+        return types.SimpleNamespace(json=lambda: {'keys': keys})
+
+
+def _load_bearer_auth(kids, settings=None):
+    with open(AUTH_FILE, 'r', encoding='utf-8') as source_file:
+        parsed = ast.parse(source_file.read(), filename=AUTH_FILE)
+    selected_nodes = [
+        node for node in parsed.body
+        if (isinstance(node, ast.FunctionDef) and node.name in TARGET_FUNCTIONS)
+        or (isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id.startswith(TARGET_ASSIGNMENTS) for target in node.targets
+        ))
+    ]
+
+    clock = FakeClock()
+    fake_jwt = FakeJwt(clock)
+    fake_requests = FakeRequests(kids)
+    namespace = {
+        'copy': copy,
+        'hashlib': hashlib,
+        'threading': threading,
+        'time': clock,
+        'OrderedDict': OrderedDict,
+        'jwt': fake_jwt,
+        'requests': fake_requests,
+        'OIDC_METADATA_URL': 'https://login.example/openid-configuration',
+        'CLIENT_ID': 'client',
+        'TENANT_ID': 'tenant',
+        'AUTHORITY': 'https://login.example/tenant',
+        'get_settings': lambda: dict(settings or {}),
+        'debug_print': lambda *args, **kwargs: None,
+    }
+    exec(compile(ast.Module(body=selected_nodes, type_ignores=[]), AUTH_FILE, 'exec'), namespace)
+    return namespace, fake_jwt, fake_requests, clock
+
+
+def test_validated_token_cache():
+    """Verify keys are parsed once and a validated token skips verification until exp."""
+    print('🔍 Testing validated bearer token cache...')
+
+    namespace, fake_jwt, fake_requests, clock = _load_bearer_auth(['key-a', 'key-b'])
+    validate_bearer_token = namespace['validate_bearer_token']
+    token = 'key-a.client-app.1600'
+
+    for _ in range(5):
+        is_valid, claims = validate_bearer_token(token)
+        assert is_valid and claims['sub'] == 'client-app'
+    assert fake_jwt.verifications == 1, 'Repeated calls with the same token reuse the validation'
+    assert fake_jwt.parsed_keys == 2 and fake_requests.jwks_fetches == 1
+
+    claims['roles'].append('Admin')
+    assert validate_bearer_token(token)[1]['roles'] == ['ExternalApi'], 'Callers cannot change cached claims'
+
+    assert validate_bearer_token('key-b.other-app.1600')[0]
+    assert fake_jwt.verifications == 2 and fake_jwt.parsed_keys == 2, 'Other kids reuse the parsed keys'
+
+    assert not validate_bearer_token('key-a.stale-app.900')[0]
+    assert namespace['get_bearer_token_cache_stats']()['entries'] == 2, 'Failed validations are not cached'
+
+    clock.now = 1600
+    is_valid, message = validate_bearer_token(token)
+    assert not is_valid and message == 'Token has expired.', 'Cached tokens expire with their exp claim'
+
+    disabled, disabled_jwt, _, _ = _load_bearer_auth(['key-a'], {'enable_bearer_token_cache': False})
+    disabled['validate_bearer_token'](token)
+    disabled['validate_bearer_token'](token)
+    assert disabled_jwt.verifications == 2 and disabled_jwt.parsed_keys == 1
+
+    print('✅ Validated bearer token cache verified')
+
+
+def test_signing_key_rotation():
+    """Verify unknown kids trigger a throttled JWKS refresh and periodic refresh drops retired keys."""
+    print('🔍 Testing signing key refresh...')
+
+    namespace, fake_jwt, fake_requests, clock = _load_bearer_auth(['key-a'])
+    validate_bearer_token = namespace['validate_bearer_token']
+    assert validate_bearer_token('key-a.client-app.99999')[0]
+
+    # Key rotation: a new kid is published, the JWKS has not been refreshed yet
+    fake_requests.kids = ['key-b']
+    clock.now += 400
+    assert validate_bearer_token('key-b.client-app.99999')[0]
+    assert fake_requests.jwks_fetches == 2
+
+    is_valid, message = validate_bearer_token('key-unknown.client-app.99999')
+    assert not is_valid and message == 'Invalid or missing key ID.'
+    assert fake_requests.jwks_fetches == 2, 'Unknown kids cannot refetch the JWKS more than once per throttle window'
+
+    # key-a is no longer published, so its cached validation is dropped
+    assert namespace['get_bearer_token_cache_stats']()['entries'] == 1
+    assert not validate_bearer_token('key-a.client-app.99999')[0]
+
+    clock.now += 24 * 60 * 60
+    assert validate_bearer_token('key-b.other-app.99999')[0]
+    assert fake_requests.jwks_fetches == 3, 'Keys are refreshed periodically'
+
+    print('✅ Signing key refresh verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_validated_token_cache,
+        test_signing_key_rotation,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
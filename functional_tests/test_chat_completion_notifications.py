@@ -2,7 +2,7 @@
 # test_chat_completion_notifications.py
 """
 Functional test for chat completion notifications.
-Version: 0.239.136
+Version: 0.241.030
 Implemented in: 0.239.128
 
 This test ensures that personal chat completions create deep-link notifications,
@@ -51,6 +51,13 @@ class FakeConversationContainer:
             if user_match:
                 results = [item for item in results if item.get('user_id') == user_match.group(1)]
 
+        if query and query.startswith('SELECT VALUE COUNT(1)'):
+            return [len(results)]
+        if query and query.startswith('SELECT VALUE MAX('):
+            field_name = re.search(r"MAX\(c\.(\w+)\)", query).group(1)
+            values = [item[field_name] for item in results if field_name in item]
+            return [max(values)] if values else []
+
         if query and 'ORDER BY c.last_updated DESC' in query:
             results.sort(key=lambda item: item.get('last_updated', ''), reverse=True)
 
@@ -71,6 +78,18 @@ class FakeNotificationContainer:
         self.items[item['id']] = copy.deepcopy(item)
         return copy.deepcopy(item)
 
+    def patch_item(self, item, partition_key, patch_operations, **kwargs):
+        if item not in self.items:
+            raise KeyError(item)
+        stored = self.items[item]
+        for operation in patch_operations:
+            field = operation['path'].lstrip('/')
+            if operation['op'] == 'incr':
+                stored[field] = stored.get(field, 0) + operation['value']
+            else:
+                stored[field] = operation['value']
+        return copy.deepcopy(stored)
+
     def query_items(self, query=None, parameters=None, partition_key=None, enable_cross_partition_query=False):
         results = [copy.deepcopy(item) for item in self.items.values()]
         parameter_map = {param['name']: param['value'] for param in (parameters or [])}
@@ -308,7 +327,7 @@ def test_mark_read_endpoint_clears_unread_state_and_notification():
             return False
 
         stored_notification = next(iter(fake_notifications.items.values()))
-        if test_user_id not in stored_notification.get('read_by', []):
+        if not stored_notification.get('is_read'):
             print(f"❌ Notification was not marked read: {stored_notification}")
             return False
 
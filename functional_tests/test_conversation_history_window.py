@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# test_conversation_history_window.py
+"""
+Functional test for the incremental conversation history window.
+Version: 0.241.016
+Implemented in: 0.241.016
+
+This test ensures that chat history is served from a per-conversation window:
+later turns only read items written since the previous turn, only messages that
+age out of the window are folded into a rolling summary, the summary persisted
+on the conversation item is reused after a cold start, and edits, deletions and
+masking force a rebuild instead of carrying stale content forward.
+"""
+
+import ast
+import importlib
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT_DIR, 'application', 'single_app')
+sys.path.insert(0, APP_DIR)
+
+
+class FakeMessagesContainer:
+    """Messages container answering the full and _ts delta queries used by the window."""
+
+    def __init__(self):
+        self.items = {}
+        self.clock = 1000
+        self.queries = []
+
+    def write(self, item):
+        self.clock += 1
+        stored = dict(item, _ts=self.clock)
+        self.items[stored['id']] = stored
+        return stored
+
+    def query_items(self, query, parameters, partition_key=None, enable_cross_partition_query=False):
+        values = {parameter['name']: parameter['value'] for parameter in parameters}
+        items = [dict(item) for item in self.items.values() if item['conversation_id'] == values['@conv_id']]
+        if '@since' in values:
+            items = [item for item in items if item['_ts'] >= values['@since']]
+            self.queries.append(('delta', len(items)))
+        else:
+            items.sort(key=lambda item: item['timestamp'])
+            self.queries.append(('full', len(items)))
+        return items
+
+
+class FakeConversationsContainer:
+    def __init__(self):
+        self.patches = []
+
+    def patch_item(self, item, partition_key, patch_operations):
+        self.patches.append((item, patch_operations))
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.prompts = []
+
+    def create(self, model, messages, max_tokens, temperature):
+        self.prompts.append(messages[0]['content'])
+        summary = f"summary-{len(self.prompts)}"
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=summary))])
+
+
+def _load_sort_messages_by_thread():
+    chat_file = os.path.join(APP_DIR, 'functions_chat.py')
+    with open(chat_file, 'r', encoding='utf-8') as source_file:
+        parsed = ast.parse(source_file.read(), filename=chat_file)
+    nodes = [node for node in parsed.body if isinstance(node, ast.FunctionDef) and node.name == 'sort_messages_by_thread']
+    namespace = {'print': lambda *args, **kwargs: None}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), chat_file, 'exec'), namespace)
+    return namespace['sort_messages_by_thread']
+
+
+@contextmanager
+def _load_history_window(max_entries=256):
+    messages_container = FakeMessagesContainer()
+    conversations_container = FakeConversationsContainer()
+
+    config_stub = types.ModuleType('config')
+    config_stub.cosmos_messages_container = messages_container
+    config_stub.cosmos_conversations_container = conversations_container
+    chat_stub = types.ModuleType('functions_chat')
+    chat_stub.sort_messages_by_thread = _load_sort_messages_by_thread()
+    debug_stub = types.ModuleType('functions_debug')
+    debug_stub.debug_print = lambda *args, **kwargs: None
+    settings_stub = types.ModuleType('functions_settings')
+    settings_stub.get_settings = lambda: {'conversation_history_window_cache_max_entries': max_entries}
+
+    module_names = ['config', 'functions_chat', 'functions_debug', 'functions_settings', 'functions_conversation_history']
+    original_modules = {name: sys.modules.get(name) for name in module_names}
+    sys.modules.update({
+        'config': config_stub,
+        'functions_chat': chat_stub,
+        'functions_debug': debug_stub,
+        'functions_settings': settings_stub,
+    })
+    sys.modules.pop('functions_conversation_history', None)
+    try:
+        yield importlib.import_module('functions_conversation_history'), messages_container, conversations_container
+    finally:
+        for module_name, original_module in original_modules.items():
+            if original_module is None:
+                sys.modules.pop(module_name, None)
+            else:
+                sys.modules[module_name] = original_module
+
+
+def _add_turn(container, turn_number, conversation_id='conv-1'):
+    thread_id = f'thread-{turn_number:03d}'
+    previous_thread_id = f'thread-{turn_number - 1:03d}' if turn_number > 1 else None
+    for offset, role in enumerate(('user', 'assistant')):
+        container.write({
+            'id': f'{role}-{turn_number:03d}',
+            'conversation_id': conversation_id,
+            'role': role,
+            'content': f'{role} message {turn_number}',
+            'timestamp': f'2026-01-01T00:{turn_number:02d}:{offset:02d}',
+            'metadata': {'thread_info': {
+                'thread_id': thread_id,
+                'previous_thread_id': previous_thread_id,
+                'active_thread': True,
+            }},
+        })
+
+
+def _window(history, conversation_item, gpt_client, summarize=True, limit=4):
+    return history.get_conversation_history_window(
+        'conv-1',
+        conversation_item,
+        limit,
+        enable_summarize_older_messages=summarize,
+        gpt_client=gpt_client,
+        gpt_model='gpt-test',
+    )
+
+
+def test_later_turns_read_only_new_items():
+    """Verify the first turn loads once and later turns only read the delta and fold aged messages."""
+    print('🔍 Testing incremental window refresh...')
+
+    with _load_history_window() as (history, container, _):
+        for turn in range(1, 11):
+            _add_turn(container, turn)
+        completions = FakeCompletions()
+        gpt_client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+        conversation_item = {'id': 'conv-1'}
+
+        first = _window(history, conversation_item, gpt_client)
+        assert first['source'] == 'rebuild' and container.queries[-1] == ('full', 20)
+        assert first['folded_message_count'] == 16 and len(completions.prompts) == 1
+        assert [message['id'] for message in first['messages']] == ['user-009', 'assistant-009', 'user-010', 'assistant-010']
+        assert conversation_item['history_summary']['through_id'] == 'assistant-008'
+        assert conversation_item['history_summary']['message_count'] == 16
+
+        _add_turn(container, 11)
+        second = _window(history, conversation_item, gpt_client)
+        assert second['source'] == 'window'
+        assert container.queries[-1][0] == 'delta' and container.queries[-1][1] <= 3, container.queries
+        assert second['folded_message_count'] == 2 and len(completions.prompts) == 2
+        assert 'Current Summary:\nsummary-1' in completions.prompts[-1]
+        assert 'user message 9' in completions.prompts[-1] and 'user message 1\n' not in completions.prompts[-1]
+        assert second['summary_text'] == 'summary-2' and second['summarized_message_count'] == 18
+        assert [message['id'] for message in second['messages']][-1] == 'assistant-011'
+
+    print('✅ Incremental window refresh verified')
+
+
+def test_persisted_summary_survives_cold_start():
+    """Verify a new worker resumes from the summary stored on the conversation item."""
+    print('🔍 Testing cold start from persisted summary...')
+
+    with _load_history_window() as (history, container, _):
+        for turn in range(1, 8):
+            _add_turn(container, turn)
+        completions = FakeCompletions()
+        gpt_client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+        conversation_item = {'id': 'conv-1'}
+        _window(history, conversation_item, gpt_client)
+
+        assert history.clear_conversation_history_windows() == 1
+        resumed = _window(history, conversation_item, gpt_client)
+        assert resumed['source'] == 'rebuild'
+        assert resumed['folded_message_count'] == 0 and len(completions.prompts) == 1
+        assert resumed['summary_text'] == 'summary-1' and resumed['summarized_message_count'] == 10
+
+    print('✅ Cold start from persisted summary verified')
+
+
+def test_changes_to_summarized_messages_force_rebuild():
+    """Verify editing a summarized message or bumping the revision discards the rolling summary."""
+    print('🔍 Testing summary invalidation...')
+
+    with _load_history_window() as (history, container, conversations):
+        for turn in range(1, 6):
+            _add_turn(container, turn)
+        completions = FakeCompletions()
+        gpt_client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+        conversation_item = {'id': 'conv-1'}
+        _window(history, conversation_item, gpt_client)
+
+        masked = dict(container.items['user-001'])
+        masked['metadata'] = dict(masked['metadata'], masked=True)
+        container.write(masked)
+        rebuilt = _window(history, conversation_item, gpt_client)
+        assert rebuilt['source'] == 'rebuild' and container.queries[-1][0] == 'full'
+        assert 'Current Summary' not in completions.prompts[-1]
+        assert 'user message 1\n' not in completions.prompts[-1]
+
+        history.invalidate_conversation_history_window('conv-1')
+        operations = conversations.patches[-1][1]
+        assert {'op': 'incr', 'path': '/history_window_revision', 'value': 1} in operations
+        assert {'op': 'set', 'path': '/history_summary', 'value': None} in operations
+
+        conversation_item.update(history_window_revision=1, history_summary=None)
+        after_invalidation = _window(history, conversation_item, gpt_client)
+        assert after_invalidation['source'] == 'rebuild' and len(completions.prompts) == 3
+
+    print('✅ Summary invalidation verified')
+
+
+def test_window_without_summarization():
+    """Verify aged messages are dropped without completions when summarization is off."""
+    print('🔍 Testing window without summarization...')
+
+    with _load_history_window() as (history, container, _):
+        for turn in range(1, 6):
+            _add_turn(container, turn)
+        completions = FakeCompletions()
+        gpt_client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+        conversation_item = {'id': 'conv-1'}
+
+        result = _window(history, conversation_item, gpt_client, summarize=False)
+        assert result['summary_text'] == '' and not completions.prompts
+        assert len(result['messages']) == 4 and 'history_summary' not in conversation_item
+
+    print('✅ Window without summarization verified')
+
+
+def test_chat_routes_use_history_window():
+    """Verify both chat routes build history through the window."""
+    print('🔍 Testing chat route wiring...')
+
+    with open(os.path.join(APP_DIR, 'route_backend_chats.py'), 'r', encoding='utf-8') as source_file:
+        source = source_file.read()
+
+    assert source.count('_segments = build_windowed_conversation_history_segments(\n') == 4
+    assert 'all_messages=all_messages,\n                    conversation_history_limit' not in source
+    assert source.count('invalidate_conversation_history_window(conversation_id)') == 1
+
+    print('✅ Chat route wiring verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_later_turns_read_only_new_items,
+        test_persisted_summary_survives_cold_start,
+        test_changes_to_summarized_messages_force_rebuild,
+        test_window_without_summarization,
+        test_chat_routes_use_history_window,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
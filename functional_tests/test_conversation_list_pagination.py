@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# test_conversation_list_pagination.py
+"""
+Functional test for the paginated, projected conversation list.
+Version: 0.241.030
+Implemented in: 0.241.030
+
+This test ensures that the sidebar conversation list uses a lightweight
+projection, pages with continuation tokens, returns only conversations written
+since a sync token in delta mode, and gets a new ETag whenever a conversation is
+added, deleted or changed, including writes such as mark-read that do not bump
+last_updated.
+"""
+
+import importlib
+import os
+import re
+import sys
+import types
+from contextlib import contextmanager
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT_DIR, 'application', 'single_app')
+sys.path.insert(0, APP_DIR)
+
+
+class FakePager:
+    def __init__(self, items, page_size, continuation_token):
+        self.items = items
+        self.page_size = page_size
+        self.start = int(continuation_token or 0)
+        self.continuation_token = None
+
+    def __iter__(self):
+        stop = self.start + self.page_size
+        self.continuation_token = str(stop) if stop < len(self.items) else None
+        yield iter(self.items[self.start:stop])
+
+
+class FakeQueryResult(list):
+    def __init__(self, items, page_size):
+        super().__init__(items)
+        self.page_size = page_size
+
+    def by_page(self, continuation_token=None):
+        return FakePager(list(self), self.page_size, continuation_token)
+
+
+class FakeConversationsContainer:
+    """Conversations container answering the list, delta and aggregate queries."""
+
+    def __init__(self):
+        self.items = {}
+        self.clock = 1000
+        self.queries = []
+
+    def write(self, item):
+        self.clock += 1
+        self.items[item['id']] = dict(item, _ts=self.clock)
+
+    def query_items(self, query, parameters, enable_cross_partition_query=False, max_item_count=None):
+        self.queries.append(query)
+        values = {parameter['name']: parameter['value'] for parameter in parameters}
+        items = [dict(item) for item in self.items.values() if item['user_id'] == values['@user_id']]
+
+        if query.startswith('SELECT COUNT(1) AS conversation_count'):
+            if not items:
+                return []
+            return [{
+                'conversation_count': len(items),
+                'sync_token': max(item['_ts'] for item in items),
+                'latest_last_updated': max(item['last_updated'] for item in items),
+            }]
+
+        if '@since' in values:
+            items = [item for item in items if item['_ts'] >= values['@since']]
+        items.sort(key=lambda item: item['last_updated'], reverse=True)
+        projected_fields = re.findall(r"c\.(\w+)(?:,| FROM)", query.split(' FROM c WHERE')[0] + ' FROM')
+        projected = []
+        for item in items:
+            row = {field: item[field] for field in projected_fields if field in item}
+            row['context'] = [ctx for ctx in item.get('context', []) if ctx.get('type') == 'primary']
+            projected.append(row)
+        return FakeQueryResult(projected, max_item_count)
+
+
+@contextmanager
+def _load_conversation_list():
+    container = FakeConversationsContainer()
+    config_stub = types.ModuleType('config')
+    config_stub.cosmos_conversations_container = container
+
+    module_names = ['config', 'functions_conversation_unread', 'functions_conversation_list']
+    original_modules = {name: sys.modules.get(name) for name in module_names}
+    sys.modules['config'] = config_stub
+    sys.modules.pop('functions_conversation_unread', None)
+    sys.modules.pop('functions_conversation_list', None)
+    try:
+        yield importlib.import_module('functions_conversation_list'), container
+    finally:
+        for module_name, original_module in original_modules.items():
+            if original_module is None:
+                sys.modules.pop(module_name, None)
+            else:
+                sys.modules[module_name] = original_module
+
+
+def _conversation(index, user_id='user-1', **fields):
+    return {
+        'id': f'conv-{index:03d}',
+        'user_id': user_id,
+        'title': f'Conversation {index}',
+        'last_updated': f'2026-01-01T00:{index:02d}:00',
+        'context': [
+            {'type': 'primary', 'scope': 'group', 'id': 'group-1', 'name': 'Finance'},
+            {'type': 'secondary', 'scope': 'personal', 'id': f'doc-{index}'},
+        ],
+        'tags': [{'category': 'document', 'value': f'doc-{index}'}] * 20,
+        'metadata': {'large': 'x' * 1000},
+        'is_pinned': index == 1,
+        **fields,
+    }
+
+
+def test_projection_and_pagination():
+    """Verify the list projection and continuation-token paging."""
+    print('🔍 Testing conversation list projection and pagination...')
+
+    with _load_conversation_list() as (conversation_list, container):
+        for index in range(1, 8):
+            container.write(_conversation(index))
+        container.write(_conversation(99, user_id='someone-else'))
+
+        conversations, next_token = conversation_list.query_conversation_list('user-1')
+        assert [item['id'] for item in conversations][:2] == ['conv-007', 'conv-006'] and len(conversations) == 7
+        assert next_token is None
+        first = conversations[0]
+        assert 'tags' not in first and 'metadata' not in first and 'user_id' not in first
+        assert first['context'] == [{'type': 'primary', 'scope': 'group', 'id': 'group-1', 'name': 'Finance'}]
+        assert first['has_unread_assistant_response'] is False, 'Unread fields are normalized'
+
+        seen = []
+        token = None
+        while True:
+            page, token = conversation_list.query_conversation_list('user-1', page_size=3, continuation_token=token)
+            seen.extend(item['id'] for item in page)
+            if not token:
+                break
+        assert seen == [item['id'] for item in conversations]
+
+    print('✅ Conversation list projection and pagination verified')
+
+
+def test_etag_version_and_delta():
+    """Verify the list version moves on every write and delta mode returns only changed conversations."""
+    print('🔍 Testing conversation list ETag and delta mode...')
+
+    with _load_conversation_list() as (conversation_list, container):
+        for index in range(1, 5):
+            container.write(_conversation(index))
+
+        container.queries.clear()
+        version = conversation_list.get_conversation_list_version('user-1')
+        assert len(container.queries) == 1, 'The list version is a single aggregate query'
+        etag = conversation_list.build_conversation_list_etag(version, b'')
+        assert version[0] == 4 and version[1] == container.clock
+        assert conversation_list.build_conversation_list_etag(conversation_list.get_conversation_list_version('user-1'), b'') == etag
+        assert conversation_list.build_conversation_list_etag(version, b'page_size=2') != etag, 'Each query has its own ETag'
+
+        # mark-read changes _ts but not last_updated
+        container.write(dict(container.items['conv-002'], has_unread_assistant_response=False))
+        marked_version = conversation_list.get_conversation_list_version('user-1')
+        assert marked_version[2] == version[2] and conversation_list.build_conversation_list_etag(marked_version, b'') != etag
+
+        changed, _ = conversation_list.query_conversation_list('user-1', since=version[1] + 1)
+        assert [item['id'] for item in changed] == ['conv-002']
+
+        del container.items['conv-004']
+        deleted_version = conversation_list.get_conversation_list_version('user-1')
+        assert deleted_version[0] == 3 and deleted_version != marked_version, 'Deletes change the version'
+
+        assert conversation_list.get_conversation_list_version('nobody') == (0, 0, '')
+
+    print('✅ Conversation list ETag and delta mode verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_projection_and_pagination,
+        test_etag_version_and_delta,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# test_document_list_pushdown.py
+"""
+Functional test for push-down pagination of workspace document lists.
+Version: 0.241.031
+Implemented in: 0.241.031
+
+This test ensures that normalize_document_revision_families flags exactly one
+current revision per family (single-revision families included), and that
+query_current_documents_page counts, sorts and pages current revisions in
+Cosmos with a list projection. Older documents are backfilled once per scope,
+and title and file name sorts stay case-insensitive through stored sort keys.
+"""
+
+import ast
+import copy
+import os
+import re
+import sys
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOCUMENTS_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_documents.py')
+TARGET_FUNCTIONS = {
+    '_safe_int',
+    '_has_persisted_blob_reference',
+    '_normalize_document_enhanced_citations',
+    '_get_document_family_key',
+    '_document_revision_sort_key',
+    '_choose_current_document',
+    'select_current_documents',
+    'sort_documents',
+    '_count_documents',
+    '_get_accessible_documents_filter',
+    '_get_document_sort_value',
+    '_apply_document_list_fields',
+    '_get_revision_scope_key',
+    '_ensure_document_list_fields',
+    'query_current_documents_page',
+    '_set_document_list_fields',
+    'normalize_document_revision_families',
+}
+TARGET_ASSIGNMENTS = {
+    'DOCUMENT_LIST_FIELDS',
+    'DOCUMENT_LIST_SORT_FIELDS',
+    'DOCUMENT_LIST_SORT_KEY_FIELDS',
+    'DOCUMENT_LIST_FIELDS_MISSING_CLAUSE',
+    '_document_list_ready_scopes',
+    'ARCHIVED_REVISION_BLOB_PATH_MODE',
+}
+LIST_FIELDS = ('is_current_revision', 'file_name_sort', 'title_sort')
+
+
+class FakeDocumentsContainer:
+    """Documents container answering the count, full and projected page queries for one user."""
+
+    def __init__(self, documents):
+        self.items = {doc['id']: copy.deepcopy(doc) for doc in documents}
+        self.queries = []
+        self.upserts = 0
+        self.patches = 0
+
+    def _matching(self, query, values):
+        items = [copy.deepcopy(item) for item in self.items.values() if item['user_id'] == values['@user_id']]
+        if 'NOT IS_DEFINED(c.is_current_revision)' in query:
+            items = [item for item in items if any(field not in item for field in LIST_FIELDS)]
+        if 'c.is_current_revision = true' in query:
+            items = [item for item in items if item.get('is_current_revision') is True]
+        return items
+
+    def query_items(self, query, parameters, enable_cross_partition_query=False):
+        self.queries.append(query)
+        values = {parameter['name']: parameter['value'] for parameter in parameters}
+        items = self._matching(query, values)
+        if query.startswith('SELECT VALUE COUNT(1)'):
+            return [len(items)]
+        if query.startswith('SELECT * '):
+            return items
+
+        order_match = re.search(r"ORDER BY c\.(\w+) (ASC|DESC)", query)
+        items.sort(key=lambda item: item.get(order_match.group(1)) or '', reverse=order_match.group(2) == 'DESC')
+        items = items[values['@list_offset']:values['@list_offset'] + values['@list_limit']]
+        fields = re.findall(r"c\.(\w+)", query.split(' FROM c')[0])
+        return [{field: item[field] for field in fields if field in item} for item in items]
+
+    def upsert_item(self, body):
+        self.upserts += 1
+        self.items[body['id']] = copy.deepcopy(body)
+
+    def patch_item(self, item, partition_key, patch_operations):
+        self.patches += 1
+        for operation in patch_operations:
+            self.items[item][operation['path'].lstrip('/')] = operation['value']
+
+
+def _load_document_listing(container):
+    with open(DOCUMENTS_FILE, 'r', encoding='utf-8') as source_file:
+        parsed = ast.parse(source_file.read(), filename=DOCUMENTS_FILE)
+    selected_nodes = [
+        node for node in parsed.body
+        if (isinstance(node, ast.FunctionDef) and node.name in TARGET_FUNCTIONS)
+        or (isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id in TARGET_ASSIGNMENTS for target in node.targets
+        ))
+    ]
+
+    namespace = {
+        'debug_print': lambda *args, **kwargs: None,
+        'set_document_chunk_visibility': lambda document_item, active=True: 0,
+        'bump_document_search_fingerprints': lambda *args, **kwargs: None,
+    }
+    exec(compile(ast.Module(body=selected_nodes, type_ignores=[]), DOCUMENTS_FILE, 'exec'), namespace)
+
+    def query_accessible_documents(user_id, group_id=None, public_workspace_id=None):
+        return [copy.deepcopy(item) for item in container.items.values() if item['user_id'] == user_id]
+
+    namespace['_query_accessible_documents'] = query_accessible_documents
+    namespace['_get_documents_container'] = lambda group_id=None, public_workspace_id=None: container
+    return namespace
+
+
+def _documents():
+    documents = []
+    for index in range(1, 8):
+        documents.append({
+            'id': f'doc-{index}',
+            'user_id': 'user-1',
+            'file_name': f'file-{index}.pdf',
+            'title': f'Title {index}' if index != 4 else 'annual report',
+            'version': 1,
+            '_ts': 100 + index,
+            'blob_path': f'user-1/file-{index}.pdf',
+            'search_visibility_state': 'active',
+            'embedding_tokens': 12345,
+        })
+    # file-1.pdf has a newer revision
+    documents.append(dict(documents[0], id='doc-1-v2', version=2, _ts=200, revision_family_id='doc-1'))
+    documents[0]['revision_family_id'] = 'doc-1'
+    documents.append({'id': 'other-doc', 'user_id': 'user-2', 'file_name': 'other.pdf', '_ts': 300})
+    return documents
+
+
+def test_normalize_flags_every_family():
+    """Verify exactly one is_current_revision document per family, with patches for flag-only changes."""
+    print('🔍 Testing revision flag normalization...')
+
+    container = FakeDocumentsContainer(_documents())
+    namespace = _load_document_listing(container)
+
+    changed = namespace['normalize_document_revision_families'](user_id='user-1')
+    assert changed, 'Archiving the older revision affects search'
+    flags = {doc_id: item.get('is_current_revision') for doc_id, item in container.items.items() if item['user_id'] == 'user-1'}
+    assert flags['doc-1'] is False and flags['doc-1-v2'] is True
+    assert all(flags[f'doc-{index}'] is True for index in range(2, 8))
+    assert container.patches == 6, 'Single-revision families are flagged with a patch'
+
+    upserts, patches = container.upserts, container.patches
+    assert not namespace['normalize_document_revision_families'](user_id='user-1')
+    assert (container.upserts, container.patches) == (upserts, patches), 'Normalized families are not rewritten'
+
+    # A shared older revision is the only family member this scope sees; it must stay non-current
+    container.items['doc-1']['is_current_revision'] = True
+    namespace['normalize_document_revision_families'](user_id='user-3', document_items=[copy.deepcopy(container.items['doc-1'])])
+    assert container.items['doc-1']['is_current_revision'] is False
+
+    print('✅ Revision flag normalization verified')
+
+
+def test_page_pushed_down_to_cosmos():
+    """Verify backfill on first use, then count, sort and page in Cosmos with the list projection."""
+    print('🔍 Testing push-down document paging...')
+
+    container = FakeDocumentsContainer(_documents())
+    namespace = _load_document_listing(container)
+    query_page = namespace['query_current_documents_page']
+    parameters = [{'name': '@user_id', 'value': 'user-1'}]
+
+    docs, total_count = query_page(container, 'c.user_id = @user_id', parameters, page=1, page_size=3,
+                                   revision_scopes=[{'user_id': 'user-1'}])
+    assert total_count == 7, 'Older revisions are not counted'
+    assert [doc['id'] for doc in docs] == ['doc-1-v2', 'doc-7', 'doc-6']
+    assert 'embedding_tokens' not in docs[0] and 'search_visibility_state' not in docs[0], 'List projection only'
+    assert docs[0]['enhanced_citations'] is True
+    assert not any(query.startswith('SELECT * ') for query in container.queries), 'Flags were backfilled, nothing read in full'
+
+    container.queries.clear()
+    docs, total_count = query_page(container, 'c.user_id = @user_id', parameters, page=3, page_size=3,
+                                   sort_by='file_name', sort_order='asc', revision_scopes=[{'user_id': 'user-1'}])
+    assert [doc['id'] for doc in docs] == ['doc-7'] and total_count == 7
+    assert any('ORDER BY c.file_name_sort ASC OFFSET @list_offset LIMIT @list_limit' in query for query in container.queries)
+    assert not any('NOT IS_DEFINED' in query for query in container.queries), 'A ready scope is not checked again'
+
+    docs, _ = query_page(container, 'c.user_id = @user_id', parameters, page=1, page_size=2,
+                         sort_by='title', sort_order='asc', revision_scopes=[{'user_id': 'user-1'}])
+    assert [doc['id'] for doc in docs] == ['doc-4', 'doc-1-v2'], 'Title sort is case-insensitive'
+
+    assert query_page(container, 'c.user_id = @user_id', parameters, page=9, page_size=3)[0] == []
+
+    # When the backfill fails, this page is collapsed in memory and the scope is retried next time
+    legacy_container = FakeDocumentsContainer(_documents())
+    legacy_namespace = _load_document_listing(legacy_container)
+
+    def failing_normalize(**revision_scope):
+        raise RuntimeError('throttled')
+
+    legacy_namespace['normalize_document_revision_families'] = failing_normalize
+    docs, total_count = legacy_namespace['query_current_documents_page'](
+        legacy_container, 'c.user_id = @user_id', parameters, page=1, page_size=2, sort_by='bogus',
+        revision_scopes=[{'user_id': 'user-1'}],
+    )
+    assert total_count == 7 and [doc['id'] for doc in docs] == ['doc-1-v2', 'doc-7']
+    assert sum(query.startswith('SELECT VALUE COUNT(1)') for query in legacy_container.queries) == 1, (
+        'A failed backfill is not re-counted in the same request'
+    )
+    assert not legacy_namespace['_document_list_ready_scopes']
+
+    print('✅ Push-down document paging verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_normalize_flags_every_family,
+        test_page_pushed_down_to_cosmos,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# test_document_progress_reporter.py
+"""
+Functional test for coalesced, throttled document progress updates.
+Version: 0.241.014
+Implemented in: 0.241.014
+
+This test ensures that DocumentProgressReporter merges progress updates in
+memory, writes them at most once per flush interval with an ETag-guarded
+patch against a point-read snapshot, retries once on a precondition failure,
+and sends terminal statuses and metadata fields through update_document
+immediately.
+"""
+
+import ast
+import json
+import os
+import sys
+import threading
+import types
+from datetime import datetime, timezone
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOCUMENTS_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_documents.py')
+TARGET_DEFINITIONS = {
+    'calculate_processing_percentage',
+    '_normalize_document_status',
+    '_resolve_processing_percentage',
+    '_read_scoped_document',
+    'DocumentProgressReporter',
+}
+
+
+class FakeCosmosResourceNotFoundError(Exception):
+    def __init__(self, message=None, status=None):
+        super().__init__(message)
+        self.status_code = status
+
+
+class FakePreconditionFailed(Exception):
+    status_code = 412
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class FakeDocumentsContainer:
+    """Document container that enforces ETags on patch."""
+
+    def __init__(self, document):
+        self.document = dict(document, _etag='1')
+        self.reads = 0
+        self.patches = []
+
+    def read_item(self, item, partition_key):
+        self.reads += 1
+        if item != self.document['id']:
+            raise FakeCosmosResourceNotFoundError(item)
+        return dict(self.document)
+
+    def patch_item(self, item, partition_key, patch_operations, etag=None, match_condition=None):
+        assert match_condition == 'IfNotModified'
+        if etag != self.document['_etag']:
+            raise FakePreconditionFailed('Precondition failed')
+        for operation in patch_operations:
+            field = operation['path'].lstrip('/')
+            if operation['op'] == 'incr':
+                self.document[field] = self.document.get(field, 0) + operation['value']
+            else:
+                self.document[field] = operation['value']
+        self.document['_etag'] = str(int(self.document['_etag']) + 1)
+        self.patches.append(patch_operations)
+        return dict(self.document)
+
+    def external_edit(self, **fields):
+        self.document.update(fields)
+        self.document['_etag'] = str(int(self.document['_etag']) + 1)
+
+
+def _load_reporter(container, clock):
+    with open(DOCUMENTS_FILE, 'r', encoding='utf-8') as source_file:
+        source = source_file.read()
+    parsed = ast.parse(source, filename=DOCUMENTS_FILE)
+    selected_nodes = [
+        node for node in parsed.body
+        if (isinstance(node, (ast.FunctionDef, ast.ClassDef)) and node.name in TARGET_DEFINITIONS)
+        or (isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id.startswith('DOCUMENT_') for target in node.targets
+        ))
+    ]
+
+    full_updates = []
+    namespace = {
+        'json': json,
+        'threading': threading,
+        'datetime': datetime,
+        'timezone': timezone,
+        'time': clock,
+        'MatchConditions': types.SimpleNamespace(IfNotModified='IfNotModified'),
+        'CosmosResourceNotFoundError': FakeCosmosResourceNotFoundError,
+        'cosmos_user_documents_container': container,
+        'cosmos_group_documents_container': container,
+        'cosmos_public_documents_container': container,
+        'get_settings': lambda: {},
+        'update_document': lambda **kwargs: full_updates.append(kwargs),
+        'add_file_task_to_file_processing_log': lambda **kwargs: None,
+    }
+    exec(compile(ast.Module(body=selected_nodes, type_ignores=[]), DOCUMENTS_FILE, 'exec'), namespace)
+    return namespace['DocumentProgressReporter'], full_updates
+
+
+def _document(**fields):
+    document = {
+        'id': 'doc-1',
+        'user_id': 'user-1',
+        'status': 'Queued',
+        'percentage_complete': 0,
+        'number_of_pages': 0,
+        'num_chunks': 0,
+    }
+    document.update(fields)
+    return document
+
+
+def test_progress_updates_are_coalesced():
+    """Verify many progress updates within the interval produce one patch."""
+    print('🔍 Testing progress coalescing...')
+
+    clock = FakeClock()
+    container = FakeDocumentsContainer(_document())
+    reporter_class, full_updates = _load_reporter(container, clock)
+    reporter = reporter_class('doc-1', 'user-1', flush_interval_seconds=2)
+
+    reporter.update(status='Processing file report.txt')
+    for chunk_number in range(1, 201):
+        clock.now += 0.005
+        reporter.update(current_file_chunk=chunk_number, number_of_pages=200, status=f'Saving chunks {chunk_number}/200...')
+
+    assert reporter.updates_received == 201
+    assert len(container.patches) == 1 and container.reads == 1
+    assert container.document['status'] == 'Processing file report.txt'
+
+    clock.now += 2
+    reporter.update(current_file_chunk=200, number_of_pages=200, status='Saving chunks 200/200...')
+    assert len(container.patches) == 2 and container.reads == 1
+    assert container.document['current_file_chunk'] == 200
+    assert container.document['percentage_complete'] == 85, container.document
+    assert not full_updates
+
+    print('✅ Progress coalescing verified')
+
+
+def test_terminal_and_metadata_updates_flush_immediately():
+    """Verify terminal statuses and metadata fields go through update_document with pending progress."""
+    print('🔍 Testing immediate flushes...')
+
+    clock = FakeClock()
+    container = FakeDocumentsContainer(_document(group_id='group-1'))
+    reporter_class, full_updates = _load_reporter(container, clock)
+    reporter = reporter_class('doc-1', 'user-1', group_id='group-1', flush_interval_seconds=60)
+
+    reporter.update(status='Saving chunks 1-64/100...', current_file_chunk=64)
+    reporter.update(status='Saving chunks 65-100/100...', current_file_chunk=100, num_chunks_increment=36)
+    reporter.update(title='Quarterly Report')
+
+    assert full_updates[-1]['title'] == 'Quarterly Report'
+    assert full_updates[-1]['current_file_chunk'] == 100
+    assert full_updates[-1]['num_chunks_increment'] == 36
+    assert full_updates[-1]['group_id'] == 'group-1'
+
+    reporter.update(status='Processing complete', percentage_complete=100, current_file_chunk=None)
+    assert full_updates[-1]['status'] == 'Processing complete'
+    assert 'current_file_chunk' not in full_updates[-1]
+    assert reporter.writes == 3
+
+    print('✅ Immediate flushes verified')
+
+
+def test_precondition_failure_rereads_and_retries():
+    """Verify an ETag mismatch re-reads the document once and preserves the other edit."""
+    print('🔍 Testing ETag retry...')
+
+    clock = FakeClock()
+    container = FakeDocumentsContainer(_document())
+    reporter_class, _ = _load_reporter(container, clock)
+    reporter = reporter_class('doc-1', 'user-1', flush_interval_seconds=1)
+
+    reporter.update(status='Saving chunks 1/10...', number_of_pages=10, current_file_chunk=1, num_chunks_increment=1)
+    container.external_edit(tags=['finance'])
+
+    clock.now += 5
+    reporter.update(status='Saving chunks 2/10...', current_file_chunk=2, num_chunks_increment=1)
+
+    assert container.reads == 2
+    assert container.document['num_chunks'] == 2
+    assert container.document['tags'] == ['finance']
+    assert container.document['current_file_chunk'] == 2
+
+    print('✅ ETag retry verified')
+
+
+def test_flush_writes_remaining_progress():
+    """Verify flush writes the progress still pending at the end of processing."""
+    print('🔍 Testing final flush...')
+
+    clock = FakeClock()
+    container = FakeDocumentsContainer(_document())
+    reporter_class, _ = _load_reporter(container, clock)
+    reporter = reporter_class('doc-1', 'user-1', flush_interval_seconds=30)
+
+    reporter.update(status='Sending to analysis')
+    reporter.update(status='Saving chunks 1/4...', number_of_pages=4, current_file_chunk=1)
+    assert container.document['status'] == 'Sending to analysis'
+
+    reporter.flush()
+    assert container.document['status'] == 'Saving chunks 1/4...'
+    reporter.flush()
+    assert len(container.patches) == 2
+
+    print('✅ Final flush verified')
+
+
+def test_scope_mismatch_is_not_found():
+    """Verify the point read only returns documents in the caller's scope."""
+    print('🔍 Testing scoped point reads...')
+
+    clock = FakeClock()
+    container = FakeDocumentsContainer(_document(user_id='someone-else'))
+    reporter_class, _ = _load_reporter(container, clock)
+    reporter = reporter_class('doc-1', 'user-1', flush_interval_seconds=0)
+
+    try:
+        reporter.update(status='Saving chunks 1/1...')
+        raise AssertionError('Expected the document to be out of scope')
+    except FakeCosmosResourceNotFoundError:
+        pass
+
+    print('✅ Scoped point reads verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_progress_updates_are_coalesced,
+        test_terminal_and_metadata_updates_flush_immediately,
+        test_precondition_failure_rereads_and_retries,
+        test_flush_writes_remaining_progress,
+        test_scope_mismatch_is_not_found,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -1,7 +1,7 @@
 # test_document_revision_current_version_fix.py
 """
 Functional test for document revision current-version behavior.
-Version: 0.240.022
+Version: 0.241.031
 Implemented in: 0.240.022
 
 This test ensures duplicate-name uploads preserve revision metadata, only the
@@ -62,6 +62,8 @@ def test_revision_metadata_helpers_exist():
         '"search_visibility_state": "active"',
         "existing_document['search_visibility_state'] = 'archived'",
         "promoted_document['is_current_version'] = True",
+        "promoted_document['is_current_revision'] = True",
+        'def query_current_documents_page(',
         'blob_container',
         'archived_blob_path',
         'blob_path_mode',
@@ -113,11 +115,8 @@ def test_workspace_routes_only_return_current_revisions_and_accept_delete_modes(
 
     for route_path in route_expectations:
         route_content = read_file_text(route_path)
-        assert 'select_current_documents' in route_content, (
-            f'{os.path.basename(route_path)} should collapse results to current revisions.'
-        )
-        assert 'sort_documents' in route_content, (
-            f'{os.path.basename(route_path)} should sort collapsed current revisions.'
+        assert 'query_current_documents_page(' in route_content, (
+            f'{os.path.basename(route_path)} should page through current revisions only.'
         )
         assert "delete_mode = request.args.get('delete_mode', 'all_versions')" in route_content, (
             f'{os.path.basename(route_path)} should accept delete_mode.'
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# test_document_streaming_ingestion.py
+"""
+Functional test for streaming, batched ingestion of text-based documents.
+Version: 0.241.013
+Implemented in: 0.241.013
+
+This test ensures that the txt/xml/yaml/log/doc/html/md/json processors feed
+chunks through ingest_document_chunks, which buffers them into
+save_chunks_batch calls, reads document metadata once per document, keeps
+page numbering stable and accumulates embedding token usage.
+"""
+
+import ast
+import os
+import re
+import sys
+import types
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOCUMENTS_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_documents.py')
+TARGET_DEFINITIONS = {
+    'iter_word_chunks',
+    'iter_line_chunks',
+    'iter_numbered_chunks',
+    'ingest_document_chunks',
+}
+STREAMED_PROCESSORS = (
+    'process_txt', 'process_xml', 'process_yaml', 'process_log',
+    'process_doc', 'process_html', 'process_md', 'process_json',
+)
+
+
+def _read_source():
+    with open(DOCUMENTS_FILE, 'r', encoding='utf-8') as source_file:
+        return source_file.read()
+
+
+def _load_ingestion(buffer_size=3):
+    parsed = ast.parse(_read_source(), filename=DOCUMENTS_FILE)
+    selected_nodes = [
+        node for node in parsed.body
+        if isinstance(node, ast.FunctionDef) and node.name in TARGET_DEFINITIONS
+    ]
+
+    recorder = types.SimpleNamespace(batches=[], metadata_reads=0, updates=[], log_lines=[])
+
+    def fake_get_document_metadata(**kwargs):
+        recorder.metadata_reads += 1
+        return {'id': kwargs['document_id'], 'title': 'Report', 'authors': ['A. Writer']}
+
+    def fake_save_chunks_batch(chunks_data, user_id, document_id, group_id=None, public_workspace_id=None, metadata=None):
+        assert metadata and metadata['title'] == 'Report'
+        recorder.batches.append([dict(chunk) for chunk in chunks_data])
+        return {'total_tokens': 5 * len(chunks_data), 'model_deployment_name': 'text-embedding-test'}
+
+    namespace = {
+        'get_settings': lambda: {'document_ingestion_buffer_size': buffer_size},
+        'get_document_metadata': fake_get_document_metadata,
+        'save_chunks_batch': fake_save_chunks_batch,
+        'add_file_task_to_file_processing_log': lambda **kwargs: recorder.log_lines.append(kwargs['content']),
+        'debug_print': lambda *args, **kwargs: None,
+    }
+    exec(compile(ast.Module(body=selected_nodes, type_ignores=[]), DOCUMENTS_FILE, 'exec'), namespace)
+    recorder.update_callback = lambda **kwargs: recorder.updates.append(kwargs)
+    return types.SimpleNamespace(**namespace), recorder
+
+
+def test_chunks_are_flushed_in_buffered_batches():
+    """Verify chunks are saved in buffer-sized batches with one metadata read."""
+    print('🔍 Testing buffered flushing...')
+
+    ingestion, recorder = _load_ingestion(buffer_size=3)
+    text = ' '.join(f'word{index}' for index in range(35))
+    chunks = ingestion.iter_word_chunks(text, 5)
+
+    saved, tokens, model = ingestion.ingest_document_chunks(
+        ingestion.iter_numbered_chunks(chunks), 'doc-1', 'user-1', 'notes.txt',
+        recorder.update_callback, estimated_chunks=7
+    )
+
+    assert saved == 7 and tokens == 35 and model == 'text-embedding-test'
+    assert [len(batch) for batch in recorder.batches] == [3, 3, 1], recorder.batches
+    assert recorder.metadata_reads == 1
+    assert len(recorder.log_lines) == 3
+    assert recorder.updates[0]['status'] == 'Saving chunks 1-3/7...'
+    assert not any('number_of_pages' in update for update in recorder.updates)
+
+    print('✅ Buffered flushing verified')
+
+
+def test_empty_chunks_are_skipped_and_numbered():
+    """Verify positional and sequential page numbering around skipped chunks."""
+    print('🔍 Testing page numbering...')
+
+    ingestion, _ = _load_ingestion()
+    chunks = ['alpha', '   ', '{}', 'beta', '']
+
+    positional = list(ingestion.iter_numbered_chunks(chunks))
+    assert positional == [(1, 'alpha'), (3, '{}'), (4, 'beta')], positional
+
+    sequential = list(ingestion.iter_numbered_chunks(
+        chunks, sequential_page_numbers=True, is_trivial_chunk=lambda chunk: chunk == '{}'
+    ))
+    assert sequential == [(1, 'alpha'), (2, 'beta')], sequential
+
+    print('✅ Page numbering verified')
+
+
+def test_estimated_page_count_is_corrected():
+    """Verify number_of_pages is updated when empty chunks were skipped."""
+    print('🔍 Testing page count correction...')
+
+    ingestion, recorder = _load_ingestion(buffer_size=10)
+    saved, _, _ = ingestion.ingest_document_chunks(
+        ingestion.iter_numbered_chunks(['one', '', 'three']), 'doc-2', 'user-1', 'data.log',
+        recorder.update_callback, estimated_chunks=3
+    )
+
+    assert saved == 2
+    assert recorder.updates[-1] == {'number_of_pages': 2}, recorder.updates
+    assert [chunk['page_number'] for chunk in recorder.batches[0]] == [1, 3]
+
+    print('✅ Page count correction verified')
+
+
+def test_line_chunks_keep_whole_lines():
+    """Verify line-based chunking never splits a line across chunks."""
+    print('🔍 Testing line chunking...')
+
+    ingestion, _ = _load_ingestion()
+    lines = ['a b c\n', 'd e\n', 'f g h i\n', 'j\n']
+    chunks = list(ingestion.iter_line_chunks(lines, 5))
+
+    assert chunks == ['a b c\nd e\n', 'f g h i\nj\n'], chunks
+    assert ''.join(chunks) == ''.join(lines)
+
+    print('✅ Line chunking verified')
+
+
+def test_processors_use_streaming_ingestion():
+    """Verify each text processor is defined once and no longer saves chunk by chunk."""
+    print('🔍 Testing processor wiring...')
+
+    source = _read_source()
+    parsed = ast.parse(source, filename=DOCUMENTS_FILE)
+    definitions = [node.name for node in parsed.body if isinstance(node, ast.FunctionDef)]
+
+    for processor_name in STREAMED_PROCESSORS:
+        assert definitions.count(processor_name) == 1, f'{processor_name} defined {definitions.count(processor_name)} times'
+        processor_node = next(node for node in parsed.body if isinstance(node, ast.FunctionDef) and node.name == processor_name)
+        processor_source = ast.get_source_segment(source, processor_node)
+        assert not re.search(r'\bsave_chunks\(', processor_source), f'{processor_name} still calls save_chunks()'
+
+    print('✅ Processor wiring verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_chunks_are_flushed_in_buffered_batches,
+        test_empty_chunks_are_skipped_and_numbered,
+        test_estimated_page_count_is_corrected,
+        test_line_chunks_keep_whole_lines,
+        test_processors_use_streaming_ingestion,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# test_embedding_batch_concurrency.py
+"""
+Functional test for concurrent, token-packed embedding batches.
+Version: 0.241.012
+Implemented in: 0.241.012
+
+This test ensures that generate_embeddings_batch packs inputs by token budget,
+keeps several batches in flight at once while returning results in input
+order, pauses every in-flight batch when one receives a 429, and apportions
+the billed batch token usage so per-item usage adds up exactly.
+"""
+
+import ast
+import email.utils
+import hashlib
+import math
+import os
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTENT_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_content.py')
+TARGET_DEFINITIONS = {
+    '_parse_retry_after_seconds',
+    '_get_rate_limit_wait_time',
+    'EmbeddingRateLimiter',
+    '_get_cached_embedding_token_usage',
+    '_get_embedding_token_encoder',
+    '_estimate_embedding_tokens',
+    '_pack_embedding_batches',
+    '_apportion_token_usage',
+    '_embed_batch',
+    'get_embedding_batch_settings',
+    'generate_embeddings_batch',
+}
+
+
+class FakeRateLimitError(Exception):
+    def __init__(self, headers=None):
+        super().__init__('Rate limit exceeded')
+        self.response = types.SimpleNamespace(headers=headers or {})
+
+
+class ConcurrentEmbeddingClient:
+    """Embeddings endpoint that records batch sizes and peak concurrency."""
+
+    def __init__(self, delay=0.05, scripted_errors=None):
+        self.delay = delay
+        self.scripted_errors = list(scripted_errors or [])
+        self.batches = []
+        self.active = 0
+        self.peak_active = 0
+        self.lock = threading.Lock()
+        self.embeddings = self
+
+    def create(self, model, input):
+        with self.lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            self.batches.append(list(input))
+            error = self.scripted_errors.pop(0) if self.scripted_errors else None
+        try:
+            time.sleep(self.delay)
+            if error:
+                raise error
+            # Return items out of order with their index, as the service may
+            data = [
+                types.SimpleNamespace(index=position, embedding=[float(len(text))])
+                for position, text in enumerate(input)
+            ]
+            billed_tokens = sum(len(text) for text in input)
+            return types.SimpleNamespace(
+                data=list(reversed(data)),
+                usage=types.SimpleNamespace(prompt_tokens=billed_tokens, total_tokens=billed_tokens),
+            )
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _load_functions_content(settings, client, sleep_calls=None):
+    source = open(CONTENT_FILE, 'r', encoding='utf-8').read()
+    parsed = ast.parse(source, filename=CONTENT_FILE)
+    selected_nodes = [
+        node for node in parsed.body
+        if (isinstance(node, (ast.FunctionDef, ast.ClassDef)) and node.name in TARGET_DEFINITIONS)
+        or (isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id.startswith(('_embedding_', 'EMBEDDING_')) for target in node.targets
+        ))
+    ]
+
+    def recording_sleep(delay):
+        if sleep_calls is not None:
+            sleep_calls.append(delay)
+        time.sleep(min(delay, 0.05))
+
+    namespace = {
+        'email': email,
+        'hashlib': hashlib,
+        'math': math,
+        'threading': threading,
+        'ThreadPoolExecutor': ThreadPoolExecutor,
+        'FIRST_COMPLETED': FIRST_COMPLETED,
+        'wait': wait,
+        'time': types.SimpleNamespace(time=time.time, sleep=recording_sleep),
+        'random': types.SimpleNamespace(uniform=lambda low, high: low),
+        'RateLimitError': FakeRateLimitError,
+        'get_settings': lambda: settings,
+        'get_cached_embeddings': lambda deployment, texts: [None] * len(texts),
+        'cache_embeddings': lambda deployment, items: 0,
+        'debug_print': lambda *args, **kwargs: None,
+    }
+    exec(compile(ast.Module(body=selected_nodes, type_ignores=[]), CONTENT_FILE, 'exec'), namespace)
+    limiter = namespace['EmbeddingRateLimiter'](0, 1)
+    namespace['get_embedding_client'] = lambda settings=None: (client, 'text-embedding-test', limiter)
+    namespace['_get_embedding_token_encoder'] = lambda: None
+    return types.SimpleNamespace(**namespace), limiter
+
+
+def _settings(**overrides):
+    settings = {
+        'embedding_batch_max_concurrency': 4,
+        'embedding_batch_token_budget': 32000,
+        'embedding_batch_max_items': 16,
+    }
+    settings.update(overrides)
+    return settings
+
+
+def test_batches_are_packed_by_token_budget():
+    """Verify long texts get smaller batches and short texts fill up to the item cap."""
+    print('🔍 Testing token budget packing...')
+
+    client = ConcurrentEmbeddingClient(delay=0)
+    content, _ = _load_functions_content(_settings(embedding_batch_token_budget=100, embedding_batch_max_items=3), client)
+
+    texts = ['x' * 200, 'y' * 200, 'a', 'b', 'c', 'd', 'z' * 1000]
+    results = content.generate_embeddings_batch(texts)
+
+    batch_sizes = sorted(len(batch) for batch in client.batches)
+    assert batch_sizes == [1, 1, 2, 3], client.batches
+    assert [embedding for embedding, _ in results] == [[float(len(text))] for text in texts]
+
+    print('✅ Token budget packing verified')
+
+
+def test_batches_run_concurrently_in_input_order():
+    """Verify several batches are in flight and results line up with the inputs."""
+    print('🔍 Testing concurrent batches...')
+
+    client = ConcurrentEmbeddingClient(delay=0.1)
+    content, _ = _load_functions_content(_settings(embedding_batch_max_concurrency=3), client)
+
+    texts = [f'chunk-{index:03d}' + 'x' * index for index in range(40)]
+    started = time.time()
+    results = content.generate_embeddings_batch(texts, batch_size=4)
+    elapsed = time.time() - started
+
+    assert len(client.batches) == 10
+    assert client.peak_active == 3, client.peak_active
+    assert elapsed < 0.8, f'Expected overlapping batches, took {elapsed:.2f}s'
+    assert [embedding for embedding, _ in results] == [[float(len(text))] for text in texts]
+
+    print('✅ Concurrent batches verified')
+
+
+def test_token_usage_adds_up_exactly():
+    """Verify per-item token usage is proportional and sums to the billed total."""
+    print('🔍 Testing exact token apportioning...')
+
+    client = ConcurrentEmbeddingClient(delay=0)
+    content, _ = _load_functions_content(_settings(), client)
+
+    texts = ['a' * 40, 'b' * 4, 'c' * 13]
+    results = content.generate_embeddings_batch(texts)
+    prompt_tokens = [token_usage['prompt_tokens'] for _, token_usage in results]
+
+    assert sum(prompt_tokens) == 57, prompt_tokens
+    assert prompt_tokens[0] > prompt_tokens[2] > prompt_tokens[1], prompt_tokens
+    assert content._apportion_token_usage(10, [1, 1, 1]) == [4, 3, 3]
+
+    print('✅ Exact token apportioning verified')
+
+
+def test_rate_limit_pauses_every_batch():
+    """Verify a 429 on one batch pauses the shared limiter for all in-flight batches."""
+    print('🔍 Testing global 429 backoff...')
+
+    sleep_calls = []
+    client = ConcurrentEmbeddingClient(delay=0.01, scripted_errors=[FakeRateLimitError({'retry-after-ms': '300'})])
+    content, limiter = _load_functions_content(_settings(embedding_batch_max_concurrency=2), client, sleep_calls)
+
+    original_pause = limiter.pause
+    pauses = []
+
+    def recording_pause(wait_time):
+        pauses.append(wait_time)
+        original_pause(wait_time)
+
+    limiter.pause = recording_pause
+    results = content.generate_embeddings_batch([f'text-{index}' for index in range(6)], batch_size=1)
+
+    assert pauses == [0.3], pauses
+    assert 0.3 in sleep_calls, sleep_calls
+    assert len(client.batches) == 7, 'The rate limited batch should be retried once'
+    assert all(embedding for embedding, _ in results)
+
+    print('✅ Global 429 backoff verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_batches_are_packed_by_token_budget,
+        test_batches_run_concurrently_in_input_order,
+        test_token_usage_adds_up_exactly,
+        test_rate_limit_pauses_every_batch,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# test_embedding_cache.py
+"""
+Functional test for the content-addressed embedding cache.
+Version: 0.241.011
+Implemented in: 0.241.011
+
+This test ensures that embeddings are cached by (deployment, SHA-256 of the
+NFC-normalized text) in a worker LRU tier and an optional Redis or Cosmos DB
+tier, that the Cosmos DB container is only created when that tier is used, that
+generate_embedding and generate_embeddings_batch only send cache misses to the
+embedding deployment, and that hit rates are reported.
+"""
+
+import ast
+import email.utils
+import hashlib
+import math
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import importlib
+import os
+import sys
+import threading
+import types
+from contextlib import contextmanager
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTENT_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_content.py')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'application', 'single_app'))
+CONTENT_TARGET_DEFINITIONS = {
+    '_parse_retry_after_seconds',
+    '_get_rate_limit_wait_time',
+    '_get_cached_embedding_token_usage',
+    'generate_embedding',
+    'generate_embeddings_batch',
+    '_get_embedding_token_encoder',
+    '_estimate_embedding_tokens',
+    '_pack_embedding_batches',
+    '_apportion_token_usage',
+    '_embed_batch',
+    'get_embedding_batch_settings',
+}
+
+
+class FakeCosmosResourceNotFoundError(Exception):
+    pass
+
+
+class FakeEmbeddingCacheContainer:
+    def __init__(self):
+        self.items = {}
+
+    def read_item(self, item, partition_key):
+        if item not in self.items:
+            raise FakeCosmosResourceNotFoundError(item)
+        return dict(self.items[item])
+
+    def upsert_item(self, body):
+        self.items[body['id']] = dict(body)
+        return body
+
+
+class FakeCosmosDatabase:
+    def __init__(self, container):
+        self.container = container
+        self.created = []
+
+    def create_container_if_not_exists(self, id, partition_key, default_ttl=None):
+        self.created.append(id)
+        return self.container
+
+
+class FakeRedisPipeline:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value, ex))
+
+    def execute(self):
+        for key, value, ex in self.commands:
+            self.redis_client.values[key] = value
+            self.redis_client.expirations[key] = ex
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.expirations = {}
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakeRedisPipeline(self)
+
+
+class FakeEmbeddingClient:
+    def __init__(self):
+        self.inputs = []
+        self.embeddings = self
+
+    def create(self, model, input):
+        self.inputs.append(list(input) if isinstance(input, list) else input)
+        texts = input if isinstance(input, list) else [input]
+        return types.SimpleNamespace(
+            data=[types.SimpleNamespace(embedding=[float(len(text)), 0.5]) for text in texts],
+            usage=types.SimpleNamespace(prompt_tokens=10 * len(texts), total_tokens=10 * len(texts)),
+        )
+
+
+class FakeRateLimiter:
+    def acquire(self):
+        return 0.0
+
+    def pause(self, wait_time):
+        pass
+
+
+def _restore_modules(original_modules):
+    for module_name, original_module in original_modules.items():
+        if original_module is None:
+            sys.modules.pop(module_name, None)
+        else:
+            sys.modules[module_name] = original_module
+
+
+@contextmanager
+def _load_embedding_cache(settings, redis_client=None):
+    container = FakeEmbeddingCacheContainer()
+
+    database = FakeCosmosDatabase(container)
+    config_stub = types.ModuleType('config')
+    config_stub.cosmos_database = database
+    config_stub.cosmos_embedding_cache_container_name = 'embedding_cache'
+
+    exceptions_stub = types.ModuleType('azure.cosmos.exceptions')
+    exceptions_stub.CosmosResourceNotFoundError = FakeCosmosResourceNotFoundError
+    azure_stub = types.ModuleType('azure')
+    cosmos_stub = types.ModuleType('azure.cosmos')
+    cosmos_stub.exceptions = exceptions_stub
+    cosmos_stub.PartitionKey = lambda path: path
+    azure_stub.cosmos = cosmos_stub
+
+    app_cache_stub = types.ModuleType('app_settings_cache')
+    app_cache_stub.get_app_redis_client = lambda: redis_client
+
+    settings_stub = types.ModuleType('functions_settings')
+    settings_stub.get_settings = lambda: settings
+
+    module_names = [
+        'config', 'azure', 'azure.cosmos', 'azure.cosmos.exceptions',
+        'app_settings_cache', 'functions_settings', 'utils_embedding_cache',
+    ]
+    original_modules = {name: sys.modules.get(name) for name in module_names}
+    sys.modules.update({
+        'config': config_stub,
+        'azure': azure_stub,
+        'azure.cosmos': cosmos_stub,
+        'azure.cosmos.exceptions': exceptions_stub,
+        'app_settings_cache': app_cache_stub,
+        'functions_settings': settings_stub,
+    })
+    sys.modules.pop('utils_embedding_cache', None)
+    try:
+        # Stubs stay registered while the test runs because settings are imported lazily
+        yield importlib.import_module('utils_embedding_cache'), container
+    finally:
+        _restore_modules(original_modules)
+
+
+def _load_generate_functions(embedding_cache, client):
+    source = open(CONTENT_FILE, 'r', encoding='utf-8').read()
+    parsed = ast.parse(source, filename=CONTENT_FILE)
+    selected_nodes = [
+        node for node in parsed.body
+        if (isinstance(node, ast.FunctionDef) and node.name in CONTENT_TARGET_DEFINITIONS)
+        or (isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id.startswith(('_embedding_', 'EMBEDDING_')) for target in node.targets
+        ))
+    ]
+    namespace = {
+        'email': email,
+        'math': math,
+        'threading': threading,
+        'ThreadPoolExecutor': ThreadPoolExecutor,
+        'FIRST_COMPLETED': FIRST_COMPLETED,
+        'wait': wait,
+        'time': types.SimpleNamespace(time=lambda: 0.0, sleep=lambda delay: None),
+        'random': types.SimpleNamespace(uniform=lambda low, high: low),
+        'RateLimitError': RuntimeError,
+        'get_settings': lambda: {},
+        'get_embedding_client': lambda settings=None: (client, 'text-embedding-test', FakeRateLimiter()),
+        'get_cached_embeddings': embedding_cache.get_cached_embeddings,
+        'cache_embeddings': embedding_cache.cache_embeddings,
+        'debug_print': lambda *args, **kwargs: None,
+    }
+    exec(compile(ast.Module(body=selected_nodes, type_ignores=[]), CONTENT_FILE, 'exec'), namespace)
+    return types.SimpleNamespace(**namespace)
+
+
+def _base_settings(**overrides):
+    settings = {
+        'enable_embedding_cache': True,
+        'embedding_cache_l1_max_entries': 10,
+        'embedding_cache_persistent_tier': 'none',
+        'embedding_cache_ttl_seconds': 3600,
+    }
+    settings.update(overrides)
+    return settings
+
+
+def test_cache_key_is_content_addressed():
+    """Verify keys depend on deployment and NFC-normalized text only."""
+    print('🔍 Testing embedding cache keys...')
+
+    with _load_embedding_cache(_base_settings()) as (embedding_cache, _):
+        key = embedding_cache.get_embedding_cache_key('ada', 'Hello world')
+        expected_hash = hashlib.sha256('Hello world'.encode('utf-8')).hexdigest()
+        assert key == f'ada:{expected_hash}'
+        assert embedding_cache.get_embedding_cache_key('ada', '  Hello world\n') != key, 'Whitespace changes the embedding'
+        assert embedding_cache.get_embedding_cache_key('ada', 'Cafe\u0301') == embedding_cache.get_embedding_cache_key('ada', 'Caf\u00e9')
+        assert embedding_cache.get_embedding_cache_key('ada', 'hello world') != key
+        assert embedding_cache.get_embedding_cache_key('large', 'Hello world') != key
+
+    print('✅ Embedding cache keys verified')
+
+
+def test_batch_skips_cached_items_and_reports_hit_rate():
+    """Verify a batch only sends misses and keeps results aligned with inputs."""
+    print('🔍 Testing batch cache skipping...')
+
+    with _load_embedding_cache(_base_settings()) as (embedding_cache, _):
+        client = FakeEmbeddingClient()
+        content = _load_generate_functions(embedding_cache, client)
+
+        first = content.generate_embeddings_batch(['alpha', 'beta'])
+        assert client.inputs == [['alpha', 'beta']]
+        assert first[0][1]['prompt_tokens'] + first[1][1]['prompt_tokens'] == 20
+
+        second = content.generate_embeddings_batch(['beta', 'gamma', 'alpha'])
+        assert client.inputs[-1] == ['gamma'], client.inputs
+        assert [result[0] for result in second] == [[4.0, 0.5], [5.0, 0.5], [5.0, 0.5]]
+        assert second[0][1]['cached'] is True and second[0][1]['total_tokens'] == 0
+        assert second[1][1]['prompt_tokens'] == 10
+
+        embedding, token_usage = content.generate_embedding('alpha')
+        assert embedding == [5.0, 0.5] and token_usage['cached'] is True
+        assert len(client.inputs) == 2
+
+        stats = embedding_cache.get_embedding_cache_stats()
+        assert stats['l1_hits'] == 3 and stats['misses'] == 3, stats
+        assert stats['hit_rate'] == 0.5, stats
+
+    print('✅ Batch cache skipping verified')
+
+
+def test_l1_is_size_bounded():
+    """Verify the least recently used vectors are evicted over the limit."""
+    print('🔍 Testing embedding L1 bound...')
+
+    with _load_embedding_cache(_base_settings(embedding_cache_l1_max_entries=2)) as (embedding_cache, _):
+        embedding_cache.cache_embeddings('ada', [('a', [1.0]), ('b', [2.0]), ('c', [3.0])])
+        stats = embedding_cache.get_embedding_cache_stats()
+        assert stats['l1_entries'] == 2 and stats['evictions'] == 1
+        assert embedding_cache.get_cached_embeddings('ada', ['a', 'c']) == [None, [3.0]]
+
+    print('✅ Embedding L1 bound verified')
+
+
+def test_persistent_tiers_share_vectors_across_workers():
+    """Verify Redis and Cosmos DB tiers serve vectors after the worker L1 is cleared."""
+    print('🔍 Testing persistent embedding tiers...')
+
+    vector = [0.1234567890123, -2.5, 1e-9]
+
+    redis_client = FakeRedis()
+    with _load_embedding_cache(_base_settings(embedding_cache_persistent_tier='redis'), redis_client) as (embedding_cache, _):
+        embedding_cache.cache_embeddings('ada', [('shared text', vector)])
+        assert all(ex == 3600 for ex in redis_client.expirations.values())
+        embedding_cache.clear_embedding_cache()
+        assert embedding_cache.get_cached_embeddings('ada', ['shared text']) == [vector]
+        assert embedding_cache.get_embedding_cache_stats()['persistent_hits'] == 1
+
+    with _load_embedding_cache(_base_settings(embedding_cache_persistent_tier='cosmos')) as (embedding_cache, container):
+        database = sys.modules['config'].cosmos_database
+        assert database.created == [], 'The container is created on first use'
+        embedding_cache.cache_embeddings('ada', [('shared text', vector)])
+        stored = next(iter(container.items.values()))
+        assert stored['ttl'] == 3600 and stored['deployment'] == 'ada'
+        embedding_cache.clear_embedding_cache()
+        assert embedding_cache.get_cached_embeddings('ada', ['shared text']) == [vector]
+        assert database.created == ['embedding_cache']
+
+    with _load_embedding_cache(_base_settings(embedding_cache_persistent_tier='redis'), FakeRedis()) as (embedding_cache, _):
+        embedding_cache.cache_embeddings('ada', [('shared text', vector)])
+        embedding_cache.get_cached_embeddings('ada', ['other text'])
+        assert sys.modules['config'].cosmos_database.created == [], 'Other tiers never create the container'
+
+    print('✅ Persistent embedding tiers verified')
+
+
+def test_disabled_cache_never_hits():
+    """Verify disabling the cache sends every text to the deployment."""
+    print('🔍 Testing disabled embedding cache...')
+
+    with _load_embedding_cache(_base_settings(enable_embedding_cache=False)) as (embedding_cache, _):
+        assert embedding_cache.cache_embeddings('ada', [('a', [1.0])]) == 0
+        assert embedding_cache.get_cached_embeddings('ada', ['a']) == [None]
+
+    print('✅ Disabled embedding cache verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_cache_key_is_content_addressed,
+        test_batch_skips_cached_items_and_reports_hit_rate,
+        test_l1_is_size_bounded,
+        test_persistent_tiers_share_vectors_across_workers,
+        test_disabled_cache_never_hits,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# test_embedding_client_pool.py
+"""
+Functional test for pooled embedding clients and the embedding rate limiter.
+Version: 0.241.010
+Implemented in: 0.241.010
+
+This test ensures that generate_embedding and generate_embeddings_batch reuse
+one AzureOpenAI client per endpoint, auth type and deployment, create the
+managed identity credential once per process, no longer sleep before every
+request, and pause the shared token bucket when a 429 arrives.
+"""
+
+import ast
+import email.utils
+import hashlib
+import math
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import os
+import sys
+import threading
+import types
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTENT_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_content.py')
+TARGET_DEFINITIONS = {
+    '_parse_retry_after_seconds',
+    '_get_rate_limit_wait_time',
+    'EmbeddingRateLimiter',
+    '_get_embedding_token_provider',
+    '_get_embedding_client_config',
+    'get_embedding_client',
+    'clear_embedding_client_registry',
+    '_get_cached_embedding_token_usage',
+    'generate_embedding',
+    'generate_embeddings_batch',
+    '_get_embedding_token_encoder',
+    '_estimate_embedding_tokens',
+    '_pack_embedding_batches',
+    '_apportion_token_usage',
+    '_embed_batch',
+    'get_embedding_batch_settings',
+}
+
+
+class FakeRateLimitError(Exception):
+    def __init__(self, headers=None):
+        super().__init__('Rate limit exceeded')
+        self.response = types.SimpleNamespace(headers=headers or {})
+
+
+class FakeEmbeddingResponse:
+    def __init__(self, count):
+        self.data = [types.SimpleNamespace(embedding=[float(index)]) for index in range(count)]
+        self.usage = types.SimpleNamespace(prompt_tokens=4 * count, total_tokens=4 * count)
+
+
+class FakeEmbeddingsEndpoint:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def create(self, model, input):
+        if FakeAzureOpenAI.scripted_errors:
+            raise FakeAzureOpenAI.scripted_errors.pop(0)
+        count = len(input) if isinstance(input, list) else 1
+        return FakeEmbeddingResponse(count)
+
+
+class FakeAzureOpenAI:
+    instances = []
+    scripted_errors = []
+
+    def __init__(self, *args, **kwargs):
+        self.kwargs = kwargs
+        self.embeddings = FakeEmbeddingsEndpoint(self)
+        type(self).instances.append(self)
+
+
+class FakeCredential:
+    created = 0
+
+    def __init__(self):
+        type(self).created += 1
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+def _load_functions_content(settings, clock):
+    FakeAzureOpenAI.instances = []
+    FakeAzureOpenAI.scripted_errors = []
+    FakeCredential.created = 0
+
+    source = open(CONTENT_FILE, 'r', encoding='utf-8').read()
+    parsed = ast.parse(source, filename=CONTENT_FILE)
+    selected_nodes = [
+        node for node in parsed.body
+        if (isinstance(node, (ast.FunctionDef, ast.ClassDef)) and node.name in TARGET_DEFINITIONS)
+        or (isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id.startswith(('_embedding_', 'EMBEDDING_')) for target in node.targets
+        ))
+    ]
+    namespace = {
+        'email': email,
+        'math': math,
+        'ThreadPoolExecutor': ThreadPoolExecutor,
+        'FIRST_COMPLETED': FIRST_COMPLETED,
+        'wait': wait,
+        'hashlib': hashlib,
+        'threading': threading,
+        'time': clock,
+        'random': types.SimpleNamespace(uniform=lambda low, high: low),
+        'AzureOpenAI': FakeAzureOpenAI,
+        'RateLimitError': FakeRateLimitError,
+        'DefaultAzureCredential': FakeCredential,
+        'get_bearer_token_provider': lambda credential, scope: ('token-provider', credential),
+        'cognitive_services_scope': 'https://cognitiveservices.azure.com/.default',
+        'get_settings': lambda: settings,
+        'debug_print': lambda *args, **kwargs: None,
+        # Run with the embedding cache disabled to exercise every request
+        'get_cached_embeddings': lambda deployment, texts: [None] * len(texts),
+        'cache_embeddings': lambda deployment, items: 0,
+    }
+    module = ast.Module(body=selected_nodes, type_ignores=[])
+    exec(compile(module, CONTENT_FILE, 'exec'), namespace)
+    return types.SimpleNamespace(**namespace)
+
+
+def _settings(**overrides):
+    settings = {
+        'enable_embedding_apim': False,
+        'azure_openai_embedding_authentication_type': 'key',
+        'azure_openai_embedding_api_version': '2024-06-01',
+        'azure_openai_embedding_endpoint': 'https://example.openai.azure.com',
+        'azure_openai_embedding_key': 'test-key',
+        'embedding_model': {'selected': [{'deploymentName': 'text-embedding-test'}]},
+        'embedding_rate_limit_requests_per_second': 10,
+        'embedding_rate_limit_burst': 10,
+    }
+    settings.update(overrides)
+    return settings
+
+
+def test_client_is_reused_without_presleep():
+    """Verify repeated calls share one client and do not sleep when under the limit."""
+    print('🔍 Testing embedding client reuse...')
+
+    clock = FakeClock()
+    module = _load_functions_content(_settings(), clock)
+    for _ in range(3):
+        embedding, _ = module.generate_embedding('hello')
+        assert embedding == [0.0]
+    module.generate_embeddings_batch(['a', 'b', 'c'], batch_size=2)
+
+    assert len(FakeAzureOpenAI.instances) == 1, len(FakeAzureOpenAI.instances)
+    assert clock.sleeps == [], f'Unexpected sleeps: {clock.sleeps}'
+
+    print('✅ Embedding client reuse verified')
+
+
+def test_client_rebuilt_when_key_changes():
+    """Verify a rotated key or different deployment gets a new client."""
+    print('🔍 Testing embedding client invalidation...')
+
+    clock = FakeClock()
+    settings = _settings()
+    module = _load_functions_content(settings, clock)
+    module.generate_embedding('one')
+    settings['azure_openai_embedding_key'] = 'rotated-key'
+    module.generate_embedding('two')
+    settings['embedding_model'] = {'selected': [{'deploymentName': 'other-deployment'}]}
+    module.generate_embedding('three')
+    module.generate_embedding('four')
+
+    assert len(FakeAzureOpenAI.instances) == 3, len(FakeAzureOpenAI.instances)
+    assert FakeAzureOpenAI.instances[1].kwargs['api_key'] == 'rotated-key'
+
+    print('✅ Embedding client invalidation verified')
+
+
+def test_managed_identity_credential_is_cached():
+    """Verify managed identity builds one credential and token provider per process."""
+    print('🔍 Testing managed identity credential caching...')
+
+    clock = FakeClock()
+    settings = _settings(azure_openai_embedding_authentication_type='managed_identity')
+    module = _load_functions_content(settings, clock)
+    module.generate_embedding('one')
+    settings['embedding_model'] = {'selected': [{'deploymentName': 'other-deployment'}]}
+    module.generate_embedding('two')
+
+    assert FakeCredential.created == 1, FakeCredential.created
+    assert len(FakeAzureOpenAI.instances) == 2
+    assert all('azure_ad_token_provider' in client.kwargs for client in FakeAzureOpenAI.instances)
+
+    print('✅ Managed identity credential caching verified')
+
+
+def test_token_bucket_spaces_requests():
+    """Verify callers past the burst wait for the refill rate."""
+    print('🔍 Testing token bucket spacing...')
+
+    clock = FakeClock()
+    module = _load_functions_content(_settings(embedding_rate_limit_requests_per_second=2, embedding_rate_limit_burst=2), clock)
+    for _ in range(4):
+        module.generate_embedding('hello')
+
+    assert len(clock.sleeps) == 2, clock.sleeps
+    assert all(abs(delay - 0.5) < 1e-9 for delay in clock.sleeps), clock.sleeps
+
+    print('✅ Token bucket spacing verified')
+
+
+def test_rate_limit_pauses_shared_bucket():
+    """Verify a 429 pauses every caller of the pooled client."""
+    print('🔍 Testing shared 429 pause...')
+
+    clock = FakeClock()
+    module = _load_functions_content(_settings(), clock)
+    FakeAzureOpenAI.scripted_errors = [FakeRateLimitError({'retry-after': '3'})]
+    module.generate_embedding('first')
+    assert 3.0 in clock.sleeps, clock.sleeps
+
+    _, _, limiter = module.get_embedding_client()
+    limiter.pause(2.0)
+    waited = limiter.acquire()
+    assert abs(waited - 2.0) < 1e-9, waited
+
+    print('✅ Shared 429 pause verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_client_is_reused_without_presleep,
+        test_client_rebuilt_when_key_changes,
+        test_managed_identity_credential_is_cached,
+        test_token_bucket_spaces_requests,
+        test_rate_limit_pauses_shared_bucket,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# test_enhanced_citation_range_streaming.py
+"""
+Functional test for HTTP range streaming of enhanced citation media.
+Version: 0.241.025
+Implemented in: 0.241.025
+
+This test ensures that media citations honour Range requests with 206 partial
+responses fetched through ranged blob downloads, stream full responses in
+chunks, answer unsatisfiable ranges with 416, and answer a matching
+If-None-Match with 304 without downloading the blob.
+"""
+
+import enum
+import importlib.util
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+from flask import Flask
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STREAMING_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_blob_streaming.py')
+BLOB_ETAG = '"0x8DC0FFEE"'
+
+
+class _MatchConditions(enum.Enum):
+    IfNotModified = 1
+
+
+class _FakeDownload:
+    def __init__(self, data):
+        self._data = data
+
+    def readall(self):
+        return self._data
+
+
+class _FakeBlobClient:
+    def __init__(self, data):
+        self.data = data
+        self.downloads = []
+
+    def get_blob_properties(self):
+        return types.SimpleNamespace(size=len(self.data), etag=BLOB_ETAG)
+
+    def download_blob(self, offset=None, length=None, etag=None, match_condition=None):
+        self.downloads.append((offset, length, etag))
+        return _FakeDownload(self.data[offset:offset + length])
+
+
+@contextmanager
+def _load_streaming():
+    azure_stub = types.ModuleType('azure')
+    azure_core_stub = types.ModuleType('azure.core')
+    azure_core_stub.MatchConditions = _MatchConditions
+    debug_stub = types.ModuleType('functions_debug')
+    debug_stub.debug_print = lambda *args, **kwargs: None
+
+    stubs = {'azure': azure_stub, 'azure.core': azure_core_stub, 'functions_debug': debug_stub}
+    original_modules = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    try:
+        spec = importlib.util.spec_from_file_location('functions_blob_streaming_under_test', STREAMING_FILE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        for module_name, original_module in original_modules.items():
+            if original_module is None:
+                sys.modules.pop(module_name, None)
+            else:
+                sys.modules[module_name] = original_module
+
+
+def _serve(streaming, blob_client, headers=None):
+    app = Flask(__name__)
+    with app.test_request_context('/api/enhanced_citations/video', headers=headers or {}):
+        from flask import request
+        response = streaming.build_blob_stream_response(
+            blob_client,
+            request,
+            'video/mp4',
+            headers={'Cache-Control': 'private, max-age=300'},
+            chunk_size=4,
+        )
+        body = b''.join(response.response) if response.status_code in (200, 206) else b''
+        return response, body
+
+
+def test_partial_and_full_responses():
+    """Verify 206 ranges, suffix ranges and chunked full responses."""
+    print('🔍 Testing range responses...')
+
+    with _load_streaming() as streaming:
+        data = bytes(range(10))
+
+        blob_client = _FakeBlobClient(data)
+        response, body = _serve(streaming, blob_client, {'Range': 'bytes=2-6'})
+        assert response.status_code == 206
+        assert body == data[2:7]
+        assert response.headers['Content-Range'] == 'bytes 2-6/10'
+        assert response.headers['Content-Length'] == '5'
+        assert response.headers['ETag'] == BLOB_ETAG
+        assert blob_client.downloads == [(2, 4, BLOB_ETAG), (6, 1, BLOB_ETAG)], 'Only the requested bytes should be downloaded'
+
+        response, body = _serve(streaming, _FakeBlobClient(data), {'Range': 'bytes=-3'})
+        assert response.status_code == 206 and body == data[7:]
+
+        blob_client = _FakeBlobClient(data)
+        response, body = _serve(streaming, blob_client)
+        assert response.status_code == 200 and body == data
+        assert response.headers['Accept-Ranges'] == 'bytes'
+        assert len(blob_client.downloads) == 3
+
+        response, body = _serve(streaming, _FakeBlobClient(data), {'Range': 'bytes=0-1,4-5'})
+        assert response.status_code == 200 and body == data
+
+        response, body = _serve(streaming, _FakeBlobClient(data), {'Range': 'bytes=2-3', 'If-Range': '"other"'})
+        assert response.status_code == 200 and body == data
+
+    print('✅ Range responses verified')
+
+
+def test_unsatisfiable_and_not_modified():
+    """Verify 416 for ranges past the end and 304 for a matching ETag."""
+    print('🔍 Testing 416 and 304 responses...')
+
+    with _load_streaming() as streaming:
+        blob_client = _FakeBlobClient(b'0123456789')
+        response, _ = _serve(streaming, blob_client, {'Range': 'bytes=20-30'})
+        assert response.status_code == 416
+        assert response.headers['Content-Range'] == 'bytes */10'
+
+        response, _ = _serve(streaming, blob_client, {'If-None-Match': BLOB_ETAG})
+        assert response.status_code == 304
+        assert blob_client.downloads == [], 'Conditional and unsatisfiable requests should not download the blob'
+
+    print('✅ 416 and 304 responses verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_partial_and_full_responses,
+        test_unsatisfiable_and_not_modified,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
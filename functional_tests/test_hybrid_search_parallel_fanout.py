@@ -0,0 +1,196 @@
+# test_hybrid_search_parallel_fanout.py
+#!/usr/bin/env python3
+"""
+Functional test for parallel multi-index fan-out in hybrid_search.
+Version: 0.241.007
+Implemented in: 0.241.007
+
+This test ensures that hybrid_search with doc_scope="all" runs the user, group,
+and public index queries concurrently, applies the per-index deadline so one
+slow index cannot hold up the turn, falls back to sequential execution when
+fan-out is disabled, and never caches partial results.
+"""
+
+import ast
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Tuple
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEARCH_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_search.py')
+SETTINGS_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_settings.py')
+TARGET_FUNCTIONS = {
+    'get_search_fanout_settings',
+    '_execute_index_search',
+    'run_index_searches',
+}
+
+
+def read_file_text(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file_handle:
+        return file_handle.read()
+
+
+def load_fanout_helpers(settings):
+    source = read_file_text(SEARCH_FILE)
+    parsed = ast.parse(source, filename=SEARCH_FILE)
+    selected_nodes = [
+        node for node in parsed.body
+        if isinstance(node, ast.FunctionDef) and node.name in TARGET_FUNCTIONS
+    ]
+    assert len(selected_nodes) == len(TARGET_FUNCTIONS), (
+        f'Expected helpers {sorted(TARGET_FUNCTIONS)}, found {[node.name for node in selected_nodes]}'
+    )
+
+    namespace = {
+        'time': time,
+        'logger': logging.getLogger('test_hybrid_search_parallel_fanout'),
+        'FutureTimeoutError': FutureTimeoutError,
+        'Any': Any,
+        'Callable': Callable,
+        'Dict': Dict,
+        'List': List,
+        'Tuple': Tuple,
+        '_search_fanout_executor': ThreadPoolExecutor(max_workers=6),
+        'get_settings': lambda: settings,
+        'extract_search_results': lambda paged_results, top_n: list(paged_results)[:top_n],
+        'debug_print': lambda *args, **kwargs: None,
+    }
+    module = ast.Module(body=selected_nodes, type_ignores=[])
+    exec(compile(module, SEARCH_FILE, 'exec'), namespace)
+    return namespace
+
+
+def make_search(index_name, delay_seconds):
+    def _search():
+        time.sleep(delay_seconds)
+        return [{'id': f'{index_name}-1', 'score': 1.0}]
+    return _search
+
+
+def test_parallel_fanout_runs_indexes_concurrently():
+    """Verify the three index searches overlap instead of running back to back."""
+    print('🔍 Testing concurrent index fan-out...')
+
+    namespace = load_fanout_helpers({
+        'enable_parallel_search_fanout': True,
+        'search_fanout_index_timeout_seconds': 5,
+    })
+    run_index_searches = namespace['run_index_searches']
+
+    started_at = time.monotonic()
+    results, timed_out = run_index_searches({
+        'user_index': make_search('user', 0.3),
+        'group_index': make_search('group', 0.3),
+        'public_index': make_search('public', 0.3),
+    }, 12)
+    elapsed = time.monotonic() - started_at
+
+    assert timed_out == [], timed_out
+    assert sorted(results) == ['group_index', 'public_index', 'user_index']
+    assert results['group_index'] == [{'id': 'group-1', 'score': 1.0}]
+    assert elapsed < 0.8, f'Fan-out took {elapsed:.2f}s, expected concurrent execution'
+
+    print('✅ Concurrent fan-out verified')
+
+
+def test_slow_index_is_dropped_after_deadline():
+    """Verify an index that misses the deadline contributes no results."""
+    print('🔍 Testing per-index deadline...')
+
+    namespace = load_fanout_helpers({
+        'enable_parallel_search_fanout': True,
+        'search_fanout_index_timeout_seconds': 0.2,
+    })
+    run_index_searches = namespace['run_index_searches']
+
+    started_at = time.monotonic()
+    results, timed_out = run_index_searches({
+        'user_index': make_search('user', 0.01),
+        'public_index': make_search('public', 1.5),
+    }, 12)
+    elapsed = time.monotonic() - started_at
+
+    assert timed_out == ['public_index'], timed_out
+    assert results['public_index'] == []
+    assert results['user_index'] == [{'id': 'user-1', 'score': 1.0}]
+    assert elapsed < 1.0, f'Deadline not enforced, waited {elapsed:.2f}s'
+
+    print('✅ Per-index deadline verified')
+
+
+def test_disabled_fanout_runs_sequentially_without_deadline():
+    """Verify the legacy sequential path is used when fan-out is disabled."""
+    print('🔍 Testing sequential fallback...')
+
+    namespace = load_fanout_helpers({
+        'enable_parallel_search_fanout': False,
+        'search_fanout_index_timeout_seconds': 0.01,
+    })
+    run_index_searches = namespace['run_index_searches']
+
+    call_order = []
+
+    def tracked(index_name):
+        def _search():
+            call_order.append(index_name)
+            time.sleep(0.05)
+            return [{'id': index_name, 'score': 0.5}]
+        return _search
+
+    results, timed_out = run_index_searches({
+        'user_index': tracked('user_index'),
+        'group_index': tracked('group_index'),
+    }, 12)
+
+    assert timed_out == []
+    assert call_order == ['user_index', 'group_index']
+    assert results['group_index'] == [{'id': 'group_index', 'score': 0.5}]
+    assert run_index_searches({}, 12) == ({}, [])
+
+    print('✅ Sequential fallback verified')
+
+
+def test_hybrid_search_wiring_and_defaults():
+    """Verify hybrid_search routes the all-scope queries through the fan-out helper."""
+    print('🔍 Testing hybrid_search wiring...')
+
+    search_source = read_file_text(SEARCH_FILE)
+    settings_source = read_file_text(SETTINGS_FILE)
+
+    assert 'run_index_searches(index_searches, top_n)' in search_source
+    assert 'index_searches["user_index"] = partial(' in search_source
+    assert 'index_searches["group_index"] = partial(' in search_source
+    assert 'index_searches["public_index"] = partial(' in search_source
+    assert 'if not timed_out_indexes:' in search_source
+    assert "'enable_parallel_search_fanout': True" in settings_source
+    assert "'search_fanout_index_timeout_seconds': 10" in settings_source
+
+    print('✅ hybrid_search wiring verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_parallel_fanout_runs_indexes_concurrently,
+        test_slow_index_is_dropped_after_deadline,
+        test_disabled_fanout_runs_sequentially_without_deadline,
+        test_hybrid_search_wiring_and_defaults,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
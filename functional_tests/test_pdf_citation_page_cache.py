@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# test_pdf_citation_page_cache.py
+"""
+Functional test for the page-window cache of PDF enhanced citations.
+Version: 0.241.026
+Implemented in: 0.241.026
+
+This test ensures that the ±1 page window matches the original citation logic,
+that extracted windows and page counts are served from the disk cache keyed by
+blob ETag without downloading the source PDF again, that a new ETag misses the
+cache, that the cache directory stays within its byte budget, and that the
+extracted PDF answers Range requests it advertises with Accept-Ranges.
+"""
+
+import enum
+import importlib.util
+import os
+import sys
+import tempfile
+import types
+from contextlib import contextmanager
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_pdf_citation_cache.py')
+ROUTE_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'route_enhanced_citations.py')
+
+
+class _MatchConditions(enum.Enum):
+    IfNotModified = 1
+
+
+class _FakeDownload:
+    def __init__(self, data):
+        self._data = data
+
+    def readall(self):
+        return self._data
+
+
+class _FakeBlobClient:
+    def __init__(self, data):
+        self.data = data
+        self.downloads = 0
+
+    def download_blob(self, **kwargs):
+        self.downloads += 1
+        return _FakeDownload(self.data)
+
+
+@contextmanager
+def _load_cache():
+    azure_stub = types.ModuleType('azure')
+    azure_core_stub = types.ModuleType('azure.core')
+    azure_core_stub.MatchConditions = _MatchConditions
+    debug_stub = types.ModuleType('functions_debug')
+    debug_stub.debug_print = lambda *args, **kwargs: None
+
+    stubs = {'azure': azure_stub, 'azure.core': azure_core_stub, 'functions_debug': debug_stub}
+    original_modules = {name: sys.modules.get(name) for name in stubs}
+    original_cache_dir = os.environ.get('SIMPLECHAT_PDF_CITATION_CACHE_DIR')
+    sys.modules.update(stubs)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ['SIMPLECHAT_PDF_CITATION_CACHE_DIR'] = cache_dir
+        try:
+            spec = importlib.util.spec_from_file_location('functions_pdf_citation_cache_under_test', CACHE_FILE)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            yield module, cache_dir
+        finally:
+            if original_cache_dir is None:
+                os.environ.pop('SIMPLECHAT_PDF_CITATION_CACHE_DIR', None)
+            else:
+                os.environ['SIMPLECHAT_PDF_CITATION_CACHE_DIR'] = original_cache_dir
+            for module_name, original_module in original_modules.items():
+                if original_module is None:
+                    sys.modules.pop(module_name, None)
+                else:
+                    sys.modules[module_name] = original_module
+
+
+def _build_pdf(page_count):
+    import fitz  # PyMuPDF
+
+    document = fitz.open()
+    for page_index in range(page_count):
+        document.new_page().insert_text((72, 72), f'Page {page_index + 1}')
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def _serve(cache, blob_client, settings, etag, page_number):
+    """Mirror serve_enhanced_citation_pdf_content's use of the cache."""
+    pdf_document = None
+    try:
+        total_pages = cache.read_cached_pdf_page_count(settings, 'docs', 'user-1/big.pdf', etag)
+        if total_pages is None:
+            pdf_document = cache.open_pdf_citation_source(blob_client, etag)
+            total_pages = pdf_document.page_count
+            cache.store_pdf_page_count(settings, 'docs', 'user-1/big.pdf', etag, total_pages)
+        start_idx, end_idx, new_page_number = cache.get_pdf_citation_page_window(page_number, total_pages)
+        content = cache.read_cached_pdf_page_window(settings, 'docs', 'user-1/big.pdf', etag, start_idx, end_idx)
+        if content is None:
+            if pdf_document is None:
+                pdf_document = cache.open_pdf_citation_source(blob_client, etag)
+            content = cache.extract_pdf_page_window(pdf_document, start_idx, end_idx)
+            cache.store_pdf_page_window(settings, 'docs', 'user-1/big.pdf', etag, start_idx, end_idx, content)
+        return content, new_page_number
+    finally:
+        if pdf_document is not None:
+            pdf_document.close()
+
+
+def test_page_window_matches_original_logic():
+    """Verify the ±1 window and the sub-document page number."""
+    print('🔍 Testing page windows...')
+
+    with _load_cache() as (cache, _):
+        assert cache.get_pdf_citation_page_window(1, 1) == (0, 0, 1)
+        assert cache.get_pdf_citation_page_window(1, 5) == (0, 1, 1)
+        assert cache.get_pdf_citation_page_window(3, 5) == (1, 3, 2)
+        assert cache.get_pdf_citation_page_window(5, 5) == (3, 4, 2)
+        assert cache.get_pdf_citation_page_window(4, 5, show_all=True) == (0, 4, 4)
+        assert cache.get_pdf_citation_page_window(0, 5) is None
+        assert cache.get_pdf_citation_page_window(6, 5) is None
+
+    print('✅ Page windows verified')
+
+
+def test_cached_windows_skip_source_download():
+    """Verify repeat citations are served from disk and a new ETag misses."""
+    print('🔍 Testing cached page windows...')
+
+    import fitz  # PyMuPDF
+
+    with _load_cache() as (cache, cache_dir):
+        blob_client = _FakeBlobClient(_build_pdf(20))
+        settings = {}
+
+        content, new_page_number = _serve(cache, blob_client, settings, '"etag-1"', 10)
+        assert new_page_number == 2
+        extracted = fitz.open(stream=content, filetype='pdf')
+        assert extracted.page_count == 3
+        assert 'Page 9' in extracted[0].get_text()
+        extracted.close()
+        assert blob_client.downloads == 1
+
+        cached_content, _ = _serve(cache, blob_client, settings, '"etag-1"', 10)
+        assert cached_content == content
+        assert blob_client.downloads == 1, 'A cached window should not download the PDF again'
+
+        _serve(cache, blob_client, settings, '"etag-1"', 15)
+        assert blob_client.downloads == 2, 'A new window needs the source, but not the page count'
+
+        _serve(cache, blob_client, settings, '"etag-2"', 10)
+        assert blob_client.downloads == 3, 'A new ETag must not reuse older extracts'
+
+        stats = cache.get_pdf_citation_cache_stats()
+        assert stats['hits'] == 1
+        assert stats['source_downloads'] == 3
+        assert all(not name.endswith('.tmp') for name in os.listdir(cache_dir))
+
+    print('✅ Cached page windows verified')
+
+
+def test_cache_budget_and_disable():
+    """Verify least recently used files are evicted and the cache can be disabled."""
+    print('🔍 Testing cache budget...')
+
+    with _load_cache() as (cache, cache_dir):
+        settings = {'pdf_citation_cache_max_mb': 1}
+        block = b'x' * (400 * 1024)
+        for index in range(3):
+            cache.store_pdf_page_window(settings, 'docs', 'a.pdf', '"e"', index, index, block)
+        total_bytes = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+        assert total_bytes <= 1024 * 1024
+        assert cache.get_pdf_citation_cache_stats()['evictions'] == 1
+        assert cache.read_cached_pdf_page_window(settings, 'docs', 'a.pdf', '"e"', 2, 2) == block
+
+        disabled = {'enable_pdf_citation_cache': False}
+        cache.store_pdf_page_window(disabled, 'docs', 'b.pdf', '"e"', 0, 0, b'data')
+        assert cache.read_cached_pdf_page_window(disabled, 'docs', 'b.pdf', '"e"', 0, 0) is None
+
+    print('✅ Cache budget verified')
+
+
+def test_extracted_pdf_range_requests():
+    """Verify the extracted PDF response serves byte ranges instead of only advertising them."""
+    print('🔍 Testing extracted PDF range requests...')
+
+    from flask import Flask, Response, request
+
+    with open(ROUTE_FILE, 'r', encoding='utf-8') as route_file:
+        route_source = route_file.read()
+    pdf_route_source = route_source.split('def serve_enhanced_citation_pdf_content', 1)[1]
+    assert "'Accept-Ranges': 'bytes'" not in pdf_route_source
+    assert 'make_conditional(request, accept_ranges=True, complete_length=len(extracted_content))' in pdf_route_source
+
+    extracted_content = b'%PDF-1.7 extracted window'
+    app = Flask(__name__)
+    with app.test_request_context('/', headers={'Range': 'bytes=0-7'}):
+        response = Response(extracted_content, content_type='application/pdf', headers={'Content-Length': str(len(extracted_content))})
+        response = response.make_conditional(request, accept_ranges=True, complete_length=len(extracted_content))
+        assert response.status_code == 206
+        assert response.headers['Accept-Ranges'] == 'bytes'
+        assert response.headers['Content-Range'] == f'bytes 0-7/{len(extracted_content)}'
+        assert response.get_data() == b'%PDF-1.7'
+
+    with app.test_request_context('/'):
+        response = Response(extracted_content, content_type='application/pdf', headers={'Content-Length': str(len(extracted_content))})
+        response = response.make_conditional(request, accept_ranges=True, complete_length=len(extracted_content))
+        assert response.status_code == 200 and response.get_data() == extracted_content
+
+    print('✅ Extracted PDF range requests verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_page_window_matches_original_logic,
+        test_cached_windows_skip_source_download,
+        test_cache_budget_and_disable,
+        test_extracted_pdf_range_requests,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -0,0 +1,234 @@
+# test_search_cache_document_set_fingerprints.py
+#!/usr/bin/env python3
+"""
+Functional test for maintained search cache document set fingerprints.
+Version: 0.241.008
+Implemented in: 0.241.008
+
+This test ensures that search cache keys use a maintained per-scope
+fingerprint document (a single point read) instead of scanning every document
+in scope, and that document create/update/delete/share/unshare operations and
+the invalidate_* helpers rotate the affected fingerprints.
+"""
+
+import ast
+import hashlib
+import logging
+import os
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'utils_cache.py')
+DOCUMENTS_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_documents.py')
+CACHE_TARGET_FUNCTIONS = {
+    '_get_document_set_fingerprint_item_id',
+    'bump_document_set_fingerprint',
+    '_get_document_set_fingerprint',
+    'get_personal_document_fingerprint',
+    'get_group_document_fingerprint',
+    'get_public_workspace_document_fingerprint',
+}
+DOCUMENT_TARGET_FUNCTIONS = {
+    '_get_shared_scope_ids',
+    'bump_document_search_fingerprints',
+}
+
+
+class CosmosResourceNotFoundError(Exception):
+    pass
+
+
+class FakeCacheContainer:
+    def __init__(self):
+        self.items = {}
+        self.read_count = 0
+        self.query_count = 0
+
+    def read_item(self, item, partition_key):
+        self.read_count += 1
+        stored = self.items.get((partition_key, item))
+        if stored is None:
+            raise CosmosResourceNotFoundError(item)
+        return dict(stored)
+
+    def upsert_item(self, body):
+        self.items[(body['user_id'], body['id'])] = dict(body)
+        return body
+
+    def query_items(self, *args, **kwargs):
+        self.query_count += 1
+        return []
+
+
+def read_file_text(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file_handle:
+        return file_handle.read()
+
+
+def load_selected_functions(file_path, target_functions, namespace):
+    source = read_file_text(file_path)
+    parsed = ast.parse(source, filename=file_path)
+    selected_nodes = [
+        node for node in parsed.body
+        if isinstance(node, ast.FunctionDef) and node.name in target_functions
+    ]
+    assert len(selected_nodes) == len(target_functions), (
+        f'Expected {sorted(target_functions)}, found {[node.name for node in selected_nodes]}'
+    )
+    module = ast.Module(body=selected_nodes, type_ignores=[])
+    exec(compile(module, file_path, 'exec'), namespace)
+    return namespace
+
+
+def load_cache_helpers(container):
+    namespace = {
+        'cosmos_search_cache_container': container,
+        'CosmosResourceNotFoundError': CosmosResourceNotFoundError,
+        'DOCUMENT_SET_FINGERPRINT_ITEM_TYPE': 'document_set_fingerprint',
+        'DOCUMENT_SET_FINGERPRINT_ID_PREFIX': 'fingerprint:',
+        'Optional': Optional,
+        'datetime': datetime,
+        'timezone': timezone,
+        'hashlib': hashlib,
+        'uuid': uuid,
+        'logger': logging.getLogger('test_search_cache_document_set_fingerprints'),
+        '_debug_print': lambda *args, **kwargs: None,
+        # Run with the process-local L1 tier disabled to exercise the Cosmos path
+        'get_l1_cache_settings': lambda: (False, 0, 0, False),
+        '_l1_get': lambda key: None,
+        '_l1_set': lambda *args, **kwargs: None,
+        '_l1_invalidation_snapshot': lambda scope_tags: (),
+        'invalidate_l1_scope': lambda *args, **kwargs: 0,
+    }
+    return load_selected_functions(CACHE_FILE, CACHE_TARGET_FUNCTIONS, namespace)
+
+
+def test_fingerprint_is_point_read_and_rotates():
+    """Verify fingerprints are created once, read by id, and change on bump."""
+    print('🔍 Testing maintained fingerprint reads...')
+
+    container = FakeCacheContainer()
+    namespace = load_cache_helpers(container)
+    get_personal = namespace['get_personal_document_fingerprint']
+    get_group = namespace['get_group_document_fingerprint']
+    bump = namespace['bump_document_set_fingerprint']
+
+    first = get_personal('user-1')
+    second = get_personal('user-1')
+    assert first == second, 'Fingerprint should be stable without document changes'
+    assert container.query_count == 0, 'Fingerprint lookup must not query documents'
+    assert ('fingerprint:personal:user-1', 'fingerprint:personal:user-1') in container.items
+
+    rotated = bump('personal', 'user-1')
+    assert rotated and rotated != first
+    assert get_personal('user-1') == rotated
+
+    assert get_group('group-1') != get_personal('user-1')
+    assert bump('group', '') is None
+
+    print('✅ Fingerprint point reads verified')
+
+
+def test_missing_fingerprint_never_reuses_old_generation():
+    """Verify a deleted fingerprint document is recreated with a fresh token."""
+    print('🔍 Testing fingerprint recreation...')
+
+    container = FakeCacheContainer()
+    namespace = load_cache_helpers(container)
+    get_public = namespace['get_public_workspace_document_fingerprint']
+
+    original = get_public('ws-1')
+    container.items.clear()
+    recreated = get_public('ws-1')
+    assert recreated != original
+
+    print('✅ Fingerprint recreation verified')
+
+
+def test_document_changes_rotate_every_visible_scope():
+    """Verify owners and share targets are rotated for personal and group documents."""
+    print('🔍 Testing document fingerprint fan-out...')
+
+    bumped = []
+    namespace = {
+        'bump_document_set_fingerprint': lambda scope, scope_id: bumped.append((scope, scope_id)),
+        'debug_print': lambda *args, **kwargs: None,
+    }
+    load_selected_functions(DOCUMENTS_FILE, DOCUMENT_TARGET_FUNCTIONS, namespace)
+    bump_document = namespace['bump_document_search_fingerprints']
+
+    bump_document(
+        {'user_id': 'owner', 'shared_user_ids': ['friend,approved', 'other,not_approved', 'friend,approved']},
+        user_id='owner',
+    )
+    assert bumped == [('personal', 'owner'), ('personal', 'friend'), ('personal', 'other')], bumped
+
+    bumped.clear()
+    bump_document(
+        {'group_id': 'group-a', 'shared_group_ids': ['group-b,approved']},
+        user_id='owner',
+        group_id='group-a',
+    )
+    assert bumped == [('group', 'group-a'), ('group', 'group-b')], bumped
+
+    bumped.clear()
+    bump_document(user_id='owner', public_workspace_id='ws-1')
+    assert bumped == [('public', 'ws-1')], bumped
+
+    print('✅ Document fingerprint fan-out verified')
+
+
+def test_write_paths_rotate_fingerprints():
+    """Verify document write paths and invalidation helpers rotate fingerprints."""
+    print('🔍 Testing fingerprint rotation wiring...')
+
+    cache_source = read_file_text(CACHE_FILE)
+    documents_source = read_file_text(DOCUMENTS_FILE)
+
+    assert 'ORDER BY c.id' not in cache_source, 'Fingerprints should no longer scan documents'
+    for scope, variable in (('personal', 'user_id'), ('group', 'group_id'), ('public', 'public_workspace_id')):
+        assert f'bump_document_set_fingerprint("{scope}", {variable})' in cache_source
+
+    for function_name in ('create_document', 'update_document', 'delete_document'):
+        start = documents_source.index(f'def {function_name}(')
+        end = documents_source.index('\ndef ', start + 1)
+        assert 'bump_document_search_fingerprints(' in documents_source[start:end], function_name
+
+    for function_name, scope_call in (
+        ('share_document_with_user', 'bump_document_set_fingerprint("personal", target_user_id)'),
+        ('unshare_document_from_user', 'bump_document_set_fingerprint("personal", target_user_id)'),
+        ('share_document_with_group', 'bump_document_set_fingerprint("group", target_group_id)'),
+        ('unshare_document_from_group', 'bump_document_set_fingerprint("group", target_group_id)'),
+    ):
+        start = documents_source.index(f'def {function_name}(')
+        end = documents_source.index('\ndef ', start + 1)
+        assert scope_call in documents_source[start:end], function_name
+
+    print('✅ Fingerprint rotation wiring verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_fingerprint_is_point_read_and_rotates,
+        test_missing_fingerprint_never_reuses_old_generation,
+        test_document_changes_rotate_every_visible_scope,
+        test_write_paths_rotate_fingerprints,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
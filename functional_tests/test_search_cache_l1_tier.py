@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# test_search_cache_l1_tier.py
+"""
+Functional test for the process-local L1 search cache tier.
+Version: 0.241.009
+Implemented in: 0.241.009
+
+This test ensures that repeated search cache lookups are answered from a
+size-bounded, TTL-limited in-process tier without Cosmos DB reads, that the
+same invalidate_* calls and fingerprint rotations drop the affected L1
+entries, that a value read while its scope is invalidated is not stored, and
+that invalidations are fanned out over Redis pub/sub when the app cache is
+Redis-backed.
+"""
+
+import importlib
+import json
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class FakeCosmosResourceNotFoundError(Exception):
+    pass
+
+
+class FakeCacheContainer:
+    def __init__(self):
+        self.items = {}
+        self.read_count = 0
+
+    def read_item(self, item, partition_key):
+        self.read_count += 1
+        stored = self.items.get((partition_key, item))
+        if stored is None:
+            raise FakeCosmosResourceNotFoundError(item)
+        return json.loads(json.dumps(stored))
+
+    def upsert_item(self, body):
+        self.items[(body['user_id'], body['id'])] = json.loads(json.dumps(body))
+        return body
+
+    def delete_item(self, item, partition_key):
+        self.items.pop((partition_key, item), None)
+
+    def query_items(self, query, parameters=None, partition_key=None, enable_cross_partition_query=False):
+        if partition_key is not None:
+            return [{'id': item_id} for (pk, item_id) in self.items if pk == partition_key]
+        return []
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+    def pubsub(self, **kwargs):
+        raise RuntimeError('pubsub not used in this test')
+
+
+def _restore_modules(original_modules):
+    for module_name, original_module in original_modules.items():
+        if original_module is None:
+            sys.modules.pop(module_name, None)
+        else:
+            sys.modules[module_name] = original_module
+
+
+@contextmanager
+def _load_utils_cache(settings, redis_client=None, listening=True):
+    container = FakeCacheContainer()
+
+    config_stub = types.ModuleType('config')
+    config_stub.cosmos_user_documents_container = None
+    config_stub.cosmos_group_documents_container = None
+    config_stub.cosmos_public_documents_container = None
+    config_stub.cosmos_search_cache_container = container
+
+    exceptions_stub = types.ModuleType('azure.cosmos.exceptions')
+    exceptions_stub.CosmosResourceNotFoundError = FakeCosmosResourceNotFoundError
+    azure_stub = types.ModuleType('azure')
+    cosmos_stub = types.ModuleType('azure.cosmos')
+    cosmos_stub.exceptions = exceptions_stub
+    azure_stub.cosmos = cosmos_stub
+
+    app_cache_stub = types.ModuleType('app_settings_cache')
+    app_cache_stub.get_app_redis_client = lambda: redis_client
+
+    settings_stub = types.ModuleType('functions_settings')
+    settings_stub.get_settings = lambda: settings
+
+    module_names = [
+        'config', 'azure', 'azure.cosmos', 'azure.cosmos.exceptions',
+        'app_settings_cache', 'functions_settings', 'utils_cache',
+    ]
+    original_modules = {name: sys.modules.get(name) for name in module_names}
+    sys.modules.update({
+        'config': config_stub,
+        'azure': azure_stub,
+        'azure.cosmos': cosmos_stub,
+        'azure.cosmos.exceptions': exceptions_stub,
+        'app_settings_cache': app_cache_stub,
+        'functions_settings': settings_stub,
+    })
+    sys.modules.pop('utils_cache', None)
+    try:
+        # Stubs stay registered while the test runs because settings are imported lazily
+        utils_cache = importlib.import_module('utils_cache')
+        if listening:
+            # Stand in for a started invalidation subscriber instead of a thread
+            utils_cache._l1_subscriber_state.update(pid=os.getpid(), listening=True)
+        yield utils_cache, container
+    finally:
+        _restore_modules(original_modules)
+
+
+def _base_settings(**overrides):
+    settings = {
+        'enable_search_result_caching': True,
+        'search_cache_ttl_seconds': 300,
+        'enable_search_cache_l1': True,
+        'search_cache_l1_max_entries': 2,
+        'search_cache_l1_ttl_seconds': 60,
+        'enable_search_cache_l1_redis_invalidation': True,
+    }
+    settings.update(overrides)
+    return settings
+
+
+def test_l1_hit_skips_cosmos_and_returns_copies():
+    """Verify repeated lookups are served from worker memory without Cosmos reads."""
+    print('🔍 Testing L1 hits...')
+
+    with _load_utils_cache(_base_settings(), FakeRedis()) as (utils_cache, container):
+        results = [{'id': 'chunk-1', 'score': 0.9}]
+        utils_cache.cache_search_results('key-1', results, 'user-1', 'group', active_group_ids=['group-1'])
+
+        reads_before = container.read_count
+        first = utils_cache.get_cached_search_results('key-1', 'user-1', 'group', active_group_ids=['group-1'])
+        assert first == results
+        assert container.read_count == reads_before, 'L1 hit should not read Cosmos DB'
+
+        first[0]['score'] = 0.1
+        second = utils_cache.get_cached_search_results('key-1', 'user-1', 'group', active_group_ids=['group-1'])
+        assert second[0]['score'] == 0.9, 'L1 must hand out copies'
+
+        stats = utils_cache.get_l1_cache_stats()
+        assert stats['hits'] >= 2 and stats['entries'] == 1
+
+    print('✅ L1 hits verified')
+
+
+def test_l1_falls_back_to_cosmos_and_backfills():
+    """Verify an L1 miss reads Cosmos DB once and then serves from memory."""
+    print('🔍 Testing Cosmos fallback...')
+
+    with _load_utils_cache(_base_settings(), FakeRedis()) as (utils_cache, container):
+        utils_cache.cache_search_results('key-2', [{'id': 'c'}], 'user-1', 'personal')
+        utils_cache.clear_l1_cache()
+
+        assert utils_cache.get_cached_search_results('key-2', 'user-1', 'personal') == [{'id': 'c'}]
+        reads_after_fallback = container.read_count
+        assert utils_cache.get_cached_search_results('key-2', 'user-1', 'personal') == [{'id': 'c'}]
+        assert container.read_count == reads_after_fallback
+
+    print('✅ Cosmos fallback verified')
+
+
+def test_l1_is_size_bounded():
+    """Verify the least recently used entries are evicted over the limit."""
+    print('🔍 Testing LRU bound...')
+
+    with _load_utils_cache(_base_settings(search_cache_l1_max_entries=2), FakeRedis()) as (utils_cache, _):
+        for index in range(3):
+            utils_cache.cache_search_results(f'key-{index}', [{'id': index}], 'user-1', 'personal')
+
+        stats = utils_cache.get_l1_cache_stats()
+        assert stats['entries'] == 2
+        assert stats['evictions'] == 1
+
+    print('✅ LRU bound verified')
+
+
+def test_invalidation_drops_scope_entries_and_publishes():
+    """Verify invalidate_* drops dependent entries and fans out over Redis."""
+    print('🔍 Testing L1 invalidation...')
+
+    redis_client = FakeRedis()
+    with _load_utils_cache(_base_settings(search_cache_l1_max_entries=10), redis_client) as (utils_cache, _):
+        utils_cache.cache_search_results('group-key', [{'id': 'g'}], 'user-1', 'group', active_group_ids=['group-1'])
+        utils_cache.cache_search_results('personal-key', [{'id': 'p'}], 'user-1', 'personal')
+
+        utils_cache.invalidate_group_search_cache('group-1')
+
+        remaining_keys = {key[-1] for key in utils_cache._l1_cache if key[0] == 'results'}
+        assert remaining_keys == {'personal-key'}, remaining_keys
+        assert (utils_cache.SEARCH_CACHE_INVALIDATION_CHANNEL, {
+            'scope': 'group',
+            'scope_id': 'group-1',
+            'origin': utils_cache._L1_PROCESS_ID,
+        }) in redis_client.published
+
+    print('✅ L1 invalidation verified')
+
+
+def test_fill_racing_invalidation_is_dropped():
+    """Verify a fingerprint read that overlaps a rotation does not keep the old generation in L1."""
+    print('🔍 Testing L1 fills racing invalidations...')
+
+    with _load_utils_cache(_base_settings(search_cache_l1_max_entries=10), FakeRedis()) as (utils_cache, container):
+        old_generation = utils_cache._get_document_set_fingerprint('personal', 'user-1')
+        utils_cache.clear_l1_cache()
+
+        original_read = container.read_item
+
+        def read_then_rotate(item, partition_key):
+            # The document is deleted after this worker read the old generation but before it stores it
+            stored = original_read(item, partition_key)
+            utils_cache.bump_document_set_fingerprint('personal', 'user-1')
+            return stored
+
+        container.read_item = read_then_rotate
+        assert utils_cache._get_document_set_fingerprint('personal', 'user-1') == old_generation
+        container.read_item = original_read
+
+        assert ('fingerprint', 'fingerprint:personal:user-1') not in utils_cache._l1_cache
+        assert utils_cache.get_l1_cache_stats()['stale_fills_skipped'] == 1
+        assert utils_cache._get_document_set_fingerprint('personal', 'user-1') != old_generation
+
+        # Without an invalidation in between, the fill is kept
+        new_generation = utils_cache._get_document_set_fingerprint('personal', 'user-1')
+        reads_before = container.read_count
+        assert utils_cache._get_document_set_fingerprint('personal', 'user-1') == new_generation
+        assert container.read_count == reads_before
+
+    print('✅ L1 fills racing invalidations verified')
+
+
+def test_l1_disabled_uses_cosmos_only():
+    """Verify disabling the L1 tier keeps the Cosmos-only behavior."""
+    print('🔍 Testing disabled L1...')
+
+    with _load_utils_cache(_base_settings(enable_search_cache_l1=False), FakeRedis()) as (utils_cache, container):
+        utils_cache.cache_search_results('key-3', [{'id': 'x'}], 'user-1', 'personal')
+        assert utils_cache.get_l1_cache_stats()['entries'] == 0
+
+        reads_before = container.read_count
+        assert utils_cache.get_cached_search_results('key-3', 'user-1', 'personal') == [{'id': 'x'}]
+        assert container.read_count == reads_before + 1
+
+    print('✅ Disabled L1 verified')
+
+
+def test_l1_requires_redis_invalidation():
+    """Verify the L1 tier is skipped when other workers can't be told about invalidations."""
+    print('🔍 Testing L1 without Redis...')
+
+    with _load_utils_cache(_base_settings()) as (utils_cache, container):
+        utils_cache.cache_search_results('key-4', [{'id': 'y'}], 'user-1', 'personal')
+        assert utils_cache.get_l1_cache_stats()['entries'] == 0, 'No L1 tier without Redis'
+
+        reads_before = container.read_count
+        assert utils_cache.get_cached_search_results('key-4', 'user-1', 'personal') == [{'id': 'y'}]
+        assert container.read_count > reads_before, 'Results come from Cosmos DB'
+
+    settings = _base_settings(enable_search_cache_l1_redis_invalidation=False)
+    with _load_utils_cache(settings, FakeRedis()) as (utils_cache, _):
+        utils_cache.cache_search_results('key-5', [{'id': 'z'}], 'user-1', 'personal')
+        assert utils_cache.get_l1_cache_stats()['entries'] == 0
+
+    with _load_utils_cache(_base_settings(), FakeRedis(), listening=False) as (utils_cache, container):
+        utils_cache._l1_subscriber_state['pid'] = os.getpid()  # Subscriber started but not subscribed yet
+        utils_cache.cache_search_results('key-6', [{'id': 'w'}], 'user-1', 'personal')
+        reads_before = container.read_count
+        assert utils_cache.get_cached_search_results('key-6', 'user-1', 'personal') == [{'id': 'w'}]
+        assert container.read_count > reads_before, 'Nothing is served before the subscriber listens'
+
+    print('✅ L1 without Redis verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_l1_hit_skips_cosmos_and_returns_copies,
+        test_l1_falls_back_to_cosmos_and_backfills,
+        test_l1_is_size_bounded,
+        test_invalidation_drops_scope_entries_and_publishes,
+        test_fill_racing_invalidation_is_dropped,
+        test_l1_disabled_uses_cosmos_only,
+        test_l1_requires_redis_invalidation,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
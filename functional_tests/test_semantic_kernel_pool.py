@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# test_semantic_kernel_pool.py
+"""
+Functional test for the per-user Semantic Kernel pool.
+Version: 0.241.020
+Implemented in: 0.241.020
+
+This test ensures that warmed per-user kernels are checked out exclusively,
+reused when the manifest version is unchanged, evicted when an agent or action
+manifest changes, bounded by LRU and TTL, and that the pool can be disabled.
+Kernels from chat turns that failed are marked poisoned and never returned.
+It also ensures the global agent and action versions are cached per settings
+and shared global manifest version, and that saving a global manifest bumps that
+version and clears the pool.
+"""
+
+import importlib.util
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POOL_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'semantic_kernel_pool.py')
+
+
+class _FakeContainer:
+    def __init__(self, items=None):
+        self.items = list(items or [])
+        self.queries = 0
+
+    def query_items(self, query, parameters=None, partition_key=None, enable_cross_partition_query=False):
+        self.queries += 1
+        if partition_key is None:
+            return list(self.items)
+        return [item for item in self.items if partition_key in (item.get('user_id'), item.get('group_id'))]
+
+    def read_item(self, item, partition_key):
+        for candidate in self.items:
+            if candidate.get('id') == item:
+                return candidate
+        raise KeyError(item)
+
+
+@contextmanager
+def _load_pool():
+    containers = {
+        name: _FakeContainer()
+        for name in (
+            'cosmos_global_actions_container',
+            'cosmos_global_agents_container',
+            'cosmos_group_actions_container',
+            'cosmos_group_agents_container',
+            'cosmos_groups_container',
+            'cosmos_personal_actions_container',
+            'cosmos_personal_agents_container',
+        )
+    }
+    config_stub = types.ModuleType('config')
+    for name, container in containers.items():
+        setattr(config_stub, name, container)
+    appinsights_stub = types.ModuleType('functions_appinsights')
+    appinsights_stub.log_event = lambda *args, **kwargs: None
+    shared_versions = {}
+    app_cache_stub = types.ModuleType('app_settings_cache')
+    app_cache_stub.get_shared_cache_version = lambda name: shared_versions.get(name, 0)
+    app_cache_stub.bump_shared_cache_version = lambda name: shared_versions.__setitem__(name, shared_versions.get(name, 0) + 1)
+
+    stubs = {'config': config_stub, 'functions_appinsights': appinsights_stub, 'app_settings_cache': app_cache_stub}
+    original_modules = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    try:
+        spec = importlib.util.spec_from_file_location('semantic_kernel_pool_under_test', POOL_FILE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module, containers
+    finally:
+        for module_name, original_module in original_modules.items():
+            if original_module is None:
+                sys.modules.pop(module_name, None)
+            else:
+                sys.modules[module_name] = original_module
+
+
+def _lease(pool_key, manifest_version, kernel, built_at):
+    return {
+        'pool_key': pool_key,
+        'manifest_version': manifest_version,
+        'kernel': kernel,
+        'kernel_agents': {'researcher': object()},
+        'built_at': built_at,
+    }
+
+
+def test_kernel_reused_until_manifest_changes():
+    """Verify a returned kernel is reused and a changed agent manifest evicts it."""
+    print('🔍 Testing kernel reuse and manifest eviction...')
+
+    with _load_pool() as (pool, containers):
+        settings = {}
+        user_settings = {'selected_agent': {'name': 'researcher'}}
+        containers['cosmos_personal_agents_container'].items = [
+            {'id': 'agent-1', '_etag': 'v1', 'user_id': 'user-a'},
+        ]
+        key, version = pool.get_user_kernel_pool_identity('user-a', user_settings, {}, 7)
+        assert pool.acquire_pooled_kernel(settings, key, version) is None
+
+        kernel = object()
+        assert pool.release_pooled_kernel(_lease(key, version, kernel, pool.time.time()), settings)
+
+        pooled = pool.acquire_pooled_kernel(settings, key, version)
+        assert pooled is not None and pooled[0] is kernel
+        assert pool.acquire_pooled_kernel(settings, key, version) is None, 'Checkout should be exclusive'
+        pool.release_pooled_kernel(_lease(key, version, kernel, pooled[2]), settings)
+
+        containers['cosmos_personal_agents_container'].items[0]['_etag'] = 'v2'
+        same_key, new_version = pool.get_user_kernel_pool_identity('user-a', user_settings, {}, 7)
+        assert same_key == key and new_version != version
+        assert pool.acquire_pooled_kernel(settings, key, new_version) is None
+
+        _, settings_version_changed = pool.get_user_kernel_pool_identity('user-a', user_settings, {}, 8)
+        assert settings_version_changed != new_version
+
+        stats = pool.get_kernel_pool_stats()
+        assert stats['hits'] == 1
+        assert stats['stale_evictions'] == 1
+        assert stats['entries'] == 0
+
+    print('✅ Kernel reuse and manifest eviction verified')
+
+
+def test_selection_changes_pool_key():
+    """Verify a different selected or requested agent uses a separate pool entry."""
+    print('🔍 Testing pool keys per selection...')
+
+    with _load_pool() as (pool, _):
+        key_a, _ = pool.get_user_kernel_pool_identity('user-a', {'selected_agent': {'name': 'researcher'}}, {}, 1)
+        key_b, _ = pool.get_user_kernel_pool_identity('user-a', {'selected_agent': {'name': 'writer'}}, {}, 1)
+        key_c, _ = pool.get_user_kernel_pool_identity(
+            'user-a',
+            {'selected_agent': {'name': 'researcher'}},
+            {'request_agent_info': {'name': 'writer'}},
+            1,
+        )
+        key_other_user, _ = pool.get_user_kernel_pool_identity('user-b', {'selected_agent': {'name': 'researcher'}}, {}, 1)
+        assert len({key_a, key_b, key_c, key_other_user}) == 4
+        assert key_a.startswith('user-a:') and key_other_user.startswith('user-b:')
+
+    print('✅ Pool keys per selection verified')
+
+
+def test_lru_ttl_and_disable():
+    """Verify LRU and TTL bounds, user invalidation, and the enable switch."""
+    print('🔍 Testing pool bounds...')
+
+    with _load_pool() as (pool, _):
+        settings = {'semantic_kernel_pool_max_entries': 2, 'semantic_kernel_pool_ttl_seconds': 60}
+        now = pool.time.time()
+        for index in range(3):
+            pool.release_pooled_kernel(_lease(f'user-{index}:key', 'v', object(), now), settings)
+        assert pool.acquire_pooled_kernel(settings, 'user-0:key', 'v') is None
+        assert pool.get_kernel_pool_stats()['lru_evictions'] == 1
+
+        pool.release_pooled_kernel(_lease('user-1:other', 'v', object(), now - 120), settings)
+        assert pool.acquire_pooled_kernel(settings, 'user-1:other', 'v') is None
+        assert pool.get_kernel_pool_stats()['expired_evictions'] == 1
+
+        assert pool.invalidate_user_kernels('user-2') == 1
+        assert pool.acquire_pooled_kernel(settings, 'user-2:key', 'v') is None
+
+        disabled = {'enable_semantic_kernel_pool': False}
+        assert not pool.release_pooled_kernel(_lease('user-3:key', 'v', object(), now), disabled)
+        assert pool.acquire_pooled_kernel(disabled, 'user-3:key', 'v') is None
+
+    print('✅ Pool bounds verified')
+
+
+def test_poisoned_lease_is_discarded():
+    """Verify a kernel marked poisoned by a chat error handler is not returned to the pool."""
+    print('🔍 Testing poisoned kernel discard...')
+
+    from flask import Flask, g
+
+    with _load_pool() as (pool, _):
+        settings = {}
+        assert not pool.mark_request_kernel_poisoned(), 'Marking outside a request is a no-op'
+
+        app = Flask(__name__)
+        with app.app_context():
+            assert not pool.mark_request_kernel_poisoned(), 'Requests without a lease are ignored'
+            lease = _lease('user-a:key', 'v', object(), pool.time.time())
+            setattr(g, pool.KERNEL_POOL_LEASE_ATTRIBUTE, lease)
+            assert pool.mark_request_kernel_poisoned()
+
+        assert not pool.release_pooled_kernel(lease, settings)
+        assert pool.acquire_pooled_kernel(settings, 'user-a:key', 'v') is None
+        stats = pool.get_kernel_pool_stats()
+        assert stats['poisoned'] == 1 and stats['released'] == 0
+
+    print('✅ Poisoned kernel discard verified')
+
+
+def test_global_manifest_cached_per_version():
+    """Verify global ETags are not queried on every message and global saves invalidate every worker."""
+    print('🔍 Testing global manifest cache...')
+
+    with _load_pool() as (pool, containers):
+        settings = {}
+        global_agents = containers['cosmos_global_agents_container']
+        global_actions = containers['cosmos_global_actions_container']
+        global_agents.items = [{'id': 'global-agent', '_etag': 'v1'}]
+
+        key, version = pool.get_user_kernel_pool_identity('user-a', {}, {}, 3)
+        for user_id in ('user-a', 'user-b', 'user-a'):
+            pool.get_user_kernel_pool_identity(user_id, {}, {}, 3)
+        assert global_agents.queries == 1 and global_actions.queries == 1, 'Global ETags are cached per version'
+
+        pool.release_pooled_kernel(_lease(key, version, object(), pool.time.time()), settings)
+        global_agents.items[0]['_etag'] = 'v2'
+        assert pool.invalidate_global_kernel_manifests() == 1, 'Global saves clear this worker\'s pool'
+
+        _, new_version = pool.get_user_kernel_pool_identity('user-a', {}, {}, 3)
+        assert new_version != version and global_agents.queries == 2
+
+        # A bump made by another worker also refreshes the cached ETags
+        global_agents.items[0]['_etag'] = 'v3'
+        sys.modules['app_settings_cache'].bump_shared_cache_version(pool.GLOBAL_MANIFEST_CACHE_VERSION_NAME)
+        _, other_version = pool.get_user_kernel_pool_identity('user-a', {}, {}, 3)
+        assert other_version != new_version and global_agents.queries == 3
+
+        pool.get_user_kernel_pool_identity('user-a', {}, {}, 4)
+        assert global_agents.queries == 4, 'A new settings version refreshes the global ETags'
+
+    print('✅ Global manifest cache verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_kernel_reused_until_manifest_changes,
+        test_selection_changes_pool_key,
+        test_lru_ttl_and_disable,
+        test_poisoned_lease_is_discarded,
+        test_global_manifest_cached_per_version,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
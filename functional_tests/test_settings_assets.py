@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# test_settings_assets.py
+"""
+Functional test for branding assets stored outside the app settings document.
+Version: 0.241.018
+Implemented in: 0.241.018
+
+This test ensures that inline base64 logos and favicons are moved into their own
+settings container items and replaced by content hashes, that assets are cached
+per worker by hash, that legacy inline values still resolve, and that templates
+load the assets from the ETag-aware /settings-assets route.
+"""
+
+import base64
+import glob
+import importlib
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT_DIR, 'application', 'single_app')
+sys.path.insert(0, APP_DIR)
+
+
+class FakeCosmosResourceNotFoundError(Exception):
+    pass
+
+
+class FakeSettingsContainer:
+    def __init__(self):
+        self.items = {}
+        self.reads = 0
+
+    def upsert_item(self, body):
+        self.items[body['id']] = dict(body)
+
+    def read_item(self, item, partition_key):
+        self.reads += 1
+        assert item == partition_key
+        if item not in self.items:
+            raise FakeCosmosResourceNotFoundError(item)
+        return dict(self.items[item])
+
+
+@contextmanager
+def _load_settings_assets():
+    container = FakeSettingsContainer()
+    config_stub = types.ModuleType('config')
+    config_stub.cosmos_settings_container = container
+    appinsights_stub = types.ModuleType('functions_appinsights')
+    appinsights_stub.log_event = lambda *args, **kwargs: None
+    exceptions_stub = types.ModuleType('azure.cosmos.exceptions')
+    exceptions_stub.CosmosResourceNotFoundError = FakeCosmosResourceNotFoundError
+
+    stubs = {
+        'config': config_stub,
+        'functions_appinsights': appinsights_stub,
+        'azure': types.ModuleType('azure'),
+        'azure.cosmos': types.ModuleType('azure.cosmos'),
+        'azure.cosmos.exceptions': exceptions_stub,
+    }
+    module_names = list(stubs) + ['functions_settings_assets']
+    original_modules = {name: sys.modules.get(name) for name in module_names}
+    sys.modules.update(stubs)
+    sys.modules.pop('functions_settings_assets', None)
+    try:
+        yield importlib.import_module('functions_settings_assets'), container
+    finally:
+        for module_name, original_module in original_modules.items():
+            if original_module is None:
+                sys.modules.pop(module_name, None)
+            else:
+                sys.modules[module_name] = original_module
+
+
+def test_migration_moves_blobs_out_of_settings():
+    """Verify inline base64 assets are replaced by content hashes."""
+    print('🔍 Testing asset migration...')
+
+    logo_bytes = b'\x89PNG' + b'\x00' * 4096
+    settings_item = {
+        'id': 'app_settings',
+        'custom_logo_base64': base64.b64encode(logo_bytes).decode('utf-8'),
+        'custom_logo_dark_base64': '',
+        'custom_favicon_base64': base64.b64encode(b'ico-bytes').decode('utf-8'),
+    }
+
+    with _load_settings_assets() as (assets, container):
+        assert assets.migrate_settings_assets(settings_item)
+        assert settings_item['custom_logo_base64'] == '' and settings_item['custom_favicon_base64'] == ''
+        assert len(settings_item['custom_logo_hash']) == 64
+        assert 'custom_logo_dark_hash' not in settings_item
+
+        stored = container.items['settings_asset_custom_logo']
+        assert stored['sha256'] == settings_item['custom_logo_hash']
+        assert stored['content_type'] == 'image/png' and stored['size'] == len(logo_bytes)
+        assert container.items['settings_asset_custom_favicon']['content_type'] == 'image/x-icon'
+
+        assert not assets.migrate_settings_assets(settings_item)
+
+    print('✅ Asset migration verified')
+
+
+def test_assets_are_cached_by_hash():
+    """Verify a worker reads an asset item once per content hash."""
+    print('🔍 Testing per-worker asset cache...')
+
+    with _load_settings_assets() as (assets, container):
+        first_hash = assets.save_settings_asset('custom_logo', b'first-logo')
+
+        for _ in range(5):
+            asset = assets.get_settings_asset('custom_logo', first_hash)
+        assert asset['content'] == b'first-logo' and container.reads == 0
+
+        # Another worker uploads a new logo; this worker only sees the new hash in settings
+        second_content = b'second-logo'
+        second_hash = assets._hash_content(second_content)
+        container.upsert_item({
+            'id': 'settings_asset_custom_logo',
+            'content_base64': base64.b64encode(second_content).decode('utf-8'),
+            'sha256': second_hash,
+            'content_type': 'image/png',
+        })
+        asset = assets.get_settings_asset('custom_logo', second_hash)
+        assert asset['content'] == second_content and container.reads == 1
+        assets.get_settings_asset('custom_logo', second_hash)
+        assert container.reads == 1
+
+        assert assets.get_settings_asset('custom_logo_dark', 'missing') is None
+        assert assets.get_settings_asset('unknown', second_hash) is None
+
+    print('✅ Per-worker asset cache verified')
+
+
+def test_legacy_inline_value_still_resolves():
+    """Verify settings that were not migrated yet still serve their logo."""
+    print('🔍 Testing legacy fallback...')
+
+    with _load_settings_assets() as (assets, _):
+        settings = {'custom_logo_base64': base64.b64encode(b'legacy-logo').decode('utf-8'), 'custom_logo_hash': ''}
+        asset = assets.resolve_settings_asset(settings, 'custom_logo')
+        assert asset['content'] == b'legacy-logo' and asset['sha256'] == assets._hash_content(b'legacy-logo')
+        assert assets.resolve_settings_asset({}, 'custom_favicon') is None
+
+    print('✅ Legacy fallback verified')
+
+
+def test_templates_and_route_use_asset_store():
+    """Verify templates request assets by hash from the ETag-aware route."""
+    print('🔍 Testing route and template wiring...')
+
+    with open(os.path.join(APP_DIR, 'app.py'), 'r', encoding='utf-8') as source_file:
+        app_source = source_file.read()
+    assert "@app.route('/settings-assets/<asset_name>')" in app_source
+    assert 'response.set_etag(' in app_source and 'make_conditional(request)' in app_source
+    assert 'immutable' in app_source
+
+    for template_path in glob.glob(os.path.join(APP_DIR, 'templates', '*.html')):
+        with open(template_path, 'r', encoding='utf-8') as template_file:
+            template = template_file.read()
+        assert "images/custom_logo" not in template, template_path
+        assert "favicon_version" not in template, template_path
+
+    with open(os.path.join(APP_DIR, 'route_frontend_admin_settings.py'), 'r', encoding='utf-8') as source_file:
+        admin_source = source_file.read()
+    assert admin_source.count('save_settings_asset(') == 3
+    assert 'base64.b64encode(png_data)' not in admin_source
+
+    print('✅ Route and template wiring verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_migration_moves_blobs_out_of_settings,
+        test_assets_are_cached_by_hash,
+        test_legacy_inline_value_still_resolves,
+        test_templates_and_route_use_asset_store,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# test_settings_snapshot.py
+"""
+Functional test for the versioned app settings snapshot.
+Version: 0.241.017
+Implemented in: 0.241.017
+
+This test ensures that get_settings serves a pre-merged snapshot instead of
+re-reading and re-merging the settings document on every call, re-checks only
+the small cache version at most once per interval, rebuilds when the version
+changes or update_settings runs, and hands out copies that callers can modify.
+"""
+
+import ast
+import copy
+import json
+import logging
+import os
+import sys
+import threading
+import types
+from types import MappingProxyType
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT_DIR, 'application', 'single_app')
+SETTINGS_FILE = os.path.join(APP_DIR, 'functions_settings.py')
+TARGET_DEFINITIONS = {
+    'SettingsCopy',
+    'SettingsSnapshot',
+    '_read_settings_cache_version',
+    'get_settings_snapshot',
+    '_store_settings_snapshot',
+    'invalidate_settings_snapshot',
+    'get_settings',
+    'update_settings',
+    'deep_merge_dicts',
+    'apply_custom_endpoint_setting_migration',
+    'is_tabular_processing_enabled',
+    'coerce_multi_model_endpoint_enablement',
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class FakeSettingsCache:
+    """Settings cache that counts document reads and version checks."""
+
+    def __init__(self, document):
+        self.document = document
+        self.version = 1
+        self.document_reads = 0
+        self.version_reads = 0
+
+    def get_settings_cache(self):
+        self.document_reads += 1
+        return copy.deepcopy(self.document)
+
+    def get_settings_cache_version(self):
+        self.version_reads += 1
+        return self.version
+
+    def update_settings_cache(self, new_settings):
+        self.document = copy.deepcopy(new_settings)
+        self.version += 1
+
+
+class FakeSettingsContainer:
+    def __init__(self):
+        self.upserts = []
+
+    def read_item(self, item, partition_key):
+        raise AssertionError('Settings should come from the cache in this test')
+
+    def upsert_item(self, body):
+        self.upserts.append(copy.deepcopy(body))
+
+
+def _load_settings_module(document):
+    with open(SETTINGS_FILE, 'r', encoding='utf-8') as source_file:
+        parsed = ast.parse(source_file.read(), filename=SETTINGS_FILE)
+    selected_nodes = [
+        node for node in parsed.body
+        if (isinstance(node, (ast.FunctionDef, ast.ClassDef)) and node.name in TARGET_DEFINITIONS)
+        or (isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id.startswith('_settings_snapshot') for target in node.targets
+        ))
+    ]
+
+    # get_settings imports the asset store locally; provide it through the namespace instead
+    for node in selected_nodes:
+        for child in ast.walk(node):
+            if hasattr(child, 'body') and isinstance(child.body, list):
+                child.body = [
+                    statement for statement in child.body
+                    if not (isinstance(statement, ast.ImportFrom) and statement.module == 'functions_settings_assets')
+                ] or [ast.Pass()]
+
+    clock = FakeClock()
+    cache = FakeSettingsCache(document)
+    container = FakeSettingsContainer()
+    namespace = {
+        'copy': copy,
+        'logging': logging,
+        'threading': threading,
+        'time': clock,
+        'MappingProxyType': MappingProxyType,
+        'inspect': None,
+        'app_settings_cache': cache,
+        'cosmos_settings_container': container,
+        'CosmosResourceNotFoundError': type('CosmosResourceNotFoundError', (Exception,), {}),
+        'log_event': lambda *args, **kwargs: None,
+        'migrate_settings_assets': lambda settings_item: False,
+        'get_default_support_latest_features_visibility': lambda: {},
+        'WORD_CHUNK_SIZE': 400,
+        'DEFAULT_VIDEO_INDEXER_ARM_API_VERSION': '2024-01-01',
+        'video_indexer_endpoint': '',
+    }
+    exec(compile(ast.Module(body=selected_nodes, type_ignores=[]), SETTINGS_FILE, 'exec'), namespace)
+    return namespace, cache, clock, container
+
+
+def _setup(**overrides):
+    namespace, cache, clock, container = _load_settings_module({'id': 'app_settings', **overrides})
+    # The first read merges in the defaults and writes them back, like a fresh deployment
+    namespace['get_settings']()
+    assert container.upserts and cache.version == 2
+    cache.document_reads = 0
+    cache.version_reads = 0
+    container.upserts.clear()
+    return namespace, cache, clock, container
+
+
+def test_repeated_calls_use_snapshot():
+    """Verify the settings document is read and merged once for many get_settings calls."""
+    print('🔍 Testing snapshot reuse...')
+
+    namespace, cache, clock, container = _setup()
+    first = namespace['get_settings']()
+    for _ in range(50):
+        settings = namespace['get_settings']()
+
+    assert cache.document_reads == 1, cache.document_reads
+    assert settings == first and settings is not first
+    assert cache.version_reads == 1
+    assert namespace['get_settings'](include_source=True)[1] == 'snapshot'
+    assert not container.upserts
+
+    settings['enable_debug_logging'] = 'changed by caller'
+    assert namespace['get_settings']()['enable_debug_logging'] != 'changed by caller'
+
+    nested_key = next(key for key, value in settings.items() if isinstance(value, (dict, list)))
+    original_nested = copy.deepcopy(settings[nested_key])
+    if isinstance(settings[nested_key], dict):
+        settings[nested_key]['changed_by_caller'] = True
+    else:
+        settings[nested_key].append('changed by caller')
+    assert namespace['get_settings']()[nested_key] == original_nested, 'Nested values are not shared with the snapshot'
+
+    # Nested values are copied only when read, and every way of reading them copies
+    lazy = namespace['get_settings']()
+    assert nested_key in lazy._shared_keys, 'Nested values are not copied up front'
+    readers = (
+        lambda value: value[nested_key],
+        lambda value: value.get(nested_key),
+        lambda value: dict(value)[nested_key],
+        lambda value: {**value}[nested_key],
+        lambda value: (value | {})[nested_key],
+    )
+    for reader in readers:
+        copied = reader(namespace['get_settings']())
+        assert copied == original_nested
+        if isinstance(copied, dict):
+            copied['changed_by_caller'] = True
+        else:
+            copied.append('changed by caller')
+    assert namespace['get_settings']()[nested_key] == original_nested
+    assert json.loads(json.dumps(namespace['get_settings']()))[nested_key] == original_nested
+
+    print('✅ Snapshot reuse verified')
+
+
+def test_version_check_is_throttled_and_detects_changes():
+    """Verify the version key is checked once per interval and a new version rebuilds the snapshot."""
+    print('🔍 Testing version checks...')
+
+    namespace, cache, clock, _ = _setup(settings_snapshot_version_check_seconds=5)
+    namespace['get_settings']()
+    version_reads = cache.version_reads
+
+    clock.now += 1
+    namespace['get_settings']()
+    assert cache.version_reads == version_reads
+
+    clock.now += 5
+    namespace['get_settings']()
+    assert cache.version_reads == version_reads + 1 and cache.document_reads == 1
+
+    changed = dict(cache.document, landing_page_text='Updated elsewhere')
+    cache.update_settings_cache(changed)
+    clock.now += 5
+    assert namespace['get_settings']()['landing_page_text'] == 'Updated elsewhere'
+    assert cache.document_reads == 2
+
+    print('✅ Version checks verified')
+
+
+def test_update_settings_refreshes_local_snapshot():
+    """Verify update_settings is visible to the saving worker immediately."""
+    print('🔍 Testing update_settings invalidation...')
+
+    namespace, cache, clock, container = _setup(settings_snapshot_version_check_seconds=60)
+    namespace['get_settings']()
+
+    assert namespace['update_settings']({'landing_page_text': 'Saved by admin'})
+    assert container.upserts[-1]['landing_page_text'] == 'Saved by admin'
+    assert namespace['get_settings']()['landing_page_text'] == 'Saved by admin'
+
+    print('✅ update_settings invalidation verified')
+
+
+def test_snapshot_can_be_disabled():
+    """Verify enable_settings_snapshot=False restores the per-call cache read."""
+    print('🔍 Testing disabled snapshot...')
+
+    namespace, cache, _, _ = _setup(enable_settings_snapshot=False)
+    for _ in range(3):
+        namespace['get_settings']()
+    assert cache.document_reads == 3
+
+    print('✅ Disabled snapshot verified')
+
+
+def test_cache_versions_are_published():
+    """Verify both cache backends bump a version when settings are written."""
+    print('🔍 Testing cache version wiring...')
+
+    with open(os.path.join(APP_DIR, 'app_settings_cache.py'), 'r', encoding='utf-8') as source_file:
+        source = source_file.read()
+
+    assert 'pipeline.incr(APP_SETTINGS_VERSION_KEY)' in source
+    assert 'APP_SETTINGS_CACHE_VERSION += 1' in source
+    assert source.count('get_settings_cache_version = get_settings_cache_version_') == 2
+
+    print('✅ Cache version wiring verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_repeated_calls_use_snapshot,
+        test_version_check_is_throttled_and_detects_changes,
+        test_update_settings_refreshes_local_snapshot,
+        test_snapshot_can_be_disabled,
+        test_cache_versions_are_published,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# test_shared_settings_cache.py
+"""
+Functional test for the cross-worker settings cache used without Redis.
+Version: 0.241.019
+Implemented in: 0.241.019
+
+This test ensures that, with enable_redis_cache off, a settings update in one
+worker process is published to a shared file in the container, that other
+workers detect it from a stat-based version stamp and reload it, that the file
+is owner-only, and that the shared file can be disabled. It also ensures that
+named cache versions bumped in one worker change in every worker.
+"""
+
+import importlib.util
+import os
+import stat
+import sys
+import tempfile
+import types
+from contextlib import contextmanager
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'app_settings_cache.py')
+
+
+@contextmanager
+def _stub_dependencies():
+    redis_stub = types.ModuleType('redis')
+    redis_stub.Redis = object
+    identity_stub = types.ModuleType('azure.identity')
+    identity_stub.DefaultAzureCredential = object
+    appinsights_stub = types.ModuleType('functions_appinsights')
+    appinsights_stub.log_event = lambda *args, **kwargs: None
+
+    stubs = {
+        'redis': redis_stub,
+        'azure': types.ModuleType('azure'),
+        'azure.identity': identity_stub,
+        'functions_appinsights': appinsights_stub,
+    }
+    original_modules = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    try:
+        yield
+    finally:
+        for module_name, original_module in original_modules.items():
+            if original_module is None:
+                sys.modules.pop(module_name, None)
+            else:
+                sys.modules[module_name] = original_module
+
+
+def _load_worker(name, settings):
+    """Load an independent copy of app_settings_cache, like a separate gunicorn worker."""
+    spec = importlib.util.spec_from_file_location(f'app_settings_cache_{name}', CACHE_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.configure_app_cache(settings)
+    return module
+
+
+def test_update_propagates_to_other_workers():
+    """Verify a settings change in one worker reaches another worker without Redis."""
+    print('🔍 Testing cross-worker propagation...')
+
+    with tempfile.TemporaryDirectory() as cache_dir, _stub_dependencies():
+        os.environ['SIMPLECHAT_SETTINGS_CACHE_DIR'] = cache_dir
+        try:
+            settings = {'enable_redis_cache': False, 'app_title': 'Original'}
+            worker_a = _load_worker('a', settings)
+            worker_b = _load_worker('b', settings)
+            worker_a.update_settings_cache(dict(settings))
+            worker_b.update_settings_cache(dict(settings))
+
+            version_before = worker_b.get_settings_cache_version()
+            assert worker_a.get_settings_cache_version() == version_before
+
+            worker_a.update_settings_cache(dict(settings, app_title='Changed by admin'))
+            assert worker_b.get_settings_cache_version() != version_before
+            assert worker_b.get_settings_cache()['app_title'] == 'Changed by admin'
+
+            version_after = worker_b.get_settings_cache_version()
+            cached = worker_b.get_settings_cache()
+            assert worker_b.get_settings_cache() is cached, 'Unchanged file should not be re-read'
+            assert worker_b.get_settings_cache_version() == version_after
+
+            shared_path = os.path.join(cache_dir, 'app_settings_cache.json')
+            assert stat.S_IMODE(os.stat(shared_path).st_mode) == 0o600
+            assert sorted(os.listdir(cache_dir)) == ['app_settings_cache.json']
+        finally:
+            os.environ.pop('SIMPLECHAT_SETTINGS_CACHE_DIR', None)
+
+    print('✅ Cross-worker propagation verified')
+
+
+def test_shared_file_can_be_disabled():
+    """Verify enable_shared_settings_cache_file=False keeps the per-worker cache."""
+    print('🔍 Testing disabled shared file...')
+
+    with tempfile.TemporaryDirectory() as cache_dir, _stub_dependencies():
+        os.environ['SIMPLECHAT_SETTINGS_CACHE_DIR'] = cache_dir
+        try:
+            settings = {'enable_redis_cache': False, 'enable_shared_settings_cache_file': False, 'app_title': 'Local'}
+            worker_a = _load_worker('c', settings)
+            worker_b = _load_worker('d', settings)
+            worker_a.update_settings_cache(dict(settings, app_title='Only in worker A'))
+
+            assert worker_a.get_settings_cache_version() == 1
+            assert worker_b.get_settings_cache() == {}
+            assert os.listdir(cache_dir) == []
+        finally:
+            os.environ.pop('SIMPLECHAT_SETTINGS_CACHE_DIR', None)
+
+    print('✅ Disabled shared file verified')
+
+
+def test_unreadable_shared_file_keeps_current_settings():
+    """Verify a corrupt shared file does not replace the worker's settings."""
+    print('🔍 Testing corrupt shared file handling...')
+
+    with tempfile.TemporaryDirectory() as cache_dir, _stub_dependencies():
+        os.environ['SIMPLECHAT_SETTINGS_CACHE_DIR'] = cache_dir
+        try:
+            settings = {'enable_redis_cache': False, 'app_title': 'Good'}
+            worker = _load_worker('e', settings)
+            worker.update_settings_cache(dict(settings))
+
+            with open(os.path.join(cache_dir, 'app_settings_cache.json'), 'w', encoding='utf-8') as shared_file:
+                shared_file.write('{"app_title": ')
+            assert worker.get_settings_cache()['app_title'] == 'Good'
+        finally:
+            os.environ.pop('SIMPLECHAT_SETTINGS_CACHE_DIR', None)
+
+    print('✅ Corrupt shared file handling verified')
+
+
+def test_named_cache_versions_reach_other_workers():
+    """Verify bump_shared_cache_version changes the version seen by other workers."""
+    print('🔍 Testing named cache versions...')
+
+    with tempfile.TemporaryDirectory() as cache_dir, _stub_dependencies():
+        os.environ['SIMPLECHAT_SETTINGS_CACHE_DIR'] = cache_dir
+        try:
+            settings = {'enable_redis_cache': False}
+            worker_a = _load_worker('f', settings)
+            worker_b = _load_worker('g', settings)
+
+            version_before = worker_b.get_shared_cache_version('global_agent_manifests')
+            assert worker_b.get_shared_cache_version('global_agent_manifests') == version_before
+            worker_a.bump_shared_cache_version('global_agent_manifests')
+            version_after = worker_b.get_shared_cache_version('global_agent_manifests')
+            assert version_after != version_before
+            assert worker_b.get_shared_cache_version('other_cache') == worker_a.get_shared_cache_version('other_cache')
+
+            worker_a.bump_shared_cache_version('global_agent_manifests')
+            assert worker_b.get_shared_cache_version('global_agent_manifests') != version_after
+
+            local_only = _load_worker('h', {'enable_redis_cache': False, 'enable_shared_settings_cache_file': False})
+            local_before = local_only.get_shared_cache_version('global_agent_manifests')
+            local_only.bump_shared_cache_version('global_agent_manifests')
+            assert local_only.get_shared_cache_version('global_agent_manifests') != local_before
+        finally:
+            os.environ.pop('SIMPLECHAT_SETTINGS_CACHE_DIR', None)
+
+    print('✅ Named cache versions verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_update_propagates_to_other_workers,
+        test_named_cache_versions_reach_other_workers,
+        test_shared_file_can_be_disabled,
+        test_unreadable_shared_file_keeps_current_settings,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# test_tabular_columnar_snapshots.py
+"""
+Functional test for columnar snapshots of tabular files.
+Version: 0.241.021
+Implemented in: 0.241.021
+
+This test ensures that every sheet of a workbook is parsed once into a Parquet
+snapshot next to the source blob, that the manifest carries the workbook
+metadata the tabular plugin needs, that a snapshot sheet loads back identical
+to a direct string read, and that a snapshot built from another source ETag is
+treated as stale. It also ensures the plugin reads only the columns an
+operation needs from an uncached sheet's snapshot.
+"""
+
+import ast
+import importlib.util
+import logging
+import io
+import os
+import sys
+import types
+from contextlib import contextmanager
+from typing import List, Optional
+
+import pandas as pd
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_tabular_snapshots.py')
+PLUGIN_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'semantic_kernel_plugins', 'tabular_processing_plugin.py')
+
+
+class _ResourceNotFoundError(Exception):
+    pass
+
+
+class _FakeDownload:
+    def __init__(self, data):
+        self._data = data
+
+    def readall(self):
+        return self._data
+
+
+class _FakeBlobClient:
+    def __init__(self, store, container, blob):
+        self._store = store
+        self._key = (container, blob)
+
+    def upload_blob(self, data, overwrite=False, metadata=None):
+        self._store[self._key] = bytes(data)
+
+    def download_blob(self):
+        if self._key not in self._store:
+            raise _ResourceNotFoundError(self._key[1])
+        return _FakeDownload(self._store[self._key])
+
+    def get_blob_properties(self):
+        return types.SimpleNamespace(etag='"etag-1"')
+
+
+class _FakeContainerClient:
+    def __init__(self, store, container):
+        self._store = store
+        self._container = container
+
+    def list_blobs(self, name_starts_with=''):
+        return [
+            {'name': blob}
+            for container, blob in list(self._store)
+            if container == self._container and blob.startswith(name_starts_with)
+        ]
+
+    def delete_blob(self, blob):
+        self._store.pop((self._container, blob), None)
+
+
+class _FakeBlobServiceClient:
+    def __init__(self):
+        self.store = {}
+
+    def get_blob_client(self, container, blob):
+        return _FakeBlobClient(self.store, container, blob)
+
+    def get_container_client(self, container):
+        return _FakeContainerClient(self.store, container)
+
+
+@contextmanager
+def _load_snapshots():
+    blob_service_client = _FakeBlobServiceClient()
+    config_stub = types.ModuleType('config')
+    config_stub.CLIENTS = {'storage_account_office_docs_client': blob_service_client}
+    appinsights_stub = types.ModuleType('functions_appinsights')
+    appinsights_stub.log_event = lambda *args, **kwargs: None
+    exceptions_stub = types.ModuleType('azure.core.exceptions')
+    exceptions_stub.ResourceNotFoundError = _ResourceNotFoundError
+
+    stubs = {
+        'config': config_stub,
+        'functions_appinsights': appinsights_stub,
+        'azure.core.exceptions': exceptions_stub,
+    }
+    original_modules = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    try:
+        spec = importlib.util.spec_from_file_location('functions_tabular_snapshots_under_test', SNAPSHOT_FILE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module, blob_service_client
+    finally:
+        for module_name, original_module in original_modules.items():
+            if original_module is None:
+                sys.modules.pop(module_name, None)
+            else:
+                sys.modules[module_name] = original_module
+
+
+def _build_workbook_bytes():
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        pd.DataFrame({
+            'Account': ['Cash', 'Savings', None],
+            'Amount': [1.5, 2500, 7],
+        }).to_excel(writer, sheet_name='Balance', index=False)
+        pd.DataFrame({'Owner': ['Ana', 'Bo']}).to_excel(writer, sheet_name='Owners', index=False)
+    return buffer.getvalue()
+
+
+def test_workbook_snapshot_round_trip():
+    """Verify every sheet is snapshotted and loads back like a direct read."""
+    print('🔍 Testing workbook snapshot round trip...')
+
+    with _load_snapshots() as (snapshots, blob_service_client):
+        blob_name = 'user-1/Finances.xlsx'
+        workbook_bytes = _build_workbook_bytes()
+        sheets = snapshots.read_tabular_sheets(workbook_bytes, blob_name)
+        manifest = snapshots.write_tabular_snapshot('user-documents', blob_name, sheets, '"etag-1"')
+
+        assert manifest['is_workbook'] is True
+        assert manifest['sheet_names'] == ['Balance', 'Owners']
+        assert manifest['default_sheet'] == 'Balance'
+        assert manifest['sheets'][0]['row_count'] == 3
+        assert manifest['sheets'][0]['columns'] == ['Account', 'Amount']
+
+        stored_blobs = sorted(blob for _, blob in blob_service_client.store)
+        assert stored_blobs == [
+            'user-1/Finances.xlsx.snapshot/manifest.json',
+            'user-1/Finances.xlsx.snapshot/sheet_000.parquet',
+            'user-1/Finances.xlsx.snapshot/sheet_001.parquet',
+        ]
+
+        loaded_manifest = snapshots.read_tabular_snapshot_manifest('user-documents', blob_name, source_etag='"etag-1"')
+        assert loaded_manifest == manifest
+        loaded = snapshots.load_tabular_snapshot_sheet('user-documents', blob_name, loaded_manifest, 'Balance')
+        direct = pd.read_excel(io.BytesIO(workbook_bytes), engine='openpyxl', keep_default_na=False, dtype=str, sheet_name='Balance')
+        pd.testing.assert_frame_equal(loaded, direct.astype(object))
+
+        only_amount = snapshots.load_tabular_snapshot_sheet('user-documents', blob_name, loaded_manifest, 'Balance', columns=['Amount'])
+        assert list(only_amount.columns) == ['Amount']
+
+    print('✅ Workbook snapshot round trip verified')
+
+
+def test_stale_and_deleted_snapshots():
+    """Verify a changed source ETag invalidates the snapshot and deletion removes it."""
+    print('🔍 Testing stale snapshot handling...')
+
+    with _load_snapshots() as (snapshots, blob_service_client):
+        blob_name = 'user-1/report.csv'
+        sheets = snapshots.read_tabular_sheets(b'Name,Count\nA,1\nB,\n', blob_name)
+        snapshots.write_tabular_snapshot('user-documents', blob_name, sheets, '"etag-1"')
+
+        manifest = snapshots.read_tabular_snapshot_manifest('user-documents', blob_name, source_etag='"etag-1"')
+        assert manifest['is_workbook'] is False
+        assert manifest['sheet_names'] == []
+        assert snapshots.get_tabular_snapshot_sheet_entry(manifest, None)['row_count'] == 2
+        assert snapshots.read_tabular_snapshot_manifest('user-documents', blob_name, source_etag='"etag-2"') is None
+        assert snapshots.read_tabular_snapshot_manifest('user-documents', 'user-1/other.csv') is None
+
+        assert snapshots.delete_tabular_snapshot('user-documents', blob_name) == 2
+        assert blob_service_client.store == {}
+
+    print('✅ Stale snapshot handling verified')
+
+
+def _load_plugin_method(method_name, namespace):
+    with open(PLUGIN_FILE, 'r', encoding='utf-8') as plugin_file:
+        tree = ast.parse(plugin_file.read())
+    plugin_class = next(
+        node for node in tree.body
+        if isinstance(node, ast.ClassDef) and node.name == 'TabularProcessingPlugin'
+    )
+    method = next(
+        node for node in plugin_class.body
+        if isinstance(node, ast.FunctionDef) and node.name == method_name
+    )
+    module = ast.Module(body=[method], type_ignores=[])
+    exec(compile(module, PLUGIN_FILE, 'exec'), namespace)
+    return namespace[method_name]
+
+
+def test_plugin_reads_only_needed_columns():
+    """Verify an uncached sheet is read with only the requested columns, falling back for unknown ones."""
+    print('🔍 Testing column-pruned snapshot reads...')
+
+    with _load_snapshots() as (snapshots, _):
+        blob_name = 'user-1/ledger.xlsx'
+        sheets = snapshots.read_tabular_sheets(_build_workbook_bytes(), blob_name)
+        manifest = snapshots.write_tabular_snapshot('user-documents', blob_name, sheets, '"etag-1"')
+
+        namespace = {
+            'Optional': Optional,
+            'List': List,
+            'pandas': pd,
+            'logging': logging,
+            'log_event': lambda *args, **kwargs: None,
+            'get_tabular_snapshot_sheet_entry': snapshots.get_tabular_snapshot_sheet_entry,
+            'load_tabular_snapshot_sheet': snapshots.load_tabular_snapshot_sheet,
+        }
+        load_snapshot_columns = _load_plugin_method('_load_snapshot_columns', namespace)
+        cached_sheets = {}
+        plugin = types.SimpleNamespace(
+            _backfilled_blobs=set(),
+            _get_cached_sheet_dataframe=lambda container, blob, sheet: cached_sheets.get(sheet),
+            _get_tabular_snapshot_manifest=lambda container, blob: manifest,
+        )
+
+        pruned = load_snapshot_columns(plugin, 'user-documents', blob_name, 'Balance', ['Amount', '', 'Amount'])
+        assert list(pruned.columns) == ['Amount']
+        assert pruned['Amount'].tolist() == ['1.5', '2500', '7']
+
+        assert load_snapshot_columns(plugin, 'user-documents', blob_name, 'Balance', ['Missing']) is None, (
+            'Unknown columns load the whole sheet so errors can list every column'
+        )
+        assert load_snapshot_columns(plugin, 'user-documents', blob_name, 'Balance', [None]) is None
+
+        cached_sheets['Balance'] = sheets['Balance']
+        assert load_snapshot_columns(plugin, 'user-documents', blob_name, 'Balance', ['Amount']) is None, (
+            'A cached whole sheet is preferred over a snapshot read'
+        )
+
+    print('✅ Column-pruned snapshot reads verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_workbook_snapshot_round_trip,
+        test_stale_and_deleted_snapshots,
+        test_plugin_reads_only_needed_columns,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# test_tabular_dataframe_cache.py
+"""
+Functional test for the process-wide tabular DataFrame cache.
+Version: 0.241.022
+Implemented in: 0.241.022
+
+This test ensures that parsed sheets are shared across readers keyed by blob
+ETag, that readers get views which cannot change the cached frame, that the
+cache is bounded by bytes with LRU eviction, and that eviction metrics are
+reported.
+"""
+
+import importlib.util
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'utils_tabular_cache.py')
+
+
+@contextmanager
+def _load_cache(settings):
+    settings_stub = types.ModuleType('functions_settings')
+    settings_stub.get_settings = lambda: settings
+    original_module = sys.modules.get('functions_settings')
+    sys.modules['functions_settings'] = settings_stub
+    try:
+        spec = importlib.util.spec_from_file_location('utils_tabular_cache_under_test', CACHE_FILE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        if original_module is None:
+            sys.modules.pop('functions_settings', None)
+        else:
+            sys.modules['functions_settings'] = original_module
+
+
+def _frame(rows):
+    return pd.DataFrame({
+        'Account': [f'Account {index}' for index in range(rows)],
+        'Amount': [str(index) for index in range(rows)],
+    })
+
+
+def test_views_do_not_change_cached_frame():
+    """Verify shared reads and that callers cannot alter the cached sheet."""
+    print('🔍 Testing cached views...')
+
+    with _load_cache({}) as cache:
+        key = cache.get_tabular_cache_key('user-documents', 'user-1/a.xlsx', '"etag-1"', 'Balance')
+        assert cache.get_cached_tabular_dataframe(key) is None
+        assert cache.store_tabular_dataframe(key, _frame(3))
+
+        view = cache.get_cached_tabular_dataframe(key)
+        view['Amount'] = pd.to_numeric(view['Amount'])
+        view.columns = ['A', 'B']
+        filtered = view[view['B'] > 0]
+        assert len(filtered) == 2
+
+        writable = cache.get_cached_tabular_dataframe(key, writable=True)
+        writable.loc[0, 'Account'] = 'Changed'
+
+        again = cache.get_cached_tabular_dataframe(key)
+        assert list(again.columns) == ['Account', 'Amount']
+        assert again['Amount'].tolist() == ['0', '1', '2']
+        assert again.loc[0, 'Account'] == 'Account 0'
+
+        new_revision_key = cache.get_tabular_cache_key('user-documents', 'user-1/a.xlsx', '"etag-2"', 'Balance')
+        assert cache.get_cached_tabular_dataframe(new_revision_key) is None
+
+        stats = cache.get_tabular_cache_stats()
+        assert stats['hits'] == 3
+        assert stats['misses'] == 2
+        assert stats['entries'] == 1
+
+    print('✅ Cached views verified')
+
+
+def test_memory_budget_eviction():
+    """Verify the byte budget evicts least recently used sheets and skips oversized ones."""
+    print('🔍 Testing memory budget...')
+
+    with _load_cache({'tabular_dataframe_cache_max_mb': 1}) as cache:
+        small_bytes = cache.estimate_dataframe_bytes(_frame(2000))
+        sheets_per_budget = (1024 * 1024) // small_bytes
+        assert sheets_per_budget >= 2
+
+        keys = [cache.get_tabular_cache_key('c', f'b{index}.csv', 'e', None) for index in range(sheets_per_budget + 1)]
+        for key in keys[:-1]:
+            cache.store_tabular_dataframe(key, _frame(2000))
+        assert cache.get_cached_tabular_dataframe(keys[0]) is not None
+
+        cache.store_tabular_dataframe(keys[-1], _frame(2000))
+        assert cache.get_cached_tabular_dataframe(keys[0]) is not None, 'Recently read sheet should survive'
+        assert cache.get_cached_tabular_dataframe(keys[1]) is None, 'Least recently used sheet should be evicted'
+
+        stats = cache.get_tabular_cache_stats()
+        assert stats['evictions'] == 1
+        assert stats['evicted_bytes'] == small_bytes
+        assert stats['bytes'] <= stats['max_bytes']
+
+        assert not cache.store_tabular_dataframe(cache.get_tabular_cache_key('c', 'huge.csv', 'e', None), _frame(40000))
+        assert cache.get_tabular_cache_stats()['oversized'] == 1
+
+    with _load_cache({'enable_tabular_dataframe_cache': False}) as cache:
+        key = cache.get_tabular_cache_key('c', 'b.csv', 'e', None)
+        assert not cache.store_tabular_dataframe(key, _frame(2))
+        assert cache.get_cached_tabular_dataframe(key) is None
+
+    print('✅ Memory budget verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_views_do_not_change_cached_frame,
+        test_memory_budget_eviction,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
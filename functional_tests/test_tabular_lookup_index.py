@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# test_tabular_lookup_index.py
+"""
+Functional test for the per-column inverted index of cached tabular sheets.
+Version: 0.241.024
+Implemented in: 0.241.024
+
+This test ensures that equality, prefix and token-contains lookups answered by
+TabularColumnIndex select exactly the rows a full scan selects, that substring
+queries without word characters fall back to scanning, and that the index is
+built once per column and counted against the cache memory budget.
+"""
+
+import importlib.util
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'utils_tabular_cache.py')
+
+
+@contextmanager
+def _load_cache(settings):
+    settings_stub = types.ModuleType('functions_settings')
+    settings_stub.get_settings = lambda: settings
+    original_module = sys.modules.get('functions_settings')
+    sys.modules['functions_settings'] = settings_stub
+    try:
+        spec = importlib.util.spec_from_file_location('utils_tabular_cache_under_test', CACHE_FILE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        if original_module is None:
+            sys.modules.pop('functions_settings', None)
+        else:
+            sys.modules['functions_settings'] = original_module
+
+
+VALUES = ['alpha beta', 'Alpha', 'gamma-delta', None, 'beta', 'alphabet', 'zeta alpha', '', 'alpha beta']
+
+
+def _lower_text(column):
+    return column.astype(str).str.lower()
+
+
+def test_index_matches_full_scan():
+    """Verify indexed equality, prefix and substring masks equal the scanned masks."""
+    print('🔍 Testing indexed lookups against full scans...')
+
+    with _load_cache({}) as cache:
+        frame = pd.DataFrame({'Name': VALUES * 20}, dtype=object)
+        text = _lower_text(frame['Name'])
+        index = cache.TabularColumnIndex(text)
+
+        for query in ['alpha beta', 'alpha', 'none', 'missing', '']:
+            assert index.match_equal(query).equals(text == query), query
+        for query in ['alpha', 'al', 'gamma-', 'z', '', 'q']:
+            assert index.match_prefix(query).equals(text.str.startswith(query)), query
+        for query in ['alpha', 'pha be', 'ta', 'a-d', 'beta ', 'bet']:
+            assert index.match_substring(query).equals(text.str.contains(query, regex=False)), query
+
+        assert index.match_substring('-') is None, 'Fragments without word characters should fall back to a scan'
+        assert index.match_equal('alpha beta').sum() == 40
+
+    print('✅ Indexed lookups verified')
+
+
+def test_index_built_once_and_budgeted():
+    """Verify the profile reuses one index per column and counts it in the entry size."""
+    print('🔍 Testing index reuse and accounting...')
+
+    with _load_cache({}) as cache:
+        key = cache.get_tabular_cache_key('user-documents', 'user-1/a.csv', '"etag-1"', None)
+        cache.store_tabular_dataframe(key, pd.DataFrame({'Name': VALUES * 100}, dtype=object))
+        profile = cache.get_tabular_sheet_profile(key)
+        assert profile.row_count == len(VALUES) * 100
+
+        bytes_before = cache.get_tabular_cache_stats()['bytes']
+        index = profile.get_column_index('lower_text', 'Name', _lower_text)
+        assert profile.get_column_index('lower_text', 'Name', _lower_text) is index
+        bytes_after_index = cache.get_tabular_cache_stats()['bytes']
+        assert bytes_after_index > bytes_before
+
+        index.match_substring('alpha')
+        assert cache.get_tabular_cache_stats()['bytes'] > bytes_after_index, 'Token index should be counted when built'
+
+    with _load_cache({'enable_tabular_lookup_index': False, 'tabular_lookup_index_min_rows': 10}) as cache:
+        assert cache.get_tabular_index_settings() == (False, 10)
+
+    print('✅ Index reuse and accounting verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_index_matches_full_scan,
+        test_index_built_once_and_budgeted,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
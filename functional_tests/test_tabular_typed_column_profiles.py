@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# test_tabular_typed_column_profiles.py
+"""
+Functional test for typed column profiles of cached tabular sheets.
+Version: 0.241.023
+Implemented in: 0.241.023
+
+This test ensures that a cached sheet converts numeric-looking columns once,
+that per-column derived series are built once and reused by later readers,
+that the typed frame never changes the cached string frame, and that derived
+data is counted against the cache memory budget.
+"""
+
+import importlib.util
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'utils_tabular_cache.py')
+
+
+@contextmanager
+def _load_cache(settings):
+    settings_stub = types.ModuleType('functions_settings')
+    settings_stub.get_settings = lambda: settings
+    original_module = sys.modules.get('functions_settings')
+    sys.modules['functions_settings'] = settings_stub
+    try:
+        spec = importlib.util.spec_from_file_location('utils_tabular_cache_under_test', CACHE_FILE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        if original_module is None:
+            sys.modules.pop('functions_settings', None)
+        else:
+            sys.modules['functions_settings'] = original_module
+
+
+def _frame(rows):
+    return pd.DataFrame({
+        'Account': [f'Account {index}' for index in range(rows)],
+        'Amount': [str(index) for index in range(rows)],
+    }, dtype=object)
+
+
+def test_typed_frame_and_derived_series_built_once():
+    """Verify numeric conversion and derived series are computed once per sheet."""
+    print('🔍 Testing typed profile reuse...')
+
+    with _load_cache({}) as cache:
+        key = cache.get_tabular_cache_key('user-documents', 'user-1/a.csv', '"etag-1"', None)
+        assert cache.get_tabular_sheet_profile(key) is None
+        assert cache.store_tabular_dataframe(key, _frame(4))
+
+        profile = cache.get_tabular_sheet_profile(key)
+        typed = profile.get_typed_dataframe()
+        assert pd.api.types.is_numeric_dtype(typed['Amount'])
+        assert profile.get_typed_dataframe() is typed
+        assert profile.get_column_types() == {'Account': 'text', 'Amount': 'numeric'}
+
+        cached = cache.get_cached_tabular_dataframe(key)
+        assert cached['Amount'].tolist() == ['0', '1', '2', '3'], 'Typed frame must not change the cached strings'
+
+        builds = []
+
+        def lower_text(column):
+            builds.append(column.name)
+            return column.astype(str).str.lower()
+
+        first = profile.get_derived_series('lower_text', 'Account', lower_text)
+        again = cache.get_tabular_sheet_profile(key).get_derived_series('lower_text', 'Account', lower_text)
+        assert again is first
+        assert builds == ['Account']
+        assert first.tolist()[0] == 'account 0'
+
+    print('✅ Typed profile reuse verified')
+
+
+def test_derived_data_counts_against_budget():
+    """Verify derived data grows the entry size and can trigger eviction."""
+    print('🔍 Testing derived data accounting...')
+
+    with _load_cache({'tabular_dataframe_cache_max_mb': 1}) as cache:
+        first_key = cache.get_tabular_cache_key('c', 'first.csv', 'e', None)
+        second_key = cache.get_tabular_cache_key('c', 'second.csv', 'e', None)
+        cache.store_tabular_dataframe(first_key, _frame(3000))
+        cache.store_tabular_dataframe(second_key, _frame(3000))
+        bytes_before = cache.get_tabular_cache_stats()['bytes']
+
+        lower_text = lambda column: column.astype(str).str.lower()
+        second_profile = cache.get_tabular_sheet_profile(second_key)
+        second_profile.get_derived_series('lower_text', 'Account', lower_text)
+        stats = cache.get_tabular_cache_stats()
+        assert stats['bytes'] > bytes_before
+        assert stats['evictions'] == 0
+
+        first_profile = cache.get_tabular_sheet_profile(first_key)
+        first_profile.get_derived_series('lower_text', 'Account', lower_text)
+        stats = cache.get_tabular_cache_stats()
+        assert stats['evictions'] == 1
+        assert stats['bytes'] <= stats['max_bytes']
+        assert cache.get_tabular_sheet_profile(second_key) is None, 'Least recently used sheet should be evicted'
+        assert cache.get_tabular_sheet_profile(first_key) is first_profile
+
+    with _load_cache({}) as cache:
+        standalone = cache.TabularSheetProfile(_frame(2))
+        assert standalone.get_column_types()['Amount'] == 'numeric'
+
+    print('✅ Derived data accounting verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_typed_frame_and_derived_series_built_once,
+        test_derived_data_counts_against_budget,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)
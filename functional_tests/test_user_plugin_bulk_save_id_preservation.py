@@ -175,6 +175,10 @@ def _load_route_module(state):
     activity_stub.log_action_update = lambda *args, **kwargs: None
     activity_stub.log_action_deletion = lambda *args, **kwargs: None
 
+    kernel_pool_stub = types.ModuleType('semantic_kernel_pool')
+    kernel_pool_stub.invalidate_user_kernels = lambda user_id: state.setdefault('invalidated_kernel_users', []).append(user_id)
+    kernel_pool_stub.invalidate_global_kernel_manifests = lambda: None
+
     original_modules = {}
     module_stubs = {
         'flask': flask_stub,
@@ -194,6 +198,7 @@ def _load_route_module(state):
         'functions_keyvault': keyvault_stub,
         'json_schema_validation': validation_stub,
         'functions_activity_logging': activity_stub,
+        'semantic_kernel_pool': kernel_pool_stub,
     }
 
     for module_name, module_stub in module_stubs.items():
@@ -269,6 +274,10 @@ def test_bulk_save_preserves_existing_id_on_rename():
             print(f"❌ Existing action should not be deleted during rename: {state['deleted_actions']}")
             return False
 
+        if state.get('invalidated_kernel_users') != ['test-user-plugin-rename']:
+            print(f"❌ Expected the user's pooled kernels to be invalidated: {state.get('invalidated_kernel_users')}")
+            return False
+
         validation_input = state['validation_inputs'][0]
         if validation_input.get('id') != 'existing-plugin-id':
             print(f"❌ Validation payload lost the existing ID: {validation_input}")
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# test_user_settings_cache.py
+"""
+Functional test for the request-scoped and short-TTL user settings cache.
+Version: 0.241.028
+Implemented in: 0.241.028
+
+This test ensures that get_user_settings reads Cosmos once per request and once
+per TTL window, that update_user_settings writes through to the cache, that
+callers cannot change the cached document, that the email, display name and
+profile image sync runs in the login job instead of on reads and only patches
+those fields, and that every settings write (access changes, active group
+switches) reaches every worker.
+"""
+
+import ast
+import copy
+import logging
+import os
+import sys
+import threading
+import types
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import Flask
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS_FILE = os.path.join(ROOT_DIR, 'application', 'single_app', 'functions_settings.py')
+TARGET_DEFINITIONS = {
+    '_get_user_settings_cache_config',
+    '_get_user_settings_version_name',
+    '_get_request_user_settings_memo',
+    '_read_cached_user_settings',
+    '_store_user_settings',
+    'invalidate_user_settings_cache',
+    'get_user_settings_cache_stats',
+    '_prepare_user_settings_doc',
+    'get_user_settings',
+    'sync_user_profile_on_login',
+    'update_user_settings',
+}
+
+
+class _NotFound(Exception):
+    pass
+
+
+class _Exists(Exception):
+    pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class FakeUserSettingsContainer:
+    def __init__(self, documents):
+        self.documents = {doc['id']: copy.deepcopy(doc) for doc in documents}
+        self.reads = 0
+        self.upserts = 0
+        self.patches = []
+        self.before_create = None
+
+    def read_item(self, item, partition_key):
+        self.reads += 1
+        if item not in self.documents:
+            raise _NotFound(item)
+        return copy.deepcopy(self.documents[item])
+
+    def create_item(self, body):
+        if self.before_create:
+            self.before_create()
+        if body['id'] in self.documents:
+            raise _Exists(body['id'])
+        self.documents[body['id']] = copy.deepcopy(body)
+        return copy.deepcopy(body)
+
+    def patch_item(self, item, partition_key, patch_operations):
+        self.patches.append(copy.deepcopy(patch_operations))
+        doc = self.documents[item]
+        for operation in patch_operations:
+            assert operation['op'] == 'set'
+            target = doc
+            path = operation['path'].strip('/').split('/')
+            for part in path[:-1]:
+                target = target[part]
+            target[path[-1]] = copy.deepcopy(operation['value'])
+        return copy.deepcopy(doc)
+
+    def upsert_item(self, body):
+        self.upserts += 1
+        self.documents[body['id']] = copy.deepcopy(body)
+        return copy.deepcopy(body)
+
+
+class FakeSharedVersions:
+    """Stands in for app_settings_cache's shared cache versions (Redis or the shared file)."""
+
+    def __init__(self):
+        self.versions = {}
+
+    def get_shared_cache_version(self, name):
+        return self.versions.get(name, 0)
+
+    def bump_shared_cache_version(self, name):
+        self.versions[name] = self.versions.get(name, 0) + 1
+
+
+def _load_user_settings(documents, settings=None, container=None, shared_versions=None):
+    with open(SETTINGS_FILE, 'r', encoding='utf-8') as source_file:
+        parsed = ast.parse(source_file.read(), filename=SETTINGS_FILE)
+    selected_nodes = [
+        node for node in parsed.body
+        if (isinstance(node, ast.FunctionDef) and node.name in TARGET_DEFINITIONS)
+        or (isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id.startswith(('_user_settings_cache', 'USER_SETTINGS_')) for target in node.targets
+        ))
+    ]
+
+    clock = FakeClock()
+    container = container or FakeUserSettingsContainer(documents)
+    namespace = {
+        'copy': copy,
+        'logging': logging,
+        'threading': threading,
+        'time': clock,
+        'OrderedDict': OrderedDict,
+        'datetime': datetime,
+        'timezone': timezone,
+        'exceptions': types.SimpleNamespace(
+            CosmosResourceNotFoundError=_NotFound,
+            CosmosResourceExistsError=_Exists,
+            CosmosHttpResponseError=_NotFound,
+        ),
+        'app_settings_cache': shared_versions or FakeSharedVersions(),
+        'cosmos_user_settings_container': container,
+        'get_settings': lambda: dict(settings or {}),
+        'log_event': lambda *args, **kwargs: None,
+        'sanitize_settings_for_logging': lambda value: value,
+    }
+    exec(compile(ast.Module(body=selected_nodes, type_ignores=[]), SETTINGS_FILE, 'exec'), namespace)
+    return namespace, container, clock
+
+
+def _user_doc(**settings):
+    return {
+        'id': 'user-1',
+        'email': 'user@example.com',
+        'display_name': 'User One',
+        'settings': {'showTutorialButtons': True, 'profileImage': None, 'agents': [{'name': 'a'}], **settings},
+    }
+
+
+def test_request_memo_and_ttl_cache():
+    """Verify one Cosmos read per request and per TTL window, with isolated copies."""
+    print('🔍 Testing user settings memo and TTL cache...')
+
+    namespace, container, clock = _load_user_settings([_user_doc(navLayout='top')])
+    get_user_settings = namespace['get_user_settings']
+    app = Flask(__name__)
+
+    with app.test_request_context('/'):
+        first = get_user_settings('user-1')
+        for _ in range(4):
+            get_user_settings('user-1')
+        assert container.reads == 1
+        first['settings']['navLayout'] = 'changed by caller'
+        assert get_user_settings('user-1')['settings']['navLayout'] == 'top'
+
+    with app.test_request_context('/'):
+        get_user_settings('user-1')
+    assert container.reads == 1, 'A new request within the TTL is served by the worker cache'
+
+    clock.now += 31
+    with app.test_request_context('/'):
+        get_user_settings('user-1')
+        get_user_settings('user-1')
+    assert container.reads == 2
+
+    stats = namespace['get_user_settings_cache_stats']()
+    assert stats['request_hits'] >= 5 and stats['hits'] == 1 and stats['entries'] == 1
+    assert container.upserts == 0, 'Reads must not write when nothing changed'
+
+    disabled, disabled_container, _ = _load_user_settings([_user_doc()], {'enable_user_settings_cache': False})
+    with app.test_request_context('/'):
+        disabled['get_user_settings']('user-1')
+        disabled['get_user_settings']('user-1')
+    with app.test_request_context('/'):
+        disabled['get_user_settings']('user-1')
+    assert disabled_container.reads == 2, 'Per-request memo still applies when the worker cache is off'
+
+    print('✅ User settings memo and TTL cache verified')
+
+
+def test_write_through_and_login_sync():
+    """Verify update_user_settings writes through and profile sync runs only in the login job."""
+    print('🔍 Testing write-through and login sync...')
+
+    legacy_doc = _user_doc()
+    legacy_doc['settings'].pop('profileImage')
+    namespace, container, _ = _load_user_settings([legacy_doc])
+    app = Flask(__name__)
+
+    fetched_tokens = []
+    auth_stub = types.ModuleType('functions_authentication')
+    auth_stub.get_user_profile_image = lambda access_token=None: fetched_tokens.append(access_token) or 'data:image/png;base64,AA=='
+    original_auth = sys.modules.get('functions_authentication')
+    sys.modules['functions_authentication'] = auth_stub
+    try:
+        with app.test_request_context('/'):
+            doc = namespace['get_user_settings']('user-1')
+            assert 'profileImage' not in doc['settings'] and not fetched_tokens, 'Reads must not call Graph'
+
+            assert namespace['update_user_settings']('user-1', {'access': {'status': 'deny', 'datetime_to_allow': None}})
+        reads_after_update = container.reads
+
+        with app.test_request_context('/'):
+            assert namespace['get_user_settings']('user-1')['settings']['access']['status'] == 'deny'
+        assert container.reads == reads_after_update, 'The saving worker sees its own write without a read'
+
+        assert namespace['sync_user_profile_on_login']('user-1', email='new@example.com', display_name='User New', access_token='token-1')
+        assert fetched_tokens == ['token-1']
+        stored = container.documents['user-1']
+        assert stored['email'] == 'new@example.com' and stored['display_name'] == 'User New'
+        assert stored['settings']['profileImage'].startswith('data:image/png')
+        assert stored['settings']['access']['status'] == 'deny'
+
+        with app.test_request_context('/'):
+            assert namespace['get_user_settings']('user-1')['email'] == 'new@example.com', 'Login sync invalidates the cache'
+
+        assert container.patches[-1] == [
+            {'op': 'set', 'path': '/email', 'value': 'new@example.com'},
+            {'op': 'set', 'path': '/display_name', 'value': 'User New'},
+            {'op': 'set', 'path': '/settings/profileImage', 'value': 'data:image/png;base64,AA=='},
+        ], 'Login sync patches only the profile fields'
+
+        upserts, patches = container.upserts, len(container.patches)
+        assert not namespace['sync_user_profile_on_login']('user-1', email='new@example.com', display_name='User New', access_token='token-2')
+        assert container.upserts == upserts and len(container.patches) == patches and fetched_tokens == ['token-1']
+
+        # A new user whose default document is created while the login job runs
+        def create_default_document():
+            container.before_create = None
+            container.documents['user-2'] = {'id': 'user-2', 'settings': {'navLayout': 'side'}}
+
+        container.before_create = create_default_document
+        assert namespace['sync_user_profile_on_login']('user-2', email='two@example.com', access_token='token-3')
+        assert container.documents['user-2']['settings'] == {'navLayout': 'side', 'profileImage': 'data:image/png;base64,AA=='}
+        assert container.documents['user-2']['email'] == 'two@example.com'
+        assert fetched_tokens == ['token-1', 'token-3'], 'The photo is fetched once across the retry'
+
+        assert namespace['sync_user_profile_on_login']('user-3', display_name='User Three', access_token='token-4')
+        assert container.documents['user-3']['settings']['profileImage'].startswith('data:image/png')
+        assert container.documents['user-3']['display_name'] == 'User Three'
+    finally:
+        if original_auth is None:
+            sys.modules.pop('functions_authentication', None)
+        else:
+            sys.modules['functions_authentication'] = original_auth
+
+    print('✅ Write-through and login sync verified')
+
+
+def test_writes_reach_other_workers():
+    """Verify access and active scope changes saved by one worker are not served stale from another worker's cache."""
+    print('🔍 Testing cross-worker invalidation...')
+
+    shared_versions = FakeSharedVersions()
+    worker_a, container, _ = _load_user_settings([_user_doc()], shared_versions=shared_versions)
+    worker_b, _, _ = _load_user_settings([], container=container, shared_versions=shared_versions)
+    app = Flask(__name__)
+
+    with app.test_request_context('/'):
+        assert 'access' not in worker_b['get_user_settings']('user-1')['settings']
+    with app.test_request_context('/'):
+        worker_b['get_user_settings']('user-1')
+    reads_before = container.reads
+
+    with app.test_request_context('/'):
+        assert worker_a['update_user_settings']('user-1', {'access': {'status': 'deny', 'datetime_to_allow': None}})
+
+    with app.test_request_context('/'):
+        assert worker_b['get_user_settings']('user-1')['settings']['access']['status'] == 'deny'
+    assert container.reads > reads_before
+
+    # Switching the active group on one worker must reach require_active_group on the others
+    with app.test_request_context('/'):
+        worker_b['get_user_settings']('user-1')
+        assert worker_a['update_user_settings']('user-1', {'activeGroupOid': 'group-2'})
+    with app.test_request_context('/'):
+        assert worker_b['get_user_settings']('user-1')['settings']['activeGroupOid'] == 'group-2'
+
+    reads_before = container.reads
+    with app.test_request_context('/'):
+        worker_b['get_user_settings']('user-1')
+    assert container.reads == reads_before, 'Unchanged users keep the TTL cache'
+
+    print('✅ Cross-worker invalidation verified')
+
+
+if __name__ == '__main__':
+    tests = [
+        test_request_memo_and_ttl_cache,
+        test_write_through_and_login_sync,
+        test_writes_reach_other_workers,
+    ]
+    results = []
+
+    for test in tests:
+        print(f'\n🧪 Running {test.__name__}...')
+        try:
+            test()
+            results.append(True)
+        except Exception as exc:
+            print(f'❌ {test.__name__} failed: {exc}')
+            results.append(False)
+
+    success = all(results)
+    print(f'\n📊 Results: {sum(results)}/{len(results)} tests passed')
+    sys.exit(0 if success else 1)